@@ -0,0 +1,45 @@
+"""execution log resource usage
+
+Record per-execution CPU time, peak memory and outbound HTTP traffic
+reported by the sandbox on tool execution logs.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("tool_execution_logs", sa.Column("cpu_user_ms", sa.Float(), nullable=True))
+    op.add_column("tool_execution_logs", sa.Column("cpu_sys_ms", sa.Float(), nullable=True))
+    op.add_column(
+        "tool_execution_logs", sa.Column("peak_memory_bytes", sa.BigInteger(), nullable=True)
+    )
+    op.add_column("tool_execution_logs", sa.Column("http_calls", sa.Integer(), nullable=True))
+    op.add_column(
+        "tool_execution_logs", sa.Column("http_bytes_sent", sa.BigInteger(), nullable=True)
+    )
+    op.add_column(
+        "tool_execution_logs", sa.Column("http_bytes_received", sa.BigInteger(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tool_execution_logs", "http_bytes_received")
+    op.drop_column("tool_execution_logs", "http_bytes_sent")
+    op.drop_column("tool_execution_logs", "http_calls")
+    op.drop_column("tool_execution_logs", "peak_memory_bytes")
+    op.drop_column("tool_execution_logs", "cpu_sys_ms")
+    op.drop_column("tool_execution_logs", "cpu_user_ms")
@@ -0,0 +1,36 @@
+"""tool result cache
+
+Let tools opt into sandbox result memoization (cacheable, with an optional
+TTL) and record cache hits on tool execution logs.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tools",
+        sa.Column("cacheable", sa.Boolean(), nullable=False, server_default="false"),
+    )
+    op.add_column("tools", sa.Column("cache_ttl_seconds", sa.Integer(), nullable=True))
+    op.add_column("tool_execution_logs", sa.Column("cache_hit", sa.Boolean(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("tool_execution_logs", "cache_hit")
+    op.drop_column("tools", "cache_ttl_seconds")
+    op.drop_column("tools", "cacheable")
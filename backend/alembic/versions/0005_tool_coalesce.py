@@ -0,0 +1,32 @@
+"""tool coalesce
+
+Let tools opt into single-flight coalescing of identical concurrent calls
+in the sandbox.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tools",
+        sa.Column("coalesce", sa.Boolean(), nullable=False, server_default="false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tools", "coalesce")
@@ -13,7 +13,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.auth import get_current_user
-from app.api.sandbox import reregister_server
+from app.api.sandbox import reregister_server, update_server_tools
 from app.core import get_db
 from app.models import ModuleRequest as ModuleRequestModel
 from app.models import NetworkAccessRequest as NetworkAccessRequestModel
@@ -143,8 +143,8 @@ async def take_tool_action(
                 approved_by=admin_identity,
             )
 
-            # Auto-refresh server registration so tool is immediately available
-            refreshed = await reregister_server(tool.server_id, db)
+            # Add the tool to the running server so it is immediately available
+            refreshed = await update_server_tools(tool.server_id, [tool.name], db)
 
             # Notify MCP clients that tool list has changed
             from app.services.tool_change_notifier import fire_and_forget_notify
@@ -171,7 +171,7 @@ async def take_tool_action(
             # If auto-approved, refresh server registration
             refreshed = False
             if tool.approval_status == "approved":
-                refreshed = await reregister_server(tool.server_id, db)
+                refreshed = await update_server_tools(tool.server_id, [tool.name], db)
                 from app.services.tool_change_notifier import fire_and_forget_notify
 
                 fire_and_forget_notify()
@@ -236,8 +236,8 @@ async def revoke_tool_approval(
             revoked_by=admin_identity,
         )
 
-        # Re-register server to remove the revoked tool from active sandbox
-        refreshed = await reregister_server(tool.server_id, db)
+        # Remove the revoked tool from the running server
+        refreshed = await update_server_tools(tool.server_id, [tool.name], db)
 
         # Notify MCP clients that tool list has changed
         from app.services.tool_change_notifier import fire_and_forget_notify
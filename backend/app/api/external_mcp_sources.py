@@ -55,6 +55,8 @@ async def _refresh_server_after_import(server: Server, db: AsyncSession) -> bool
         from app.services.server_secret import ServerSecretService as SecretSvc
         from app.services.tool import ToolService
 
+        version = await ServerService(db).next_sandbox_version(server.id)
+
         # Get all tools for this server (the builder filters as needed)
         tool_service = ToolService(db)
         tools, _ = await tool_service.list_by_server(server.id)
@@ -82,6 +84,7 @@ async def _refresh_server_after_import(server: Server, db: AsyncSession) -> bool
             server_id=str(server.id),
             server_name=server.name,
             tools=tool_defs,
+            version=version,
             allowed_modules=allowed_modules,
             secrets=secrets,
             external_sources=external_sources_data,
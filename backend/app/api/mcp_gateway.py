@@ -793,6 +793,8 @@ async def _log_tool_execution(
             error_msg = None
             tool_result = None
             stdout = None
+            resource_usage = None
+            cache_hit = None
 
             # Check for MCP isError tool execution failure in result
             raw_result = sandbox_response.get("result", {})
@@ -835,7 +837,7 @@ async def _log_tool_execution(
                 else:
                     tool_result = raw_result
 
-            # Extract execution metadata (stdout, duration) from _meta
+            # Extract execution metadata (stdout, resource usage, cache hit) from _meta
             # if present. The sandbox includes this so logging can capture
             # stdout and structured errors that would otherwise be lost
             # in the MCP JSON-RPC wrapping. Only MCP result responses
@@ -844,7 +846,10 @@ async def _log_tool_execution(
             if isinstance(raw_result, dict):
                 meta = raw_result.get("_meta", {})
                 execution_meta = meta.get("execution", {}) if isinstance(meta, dict) else {}
-                stdout = execution_meta.get("stdout") if isinstance(execution_meta, dict) else None
+                if isinstance(execution_meta, dict):
+                    stdout = execution_meta.get("stdout")
+                    resource_usage = execution_meta.get("resource_usage")
+                    cache_hit = execution_meta.get("cache_hit")
 
             log_service = ExecutionLogService(session)
             await log_service.create_log(
@@ -858,6 +863,8 @@ async def _log_tool_execution(
                 duration_ms=duration_ms,
                 success=not has_error,
                 executed_by=executed_by,
+                resource_usage=resource_usage,
+                cache_hit=cache_hit,
             )
             await session.commit()
 
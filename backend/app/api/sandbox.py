@@ -85,6 +85,8 @@ async def start_server(
             detail="Server is already running",
         )
 
+    version = await server_service.next_sandbox_version(server_id)
+
     # Get tools for this server
     tools, _total = await tool_service.list_by_server(server_id)
     if not tools:
@@ -112,6 +114,7 @@ async def start_server(
             server_id=str(server_id),
             server_name=server.name,
             tools=tool_defs,
+            version=version,
             allowed_modules=allowed_modules,
             secrets=secrets,
             external_sources=external_sources_data,
@@ -228,6 +231,8 @@ async def restart_server(
     # Unregister first (ignore errors)
     await sandbox_client.unregister_server(str(server_id))
 
+    version = await server_service.next_sandbox_version(server_id)
+
     # Get tools
     tools, _total = await tool_service.list_by_server(server_id)
     if not tools:
@@ -255,6 +260,7 @@ async def restart_server(
             server_id=str(server_id),
             server_name=server.name,
             tools=tool_defs,
+            version=version,
             allowed_modules=allowed_modules,
             secrets=secrets,
             external_sources=external_sources_data,
@@ -400,6 +406,10 @@ async def reregister_server(server_id: UUID, db: AsyncSession) -> bool:
         return False
 
     try:
+        version = await ServerService(db).next_sandbox_version(server.id)
+        # Read what is sent after taking the server's lock
+        await db.refresh(server)
+
         tool_service = ToolService(db)
         all_tools, _ = await tool_service.list_by_server(server.id)
         active_tools = [t for t in all_tools if t.enabled and t.approval_status == "approved"]
@@ -418,6 +428,7 @@ async def reregister_server(server_id: UUID, db: AsyncSession) -> bool:
             server_id=str(server.id),
             server_name=server.name,
             tools=tool_defs,
+            version=version,
             allowed_modules=allowed_modules,
             secrets=secrets,
             external_sources=external_sources_data,
@@ -436,3 +447,51 @@ async def reregister_server(server_id: UUID, db: AsyncSession) -> bool:
     except Exception as e:
         logger.error(f"Error re-registering server {server_id}: {e}")
         return False
+
+
+async def update_server_tools(server_id: UUID, tool_names: list[str], db: AsyncSession) -> bool:
+    """Bring a few tools of a running server up to date in the sandbox.
+
+    Use after a change to individual tools (edit, rename, delete, approval,
+    revocation) instead of reregister_server(): only the named tools are
+    sent, and the rest of the server keeps its sandbox state. Each name is
+    added or replaced if it now belongs to an active tool, and removed
+    otherwise, so pass a renamed tool's old and new names. Falls back to
+    a full re-registration if the sandbox can't apply the update.
+
+    Returns True if successful, False if server not found/not running/failed.
+    """
+    from app.models import Server
+
+    stmt = select(Server).where(Server.id == server_id)
+    result = await db.execute(stmt)
+    server = result.scalar_one_or_none()
+    if not server or server.status != "running":
+        return False
+
+    try:
+        version = await ServerService(db).next_sandbox_version(server.id)
+
+        tool_service = ToolService(db)
+        all_tools, _ = await tool_service.list_by_server(server.id)
+        active_tools = [
+            t
+            for t in all_tools
+            if t.name in tool_names and t.enabled and t.approval_status == "approved"
+        ]
+        active_names = {t.name for t in active_tools}
+
+        sandbox_client = SandboxClient.get_instance()
+        update_result = await sandbox_client.update_server(
+            str(server.id),
+            version,
+            tools=_build_tool_definitions(active_tools),
+            remove_tools=[name for name in dict.fromkeys(tool_names) if name not in active_names],
+        )
+        if update_result.get("success"):
+            return True
+    except Exception as e:
+        logger.error(f"Error updating tools of server {server_id}: {e}")
+
+    logger.info(f"Re-registering server {server.name}: tool update was not applied")
+    return await reregister_server(server_id, db)
@@ -37,18 +37,29 @@ async def _sync_secrets_to_sandbox(
     server_id: UUID,
     service: ServerSecretService,
     server_service: ServerService,
+    changed: dict[str, str] | None = None,
+    removed: list[str] | None = None,
 ) -> None:
-    """Sync all decrypted secrets to the sandbox if the server is running.
+    """Sync a secret change to the sandbox if the server is running.
 
     Called after a secret is set, updated, or deleted so the sandbox
     always has the latest values without requiring a server restart.
+    Only the changed key is sent; if the sandbox can't apply that update,
+    all decrypted secrets are sent instead.
     """
     server = await server_service.get(server_id)
     if not server or server.status != "running":
         return
 
-    secrets = await service.get_decrypted_for_injection(server_id)
+    version = await server_service.next_sandbox_version(server_id)
     sandbox = get_sandbox_client()
+    result = await sandbox.update_server(
+        str(server_id), version, secrets=changed, remove_secrets=removed
+    )
+    if result.get("success") or result.get("not_registered"):
+        return
+
+    secrets = await service.get_decrypted_for_injection(server_id)
     result = await sandbox.update_server_secrets(str(server_id), secrets)
     if not result.get("success"):
         logger.warning(
@@ -146,8 +157,10 @@ async def set_secret_value(
             detail=f"Secret '{key_name}' not found for server {server_id}",
         )
 
-    # Sync updated secrets to the sandbox so running tools see the new value
-    await _sync_secrets_to_sandbox(server_id, service, server_service)
+    # Sync the new value to the sandbox so running tools see it
+    await _sync_secrets_to_sandbox(
+        server_id, service, server_service, changed={key_name: data.value}
+    )
 
     return SecretResponse(
         id=secret.id,
@@ -175,7 +188,7 @@ async def delete_secret(
             detail=f"Secret '{key_name}' not found for server {server_id}",
         )
 
-    # Sync remaining secrets to the sandbox so the deleted key is removed
-    await _sync_secrets_to_sandbox(server_id, service, server_service)
+    # Remove the deleted key from the sandbox
+    await _sync_secrets_to_sandbox(server_id, service, server_service, removed=[key_name])
 
     return None
@@ -79,6 +79,10 @@ class TestCodeRequest(BaseModel):
         default_factory=dict,
         description="Arguments to pass to main() function",
     )
+    profile: bool = Field(
+        default=False,
+        description="Sample where the code spends its time and return the profile",
+    )
 
 
 class TestCodeResponse(BaseModel):
@@ -89,6 +93,13 @@ class TestCodeResponse(BaseModel):
     error: str | None = Field(default=None, description="Error message if execution failed")
     stdout: str | None = Field(default=None, description="Captured stdout output")
     duration_ms: int | None = Field(default=None, description="Execution time in milliseconds")
+    resource_usage: dict[str, Any] | None = Field(
+        default=None, description="CPU time, peak memory and HTTP traffic of the run"
+    )
+    profile: dict[str, Any] | None = Field(
+        default=None,
+        description="Sampled per-function and per-line timings and collapsed stacks",
+    )
 
 
 @router.post(
@@ -205,6 +216,7 @@ async def test_code(
             secrets=secrets,
             allowed_hosts=allowed_hosts,
             allowed_modules=allowed_modules,
+            profile=data.profile,
         )
     except Exception as e:
         return TestCodeResponse(
@@ -228,6 +240,7 @@ async def test_code(
             duration_ms=duration_ms,
             success=result.get("success", False),
             is_test=True,
+            resource_usage=result.get("resource_usage"),
         )
         await db.commit()
     except Exception:
@@ -239,6 +252,8 @@ async def test_code(
         error=result.get("error"),
         stdout=result.get("stdout"),
         duration_ms=result.get("duration_ms"),
+        resource_usage=result.get("resource_usage"),
+        profile=result.get("profile"),
     )
 
 
@@ -335,10 +350,13 @@ async def update_tool(
 ) -> ToolResponse:
     """Update a tool.
 
-    If fields that affect the MCP tool definition change (name, description,
-    enabled, python_code), re-registers the server with the sandbox and
+    If fields that affect the MCP tool definition or its sandbox-side caching
+    change (name, description, enabled, python_code, cacheable,
+    cache_ttl_seconds, coalesce), updates the tool in the sandbox and
     notifies MCP clients.
     """
+    existing = await tool_service.get(tool_id)
+    old_name = existing.name if existing else None
     tool = await tool_service.update(tool_id, data)
     if not tool:
         raise HTTPException(
@@ -347,42 +365,24 @@ async def update_tool(
         )
 
     # Check if any MCP-visible fields changed and server is running
-    mcp_fields = {"name", "description", "enabled", "python_code"}
+    mcp_fields = {
+        "name",
+        "description",
+        "enabled",
+        "python_code",
+        "cacheable",
+        "cache_ttl_seconds",
+        "coalesce",
+    }
     update_data = data.model_dump(exclude_unset=True)
     if mcp_fields & update_data.keys():
         try:
             server = await server_service.get(tool.server_id)
             if server and server.status == "running":
-                from app.api.sandbox import (
-                    _build_external_source_configs,
-                    _build_tool_definitions,
-                )
-                from app.services.global_config import GlobalConfigService
-                from app.services.server_secret import ServerSecretService
-
-                # Re-register with sandbox
-                all_tools, _ = await tool_service.list_by_server(server.id)
-                active_tools = [
-                    t for t in all_tools if t.enabled and t.approval_status == "approved"
-                ]
-                tool_defs = _build_tool_definitions(active_tools)
-
-                secret_service = ServerSecretService(db)
-                secrets = await secret_service.get_decrypted_for_injection(server.id)
-                config_service = GlobalConfigService(db)
-                allowed_modules = await config_service.get_allowed_modules()
-                external_sources = await _build_external_source_configs(db, server.id, secrets)
-
-                sandbox_client = SandboxClient.get_instance()
-                await sandbox_client.register_server(
-                    server_id=str(server.id),
-                    server_name=server.name,
-                    tools=tool_defs,
-                    allowed_modules=allowed_modules,
-                    secrets=secrets,
-                    external_sources=external_sources,
-                    allowed_hosts=server.allowed_hosts or [],
-                )
+                from app.api.sandbox import update_server_tools
+
+                # Update just this tool (under its old and new name) in the sandbox
+                await update_server_tools(server.id, [old_name or tool.name, tool.name], db)
 
                 # Notify MCP clients
                 from app.services.tool_change_notifier import fire_and_forget_notify
@@ -415,39 +415,16 @@ async def delete_tool(
         )
 
     server_id = tool.server_id
+    tool_name = tool.name
     await tool_service.delete(tool_id)
 
-    # Re-register with sandbox and notify MCP clients if server is running
+    # Remove the tool from the sandbox and notify MCP clients if server is running
     try:
         server = await server_service.get(server_id)
         if server and server.status == "running":
-            from app.api.sandbox import (
-                _build_external_source_configs,
-                _build_tool_definitions,
-            )
-            from app.services.global_config import GlobalConfigService
-            from app.services.server_secret import ServerSecretService
-
-            all_tools, _ = await tool_service.list_by_server(server.id)
-            active_tools = [t for t in all_tools if t.enabled and t.approval_status == "approved"]
-            tool_defs = _build_tool_definitions(active_tools)
-
-            secret_service = ServerSecretService(db)
-            secrets = await secret_service.get_decrypted_for_injection(server.id)
-            config_service = GlobalConfigService(db)
-            allowed_modules = await config_service.get_allowed_modules()
-            external_sources = await _build_external_source_configs(db, server.id, secrets)
-
-            sandbox_client = SandboxClient.get_instance()
-            await sandbox_client.register_server(
-                server_id=str(server.id),
-                server_name=server.name,
-                tools=tool_defs,
-                allowed_modules=allowed_modules,
-                secrets=secrets,
-                external_sources=external_sources,
-                allowed_hosts=server.allowed_hosts or [],
-            )
+            from app.api.sandbox import update_server_tools
+
+            await update_server_tools(server.id, [tool_name], db)
 
             from app.services.tool_change_notifier import fire_and_forget_notify
 
@@ -467,6 +444,9 @@ def _to_response(tool: Any) -> ToolResponse:
         description=tool.description,
         enabled=tool.enabled,
         timeout_ms=tool.timeout_ms,
+        cacheable=tool.cacheable,
+        cache_ttl_seconds=tool.cache_ttl_seconds,
+        coalesce=tool.coalesce,
         python_code=tool.python_code,
         code_dependencies=tool.code_dependencies,
         input_schema=tool.input_schema,
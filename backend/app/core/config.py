@@ -113,6 +113,14 @@ class Settings(BaseSettings):
     http_max_connections: int = 10
     http_keepalive_connections: int = 5
 
+    # Outbound HTTP limits of tool code, sent to the sandbox with every server
+    # registration. Per server; None = sandbox default, 0 = unlimited.
+    tool_http_max_concurrent_per_host: int | None = None
+    tool_http_rate_per_host: float | None = None  # Requests per second
+    tool_http_max_concurrent: int | None = None
+    tool_http_rate: float | None = None  # Requests per second
+    tool_http_queue_timeout: float | None = None  # Seconds a request may queue
+
     # Circuit breaker settings for sandbox communication
     circuit_breaker_failure_threshold: int = 10  # Failures before opening circuit
     circuit_breaker_timeout: float = 30.0  # Seconds before attempting half-open
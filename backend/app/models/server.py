@@ -60,6 +60,15 @@ class Server(BaseModel):
         nullable=False,
     )
 
+    # Version of the server's registration in the sandbox, bumped in the
+    # transaction of every change sent there (see ServerService.next_sandbox_version)
+    sandbox_version: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        server_default="0",
+        nullable=False,
+    )
+
     # NOTE: allowed_modules has been moved to global_config table
     # Module whitelist is now global, not per-server
 
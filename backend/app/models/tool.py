@@ -81,6 +81,18 @@ class Tool(BaseModel):
     # Per-tool timeout (NULL = inherit from server)
     timeout_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
+    # Result memoization for idempotent tools: the sandbox reuses successful
+    # results for identical arguments for cache_ttl_seconds
+    # (NULL = sandbox default)
+    cacheable: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default="false"
+    )
+    cache_ttl_seconds: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Identical concurrent calls share one sandbox execution (implied by cacheable)
+    coalesce: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default="false"
+    )
+
     # Tool type: "python_code" (default) or "mcp_passthrough"
     tool_type: Mapped[str] = mapped_column(
         ToolType,
@@ -3,7 +3,7 @@
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy import Boolean, ForeignKey, Index, Integer, String, Text
+from sqlalchemy import BigInteger, Boolean, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.orm import Mapped, mapped_column
@@ -15,7 +15,8 @@ class ToolExecutionLog(BaseModel):
     """Execution log entry for a tool invocation.
 
     Captures input arguments (secrets redacted), result (truncated),
-    errors, stdout, duration, and success status.
+    errors, stdout, duration, success status, and the resources the
+    execution used (CPU time, peak memory, outbound HTTP traffic).
     """
 
     __tablename__ = "tool_execution_logs"
@@ -48,6 +49,17 @@ class ToolExecutionLog(BaseModel):
     success: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
     is_test: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
 
+    # Resource usage reported by the sandbox (None when not reported)
+    cpu_user_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    cpu_sys_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
+    peak_memory_bytes: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    http_calls: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    http_bytes_sent: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    http_bytes_received: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    # Whether the result was served from the sandbox result cache
+    # (None for tools that aren't cacheable)
+    cache_hit: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+
     # Actor
     executed_by: Mapped[str | None] = mapped_column(
         String(255), nullable=True
@@ -77,6 +89,13 @@ class ToolExecutionLog(BaseModel):
             "duration_ms": self.duration_ms,
             "success": self.success,
             "is_test": self.is_test,
+            "cpu_user_ms": self.cpu_user_ms,
+            "cpu_sys_ms": self.cpu_sys_ms,
+            "peak_memory_bytes": self.peak_memory_bytes,
+            "http_calls": self.http_calls,
+            "http_bytes_sent": self.http_bytes_sent,
+            "http_bytes_received": self.http_bytes_received,
+            "cache_hit": self.cache_hit,
             "executed_by": self.executed_by,
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
@@ -23,6 +23,13 @@ class ExecutionLogResponse(BaseModel):
     duration_ms: int | None = None
     success: bool
     is_test: bool = False
+    cpu_user_ms: float | None = None
+    cpu_sys_ms: float | None = None
+    peak_memory_bytes: int | None = None
+    http_calls: int | None = None
+    http_bytes_sent: int | None = None
+    http_bytes_received: int | None = None
+    cache_hit: bool | None = None
     executed_by: str | None = None
     created_at: datetime
 
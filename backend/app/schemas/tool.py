@@ -48,6 +48,20 @@ class ToolCreate(ToolBase):
         le=300000,
         description="Tool execution timeout in milliseconds (1s-5min). If not set, inherits from server.",
     )
+    cacheable: bool = Field(
+        False,
+        description="Idempotent tool: reuse successful results for identical arguments",
+    )
+    cache_ttl_seconds: int | None = Field(
+        None,
+        ge=1,
+        le=86400,
+        description="How long cached results are reused (1s-24h). If not set, sandbox default.",
+    )
+    coalesce: bool = Field(
+        False,
+        description="Share one execution between identical concurrent calls",
+    )
 
     @model_validator(mode="after")
     def validate_python_code_syntax(self) -> "ToolCreate":
@@ -67,6 +81,9 @@ class ToolUpdate(BaseModel):
     description: str | None = Field(None, max_length=2000)
     enabled: bool | None = None
     timeout_ms: int | None = Field(None, ge=1000, le=300000)
+    cacheable: bool | None = None
+    cache_ttl_seconds: int | None = Field(None, ge=1, le=86400)
+    coalesce: bool | None = None
     python_code: str | None = Field(None, max_length=100000)
     code_dependencies: list[str] | None = Field(None, max_length=20)
 
@@ -93,6 +110,9 @@ class ToolResponse(BaseModel):
     description: str | None
     enabled: bool
     timeout_ms: int | None
+    cacheable: bool = False
+    cache_ttl_seconds: int | None = None
+    coalesce: bool = False
     python_code: str | None
     code_dependencies: list[str] | None
     input_schema: dict[str, Any] | None
@@ -1,7 +1,8 @@
 """Execution Log Service - records tool invocation results.
 
 Captures input args (secrets redacted), results (truncated),
-errors, stdout, duration, and success status for each tool call.
+errors, stdout, duration, success status, and resource usage
+for each tool call.
 """
 
 import logging
@@ -46,6 +47,16 @@ SENSITIVE_KEYS = {
     "cookie",
 }
 
+# Resource usage fields reported by the sandbox, mapped to their column type
+RESOURCE_USAGE_FIELDS: dict[str, type] = {
+    "cpu_user_ms": float,
+    "cpu_sys_ms": float,
+    "peak_memory_bytes": int,
+    "http_calls": int,
+    "http_bytes_sent": int,
+    "http_bytes_received": int,
+}
+
 
 class ExecutionLogService:
     """Service for managing tool execution logs."""
@@ -66,6 +77,8 @@ class ExecutionLogService:
         success: bool = False,
         executed_by: str | None = None,
         is_test: bool = False,
+        resource_usage: dict[str, Any] | None = None,
+        cache_hit: bool | None = None,
     ) -> ToolExecutionLog:
         """Create a new execution log entry.
 
@@ -73,6 +86,9 @@ class ExecutionLogService:
         Result and stdout are truncated if too large.
         Set is_test=True for mcpbox_test_code runs so they appear labelled
         differently from production executions in the history UI.
+        resource_usage is the sandbox's per-execution usage report; unknown
+        or malformed fields are ignored. cache_hit records whether a
+        cacheable tool's result came from the sandbox result cache.
         """
         log = ToolExecutionLog(
             tool_id=tool_id,
@@ -86,6 +102,8 @@ class ExecutionLogService:
             success=success,
             is_test=is_test,
             executed_by=executed_by,
+            cache_hit=cache_hit if isinstance(cache_hit, bool) else None,
+            **self._resource_columns(resource_usage),
         )
         self.db.add(log)
         await self.db.flush()
@@ -344,6 +362,18 @@ class ExecutionLogService:
                 return text[:MAX_RESULT_SIZE] + "...[truncated]"
             return text
 
+    def _resource_columns(self, usage: dict[str, Any] | None) -> dict[str, Any]:
+        """Map a sandbox resource usage report onto log columns."""
+        if not isinstance(usage, dict):
+            return {}
+        columns: dict[str, Any] = {}
+        for field, kind in RESOURCE_USAGE_FIELDS.items():
+            value = usage.get(field)
+            # bool is an int subclass but never a valid measurement
+            if isinstance(value, int | float) and not isinstance(value, bool):
+                columns[field] = kind(value)
+        return columns
+
 
 def _paginate(total: int, page: int, page_size: int) -> int:
     """Calculate total pages."""
@@ -170,6 +170,18 @@ MCP_MANAGEMENT_TOOLS = [
                     "type": "boolean",
                     "description": "Enable or disable the tool (optional). Disabled tools are excluded when the server starts. Requires server restart to take effect.",
                 },
+                "cacheable": {
+                    "type": "boolean",
+                    "description": "Mark the tool as idempotent (optional). Only for pure lookups whose result depends on the arguments alone: repeated calls with the same arguments then reuse the last successful result for cache_ttl_seconds.",
+                },
+                "cache_ttl_seconds": {
+                    "type": "integer",
+                    "description": "How long a cached result is reused, 1-86400 seconds (optional, default: sandbox setting)",
+                },
+                "coalesce": {
+                    "type": "boolean",
+                    "description": "Let identical calls made at the same time share one execution and its result (optional). For side-effect-free tools; cacheable tools always do this.",
+                },
             },
             "required": ["tool_id"],
         },
@@ -202,6 +214,10 @@ MCP_MANAGEMENT_TOOLS = [
                     "type": "object",
                     "description": "Arguments to pass to the tool's main() function (optional)",
                 },
+                "profile": {
+                    "type": "boolean",
+                    "description": "Sample where the tool spends its time and return a profile: hot functions and lines with self/total ms, plus collapsed stacks where <await> marks time waiting (e.g. on HTTP). Use it to find out why a tool is slow (optional, default false)",
+                },
             },
             "required": ["tool_id"],
         },
@@ -797,6 +813,9 @@ class MCPManagementService:
             "description": tool.description,
             "enabled": tool.enabled,
             "timeout_ms": tool.timeout_ms,
+            "cacheable": tool.cacheable,
+            "cache_ttl_seconds": tool.cache_ttl_seconds,
+            "coalesce": tool.coalesce,
             "input_schema": tool.input_schema,
             "current_version": tool.current_version,
             "python_code": tool.python_code,
@@ -878,7 +897,15 @@ class MCPManagementService:
         from app.schemas.tool import ToolUpdate
 
         update_fields = {}
-        for field in ["name", "description", "enabled", "timeout_ms"]:
+        for field in [
+            "name",
+            "description",
+            "enabled",
+            "timeout_ms",
+            "cacheable",
+            "cache_ttl_seconds",
+            "coalesce",
+        ]:
             if field in args and args[field] is not None:
                 update_fields[field] = args[field]
 
@@ -896,6 +923,7 @@ class MCPManagementService:
         if not update_fields:
             return {"error": "No fields to update"}
 
+        old_name = tool.name
         try:
             tool_update = ToolUpdate(**update_fields)
             updated_tool = await self._tool_service.update(tool_id, tool_update)
@@ -903,47 +931,25 @@ class MCPManagementService:
             if updated_tool is None:
                 return {"error": f"Tool {tool_id} not found"}
 
-            # If MCP-visible fields changed and server is running,
-            # re-register with sandbox and notify MCP clients
-            mcp_fields = {"name", "description", "enabled", "python_code"}
+            # If MCP-visible (or sandbox-side caching) fields changed and
+            # server is running, update the tool in the sandbox and notify MCP clients
+            mcp_fields = {
+                "name",
+                "description",
+                "enabled",
+                "python_code",
+                "cacheable",
+                "cache_ttl_seconds",
+                "coalesce",
+            }
             if mcp_fields & update_fields.keys():
                 try:
                     server = await self._server_service.get(updated_tool.server_id)
                     if server and server.status == "running":
-                        # Re-register with sandbox so changes take effect
-                        from app.api.sandbox import (
-                            _build_external_source_configs,
-                            _build_tool_definitions,
-                        )
-                        from app.services.global_config import GlobalConfigService
-                        from app.services.server_secret import (
-                            ServerSecretService,
-                        )
+                        # Update just this tool (under its old and new name) in the sandbox
+                        from app.api.sandbox import update_server_tools
 
-                        all_tools, _ = await self._tool_service.list_by_server(server.id)
-                        active_tools = [
-                            t for t in all_tools if t.enabled and t.approval_status == "approved"
-                        ]
-                        tool_defs = _build_tool_definitions(active_tools)
-
-                        secret_service = ServerSecretService(self.db)
-                        secrets = await secret_service.get_decrypted_for_injection(server.id)
-                        config_service = GlobalConfigService(self.db)
-                        allowed_modules = await config_service.get_allowed_modules()
-                        external_sources = await _build_external_source_configs(
-                            self.db, server.id, secrets
-                        )
-
-                        sandbox_client = SandboxClient.get_instance()
-                        await sandbox_client.register_server(
-                            server_id=str(server.id),
-                            server_name=server.name,
-                            tools=tool_defs,
-                            allowed_modules=allowed_modules,
-                            secrets=secrets,
-                            external_sources=external_sources,
-                            allowed_hosts=server.allowed_hosts or [],
-                        )
+                        await update_server_tools(server.id, [old_name, updated_tool.name], self.db)
 
                         # Notify MCP clients (same-process, gateway)
                         from app.services.tool_change_notifier import (
@@ -979,45 +985,18 @@ class MCPManagementService:
             return {"error": f"Tool {tool_id} not found"}
 
         server_id = tool.server_id
+        tool_name = tool.name
         deleted = await self._tool_service.delete(tool_id)
         if not deleted:
             return {"error": f"Tool {tool_id} not found"}
 
-        # Re-register with sandbox and notify MCP clients if server is running
+        # Remove the tool from the sandbox and notify MCP clients if server is running
         try:
             server = await self._server_service.get(server_id)
             if server and server.status == "running":
-                from app.api.sandbox import (
-                    _build_external_source_configs,
-                    _build_tool_definitions,
-                )
-                from app.services.global_config import GlobalConfigService
-                from app.services.server_secret import (
-                    ServerSecretService,
-                )
+                from app.api.sandbox import update_server_tools
 
-                all_tools, _ = await self._tool_service.list_by_server(server.id)
-                active_tools = [
-                    t for t in all_tools if t.enabled and t.approval_status == "approved"
-                ]
-                tool_defs = _build_tool_definitions(active_tools)
-
-                secret_service = ServerSecretService(self.db)
-                secrets = await secret_service.get_decrypted_for_injection(server.id)
-                config_service = GlobalConfigService(self.db)
-                allowed_modules = await config_service.get_allowed_modules()
-                external_sources = await _build_external_source_configs(self.db, server.id, secrets)
-
-                sandbox_client = SandboxClient.get_instance()
-                await sandbox_client.register_server(
-                    server_id=str(server.id),
-                    server_name=server.name,
-                    tools=tool_defs,
-                    allowed_modules=allowed_modules,
-                    secrets=secrets,
-                    external_sources=external_sources,
-                    allowed_hosts=server.allowed_hosts or [],
-                )
+                await update_server_tools(server.id, [tool_name], self.db)
 
                 from app.services.tool_change_notifier import (
                     notify_tools_changed_local,
@@ -1046,6 +1025,8 @@ class MCPManagementService:
         if server.status == "running":
             return {"error": "Server is already running"}
 
+        version = await self._server_service.next_sandbox_version(server_id)
+
         # Get tools for this server and filter to approved + enabled
         tools, _total = await self._tool_service.list_by_server(server_id)
         tool_defs = self._build_tool_definitions(tools)
@@ -1083,6 +1064,7 @@ class MCPManagementService:
                 server_id=str(server_id),
                 server_name=server.name,
                 tools=tool_defs,
+                version=version,
                 allowed_modules=allowed_modules,
                 secrets=secrets,
                 external_sources=external_sources_data,
@@ -1268,6 +1250,7 @@ class MCPManagementService:
                 secrets=secrets,
                 allowed_hosts=allowed_hosts,
                 allowed_modules=allowed_modules,
+                profile=bool(args.get("profile", False)),
             )
         except httpx.TimeoutException:
             return {"error": "Code execution timed out"}
@@ -1293,6 +1276,7 @@ class MCPManagementService:
                 duration_ms=duration_ms,
                 success=result.get("success", False),
                 is_test=True,
+                resource_usage=result.get("resource_usage"),
             )
             await self.db.commit()
         except Exception as e:
@@ -1326,11 +1310,11 @@ class MCPManagementService:
             )
 
             if tool.approval_status == "approved":
-                # Auto-approved: immediately re-register with sandbox so the tool
+                # Auto-approved: immediately add it to the sandbox so the tool
                 # is live without requiring a manual server restart.
-                from app.api.sandbox import reregister_server
+                from app.api.sandbox import update_server_tools
 
-                await reregister_server(tool.server_id, self.db)
+                await update_server_tools(tool.server_id, [tool.name], self.db)
                 from app.services.tool_change_notifier import fire_and_forget_notify
 
                 fire_and_forget_notify()
@@ -39,6 +39,19 @@ SANDBOX_CIRCUIT_CONFIG = CircuitBreakerConfig(
 )
 
 
+def _outbound_limits() -> dict[str, int | float] | None:
+    """Configured outbound HTTP limits for tool code (None = sandbox defaults)."""
+    limits = {
+        "max_concurrent_per_host": settings.tool_http_max_concurrent_per_host,
+        "rate_per_host": settings.tool_http_rate_per_host,
+        "max_concurrent": settings.tool_http_max_concurrent,
+        "rate": settings.tool_http_rate,
+        "queue_timeout": settings.tool_http_queue_timeout,
+    }
+    configured = {name: value for name, value in limits.items() if value is not None}
+    return configured or None
+
+
 class SandboxClient:
     """Client for communicating with the shared sandbox service.
 
@@ -61,6 +74,8 @@ class SandboxClient:
             "sandbox",
             SANDBOX_CIRCUIT_CONFIG,
         )
+        # Last tools/list result and the sandbox registry generation it is of
+        self._tools_list_result: dict[str, Any] | None = None
 
     def _get_headers(self) -> dict[str, str]:
         """Get headers for sandbox requests including API key."""
@@ -187,6 +202,7 @@ class SandboxClient:
         server_id: str,
         server_name: str,
         tools: list[dict[str, Any]],
+        version: int,
         allowed_modules: list[str] | None = None,
         secrets: dict[str, str] | None = None,
         external_sources: list[dict[str, Any]] | None = None,
@@ -194,18 +210,54 @@ class SandboxClient:
     ) -> dict[str, Any]:
         """Register a server with its tools in the sandbox.
 
+        The sandbox rejects a registration older than the last registration
+        or update it applied, so one that was overtaken in flight can't roll
+        the server back. If it rejects this one, the registration it holds
+        was sent for database state that no longer exists (a change rolled
+        back after it was sent, or a restored database) and is replaced.
+
         Args:
             server_id: Unique server ID
             server_name: Human-readable server name
             tools: List of tool definitions (with python_code for execution)
+            version: The server's sandbox version, from
+                ServerService.next_sandbox_version()
             allowed_modules: Custom list of allowed Python modules (None = use defaults)
             secrets: Dict of secret key→value pairs for injection into tool namespace
             external_sources: List of external MCP source configs for passthrough tools
             allowed_hosts: Approved network hostnames ([] = no network access)
 
+        The configured outbound HTTP limits (TOOL_HTTP_*) are sent along, so
+        the sandbox queues the server's requests per destination.
+
         Returns:
             Registration result with success status and tool count
         """
+        payload = {
+            "server_id": server_id,
+            "server_name": server_name,
+            "tools": tools,
+            "allowed_modules": allowed_modules,
+            "secrets": secrets or {},
+            "external_sources": external_sources or [],
+            "allowed_hosts": allowed_hosts,
+            "outbound_limits": _outbound_limits(),
+            "version": version,
+        }
+        result = await self._post_registration(payload)
+        if result.get("conflict"):
+            logger.warning(
+                f"Sandbox has a later registration of server {server_id} than"
+                f" version {version}; replacing it"
+            )
+            unregistered = await self.unregister_server(server_id)
+            if unregistered.get("success"):
+                result = await self._post_registration(payload)
+        return result
+
+    async def _post_registration(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """Send one registration; a rejected stale one has ``conflict`` set."""
+        server_name = payload["server_name"]
         try:
 
             async def do_register() -> dict[str, Any]:
@@ -213,15 +265,7 @@ class SandboxClient:
                 response = await client.post(
                     f"{self.sandbox_url}/servers/register",
                     headers=self._get_headers(),
-                    json={
-                        "server_id": server_id,
-                        "server_name": server_name,
-                        "tools": tools,
-                        "allowed_modules": allowed_modules,
-                        "secrets": secrets or {},
-                        "external_sources": external_sources or [],
-                        "allowed_hosts": allowed_hosts,
-                    },
+                    json=payload,
                 )
 
                 if response.status_code == 200:
@@ -240,6 +284,9 @@ class SandboxClient:
                         "success": True,
                         "tools_registered": data.get("tools_registered", 0),
                     }
+                elif response.status_code == 409:
+                    logger.warning(f"Sandbox rejected stale registration of {server_name}")
+                    return {"success": False, "conflict": True, "error": response.text}
                 else:
                     logger.error(f"Failed to register server: {response.text}")
                     return {
@@ -268,6 +315,87 @@ class SandboxClient:
                 "error": str(e),
             }
 
+    async def update_server(
+        self,
+        server_id: str,
+        version: int,
+        tools: list[dict[str, Any]] | None = None,
+        remove_tools: list[str] | None = None,
+        secrets: dict[str, str] | None = None,
+        remove_secrets: list[str] | None = None,
+        external_sources: list[dict[str, Any]] | None = None,
+        remove_external_sources: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """Add, replace or remove individual tools, secrets and external sources.
+
+        Sends only what changed; everything else stays registered in the
+        sandbox with its caches. The update is version-stamped: if the sandbox
+        has already applied a later registration or update, it is rejected
+        and the result has ``conflict`` set.
+
+        Args:
+            server_id: Server to update
+            version: The server's sandbox version, from
+                ServerService.next_sandbox_version()
+            tools: Tool definitions to add, or replace by name
+            remove_tools: Names of tools to remove
+            secrets: Secret key→decrypted value pairs to add or replace
+            remove_secrets: Secret keys to remove
+            external_sources: External MCP source configs to add or replace
+            remove_external_sources: Source IDs of external sources to remove
+
+        Returns:
+            Result with success status; on failure ``conflict`` or
+            ``not_registered`` tell the caller to re-register in full
+        """
+        try:
+
+            async def do_update() -> dict[str, Any]:
+                response = await self._request_with_retry(
+                    "PATCH",
+                    f"{self.sandbox_url}/servers/{server_id}",
+                    headers=self._get_headers(),
+                    json={
+                        "version": version,
+                        "tools": tools or [],
+                        "remove_tools": remove_tools or [],
+                        "secrets": secrets or {},
+                        "remove_secrets": remove_secrets or [],
+                        "external_sources": external_sources or [],
+                        "remove_external_sources": remove_external_sources or [],
+                    },
+                )
+
+                if response.status_code == 200:
+                    logger.info(f"Updated server {server_id} in sandbox (version {version})")
+                    return {"success": True}
+                elif response.status_code == 404:
+                    return {"success": False, "not_registered": True}
+                elif response.status_code == 409:
+                    logger.warning(f"Sandbox rejected stale update of server {server_id}")
+                    return {"success": False, "conflict": True}
+                else:
+                    logger.error(f"Failed to update server: {response.text}")
+                    return {"success": False, "error": response.text}
+
+            result: dict[str, Any] = await retry_async(
+                do_update,
+                config=SANDBOX_RETRY_CONFIG,
+                circuit_breaker=self._circuit_breaker,
+            )
+            return result
+
+        except CircuitBreakerOpen as e:
+            logger.error(f"Cannot update server - circuit breaker open: {e}")
+            return {
+                "success": False,
+                "error": f"Sandbox temporarily unavailable: {e}",
+                "circuit_breaker_open": True,
+            }
+        except Exception as e:
+            logger.exception(f"Error updating server: {e}")
+            return {"success": False, "error": str(e)}
+
     async def update_server_secrets(
         self,
         server_id: str,
@@ -373,6 +501,48 @@ class SandboxClient:
             logger.exception(f"Error unregistering server: {e}")
             return {"success": False, "error": str(e)}
 
+    async def list_servers(self) -> list[dict[str, Any]]:
+        """List the servers registered in the sandbox.
+
+        Each entry has the registration's version, tool names, secret keys
+        (no values), external source IDs, allowed hosts and allowed modules.
+
+        Returns:
+            Registered servers (empty if the sandbox can't be reached)
+        """
+        try:
+
+            async def do_list() -> list[dict[str, Any]]:
+                client = await self._get_client()
+                response = await client.get(
+                    f"{self.sandbox_url}/servers",
+                    headers=self._get_headers(),
+                )
+
+                if response.status_code == 200:
+                    try:
+                        data: dict[str, Any] = response.json()
+                    except ValueError:
+                        logger.warning("Invalid JSON response from sandbox list_servers")
+                        return []
+                    servers: list[dict[str, Any]] = data.get("servers", [])
+                    return servers
+                return []
+
+            result: list[dict[str, Any]] = await retry_async(
+                do_list,
+                config=SANDBOX_RETRY_CONFIG,
+                circuit_breaker=self._circuit_breaker,
+            )
+            return result
+
+        except CircuitBreakerOpen:
+            logger.warning("Cannot list servers - circuit breaker open")
+            return []
+        except Exception as e:
+            logger.warning(f"Error listing servers: {e}")
+            return []
+
     async def list_tools(self, server_id: str | None = None) -> list[dict[str, Any]]:
         """List all registered tools.
 
@@ -417,9 +587,28 @@ class SandboxClient:
             logger.warning(f"Error listing tools: {e}")
             return []
 
+    def _tools_list_response(
+        self, response: dict[str, Any], cached: dict[str, Any] | None
+    ) -> dict[str, Any]:
+        """Fill in an unchanged tools/list result, or remember a new one."""
+        result = response.get("result")
+        if not isinstance(result, dict) or not result.get("generation"):
+            return response
+        if result.get("unchanged"):
+            # The sandbox only answers "unchanged" to the generation we sent
+            if cached is not None and cached["generation"] == result["generation"]:
+                return {**response, "result": cached}
+        elif "tools" in result:
+            self._tools_list_result = result
+        return response
+
     async def mcp_request(self, request: dict[str, Any]) -> dict[str, Any]:
         """Send an MCP JSON-RPC request to the sandbox.
 
+        A tools/list request passes the generation of the last list received;
+        if the sandbox's tools haven't changed since, it doesn't send them
+        again and the last list is returned.
+
         Args:
             request: MCP JSON-RPC request
 
@@ -429,11 +618,16 @@ class SandboxClient:
         try:
 
             async def do_request() -> dict[str, Any]:
+                cached = self._tools_list_result if request.get("method") == "tools/list" else None
+                payload = request
+                if cached is not None:
+                    params = {**(request.get("params") or {}), "generation": cached["generation"]}
+                    payload = {**request, "params": params}
                 client = await self._get_client()
                 response = await client.post(
                     f"{self.sandbox_url}/mcp",
                     headers=self._get_headers(),
-                    json=request,
+                    json=payload,
                 )
                 # Check status before parsing JSON
                 if response.status_code >= 500:
@@ -448,6 +642,8 @@ class SandboxClient:
                     }
                 try:
                     result: dict[str, Any] = response.json()
+                    if request.get("method") == "tools/list":
+                        return self._tools_list_response(result, cached)
                     return result
                 except ValueError as e:
                     logger.error(f"Invalid JSON response from MCP request: {e}")
@@ -493,6 +689,7 @@ class SandboxClient:
         secrets: dict[str, str] | None = None,
         allowed_hosts: list[str] | None = None,
         allowed_modules: list[str] | None = None,
+        profile: bool = False,
     ) -> dict[str, Any]:
         """Execute Python code directly in the sandbox.
 
@@ -508,9 +705,12 @@ class SandboxClient:
                            [] = block all outbound, [hosts] = allowlist those hosts)
             allowed_modules: Admin-approved module list from the DB (None = sandbox
                              defaults). Should be fetched from GlobalConfigService.
+            profile: Sample where the code spends its time and include the
+                     aggregated profile (collapsed stacks, hot functions and lines)
 
         Returns:
-            Execution result with success, result, error, and stdout
+            Execution result with success, result, error, stdout and
+            resource_usage (plus profile when requested)
         """
         try:
 
@@ -526,6 +726,8 @@ class SandboxClient:
                     payload["allowed_hosts"] = allowed_hosts
                 if allowed_modules is not None:
                     payload["allowed_modules"] = allowed_modules
+                if profile:
+                    payload["profile"] = True
                 response = await client.post(
                     f"{self.sandbox_url}/execute",
                     headers=self._get_headers(),
@@ -3,7 +3,7 @@
 import builtins
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -133,3 +133,20 @@ class ServerService:
         await self.db.flush()
         await self.db.refresh(server)
         return server
+
+    async def next_sandbox_version(self, server_id: UUID) -> int:
+        """Bump and return the version of the server's sandbox registration.
+
+        Call in the transaction of the change being sent, before reading the
+        state to send: the update locks the server row until that transaction
+        ends, so versions follow the order in which changes are committed.
+        """
+        result = await self.db.execute(
+            update(Server)
+            .where(Server.id == server_id)
+            # Not a change of the server itself
+            .values(sandbox_version=Server.sandbox_version + 1, updated_at=Server.updated_at)
+            .returning(Server.sandbox_version)
+        )
+        version: int = result.scalar_one()
+        return version
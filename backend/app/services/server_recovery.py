@@ -3,18 +3,25 @@
 After a sandbox container restart, all in-memory tool registrations are lost.
 Servers still show "running" in the database but their tools aren't registered.
 This module re-registers them automatically on backend/mcp-gateway startup.
+
+A sandbox with registry snapshots (SANDBOX_SNAPSHOT_PATH) comes back with its
+registrations restored. Those are compared with the database, and only the
+servers that changed since their last registration are registered again.
 """
 
 import asyncio
 import logging
+from typing import Any
+from uuid import UUID
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.core.database import async_session_maker
-from app.models import Server
+from app.models import Server, Tool
 from app.services.sandbox_client import SandboxClient
+from app.services.server import ServerService
 
 logger = logging.getLogger(__name__)
 
@@ -49,35 +56,117 @@ async def recover_running_servers() -> None:
         return
 
     try:
+        # Registrations the sandbox restored from its registry snapshot
+        registered = {s["server_id"]: s for s in await sandbox_client.list_servers()}
+
         async with async_session_maker() as db:
             # Find all servers marked as "running"
             result = await db.execute(
-                select(Server).options(selectinload(Server.tools)).where(Server.status == "running")
+                select(Server)
+                .options(
+                    selectinload(Server.tools),
+                    selectinload(Server.secrets),
+                    selectinload(Server.external_mcp_sources),
+                )
+                .where(Server.status == "running")
             )
             running_servers = result.scalars().all()
 
+            # Registered, but stopped or deleted while the sandbox was down
+            running_ids = {str(server.id) for server in running_servers}
+            for server_id in registered.keys() - running_ids:
+                if not await _is_running(db, server_id):
+                    await sandbox_client.unregister_server(server_id)
+            await db.commit()
+
             if not running_servers:
                 logger.info("No running servers to recover")
                 return
 
-            logger.info(f"Recovering {len(running_servers)} running server(s)")
+            from app.services.global_config import GlobalConfigService
 
+            allowed_modules = await GlobalConfigService(db).get_allowed_modules()
+
+            current = 0
             for server in running_servers:
-                await _register_server(db, server, sandbox_client)
+                info = registered.get(str(server.id))
+                if _is_current(server, info, allowed_modules):
+                    current += 1
+                elif info is not None and not _approved_tools(server):
+                    # All its tools were disabled or revoked since
+                    await sandbox_client.unregister_server(str(server.id))
+                else:
+                    await _register_server(db, server, sandbox_client)
+                await db.commit()
+
+            logger.info(
+                f"Recovered {len(running_servers) - current} running server(s);"
+                f" {current} already registered and up to date"
+            )
 
     except Exception as e:
         logger.error(f"Error during server recovery: {e}")
 
 
+async def _is_running(db: AsyncSession, server_id: str) -> bool:
+    """Whether a server is running, once a start in progress has committed.
+
+    A start registers the server in the sandbox while holding the server's
+    row lock (see ServerService.next_sandbox_version), so waiting for the
+    lock tells a server being started from one that was stopped.
+    """
+    result = await db.execute(
+        select(Server.status).where(Server.id == UUID(server_id)).with_for_update()
+    )
+    return result.scalar_one_or_none() == "running"
+
+
+def _approved_tools(server: Server) -> list[Tool]:
+    """The tools of a server that are registered with the sandbox."""
+    return [tool for tool in server.tools if tool.enabled and tool.approval_status == "approved"]
+
+
+def _is_current(server: Server, info: dict[str, Any] | None, allowed_modules: list[str]) -> bool:
+    """Whether the sandbox's registration of *server* matches the database.
+
+    Args:
+        server: Running server, with its tools, secrets and external sources
+        info: The server's entry from the sandbox's server list (None if
+            it isn't registered)
+        allowed_modules: The current global module allowlist
+
+    Every change sent to the sandbox bumps the server's sandbox_version in
+    the transaction that made it, so a registration of another version
+    missed a change, or holds one that was rolled back. The names are
+    compared too, as the global module allowlist isn't versioned per server.
+    """
+    if info is None or not info.get("version"):
+        return False
+    if info["version"] != server.sandbox_version:
+        return False
+
+    sources = [s for s in server.external_mcp_sources if s.status != "disabled"]
+    secrets = [s for s in server.secrets if s.encrypted_value is not None]
+    if (
+        set(info.get("tools", [])) != {tool.name for tool in _approved_tools(server)}
+        or set(info.get("secret_keys", [])) != {s.key_name for s in secrets}
+        or set(info.get("external_source_ids", [])) != {str(s.id) for s in sources}
+        or set(info.get("allowed_hosts") or []) != set(server.allowed_hosts or [])
+        or set(info.get("allowed_modules") or []) != set(allowed_modules)
+    ):
+        return False
+    return True
+
+
 async def _register_server(db: AsyncSession, server: Server, sandbox_client: SandboxClient) -> None:
     """Re-register a single server with the sandbox."""
+    version = await ServerService(db).next_sandbox_version(server.id)
+    # Read what is sent after taking the server's lock
+    await db.refresh(server, ["name", "allowed_hosts", "tools"])
+
     # Build tool definitions (only enabled + approved)
     tool_defs = []
-    for tool in server.tools:
-        if not tool.enabled:
-            continue
-        if tool.approval_status != "approved":
-            continue
+    for tool in _approved_tools(server):
         tool_def = {
             "name": tool.name,
             "description": tool.description or "",
@@ -85,6 +174,9 @@ async def _register_server(db: AsyncSession, server: Server, sandbox_client: San
             "timeout_ms": tool.timeout_ms or 30000,
             "python_code": tool.python_code,
             "tool_type": getattr(tool, "tool_type", "python_code"),
+            "cacheable": bool(getattr(tool, "cacheable", False)),
+            "cache_ttl_seconds": getattr(tool, "cache_ttl_seconds", None),
+            "coalesce": bool(getattr(tool, "coalesce", False)),
         }
         if tool_def["tool_type"] == "mcp_passthrough":
             tool_def["external_source_id"] = (
@@ -132,6 +224,7 @@ async def _register_server(db: AsyncSession, server: Server, sandbox_client: San
         server_id=str(server.id),
         server_name=server.name,
         tools=tool_defs,
+        version=version,
         allowed_modules=allowed_modules,
         secrets=secrets,
         external_sources=external_sources_data,
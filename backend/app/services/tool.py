@@ -46,6 +46,9 @@ class ToolService:
             description=data.description,
             python_code=data.python_code,
             input_schema=input_schema,
+            cacheable=data.cacheable,
+            cache_ttl_seconds=data.cache_ttl_seconds,
+            coalesce=data.coalesce,
             enabled=True,
             current_version=1,
         )
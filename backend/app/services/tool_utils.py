@@ -37,6 +37,9 @@ def build_tool_definitions(
             "python_code": tool.python_code,
             "timeout_ms": tool.timeout_ms or 30000,
             "tool_type": getattr(tool, "tool_type", "python_code"),
+            "cacheable": bool(getattr(tool, "cacheable", False)),
+            "cache_ttl_seconds": getattr(tool, "cache_ttl_seconds", None),
+            "coalesce": bool(getattr(tool, "coalesce", False)),
         }
 
         # Add passthrough-specific fields
@@ -539,6 +539,7 @@ def mock_sandbox_client():
         return_value={"success": True, "tools_registered": 1}
     )
     client_instance.unregister_server.return_value = {"success": True}
+    client_instance.update_server = AsyncMock(return_value={"success": True})
     client_instance.list_tools.return_value = []
     client_instance.install_package = AsyncMock(
         return_value={"status": "installed", "package_name": "test", "version": "1.0"}
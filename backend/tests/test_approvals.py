@@ -1796,6 +1796,94 @@ async def test_bulk_approve_network_requests_triggers_server_reregistration(
         assert host in passed_hosts
 
 
+@pytest.mark.asyncio
+async def test_revoke_tool_sends_only_that_tool(
+    async_client: AsyncClient,
+    admin_headers: dict,
+    running_server_tool: Tool,
+    mock_sandbox_client,
+):
+    """Revoking a tool removes just that tool instead of re-registering the server."""
+    mock_sandbox_client.update_server = AsyncMock(return_value={"success": True})
+
+    response = await async_client.post(
+        f"/api/approvals/tools/{running_server_tool.id}/revoke",
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["server_refreshed"] is True
+
+    mock_sandbox_client.update_server.assert_called_once()
+    call_kwargs = mock_sandbox_client.update_server.call_args.kwargs
+    assert call_kwargs["remove_tools"] == ["network_tool"]
+    assert call_kwargs["tools"] == []
+    mock_sandbox_client.register_server.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_rejected_tool_update_falls_back_to_reregistration(
+    async_client: AsyncClient,
+    admin_headers: dict,
+    running_server_tool: Tool,
+    mock_sandbox_client,
+):
+    """If the sandbox rejects a tool update, the server is re-registered in full."""
+    mock_sandbox_client.update_server = AsyncMock(return_value={"success": False, "conflict": True})
+
+    response = await async_client.post(
+        f"/api/approvals/tools/{running_server_tool.id}/revoke",
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+
+    mock_sandbox_client.register_server.assert_called_once()
+    # The re-registration is versioned after the rejected update
+    update_version = mock_sandbox_client.update_server.call_args.args[1]
+    register_version = mock_sandbox_client.register_server.call_args.kwargs["version"]
+    assert register_version == update_version + 1
+
+
+@pytest.mark.asyncio
+async def test_edit_tool_sends_only_that_tool(
+    async_client: AsyncClient,
+    admin_headers: dict,
+    running_server_tool: Tool,
+    mock_sandbox_client,
+):
+    """Renaming a tool replaces it under its new name and removes the old one."""
+    response = await async_client.patch(
+        f"/api/tools/{running_server_tool.id}",
+        json={"name": "renamed_tool"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+
+    mock_sandbox_client.update_server.assert_called_once()
+    call_kwargs = mock_sandbox_client.update_server.call_args.kwargs
+    assert [t["name"] for t in call_kwargs["tools"]] == ["renamed_tool"]
+    assert call_kwargs["remove_tools"] == ["network_tool"]
+    mock_sandbox_client.register_server.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_delete_tool_removes_only_that_tool(
+    async_client: AsyncClient,
+    admin_headers: dict,
+    running_server_tool: Tool,
+    mock_sandbox_client,
+):
+    response = await async_client.delete(
+        f"/api/tools/{running_server_tool.id}", headers=admin_headers
+    )
+    assert response.status_code == 204
+
+    mock_sandbox_client.update_server.assert_called_once()
+    call_kwargs = mock_sandbox_client.update_server.call_args.kwargs
+    assert call_kwargs["tools"] == []
+    assert call_kwargs["remove_tools"] == ["network_tool"]
+    mock_sandbox_client.register_server.assert_not_called()
+
+
 # =============================================================================
 # Admin-Initiated Network Approval → Sandbox Re-registration Tests
 # =============================================================================
@@ -81,6 +81,37 @@ class TestCreateLog:
         assert "_preview" in log.result
         assert len(log.result["_preview"]) <= 1100  # 1000 chars + "..."
 
+    async def test_create_log_records_resource_usage(
+        self, db_session, server_factory, tool_factory
+    ):
+        """Resource usage fields map onto columns; malformed ones are dropped."""
+        server = await server_factory()
+        tool = await tool_factory(server=server)
+
+        service = ExecutionLogService(db_session)
+        log = await service.create_log(
+            tool_id=tool.id,
+            server_id=server.id,
+            tool_name="test_tool",
+            success=True,
+            resource_usage={
+                "cpu_user_ms": 12.5,
+                "cpu_sys_ms": 1,
+                "peak_memory_bytes": None,
+                "http_calls": 2,
+                "http_bytes_sent": "lots",
+                "http_bytes_received": 4096,
+            },
+        )
+
+        assert log.cpu_user_ms == 12.5
+        assert log.cpu_sys_ms == 1.0
+        assert log.peak_memory_bytes is None
+        assert log.http_calls == 2
+        assert log.http_bytes_sent is None
+        assert log.http_bytes_received == 4096
+        assert log.to_dict()["http_calls"] == 2
+
 
 class TestListByTool:
     """Tests for ExecutionLogService.list_by_tool()."""
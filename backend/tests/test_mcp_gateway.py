@@ -1159,6 +1159,8 @@ class TestLogToolExecutionMetadata:
                     "execution": {
                         "stdout": "captured print output",
                         "duration_ms": 150,
+                        "resource_usage": {"cpu_user_ms": 4.2, "http_calls": 1},
+                        "cache_hit": True,
                     }
                 },
             },
@@ -1189,6 +1191,11 @@ class TestLogToolExecutionMetadata:
         call_kwargs = mock_log_service.create_log.call_args
         assert call_kwargs.kwargs.get("stdout") == "captured print output"
         assert call_kwargs.kwargs.get("success") is True
+        assert call_kwargs.kwargs.get("resource_usage") == {
+            "cpu_user_ms": 4.2,
+            "http_calls": 1,
+        }
+        assert call_kwargs.kwargs.get("cache_hit") is True
 
     @pytest.mark.asyncio
     async def test_extracts_stdout_from_meta_on_failure(self):
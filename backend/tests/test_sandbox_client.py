@@ -221,6 +221,7 @@ class TestSandboxClientRegisterServer:
                 server_id="test-server-id",
                 server_name="Test Server",
                 tools=[{"name": "tool1"}, {"name": "tool2"}],
+                version=1,
             )
 
             assert result["success"] is True
@@ -244,11 +245,108 @@ class TestSandboxClientRegisterServer:
                 server_id="test-server-id",
                 server_name="Test Server",
                 tools=[],
+                version=1,
             )
 
             assert result["success"] is False
             assert "error" in result
 
+    @pytest.mark.asyncio
+    async def test_register_server_sends_outbound_limits(self):
+        """Configured tool HTTP limits are sent with the registration."""
+        client = SandboxClient()
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"tools_registered": 0}
+
+        with (
+            patch.object(client, "_get_client") as mock_get_client,
+            patch("app.services.sandbox_client.settings") as mock_settings,
+        ):
+            mock_client = AsyncMock()
+            mock_client.post.return_value = mock_response
+            mock_get_client.return_value = mock_client
+            mock_settings.tool_http_max_concurrent_per_host = 4
+            mock_settings.tool_http_rate_per_host = 2.5
+            mock_settings.tool_http_max_concurrent = None
+            mock_settings.tool_http_rate = None
+            mock_settings.tool_http_queue_timeout = None
+
+            await client.register_server(
+                server_id="test-server-id",
+                server_name="Test Server",
+                tools=[],
+                version=1,
+            )
+
+            payload = mock_client.post.call_args.kwargs["json"]
+            assert payload["outbound_limits"] == {
+                "max_concurrent_per_host": 4,
+                "rate_per_host": 2.5,
+            }
+
+    @pytest.mark.asyncio
+    async def test_register_server_replaces_later_registration(self):
+        """A registration the sandbox rejects as stale replaces the one it holds."""
+        client = SandboxClient()
+
+        stale = MagicMock()
+        stale.status_code = 409
+        stale.text = "Version 3 of server test-server-id is stale"
+        registered = MagicMock()
+        registered.status_code = 200
+        registered.json.return_value = {"tools_registered": 1}
+
+        with (
+            patch.object(client, "_get_client") as mock_get_client,
+            patch.object(
+                client, "unregister_server", AsyncMock(return_value={"success": True})
+            ) as mock_unregister,
+        ):
+            mock_client = AsyncMock()
+            mock_client.post.side_effect = [stale, registered]
+            mock_get_client.return_value = mock_client
+
+            result = await client.register_server(
+                server_id="test-server-id",
+                server_name="Test Server",
+                tools=[{"name": "tool1"}],
+                version=3,
+            )
+
+            assert result["success"] is True
+            mock_unregister.assert_awaited_once_with("test-server-id")
+            versions = [c.kwargs["json"]["version"] for c in mock_client.post.call_args_list]
+            assert versions == [3, 3]
+
+    @pytest.mark.asyncio
+    async def test_register_server_conflict_reported(self):
+        """A stale registration that can't be replaced is a failure."""
+        client = SandboxClient()
+
+        stale = MagicMock()
+        stale.status_code = 409
+        stale.text = "Version 3 of server test-server-id is stale"
+
+        with (
+            patch.object(client, "_get_client") as mock_get_client,
+            patch.object(client, "unregister_server", AsyncMock(return_value={"success": False})),
+        ):
+            mock_client = AsyncMock()
+            mock_client.post.return_value = stale
+            mock_get_client.return_value = mock_client
+
+            result = await client.register_server(
+                server_id="test-server-id",
+                server_name="Test Server",
+                tools=[],
+                version=3,
+            )
+
+            assert result["success"] is False
+            assert result["conflict"] is True
+
     @pytest.mark.asyncio
     async def test_register_server_circuit_breaker_open(self):
         """Test server registration when circuit breaker is open."""
@@ -262,6 +360,7 @@ class TestSandboxClientRegisterServer:
             server_id="test-server-id",
             server_name="Test Server",
             tools=[],
+            version=1,
         )
 
         assert result["success"] is False
@@ -344,6 +443,120 @@ class TestSandboxClientUpdateSecrets:
             assert "error" in result
 
 
+class TestSandboxClientUpdateServer:
+    """Tests for versioned delta updates of a registered server."""
+
+    def setup_method(self):
+        """Reset singleton before each test."""
+        SandboxClient._instance = None
+        CircuitBreaker._instances = {}
+
+    @pytest.mark.asyncio
+    async def test_update_server_sends_only_delta(self):
+        """Only the changed tools and the server's version are sent."""
+        client = SandboxClient()
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+
+        with patch.object(client, "_request_with_retry", new_callable=AsyncMock) as mock_req:
+            mock_req.return_value = mock_response
+
+            result = await client.update_server(
+                "test-server-id",
+                7,
+                tools=[{"name": "new_tool", "python_code": "async def main(): pass"}],
+                remove_tools=["old_tool"],
+            )
+
+            assert result["success"] is True
+            call_args = mock_req.call_args
+            assert call_args.args[0] == "PATCH"
+            assert call_args.args[1].endswith("/servers/test-server-id")
+            payload = call_args.kwargs["json"]
+            assert [t["name"] for t in payload["tools"]] == ["new_tool"]
+            assert payload["remove_tools"] == ["old_tool"]
+            assert payload["secrets"] == {}
+            assert payload["version"] == 7
+
+    @pytest.mark.asyncio
+    async def test_update_server_stale(self):
+        """A rejected stale update reports a conflict."""
+        client = SandboxClient()
+
+        mock_response = MagicMock()
+        mock_response.status_code = 409
+
+        with patch.object(client, "_request_with_retry", new_callable=AsyncMock) as mock_req:
+            mock_req.return_value = mock_response
+
+            result = await client.update_server("s", 1, remove_tools=["a"])
+
+            assert result["success"] is False
+            assert result["conflict"] is True
+
+    @pytest.mark.asyncio
+    async def test_update_server_not_registered(self):
+        """An update of a server the sandbox doesn't have reports it."""
+        client = SandboxClient()
+
+        mock_response = MagicMock()
+        mock_response.status_code = 404
+
+        with patch.object(client, "_request_with_retry", new_callable=AsyncMock) as mock_req:
+            mock_req.return_value = mock_response
+
+            result = await client.update_server("s", 1, remove_tools=["a"])
+
+            assert result["success"] is False
+            assert result["not_registered"] is True
+
+
+class TestSandboxClientListServers:
+    """Tests for listing the servers registered in the sandbox."""
+
+    def setup_method(self):
+        """Reset singleton before each test."""
+        SandboxClient._instance = None
+        CircuitBreaker._instances = {}
+
+    @pytest.mark.asyncio
+    async def test_list_servers(self):
+        """Registered servers are returned with their registration details."""
+        client = SandboxClient()
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "servers": [{"server_id": "s1", "version": 7, "tools": ["a"]}],
+            "total": 1,
+        }
+
+        with patch.object(client, "_get_client") as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.get.return_value = mock_response
+            mock_get_client.return_value = mock_client
+
+            result = await client.list_servers()
+
+            assert result == [{"server_id": "s1", "version": 7, "tools": ["a"]}]
+            assert mock_client.get.call_args.args[0].endswith("/servers")
+
+    @pytest.mark.asyncio
+    async def test_list_servers_unreachable(self):
+        """An unreachable sandbox lists no servers."""
+        client = SandboxClient()
+
+        with patch.object(client, "_get_client") as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.get.side_effect = httpx.ConnectError("Connection refused")
+            mock_get_client.return_value = mock_client
+
+            result = await client.list_servers()
+
+            assert result == []
+
+
 class TestSandboxClientMCPRequest:
     """Tests for MCP JSON-RPC requests."""
 
@@ -383,6 +596,72 @@ class TestSandboxClientMCPRequest:
             assert result["id"] == 1
             assert "result" in result
 
+    @pytest.mark.asyncio
+    async def test_tools_list_reuses_unchanged_list(self):
+        """A repeated tools/list passes the generation and reuses the last list."""
+        client = SandboxClient()
+        tools = [{"name": "s__t", "description": "", "inputSchema": {}}]
+
+        full = MagicMock()
+        full.status_code = 200
+        full.json.return_value = {
+            "jsonrpc": "2.0",
+            "id": "list",
+            "result": {"tools": tools, "generation": "abc-3"},
+        }
+        unchanged = MagicMock()
+        unchanged.status_code = 200
+        unchanged.json.return_value = {
+            "jsonrpc": "2.0",
+            "id": "list",
+            "result": {"generation": "abc-3", "unchanged": True},
+        }
+        request = {"jsonrpc": "2.0", "id": "list", "method": "tools/list", "params": {}}
+
+        with patch.object(client, "_get_client") as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.post.side_effect = [full, unchanged]
+            mock_get_client.return_value = mock_client
+
+            first = await client.mcp_request(request)
+            second = await client.mcp_request(request)
+
+            assert "generation" not in mock_client.post.call_args_list[0].kwargs["json"]["params"]
+            sent = mock_client.post.call_args_list[1].kwargs["json"]
+            assert sent["params"] == {"generation": "abc-3"}
+            assert first["result"]["tools"] == tools
+            assert second["result"]["tools"] == tools
+            # The caller's request is not modified
+            assert request["params"] == {}
+
+    @pytest.mark.asyncio
+    async def test_tools_list_changed(self):
+        """A changed list replaces the remembered one."""
+        client = SandboxClient()
+
+        responses = []
+        for generation, name in (("abc-3", "s__old"), ("abc-4", "s__new")):
+            response = MagicMock()
+            response.status_code = 200
+            response.json.return_value = {
+                "jsonrpc": "2.0",
+                "id": "list",
+                "result": {"tools": [{"name": name}], "generation": generation},
+            }
+            responses.append(response)
+        request = {"jsonrpc": "2.0", "id": "list", "method": "tools/list", "params": {}}
+
+        with patch.object(client, "_get_client") as mock_get_client:
+            mock_client = AsyncMock()
+            mock_client.post.side_effect = responses
+            mock_get_client.return_value = mock_client
+
+            await client.mcp_request(request)
+            second = await client.mcp_request(request)
+
+            assert second["result"]["tools"] == [{"name": "s__new"}]
+            assert client._tools_list_result["generation"] == "abc-4"
+
     @pytest.mark.asyncio
     async def test_mcp_request_returns_error_on_invalid_json(self):
         """Test MCP request handles invalid JSON response."""
@@ -341,6 +341,7 @@ class TestSecretSyncToSandbox:
         await db_session.flush()
 
         mock_client = MagicMock()
+        mock_client.update_server = AsyncMock(return_value={"success": True})
         mock_client.update_server_secrets = AsyncMock(return_value={"success": True})
 
         with patch("app.api.server_secrets.get_sandbox_client", return_value=mock_client):
@@ -354,12 +355,45 @@ class TestSecretSyncToSandbox:
         data = response.json()
         assert data["has_value"] is True
 
-        # Verify sandbox was called with the decrypted secrets
+        # Verify sandbox was sent just the changed secret
+        mock_client.update_server.assert_called_once()
+        call_args = mock_client.update_server.call_args
+        assert call_args.args[0] == str(server.id)
+        assert call_args.kwargs["secrets"] == {"API_KEY": "my-secret-value"}
+        mock_client.update_server_secrets.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_set_secret_falls_back_to_full_sync(
+        self, async_client: AsyncClient, server_factory, db_session, admin_headers
+    ):
+        """If the sandbox rejects the secret update, all secrets are sent."""
+        from app.models.server_secret import ServerSecret
+
+        server = await server_factory(status="running")
+
+        secret = ServerSecret(
+            server_id=server.id,
+            key_name="API_KEY",
+            description="Test API key",
+        )
+        db_session.add(secret)
+        await db_session.flush()
+
+        mock_client = MagicMock()
+        mock_client.update_server = AsyncMock(return_value={"success": False, "conflict": True})
+        mock_client.update_server_secrets = AsyncMock(return_value={"success": True})
+
+        with patch("app.api.server_secrets.get_sandbox_client", return_value=mock_client):
+            response = await async_client.put(
+                f"/api/servers/{server.id}/secrets/API_KEY",
+                json={"value": "my-secret-value"},
+                headers=admin_headers,
+            )
+
+        assert response.status_code == 200
         mock_client.update_server_secrets.assert_called_once()
         call_args = mock_client.update_server_secrets.call_args
-        assert call_args.args[0] == str(server.id)
-        # The secrets dict should contain the decrypted value
-        assert "API_KEY" in call_args.args[1]
+        assert call_args.args[1] == {"API_KEY": "my-secret-value"}
 
     @pytest.mark.asyncio
     async def test_set_secret_skips_sync_when_stopped(
@@ -379,6 +413,7 @@ class TestSecretSyncToSandbox:
         await db_session.flush()
 
         mock_client = MagicMock()
+        mock_client.update_server = AsyncMock(return_value={"success": True})
         mock_client.update_server_secrets = AsyncMock(return_value={"success": True})
 
         with patch("app.api.server_secrets.get_sandbox_client", return_value=mock_client):
@@ -390,6 +425,7 @@ class TestSecretSyncToSandbox:
 
         assert response.status_code == 200
         # Sandbox should NOT have been called
+        mock_client.update_server.assert_not_called()
         mock_client.update_server_secrets.assert_not_called()
 
     @pytest.mark.asyncio
@@ -412,7 +448,7 @@ class TestSecretSyncToSandbox:
         await db_session.flush()
 
         mock_client = MagicMock()
-        mock_client.update_server_secrets = AsyncMock(return_value={"success": True})
+        mock_client.update_server = AsyncMock(return_value={"success": True})
 
         with patch("app.api.server_secrets.get_sandbox_client", return_value=mock_client):
             response = await async_client.delete(
@@ -422,8 +458,8 @@ class TestSecretSyncToSandbox:
 
         assert response.status_code == 204
 
-        # Verify sandbox was called with empty secrets (the deleted key removed)
-        mock_client.update_server_secrets.assert_called_once()
-        call_args = mock_client.update_server_secrets.call_args
+        # Verify sandbox was told to remove the deleted key
+        mock_client.update_server.assert_called_once()
+        call_args = mock_client.update_server.call_args
         assert call_args.args[0] == str(server.id)
-        assert "OLD_KEY" not in call_args.args[1]
+        assert call_args.kwargs["remove_secrets"] == ["OLD_KEY"]
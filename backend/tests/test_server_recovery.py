@@ -0,0 +1,107 @@
+"""Tests for comparing restored sandbox registrations with the database."""
+
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.services.server_recovery import _is_current
+
+
+def _server(**overrides):
+    """A running server as loaded by recovery (tools, secrets, sources)."""
+    source_id = uuid4()
+    server = SimpleNamespace(
+        id=uuid4(),
+        sandbox_version=5,
+        allowed_hosts=["api.example.com"],
+        tools=[
+            SimpleNamespace(name="get_weather", enabled=True, approval_status="approved"),
+            SimpleNamespace(name="draft", enabled=True, approval_status="pending_review"),
+        ],
+        secrets=[
+            SimpleNamespace(key_name="API_KEY", encrypted_value=b"x"),
+            SimpleNamespace(key_name="PLACEHOLDER", encrypted_value=None),
+        ],
+        external_mcp_sources=[
+            SimpleNamespace(id=source_id, status="active"),
+        ],
+    )
+    for name, value in overrides.items():
+        setattr(server, name, value)
+    return server
+
+
+def _info(server, **overrides):
+    """The sandbox's entry for the server's current registration."""
+    info = {
+        "server_id": str(server.id),
+        "version": server.sandbox_version,
+        "tools": ["get_weather"],
+        "secret_keys": ["API_KEY"],
+        "external_source_ids": [str(s.id) for s in server.external_mcp_sources],
+        "allowed_hosts": ["api.example.com"],
+        "allowed_modules": ["json", "math"],
+    }
+    info.update(overrides)
+    return info
+
+
+class TestIsCurrent:
+    """Tests for _is_current()."""
+
+    def test_unchanged(self):
+        """A registration matching the database is kept."""
+        server = _server()
+
+        assert _is_current(server, _info(server), ["math", "json"])
+
+    def test_not_registered(self):
+        assert not _is_current(_server(), None, ["json", "math"])
+
+    def test_unversioned(self):
+        """Registrations of an older backend can't be compared."""
+        server = _server()
+
+        assert not _is_current(server, _info(server, version=0), ["json", "math"])
+
+    def test_changed_after_registration(self):
+        """A change whose update didn't reach the sandbox is registered again."""
+        server = _server(sandbox_version=6)
+
+        assert not _is_current(server, _info(server, version=5), ["json", "math"])
+
+    def test_registration_rolled_back(self):
+        """A registration sent for a change that was rolled back is replaced."""
+        server = _server()
+
+        assert not _is_current(server, _info(server, version=6), ["json", "math"])
+
+    def test_removed_tool(self):
+        """A deleted tool only shows in the names."""
+        server = _server()
+
+        info = _info(server, tools=["get_weather", "deleted_tool"])
+
+        assert not _is_current(server, info, ["json", "math"])
+
+    def test_removed_secret(self):
+        server = _server()
+
+        info = _info(server, secret_keys=["API_KEY", "OLD_KEY"])
+
+        assert not _is_current(server, info, ["json", "math"])
+
+    def test_allowed_modules_changed(self):
+        server = _server()
+
+        assert not _is_current(server, _info(server), ["json"])
+
+    def test_allowed_hosts_changed(self):
+        server = _server(allowed_hosts=[])
+
+        assert not _is_current(server, _info(server), ["json", "math"])
+
+    def test_disabled_source(self):
+        server = _server()
+        server.external_mcp_sources[0].status = "disabled"
+
+        assert not _is_current(server, _info(server), ["json", "math"])
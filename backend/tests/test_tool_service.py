@@ -40,6 +40,30 @@ async def main(name: str, count: int = 10) -> dict:
         assert "name" in tool.input_schema.get("properties", {})
         assert "count" in tool.input_schema.get("properties", {})
 
+    async def test_create_cacheable_tool(self, db_session, server_factory):
+        """Caching and coalescing options are stored and sent to the sandbox."""
+        from app.services.tool_utils import build_tool_definitions
+
+        server = await server_factory()
+        service = ToolService(db_session)
+
+        data = ToolCreate(
+            name="rates",
+            python_code="async def main(currency: str) -> dict:\n    return {}\n",
+            cacheable=True,
+            cache_ttl_seconds=120,
+            coalesce=True,
+        )
+
+        tool = await service.create(server.id, data)
+
+        assert tool.cacheable is True
+        assert tool.cache_ttl_seconds == 120
+        tool_def = build_tool_definitions([tool])[0]
+        assert tool_def["cacheable"] is True
+        assert tool_def["cache_ttl_seconds"] == 120
+        assert tool_def["coalesce"] is True
+
     async def test_create_tool_creates_initial_version(self, db_session, server_factory):
         """Creating a tool should create an initial version entry."""
         server = await server_factory()
@@ -685,6 +685,55 @@ async def test_test_code_success(
     mock_client.execute_code.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_test_code_returns_profile(
+    async_client: AsyncClient,
+    admin_headers,
+    test_server,
+    db_session: AsyncSession,
+):
+    """profile=true is forwarded to the sandbox and its profile returned."""
+    resp = await async_client.post(
+        f"/api/servers/{test_server['id']}/tools",
+        json={
+            "name": "profiled_tool",
+            "description": "A tool to profile",
+            "python_code": "async def main() -> int:\n    return 1",
+        },
+        headers=admin_headers,
+    )
+    tool_id = resp.json()["id"]
+
+    setting_service = SettingService(db_session)
+    await setting_service.set_value("tool_approval_mode", "auto_approve")
+
+    profile = {"samples": 3, "collapsed": ["main:2 15"], "functions": [], "lines": []}
+    mock_client = MagicMock()
+    mock_client.execute_code = AsyncMock(
+        return_value={
+            "success": True,
+            "result": 1,
+            "stdout": "",
+            "resource_usage": {"cpu_user_ms": 15.0, "http_calls": 0},
+            "profile": profile,
+        }
+    )
+
+    with override_sandbox_client(mock_client):
+        response = await async_client.post(
+            "/api/tools/test-code",
+            json={"tool_id": tool_id, "arguments": {}, "profile": True},
+            headers=admin_headers,
+        )
+
+    await setting_service.set_value("tool_approval_mode", "require_approval")
+
+    data = response.json()
+    assert data["profile"] == profile
+    assert data["resource_usage"]["cpu_user_ms"] == 15.0
+    assert mock_client.execute_code.call_args.kwargs["profile"] is True
+
+
 @pytest.mark.asyncio
 async def test_test_code_logs_test_run(
     async_client: AsyncClient,
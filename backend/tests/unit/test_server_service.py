@@ -336,3 +336,29 @@ class TestServerServiceUpdateStatus:
         result = await service.update_status(uuid4(), "ready")
 
         assert result is None
+
+
+class TestServerServiceNextSandboxVersion:
+    """Tests for ServerService.next_sandbox_version()."""
+
+    async def test_versions_increase(self, db_session, server_factory):
+        """Each change sent to the sandbox gets the next version."""
+        server = await server_factory(status="running")
+        service = ServerService(db_session)
+
+        first = await service.next_sandbox_version(server.id)
+        second = await service.next_sandbox_version(server.id)
+
+        assert (first, second) == (1, 2)
+
+    async def test_server_not_changed(self, db_session, server_factory):
+        """Bumping the version leaves the server's updated_at alone."""
+        server = await server_factory(status="running")
+        service = ServerService(db_session)
+        updated_at = server.updated_at
+
+        await service.next_sandbox_version(server.id)
+        await db_session.refresh(server)
+
+        assert server.sandbox_version == 1
+        assert server.updated_at == updated_at
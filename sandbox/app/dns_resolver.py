@@ -0,0 +1,199 @@
+"""DNS Resolver - non-blocking, cached hostname resolution for SSRF checks.
+
+SSRF validation resolves every hostname tool code (or a passthrough tool)
+talks to, so it can check the addresses and pin the request to one of them.
+socket.getaddrinfo() blocks, and called from a request path it froze the
+whole event loop for as long as the lookup took.
+
+Lookups now run on a small dedicated thread pool and their answers are
+cached:
+
+- Successful answers are kept for SANDBOX_DNS_CACHE_TTL seconds. The system
+  resolver doesn't report record TTLs, so this is an upper bound rather
+  than the record's own TTL; keep it short
+- Failed lookups (NXDOMAIN, no address) are kept for SANDBOX_DNS_NEGATIVE_TTL
+  seconds so a tool retrying a bad hostname doesn't hammer the resolver
+- Concurrent lookups of the same hostname share one resolution
+
+Only raw addresses are cached. Callers still check them on every request
+(blocked ranges depend on the request's admin approval) and connect to the
+address they checked, so the cache doesn't weaken DNS rebinding protection.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Seconds a successful answer is reused
+DNS_CACHE_TTL = float(os.environ.get("SANDBOX_DNS_CACHE_TTL", "30"))
+
+# Seconds a failed lookup is remembered
+DNS_NEGATIVE_TTL = float(os.environ.get("SANDBOX_DNS_NEGATIVE_TTL", "5"))
+
+# Maximum number of cached hostnames (LRU-evicted)
+DNS_CACHE_MAX_ENTRIES = int(os.environ.get("SANDBOX_DNS_CACHE_SIZE", "1024"))
+
+# Threads running lookups; bounds how many slow lookups can be in progress
+DNS_RESOLVER_THREADS = int(os.environ.get("SANDBOX_DNS_RESOLVER_THREADS", "8"))
+
+
+class _Answer:
+    """A cached lookup result: addresses, or the error the lookup raised."""
+
+    __slots__ = ("addresses", "error", "expires_at")
+
+    def __init__(
+        self,
+        addresses: tuple[str, ...],
+        error: socket.gaierror | None,
+        expires_at: float,
+    ):
+        self.addresses = addresses
+        self.error = error
+        self.expires_at = expires_at
+
+
+def _getaddrinfo(hostname: str) -> tuple[str, ...]:
+    """Addresses of *hostname* in resolver order, without duplicates."""
+    results = socket.getaddrinfo(hostname, None, socket.AF_UNSPEC, socket.SOCK_STREAM)
+    return tuple(dict.fromkeys(result[4][0] for result in results))
+
+
+class DnsResolver:
+    """Resolves hostnames off the event loop, with a TTL-bound LRU cache."""
+
+    def __init__(
+        self,
+        ttl: float = DNS_CACHE_TTL,
+        negative_ttl: float = DNS_NEGATIVE_TTL,
+        max_entries: int = DNS_CACHE_MAX_ENTRIES,
+        threads: int = DNS_RESOLVER_THREADS,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._threads = threads
+        self._executor: ThreadPoolExecutor | None = None
+        self._cache: OrderedDict[str, _Answer] = OrderedDict()
+        self._pending: dict[str, asyncio.Future] = {}
+        self.lookups = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.coalesced = 0
+        self.resolutions = 0
+        self.failures = 0
+        self.resolve_time_total_ms = 0.0
+        self.resolve_time_max_ms = 0.0
+
+    async def resolve(self, hostname: str) -> tuple[str, ...]:
+        """Addresses *hostname* resolves to.
+
+        Raises:
+            socket.gaierror: If the lookup failed (possibly a cached failure)
+        """
+        hostname = hostname.lower()
+        self.lookups += 1
+
+        answer = self._cache.get(hostname)
+        if answer is not None:
+            if answer.expires_at > time.monotonic():
+                self._cache.move_to_end(hostname)
+                if answer.error is not None:
+                    self.negative_hits += 1
+                    raise socket.gaierror(*answer.error.args)
+                self.hits += 1
+                return answer.addresses
+            del self._cache[hostname]
+
+        pending = self._pending.get(hostname)
+        if pending is None:
+            pending = asyncio.ensure_future(self._lookup(hostname))
+            self._pending[hostname] = pending
+            pending.add_done_callback(lambda f: self._finished(hostname, f))
+        else:
+            self.coalesced += 1
+        # Shielded: the lookup is shared, one caller going away can't cancel it
+        return await asyncio.shield(pending)
+
+    async def _lookup(self, hostname: str) -> tuple[str, ...]:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._threads, thread_name_prefix="dns"
+            )
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            addresses = await loop.run_in_executor(
+                self._executor, _getaddrinfo, hostname
+            )
+        except socket.gaierror as e:
+            self._record(hostname, (), e, self.negative_ttl)
+            self.failures += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.resolutions += 1
+            self.resolve_time_total_ms += elapsed_ms
+            self.resolve_time_max_ms = max(self.resolve_time_max_ms, elapsed_ms)
+        self._record(hostname, addresses, None, self.ttl)
+        return addresses
+
+    def _finished(self, hostname: str, lookup: asyncio.Future) -> None:
+        if self._pending.get(hostname) is lookup:
+            del self._pending[hostname]
+        if not lookup.cancelled():
+            # Retrieved so a failure whose callers all left isn't logged
+            # as "exception was never retrieved"
+            lookup.exception()
+
+    def _record(
+        self,
+        hostname: str,
+        addresses: tuple[str, ...],
+        error: socket.gaierror | None,
+        ttl: float,
+    ) -> None:
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        self._cache[hostname] = _Answer(addresses, error, time.monotonic() + ttl)
+        self._cache.move_to_end(hostname)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget all cached answers."""
+        self._cache.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Get resolver statistics for monitoring."""
+        cached = self.hits + self.negative_hits
+        return {
+            "entries": len(self._cache),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "negative_ttl_seconds": self.negative_ttl,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "coalesced": self.coalesced,
+            "hit_rate": round(cached / self.lookups, 4) if self.lookups else 0.0,
+            "resolutions": self.resolutions,
+            "failures": self.failures,
+            "resolve_time_avg_ms": (
+                round(self.resolve_time_total_ms / self.resolutions, 2)
+                if self.resolutions
+                else 0.0
+            ),
+            "resolve_time_max_ms": round(self.resolve_time_max_ms, 2),
+        }
+
+
+# Global resolver used by SSRF validation
+dns_resolver = DnsResolver()
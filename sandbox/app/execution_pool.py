@@ -0,0 +1,373 @@
+"""Execution Pool - fair admission and dedicated threads for tool execution.
+
+Tool executions used to start as soon as they arrived, and module init
+(the exec() of tool code) ran on Python's default thread pool, shared with
+everything else in the process. A timed-out init thread can't be killed,
+so it kept its slot there until it finished.
+
+Features:
+- Admission control (opt-in): at most SANDBOX_MAX_CONCURRENT_EXECUTIONS
+  executions run at once, and at most SANDBOX_SERVER_MAX_CONCURRENCY (or
+  the server's own cap) per registered server; 0, the default, is unlimited
+- Fair queuing: waiting calls are queued per server and slots are handed
+  out round-robin across servers, so a busy server can't starve the others
+- Dedicated threads for module init (SANDBOX_EXEC_POOL_THREADS)
+- Zombie accounting: work that outlived its timeout keeps its server's
+  slot and is counted as a zombie until it really finishes, so capacity
+  leaks show up in the stats and only throttle the server that caused them
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Threads dedicated to module init (exec() of tool code)
+EXEC_POOL_THREADS = int(os.environ.get("SANDBOX_EXEC_POOL_THREADS", "8"))
+
+# Executions admitted at once across all servers (0 = unlimited)
+MAX_CONCURRENT_EXECUTIONS = int(
+    os.environ.get("SANDBOX_MAX_CONCURRENT_EXECUTIONS", "0")
+)
+
+# Executions admitted at once per server, unless the server sets its own cap
+# (0 = unlimited)
+SERVER_MAX_CONCURRENCY = int(os.environ.get("SANDBOX_SERVER_MAX_CONCURRENCY", "0"))
+
+
+class ExecutionLease:
+    """Admission slot held by one execution.
+
+    The slot is given back once the execution has returned (close()) and
+    every piece of work it left running after a timeout (see pin()) has
+    finished.
+    """
+
+    __slots__ = ("_closed", "_pins", "_pool", "key")
+
+    def __init__(self, pool: "ExecutionPool", key: str):
+        self._pool = pool
+        self.key = key
+        self._pins = 0
+        self._closed = False
+
+    def pin(self) -> Callable[[], None]:
+        """Keep the slot held by timed-out work that is still running.
+
+        Counts the work as a zombie of this lease's server. Returns a
+        callable (safe to call from any thread, at most once takes effect)
+        to invoke when the work finishes.
+        """
+        return self._pool._pin(self)
+
+    def close(self) -> None:
+        """Give the slot back, or leave it to the last pinned work."""
+        self._pool._close(self)
+
+
+class _Waiter:
+    """A queued acquire() call."""
+
+    __slots__ = ("enqueued_at", "future", "loop")
+
+    def __init__(self, future: asyncio.Future, loop: asyncio.AbstractEventLoop):
+        self.future = future
+        self.loop = loop
+        self.enqueued_at = time.monotonic()
+
+
+class _SyncJob:
+    """Bookkeeping for one run_sync() call, shared with its thread."""
+
+    __slots__ = ("finished", "on_finish")
+
+    def __init__(self):
+        self.finished = False
+        self.on_finish: Callable[[], None] | None = None
+
+
+class ExecutionPool:
+    """Fair, capped admission of tool executions plus a module init pool.
+
+    A cap of 0 means unlimited.
+
+    State is guarded by a thread lock because zombie work finishes on other
+    threads; waiters are woken on their own event loop.
+    """
+
+    def __init__(
+        self,
+        threads: int = EXEC_POOL_THREADS,
+        max_concurrent: int = MAX_CONCURRENT_EXECUTIONS,
+        server_max_concurrency: int = SERVER_MAX_CONCURRENCY,
+    ):
+        self._threads = threads
+        self._max_concurrent = max_concurrent
+        self._server_max_concurrency = server_max_concurrency
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        # Per-server state; entries are dropped once a server is idle
+        self._active: dict[str, int] = {}
+        self._caps: dict[str, int] = {}
+        self._waiters: dict[str, deque[_Waiter]] = {}
+        self._zombies: dict[str, int] = {}
+        # Servers with waiters, in the order they get the next free slot
+        self._rotation: deque[str] = deque()
+        self._total_active = 0
+        self._threads_busy = 0
+        self._threads_queued = 0
+        self.zombie_threads = 0
+        self.admitted = 0
+        self.queued = 0
+        self.queue_timeouts = 0
+        self.zombies_finished = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # --- Admission ---
+
+    def _global_free_locked(self) -> bool:
+        return not self._max_concurrent or self._total_active < self._max_concurrent
+
+    def _server_free_locked(self, key: str) -> bool:
+        cap = self._caps[key]
+        return not cap or self._active.get(key, 0) < cap
+
+    def _can_run_locked(self, key: str) -> bool:
+        return self._global_free_locked() and self._server_free_locked(key)
+
+    def _admit_locked(self, key: str) -> ExecutionLease:
+        self._active[key] = self._active.get(key, 0) + 1
+        self._total_active += 1
+        self.admitted += 1
+        return ExecutionLease(self, key)
+
+    async def acquire(
+        self,
+        key: str,
+        max_concurrency: int | None = None,
+        timeout: float | None = None,
+    ) -> ExecutionLease:
+        """Wait for an execution slot for server *key*.
+
+        Raises asyncio.TimeoutError if no slot is free within *timeout*.
+        The caller must close() the returned lease.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._caps[key] = max_concurrency or self._server_max_concurrency
+            if not self._waiters.get(key) and self._can_run_locked(key):
+                return self._admit_locked(key)
+            waiter = _Waiter(loop.create_future(), loop)
+            if key not in self._waiters:
+                self._waiters[key] = deque()
+                self._rotation.append(key)
+            self._waiters[key].append(waiter)
+            self.queued += 1
+
+        try:
+            return await asyncio.wait_for(waiter.future, timeout)
+        except BaseException as e:
+            with self._lock:
+                queue = self._waiters.get(key)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    if not queue:
+                        del self._waiters[key]
+                        self._rotation.remove(key)
+                if isinstance(e, asyncio.TimeoutError):
+                    self.queue_timeouts += 1
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as we gave up waiting
+                waiter.future.result().close()
+            raise
+
+    def _dispatch_locked(self) -> None:
+        """Hand free slots to waiting servers in round-robin order."""
+        while self._rotation and self._global_free_locked():
+            for _ in range(len(self._rotation)):
+                key = self._rotation[0]
+                self._rotation.rotate(-1)
+                if self._server_free_locked(key):
+                    break
+            else:
+                return  # every waiting server is at its own cap
+
+            queue = self._waiters[key]
+            waiter = queue.popleft()
+            if not queue:
+                del self._waiters[key]
+                self._rotation.remove(key)
+            waited = time.monotonic() - waiter.enqueued_at
+            self._waits += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            lease = self._admit_locked(key)
+            try:
+                waiter.loop.call_soon_threadsafe(self._deliver, waiter.future, lease)
+            except RuntimeError:
+                # The waiter's loop is gone; take the slot back
+                self._release_locked(lease)
+
+    def _deliver(self, future: asyncio.Future, lease: ExecutionLease) -> None:
+        # Runs on the waiter's loop
+        if future.done():
+            lease.close()  # The waiter gave up before it was woken
+        else:
+            future.set_result(lease)
+
+    def _release_locked(self, lease: ExecutionLease) -> None:
+        key = lease.key
+        self._active[key] -= 1
+        self._total_active -= 1
+        if not self._active[key]:
+            del self._active[key]
+            if key not in self._waiters and not self._zombies.get(key):
+                self._caps.pop(key, None)
+                self._zombies.pop(key, None)
+        self._dispatch_locked()
+
+    def _close(self, lease: ExecutionLease) -> None:
+        with self._lock:
+            if lease._closed:
+                return
+            lease._closed = True
+            if not lease._pins:
+                self._release_locked(lease)
+
+    def _pin(self, lease: ExecutionLease) -> Callable[[], None]:
+        with self._lock:
+            lease._pins += 1
+            self._zombies[lease.key] = self._zombies.get(lease.key, 0) + 1
+        unpinned = False
+
+        def unpin() -> None:
+            nonlocal unpinned
+            with self._lock:
+                if unpinned:
+                    return
+                unpinned = True
+                lease._pins -= 1
+                self._zombies[lease.key] -= 1
+                self.zombies_finished += 1
+                if lease._closed and not lease._pins:
+                    self._release_locked(lease)
+
+        return unpin
+
+    # --- Module init threads ---
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._threads, thread_name_prefix="sandbox-exec"
+                )
+            return self._executor
+
+    async def run_sync(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: float,
+        lease: ExecutionLease | None = None,
+    ) -> Any:
+        """Run blocking *fn* on a dedicated thread, waiting up to *timeout*.
+
+        Raises asyncio.TimeoutError when the call takes longer. The thread
+        can't be stopped, so it is counted as a zombie (and keeps *lease*'s
+        slot) until *fn* returns.
+        """
+        job = _SyncJob()
+
+        def _call() -> Any:
+            with self._lock:
+                self._threads_queued -= 1
+                self._threads_busy += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._threads_busy -= 1
+                    job.finished = True
+                    on_finish = job.on_finish
+                if on_finish is not None:
+                    on_finish()
+
+        with self._lock:
+            self._threads_queued += 1
+        future = self._get_executor().submit(_call)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except (TimeoutError, asyncio.CancelledError):
+            if future.cancel():
+                # Never started, so nothing is left running
+                with self._lock:
+                    self._threads_queued -= 1
+                raise
+            unpin = lease.pin() if lease is not None else None
+            with self._lock:
+                if not job.finished:
+                    self.zombie_threads += 1
+                    job.on_finish = functools.partial(self._thread_finished, unpin)
+                    unpin = None
+            if unpin is not None:
+                unpin()  # Finished while we were timing out
+            raise
+
+    def _thread_finished(self, unpin: Callable[[], None] | None) -> None:
+        with self._lock:
+            self.zombie_threads -= 1
+        if unpin is not None:
+            unpin()
+
+    def shutdown(self) -> None:
+        """Stop idle init threads (zombie threads are left to finish)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict[str, Any]:
+        """Get pool statistics for monitoring."""
+        with self._lock:
+            servers = {
+                key: {
+                    "active": self._active.get(key, 0),
+                    "queued": len(self._waiters.get(key, ())),
+                    "zombies": self._zombies.get(key, 0),
+                    "max_concurrency": cap,
+                }
+                for key, cap in self._caps.items()
+            }
+            return {
+                "max_concurrent": self._max_concurrent,
+                "server_max_concurrency": self._server_max_concurrency,
+                "active": self._total_active,
+                "queue_depth": sum(len(q) for q in self._waiters.values()),
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "queue_timeouts": self.queue_timeouts,
+                "wait_ms_avg": round(self._wait_total * 1000 / max(1, self._waits), 1),
+                "wait_ms_max": round(self._wait_max * 1000, 1),
+                "zombies": sum(self._zombies.values()),
+                "zombies_finished": self.zombies_finished,
+                "threads": self._threads,
+                "threads_busy": self._threads_busy,
+                "threads_queued": self._threads_queued,
+                "zombie_threads": self.zombie_threads,
+                "servers": servers,
+            }
+
+
+# Global execution pool
+execution_pool = ExecutionPool()
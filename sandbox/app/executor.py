@@ -1,19 +1,43 @@
 """Python Executor - safely executes user-provided Python code."""
 
+import ast
 import asyncio
+import datetime
+import functools
+import hashlib
 import json
 import logging
 import os
+import re
 import resource
+import sys
+import threading
 import time
 import traceback
+import tracemalloc
+import weakref
+from collections import OrderedDict
+from collections.abc import Callable
 from dataclasses import dataclass
-import datetime
 from io import StringIO
+from json.encoder import encode_basestring_ascii
+from types import (
+    CodeType,
+    CoroutineType,
+    FunctionType,
+    GeneratorType,
+    MethodType,
+    ModuleType,
+)
 from typing import Any, Optional
 
 import httpx
+import regex
 
+from app.execution_pool import ExecutionLease, execution_pool
+from app.http_cache import HttpResponseCache
+from app.outbound_limiter import OutboundLimiter
+from app.profiler import ExecutionProfile, sampling_profiler
 from app.ssrf import SSRFProtectedAsyncHttpClient
 
 logger = logging.getLogger(__name__)
@@ -78,6 +102,35 @@ class ResourceLimitStatus:
 _resource_limit_status = ResourceLimitStatus()
 
 
+# glibc's M_ARENA_MAX mallopt() parameter
+_M_ARENA_MAX = -8
+
+
+def _limit_malloc_arenas(max_arenas: int = 2) -> None:
+    """Cap the number of glibc malloc arenas if RLIMIT_AS is in effect.
+
+    glibc reserves 64MB of address space for every arena it creates (up to
+    8 per core, roughly one per thread that allocates). Under RLIMIT_AS
+    those reservations alone exhaust the limit after a handful of threads
+    (exec() workers, isolated event loops), and unrelated allocations then
+    fail with MemoryError. Without an address space limit the reservations are
+    harmless, so the allocator is left alone. No-op on non-glibc platforms.
+    """
+    try:
+        soft, _ = resource.getrlimit(resource.RLIMIT_AS)
+    except (OSError, ValueError):
+        return
+    if soft == resource.RLIM_INFINITY:
+        return
+    try:
+        import ctypes
+
+        libc = ctypes.CDLL(None)
+        libc.mallopt(_M_ARENA_MAX, max_arenas)
+    except (OSError, AttributeError) as e:
+        logger.debug(f"Could not limit malloc arenas: {e}")
+
+
 def set_resource_limits() -> ResourceLimitStatus:
     """Set resource limits to prevent resource exhaustion attacks.
 
@@ -111,6 +164,8 @@ def set_resource_limits() -> ResourceLimitStatus:
             logger.info(
                 f"Container memory limit already set to {hard // (1024 * 1024)}MB"
             )
+        # The limit counts malloc arena reservations, so keep those small
+        _limit_malloc_arenas()
     except (ValueError, resource.error) as e:
         if in_container:
             # In container, cgroup limits may be enforced instead
@@ -919,26 +974,22 @@ ALLOWED_BUILTIN_NAMES = {
 }
 
 
-def create_safe_builtins(
-    allowed_modules: set[str] | None = None,
-) -> dict[str, Any]:
-    """Create a restricted builtins dict for safe code execution.
+# Number of builtins templates kept (one per distinct allowed-module set)
+SAFE_BUILTINS_CACHE_SIZE = 32
 
-    This is the single source of truth for sandbox builtins, used by both
-    PythonExecutor (tool execution via registry) and the /execute endpoint.
+# Wrapped-module entries kept per template; fromlists come from user code,
+# so the per-template import cache must not grow without bound
+_MAX_WRAPPED_IMPORTS = 256
 
-    Args:
-        allowed_modules: Set of module names that can be imported.
-                        If None, uses DEFAULT_ALLOWED_MODULES.
 
-    Returns:
-        A dict suitable for use as __builtins__ in exec().
+def _build_safe_builtins(allowed_modules: frozenset[str]) -> dict[str, Any]:
+    """Build the builtins template for one allowed-module set.
+
+    The template (and its safe_import closure) is shared by every execution
+    with the same allowed modules; callers only ever get copies of it.
     """
     import builtins
 
-    if allowed_modules is None:
-        allowed_modules = DEFAULT_ALLOWED_MODULES
-
     safe_builtins: dict[str, Any] = {}
 
     for name in ALLOWED_BUILTIN_NAMES:
@@ -951,8 +1002,18 @@ def create_safe_builtins(
     else:
         real_import = __builtins__.__import__
 
+    # Wrapped modules by (name, fromlist). Proxies are immutable, so the same
+    # proxy can be handed to every execution using this template.
+    wrapped: dict[tuple[str, tuple], Any] = {}
+
     def safe_import(name, globals=None, locals=None, fromlist=(), level=0):
-        base_module = name.split(".")[0]
+        key = (name, tuple(fromlist or ()))
+        if level == 0:
+            proxy = wrapped.get(key)
+            if proxy is not None:
+                return proxy
+
+        base_module = name.partition(".")[0]
 
         if name not in allowed_modules and base_module not in allowed_modules:
             raise ImportError(
@@ -965,17 +1026,98 @@ def create_safe_builtins(
 
         # Wrap regex module with timeout protection
         if name == "regex":
-            return TimeoutProtectedRegex(module)
+            proxy = TimeoutProtectedRegex(module)
+        else:
+            # Wrap all imported modules with SafeModuleProxy to prevent
+            # attribute traversal attacks (e.g., json.codecs.sys.modules["os"])
+            proxy = SafeModuleProxy(module, name=name)
 
-        # Wrap all imported modules with SafeModuleProxy to prevent
-        # attribute traversal attacks (e.g., json.codecs.sys.modules["os"])
-        return SafeModuleProxy(module, name=name)
+        if level == 0 and len(wrapped) < _MAX_WRAPPED_IMPORTS:
+            wrapped[key] = proxy
+        return proxy
 
     safe_builtins["__import__"] = safe_import
 
     return safe_builtins
 
 
+class SafeBuiltinsCache:
+    """LRU cache of safe builtins templates keyed by allowed-module set.
+
+    Must be invalidated when installed packages or the global module
+    allowlist change, so cached module proxies don't outlive the modules
+    (and public attribute sets) they were built from.
+    """
+
+    def __init__(self, max_entries: int = SAFE_BUILTINS_CACHE_SIZE):
+        self._max_entries = max_entries
+        self._templates: OrderedDict[frozenset[str], dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, allowed_modules: frozenset[str]) -> dict[str, Any]:
+        """Get the template for *allowed_modules* (never mutate the result)."""
+        with self._lock:
+            template = self._templates.get(allowed_modules)
+            if template is not None:
+                self._templates.move_to_end(allowed_modules)
+                self.hits += 1
+                return template
+            self.misses += 1
+            template = _build_safe_builtins(allowed_modules)
+            self._templates[allowed_modules] = template
+            while len(self._templates) > self._max_entries:
+                self._templates.popitem(last=False)
+            return template
+
+    def invalidate(self) -> None:
+        """Drop all templates and the module proxies they hold."""
+        with self._lock:
+            self._templates.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Get cache statistics for monitoring."""
+        with self._lock:
+            return {
+                "size": len(self._templates),
+                "max_size": self._max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+# Global safe builtins cache
+safe_builtins_cache = SafeBuiltinsCache()
+
+
+def create_safe_builtins(
+    allowed_modules: set[str] | None = None,
+) -> dict[str, Any]:
+    """Create a restricted builtins dict for safe code execution.
+
+    This is the single source of truth for sandbox builtins, used by both
+    PythonExecutor (tool execution via registry) and the /execute endpoint.
+
+    Returns a fresh copy of the cached template for the allowed-module set,
+    so callers can override entries such as ``print`` per execution.
+
+    Args:
+        allowed_modules: Set of module names that can be imported.
+                        If None, uses DEFAULT_ALLOWED_MODULES.
+
+    Returns:
+        A dict suitable for use as __builtins__ in exec().
+    """
+    if allowed_modules is None:
+        allowed_modules = DEFAULT_ALLOWED_MODULES
+
+    return dict(safe_builtins_cache.get(frozenset(allowed_modules)))
+
+
 # NOTE: There is no FORBIDDEN_MODULES list. Admins have full control over
 # which modules are allowed via the global module whitelist in Settings.
 # If an admin chooses to allow potentially dangerous modules like 'os' or
@@ -1052,63 +1194,126 @@ FORBIDDEN_PATTERNS = [
 ]
 
 
-def _ast_validate(code: str, source_name: str) -> tuple[bool, str | None]:
-    """AST-based defense-in-depth validation.
-
-    Catches dunder attribute access that regex might miss (e.g. via Unicode
-    normalization, string concatenation, or creative formatting).
+# Compiled once at import instead of going through the regex module's
+# pattern cache on every call. The patterns are scanned one by one, in list
+# order, so the reported pattern is always the first-listed one that
+# matches: the regex engine finds each pattern's literal prefix with a fast
+# string search, which beats a single alternation that has to try every
+# branch at every position.
+_FORBIDDEN_REGEXES = [regex.compile(pattern) for pattern in FORBIDDEN_PATTERNS]
 
-    Returns (is_safe, error_message).
-    """
-    import ast
-
-    try:
-        tree = ast.parse(code, filename=source_name, mode="exec")
-    except SyntaxError:
-        # Syntax errors will be caught later during exec() — let them through
-        return True, None
-
-    # Forbidden attribute names accessed via dotted notation
-    forbidden_attrs = {
-        "__class__",
-        "__bases__",
-        "__mro__",
-        "__subclasses__",
-        "__globals__",
-        "__code__",
-        "__builtins__",
-        "__import__",
-        "__loader__",
-        "__spec__",
-        "__dict__",
-        "__traceback__",
+# Forbidden attribute names accessed via dotted notation
+_AST_FORBIDDEN_ATTRS = frozenset(
+    FORBIDDEN_DUNDER_ATTRS
+    | {
         "__init_subclass__",
         "__set_name__",
         "__del__",
         "__reduce__",
         "__reduce_ex__",
     }
+)
+
+# Forbidden function calls
+_AST_FORBIDDEN_CALLS = frozenset(
+    {"getattr", "setattr", "hasattr", "delattr", "vars", "dir"}
+)
 
-    # Forbidden function calls
-    forbidden_calls = {"getattr", "setattr", "hasattr", "delattr", "vars", "dir"}
+_AST_FORBIDDEN_NAMES = tuple(sorted(_AST_FORBIDDEN_ATTRS | _AST_FORBIDDEN_CALLS))
 
+# Any forbidden name as a whole identifier
+_AST_FORBIDDEN_IDENTIFIER = regex.compile(
+    r"\b(?:" + "|".join(_AST_FORBIDDEN_NAMES) + r")\b"
+)
+
+
+def _ast_check_needed(code: str) -> bool:
+    """Whether the AST layer could possibly find a violation in *code*.
+
+    In ASCII source every identifier is spelled out literally, so if no
+    forbidden name appears as a whole word the AST walk can't find one and
+    the code doesn't need to be parsed for validation. Non-ASCII source is
+    always walked: NFKC normalization can turn look-alike characters into a
+    forbidden identifier.
+    """
+    if not code.isascii():
+        return True
+    # Plain substring checks are much cheaper than a regex scan and rule out
+    # almost all code; the word-boundary scan weeds out e.g. "direction".
+    if not any(name in code for name in _AST_FORBIDDEN_NAMES):
+        return False
+    return _AST_FORBIDDEN_IDENTIFIER.search(code, timeout=REGEX_TIMEOUT) is not None
+
+
+def _ast_check(tree: ast.AST, source_name: str) -> str | None:
+    """Return the first AST violation in *tree* (in ast.walk order), or None."""
     for node in ast.walk(tree):
         # Check attribute access: something.__class__, etc.
-        if isinstance(node, ast.Attribute) and node.attr in forbidden_attrs:
-            return False, (
+        if isinstance(node, ast.Attribute) and node.attr in _AST_FORBIDDEN_ATTRS:
+            return (
                 f"Security violation in {source_name}: "
                 f"Access to '.{node.attr}' is forbidden (line {node.lineno})."
             )
 
         # Check forbidden function calls: getattr(...), vars(...), etc.
         if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
-            if node.func.id in forbidden_calls:
-                return False, (
+            if node.func.id in _AST_FORBIDDEN_CALLS:
+                return (
                     f"Security violation in {source_name}: "
                     f"Call to '{node.func.id}()' is forbidden (line {node.lineno})."
                 )
+    return None
 
-    return True, None
+
+def _regex_validate(code: str, source_name: str) -> str | None:
+    """Regex layer: return the error message for the first matching pattern."""
+    for pattern in _FORBIDDEN_REGEXES:
+        try:
+            match = pattern.search(code, timeout=REGEX_TIMEOUT)
+            if match:
+                # Extract the specific forbidden attribute for the error message
+                matched_text = match.group(0)
+                return (
+                    f"Security violation in {source_name}: "
+                    f"Access to '{matched_text}' is forbidden. "
+                    f"This pattern can be used to escape the sandbox."
+                )
+        except regex.TimeoutError:
+            # If regex times out, reject the code as potentially malicious
+            return (
+                f"Security violation in {source_name}: "
+                f"Code pattern analysis timed out (possible ReDoS attempt)"
+            )
+    return None
+
+
+def _validate_and_parse(
+    code: str, source_name: str
+) -> tuple[bool, str | None, ast.Module | None]:
+    """Validate *code*, returning its AST if validation had to parse it.
+
+    Callers that compile the code can compile the returned tree instead of
+    parsing the source a second time. The tree is None when validation
+    didn't need it or the code has a syntax error.
+    """
+    error = _regex_validate(code, source_name)
+    if error is not None:
+        return False, error, None
+
+    try:
+        if not _ast_check_needed(code):
+            return True, None, None
+    except regex.TimeoutError:
+        pass  # Can't rule the AST layer out cheaply; do the full walk
+
+    try:
+        tree = ast.parse(code, filename=source_name, mode="exec")
+    except SyntaxError:
+        # Syntax errors will be caught later during exec() — let them through
+        return True, None, None
+
+    error = _ast_check(tree, source_name)
+    return error is None, error, tree
 
 
 def validate_code_safety(
@@ -1118,7 +1323,8 @@ def validate_code_safety(
 
     Uses two layers:
     1. Regex-based pattern matching (catches string patterns)
-    2. AST-based validation (catches attribute access and forbidden calls)
+    2. AST-based validation (catches attribute access and forbidden calls),
+       skipped when the source can't contain a forbidden identifier
 
     Args:
         code: Python source code to validate
@@ -1127,29 +1333,139 @@ def validate_code_safety(
     Returns:
         Tuple of (is_safe, error_message). If is_safe is True, error_message is None.
     """
-    import regex
+    is_safe, error, _ = _validate_and_parse(code, source_name)
+    return is_safe, error
 
-    # Layer 1: Regex-based pattern matching
-    for pattern in FORBIDDEN_PATTERNS:
-        try:
-            match = regex.search(pattern, code, timeout=REGEX_TIMEOUT)
-            if match:
-                # Extract the specific forbidden attribute for the error message
-                matched_text = match.group(0)
-                return False, (
-                    f"Security violation in {source_name}: "
-                    f"Access to '{matched_text}' is forbidden. "
-                    f"This pattern can be used to escape the sandbox."
-                )
-        except regex.TimeoutError:
-            # If regex times out, reject the code as potentially malicious
-            return False, (
-                f"Security violation in {source_name}: "
-                f"Code pattern analysis timed out (possible ReDoS attempt)"
+
+# =============================================================================
+# COMPILED CODE CACHE
+# =============================================================================
+#
+# Published tool code never changes between calls, yet validation (regex scan
+# + AST walk) and compile() used to run on every execution. The cache stores
+# the validation verdict and the compiled code object keyed by a SHA-256 of
+# the source, so identical code is only validated and compiled once.
+#
+# Keying by content hash (not tool name) means a changed tool body is always
+# re-validated, and identical code shared between tools is compiled once.
+# =============================================================================
+
+# Maximum number of compiled code objects kept in memory (LRU-evicted)
+CODE_CACHE_MAX_ENTRIES = int(os.environ.get("SANDBOX_CODE_CACHE_SIZE", "512"))
+
+
+def code_hash(python_code: str) -> str:
+    """Content hash used as the compiled code cache key."""
+    return hashlib.sha256(python_code.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+@dataclass
+class CompiledCode:
+    """A validated (and, if safe, compiled) piece of tool source code."""
+
+    code_hash: str
+    code: CodeType | None = None
+    # Security violation message; set when validation rejected the code
+    error: str | None = None
+
+    @property
+    def is_safe(self) -> bool:
+        return self.error is None
+
+
+class CompiledCodeCache:
+    """Bounded LRU cache of validated and compiled tool code.
+
+    Only deterministic outcomes are cached: a successful compile or a
+    security violation. SyntaxError is raised to the caller and not cached,
+    so error reporting (line numbers, code context) stays on the normal path.
+    """
+
+    def __init__(self, max_entries: int = CODE_CACHE_MAX_ENTRIES):
+        self._entries: OrderedDict[str, CompiledCode] = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, python_code: str, source_name: str = "<tool>") -> CompiledCode:
+        """Return the cached entry for *python_code*, validating and compiling on miss.
+
+        Raises:
+            SyntaxError: If the code passes validation but does not compile.
+        """
+        key = code_hash(python_code)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Validate and compile outside the lock — both can take milliseconds
+        # for large tools and must not serialize unrelated lookups.
+        # The validator's AST is compiled directly so the source is parsed
+        # once; with a syntax error, compile() re-raises it from source.
+        is_safe, error_msg, tree = _validate_and_parse(python_code, source_name)
+        if is_safe:
+            source = tree if tree is not None else python_code
+            entry = CompiledCode(
+                code_hash=key, code=compile(source, source_name, "exec")
             )
+        else:
+            entry = CompiledCode(code_hash=key, error=error_msg)
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def clear(self) -> None:
+        """Drop all cached entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def export(self) -> list[CompiledCode]:
+        """The cached entries, least recently used first."""
+        with self._lock:
+            return list(self._entries.values())
+
+    def load(self, entries: list[CompiledCode]) -> None:
+        """Add entries exported earlier (e.g. by a previous sandbox process).
+
+        The caller must make sure they came from the same validator and
+        Python version: a loaded entry is trusted like a compiled one.
+        """
+        with self._lock:
+            for entry in entries:
+                self._entries[entry.code_hash] = entry
+                self._entries.move_to_end(entry.code_hash)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        """Get cache statistics for monitoring."""
+        return {
+            "size": self.size,
+            "max_size": self._max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
 
-    # Layer 2: AST-based validation (defense-in-depth)
-    return _ast_validate(code, source_name)
+
+# Global compiled code cache (shared by all servers; keyed by content hash)
+compiled_code_cache = CompiledCodeCache()
 
 
 class TimeoutProtectedRegex:
@@ -1305,6 +1621,126 @@ class TimeoutProtectedRegex:
         return self._regex.TimeoutError
 
 
+# =============================================================================
+# RESULT ENCODING
+# =============================================================================
+#
+# A tool result is encoded to JSON exactly once, by encode_result(), and the
+# bytes travel with the ExecutionResult to the HTTP response. The size limit
+# is enforced while encoding: the outer containers of the result are walked
+# element by element, and encoding stops at the first element that crosses
+# the limit instead of serializing the whole value first.
+# =============================================================================
+
+# Container levels walked element by element before handing whole subtrees
+# to the C encoder. Two covers the common shapes (a list of rows, or an
+# object wrapping one) without paying Python-level cost per leaf.
+_ENCODE_STREAM_DEPTH = 2
+
+
+class _OutputLimitExceeded(Exception):
+    """Raised inside _BoundedJSONWriter once the output limit is crossed."""
+
+
+class _BoundedJSONWriter:
+    """Collects JSON text chunks and stops once they exceed ``limit`` chars.
+
+    Produces exactly the text ``json.dumps()`` would (default separators,
+    ASCII-escaped), so the encoded result doesn't depend on where it stops.
+    """
+
+    __slots__ = ("chunks", "limit", "size")
+
+    def __init__(self, limit: int):
+        self.chunks: list[str] = []
+        self.size = 0
+        self.limit = limit
+
+    def write(self, text: str) -> None:
+        self.chunks.append(text)
+        self.size += len(text)
+        if self.size > self.limit:
+            raise _OutputLimitExceeded
+
+    def encode(self, value: Any, depth: int) -> None:
+        if depth and isinstance(value, (list, tuple)) and value:
+            separator = "["
+            for item in value:
+                self.write(separator)
+                self.encode(item, depth - 1)
+                separator = ", "
+            self.write("]")
+        elif (
+            depth
+            and isinstance(value, dict)
+            and value
+            and all(type(key) is str for key in value)
+        ):
+            # Non-string keys are coerced by the C encoder below instead
+            separator = "{"
+            for key, item in value.items():
+                self.write(separator + encode_basestring_ascii(key) + ": ")
+                self.encode(item, depth - 1)
+                separator = ", "
+            self.write("}")
+        else:
+            self.write(json.dumps(value))
+
+
+def _truncate_result_text(text: str, max_size: int) -> str:
+    """Cut *text* to *max_size* characters and append the truncation notice."""
+    return (
+        text[:max_size]
+        + f"\n... [RESULT TRUNCATED - exceeded {max_size // 1024}KB limit] ..."
+    )
+
+
+def encode_result(
+    value: Any,
+    max_size: int = MAX_OUTPUT_SIZE,
+    redactor: "SecretRedactor | None" = None,
+) -> tuple[Any, bytes]:
+    """Encode a tool result to JSON once, enforcing the output size limit.
+
+    Strings longer than *max_size* and values whose JSON text is longer
+    than *max_size* are replaced by the truncated text plus a notice, the
+    same as ExecutionResult.to_dict() does. If *redactor* is given, secrets
+    are redacted before truncation so a secret cut by the limit can't leak
+    a prefix.
+
+    Returns:
+        (value, json_bytes): the value as it will be reported (the original,
+        redacted or truncated) and its JSON encoding.
+
+    Raises:
+        TypeError, ValueError: if the value isn't JSON-serializable.
+    """
+    if isinstance(value, str):
+        if redactor:
+            value = redactor.redact_text(value)
+        if len(value) > max_size:
+            value = _truncate_result_text(value, max_size)
+        return value, json.dumps(value).encode()
+
+    writer = _BoundedJSONWriter(max_size)
+    try:
+        writer.encode(value, _ENCODE_STREAM_DEPTH)
+        truncated = False
+    except _OutputLimitExceeded:
+        truncated = True
+    text = "".join(writer.chunks)
+    del writer
+
+    if redactor and redactor.contains_secret(text):
+        # The JSON text only tells that a secret occurs; redact the value
+        # itself so structure and escaping stay right, then encode again
+        return encode_result(redactor.redact_value(value), max_size)
+    if truncated:
+        value = _truncate_result_text(text, max_size)
+        return value, json.dumps(value).encode()
+    return value, text.encode()
+
+
 class ErrorDetail:
     """Detailed error information for debugging."""
 
@@ -1351,6 +1787,10 @@ class DebugInfo:
 
     def __init__(self):
         self.http_calls: list[dict[str, Any]] = []
+        # HTTP response cache lookups by outcome (servers with the cache on)
+        self.http_cache: dict[str, int] = {}
+        # Time requests waited for the server's outbound limits
+        self.outbound_queue: dict[str, float] = {}
 
     def add_http_call(
         self,
@@ -1361,22 +1801,106 @@ class DebugInfo:
         request_headers: Optional[dict] = None,
         response_preview: Optional[str] = None,
         error: Optional[str] = None,
+        cache: str | None = None,
+        timings: dict[str, float] | None = None,
+        connection_reused: bool | None = None,
+        request_bytes: int | None = None,
+        response_bytes: int | None = None,
     ):
-        self.http_calls.append(
-            {
-                "method": method,
-                "url": url,
-                "status_code": status_code,
-                "duration_ms": duration_ms,
-                "request_headers": request_headers,
-                "response_preview": response_preview,
-                "error": error,
-            }
-        )
+        call = {
+            "method": method,
+            "url": url,
+            "status_code": status_code,
+            "duration_ms": duration_ms,
+            "request_headers": request_headers,
+            "response_preview": response_preview,
+            "error": error,
+        }
+        if cache is not None:
+            call["cache"] = cache
+        if timings is not None:
+            call["timings"] = timings
+        if connection_reused is not None:
+            call["connection_reused"] = connection_reused
+        if request_bytes is not None:
+            call["request_bytes"] = request_bytes
+        if response_bytes is not None:
+            call["response_bytes"] = response_bytes
+        self.http_calls.append(call)
+
+    def add_http_cache_lookup(
+        self, method: str, url: str, outcome: str, status_code: int
+    ) -> None:
+        """Count a response cache lookup; hits never reach DebugHttpClient."""
+        key = {"hit": "hits", "miss": "misses"}.get(outcome, outcome)
+        self.http_cache[key] = self.http_cache.get(key, 0) + 1
+        if outcome == "hit":
+            self.add_http_call(
+                method=method, url=url, status_code=status_code, cache="hit"
+            )
+
+    def add_outbound_wait(self, hostname: str, wait_ms: float, timed_out: bool) -> None:
+        """Record how long a request waited for its turn to go out."""
+        queue = self.outbound_queue
+        queue["requests"] = queue.get("requests", 0) + 1
+        if timed_out:
+            queue["timeouts"] = queue.get("timeouts", 0) + 1
+        queue["wait_ms"] = round(queue.get("wait_ms", 0) + wait_ms, 2)
+        queue["max_wait_ms"] = round(max(queue.get("max_wait_ms", 0), wait_ms), 2)
+
+    def to_dict(self) -> dict[str, Any]:
+        info: dict[str, Any] = {
+            "http_calls": self.http_calls,
+        }
+        if self.http_cache:
+            info["http_cache"] = dict(self.http_cache)
+        if self.outbound_queue:
+            info["outbound_queue"] = dict(self.outbound_queue)
+        return info
+
+
+class ResourceUsage:
+    """Resources consumed by one execution.
+
+    CPU time covers the tool's own code (module init and every step of
+    main()), not other executions sharing the thread. HTTP counters cover
+    the injected ``http`` client; bytes are request and response bodies
+    (response bytes as downloaded, before decompression). Peak memory is
+    only known when tracemalloc is on and nothing else ran concurrently
+    (see PeakMemoryTracker); it is None otherwise.
+    """
+
+    __slots__ = (
+        "cpu_sys",
+        "cpu_user",
+        "http_bytes_received",
+        "http_bytes_sent",
+        "http_calls",
+        "peak_memory_bytes",
+    )
+
+    def __init__(self):
+        self.cpu_user = 0.0
+        self.cpu_sys = 0.0
+        self.peak_memory_bytes: int | None = None
+        self.http_calls = 0
+        self.http_bytes_sent = 0
+        self.http_bytes_received = 0
+
+    def add_cpu_since(self, start: tuple[float, float]) -> None:
+        """Add the current thread's CPU time since *start* (_thread_cpu_times)."""
+        user, system = _thread_cpu_times()
+        self.cpu_user += user - start[0]
+        self.cpu_sys += system - start[1]
 
     def to_dict(self) -> dict[str, Any]:
         return {
+            "cpu_user_ms": round(self.cpu_user * 1000, 3),
+            "cpu_sys_ms": round(self.cpu_sys * 1000, 3),
+            "peak_memory_bytes": self.peak_memory_bytes,
             "http_calls": self.http_calls,
+            "http_bytes_sent": self.http_bytes_sent,
+            "http_bytes_received": self.http_bytes_received,
         }
 
 
@@ -1392,6 +1916,9 @@ class ExecutionResult:
         stdout: str = "",
         duration_ms: int = 0,
         debug_info: Optional[DebugInfo] = None,
+        result_json: bytes | None = None,
+        resource_usage: ResourceUsage | None = None,
+        profile: ExecutionProfile | None = None,
     ):
         self.success = success
         self.result = result
@@ -1400,12 +1927,22 @@ class ExecutionResult:
         self.stdout = stdout
         self.duration_ms = duration_ms
         self.debug_info = debug_info
+        # JSON encoding of ``result`` from encode_result(), already within
+        # MAX_OUTPUT_SIZE. Sent to the client as-is instead of re-encoding.
+        self.result_json = result_json
+        self.resource_usage = resource_usage
+        self.profile = profile
 
-    def to_dict(self) -> dict[str, Any]:
-        """Convert to dictionary for JSON serialization."""
-        # Enforce result size limit to prevent memory exhaustion
+    def to_dict(self, include_json: bool = False) -> dict[str, Any]:
+        """Convert to dictionary for JSON serialization.
+
+        With *include_json*, the pre-encoded result bytes are added under
+        ``result_json`` (when present) for routes that send them directly.
+        """
+        # Enforce result size limit to prevent memory exhaustion. Results
+        # from encode_result() have already been checked.
         result_value = self.result
-        if result_value is not None:
+        if result_value is not None and self.result_json is None:
             try:
                 result_serialized = (
                     json.dumps(result_value)
@@ -1443,6 +1980,12 @@ class ExecutionResult:
             result["error_detail"] = self.error_detail.to_dict()
         if self.debug_info:
             result["debug_info"] = self.debug_info.to_dict()
+        if self.resource_usage is not None:
+            result["resource_usage"] = self.resource_usage.to_dict()
+        if self.profile is not None:
+            result["profile"] = self.profile.to_dict()
+        if include_json and self.result_json is not None:
+            result["result_json"] = self.result_json
         return result
 
 
@@ -1569,10 +2112,81 @@ def _extract_http_info(exception: Exception) -> Optional[dict[str, Any]]:
 # SSRFProtectedAsyncHttpClient is imported at the top of the file
 
 
+# httpcore step name -> phase it belongs to (see _HttpPhaseTimer)
+_HTTP_TRACE_PHASES = {
+    "connect_tcp": "connect",
+    "connect_unix_socket": "connect",
+    "start_tls": "tls",
+    "send_request_headers": "send_headers",
+    "send_request_body": "send_body",
+    "receive_response_headers": "response_headers",
+    "receive_response_body": "response_body",
+}
+
+
+class _HttpPhaseTimer:
+    """Times the phases of one HTTP call from httpcore's trace events.
+
+    httpcore reports each step of a request (TCP connect, TLS handshake,
+    sending the request, receiving headers and body) as started/complete
+    events through the ``trace`` request extension. No connect event means
+    the request went out on a pooled connection.
+    """
+
+    def __init__(self, chained: Callable[..., Any] | None = None):
+        self._chained = chained  # trace callback the tool passed itself
+        self._marks: dict[str, float] = {}
+
+    async def trace(self, event_name: str, info: dict[str, Any]) -> None:
+        step, _, state = event_name.partition(".")[2].rpartition(".")
+        phase = _HTTP_TRACE_PHASES.get(step)
+        if phase is not None and state in ("started", "complete"):
+            mark = f"{phase}.{state}"
+            # Keep the first connect: through a proxy the tunnel set-up
+            # (CONNECT round trip) is part of connecting
+            if mark != "connect.started" or mark not in self._marks:
+                self._marks[mark] = time.perf_counter()
+        if self._chained is not None:
+            await self._chained(event_name, info)
+
+    def _span(self, start: str, end: str) -> float | None:
+        started = self._marks.get(start)
+        ended = self._marks.get(end)
+        if started is None or ended is None or ended < started:
+            return None
+        return round((ended - started) * 1000, 2)
+
+    def timings(self) -> dict[str, float]:
+        """Phase durations in ms; phases that didn't happen are left out."""
+        connected = "connect.complete"
+        if "tls.started" in self._marks:
+            connected = "tls.started"
+        spans = {
+            "connect_ms": self._span("connect.started", connected),
+            "tls_ms": self._span("tls.started", "tls.complete"),
+            "send_ms": self._span("send_headers.started", "send_body.complete"),
+            "ttfb_ms": self._span("send_body.complete", "response_headers.complete"),
+            "download_ms": self._span(
+                "response_body.started", "response_body.complete"
+            ),
+        }
+        return {name: value for name, value in spans.items() if value is not None}
+
+    @property
+    def connection_reused(self) -> bool | None:
+        """Whether a pooled connection was used (None = no transport events)."""
+        if not self._marks:
+            return None
+        return "connect.started" not in self._marks
+
+
 class DebugHttpClient:
     """Wrapper around httpx.AsyncClient that captures request/response info.
 
     Used in debug mode to provide visibility into HTTP calls made by user code.
+    Besides the total duration, each call records its phase timings (DNS
+    lookup by SSRF validation, connect, TLS, send, time to first byte and
+    download), whether its connection was reused and the bytes transferred.
     """
 
     def __init__(self, client: httpx.AsyncClient, debug_info: DebugInfo):
@@ -1586,6 +2200,7 @@ class DebugHttpClient:
         response: Optional[httpx.Response] = None,
         error: Optional[Exception] = None,
         duration_ms: int = 0,
+        phase_timer: _HttpPhaseTimer | None = None,
         **kwargs,
     ):
         """Capture request/response details for debugging."""
@@ -1600,6 +2215,8 @@ class DebugHttpClient:
 
         response_preview = None
         status_code = None
+        request_bytes = None
+        response_bytes = None
 
         if response:
             status_code = response.status_code
@@ -1611,6 +2228,20 @@ class DebugHttpClient:
                 response_preview = content
             except Exception:
                 response_preview = "[binary content]"
+            # Bytes on the wire (before decompression)
+            response_bytes = response.num_bytes_downloaded
+            try:
+                request_bytes = len(response.request.content)
+            except httpx.RequestNotRead:
+                pass  # streamed request body
+
+        timings: dict[str, float] = {}
+        # Time SSRF validation spent resolving the hostname (direct mode)
+        dns_ms = (kwargs.get("extensions") or {}).get("dns_ms")
+        if dns_ms is not None:
+            timings["dns_ms"] = dns_ms
+        if phase_timer is not None:
+            timings.update(phase_timer.timings())
 
         self._debug_info.add_http_call(
             method=method,
@@ -1620,153 +2251,788 @@ class DebugHttpClient:
             request_headers=request_headers if request_headers else None,
             response_preview=response_preview,
             error=str(error) if error else None,
+            timings=timings or None,
+            connection_reused=(
+                phase_timer.connection_reused if phase_timer is not None else None
+            ),
+            request_bytes=request_bytes,
+            response_bytes=response_bytes,
         )
 
-    async def get(self, url, **kwargs):
+    async def _call(self, method: str, url, kwargs: dict, send) -> httpx.Response:
+        """Run *send*, timing it and recording the call."""
+        extensions = dict(kwargs.get("extensions") or {})
+        phase_timer = _HttpPhaseTimer(extensions.get("trace"))
+        extensions["trace"] = phase_timer.trace
+        kwargs["extensions"] = extensions
         start = time.monotonic()
         try:
-            response = await self._client.get(url, **kwargs)
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                "GET", url, response=response, duration_ms=duration, **kwargs
-            )
-            return response
+            response = await send(url, **kwargs)
         except Exception as e:
             duration = int((time.monotonic() - start) * 1000)
             await self._capture_request(
-                "GET", url, error=e, duration_ms=duration, **kwargs
+                method,
+                url,
+                error=e,
+                duration_ms=duration,
+                phase_timer=phase_timer,
+                **kwargs,
             )
             raise
+        duration = int((time.monotonic() - start) * 1000)
+        await self._capture_request(
+            method,
+            url,
+            response=response,
+            duration_ms=duration,
+            phase_timer=phase_timer,
+            **kwargs,
+        )
+        return response
+
+    async def get(self, url, **kwargs):
+        return await self._call("GET", url, kwargs, self._client.get)
 
     async def post(self, url, **kwargs):
-        start = time.monotonic()
-        try:
-            response = await self._client.post(url, **kwargs)
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                "POST", url, response=response, duration_ms=duration, **kwargs
-            )
-            return response
-        except Exception as e:
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                "POST", url, error=e, duration_ms=duration, **kwargs
-            )
-            raise
+        return await self._call("POST", url, kwargs, self._client.post)
 
     async def put(self, url, **kwargs):
-        start = time.monotonic()
-        try:
-            response = await self._client.put(url, **kwargs)
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                "PUT", url, response=response, duration_ms=duration, **kwargs
-            )
-            return response
-        except Exception as e:
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                "PUT", url, error=e, duration_ms=duration, **kwargs
-            )
-            raise
+        return await self._call("PUT", url, kwargs, self._client.put)
 
     async def patch(self, url, **kwargs):
-        start = time.monotonic()
-        try:
-            response = await self._client.patch(url, **kwargs)
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                "PATCH", url, response=response, duration_ms=duration, **kwargs
-            )
-            return response
-        except Exception as e:
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                "PATCH", url, error=e, duration_ms=duration, **kwargs
-            )
-            raise
+        return await self._call("PATCH", url, kwargs, self._client.patch)
 
     async def delete(self, url, **kwargs):
-        start = time.monotonic()
-        try:
-            response = await self._client.delete(url, **kwargs)
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                "DELETE", url, response=response, duration_ms=duration, **kwargs
-            )
-            return response
-        except Exception as e:
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                "DELETE", url, error=e, duration_ms=duration, **kwargs
-            )
-            raise
+        return await self._call("DELETE", url, kwargs, self._client.delete)
 
     async def head(self, url, **kwargs):
-        start = time.monotonic()
-        try:
-            response = await self._client.head(url, **kwargs)
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                "HEAD", url, response=response, duration_ms=duration, **kwargs
-            )
-            return response
-        except Exception as e:
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                "HEAD", url, error=e, duration_ms=duration, **kwargs
-            )
-            raise
+        return await self._call("HEAD", url, kwargs, self._client.head)
 
     async def options(self, url, **kwargs):
-        start = time.monotonic()
-        try:
-            response = await self._client.options(url, **kwargs)
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                "OPTIONS", url, response=response, duration_ms=duration, **kwargs
-            )
-            return response
-        except Exception as e:
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                "OPTIONS", url, error=e, duration_ms=duration, **kwargs
-            )
-            raise
+        return await self._call("OPTIONS", url, kwargs, self._client.options)
 
     async def request(self, method, url, **kwargs):
-        start = time.monotonic()
+        return await self._call(
+            method,
+            url,
+            kwargs,
+            lambda target_url, **options: self._client.request(
+                method, target_url, **options
+            ),
+        )
+
+
+# =============================================================================
+# RESOURCE ACCOUNTING
+# =============================================================================
+#
+# Every execution reports a ResourceUsage. Several tools can share a thread
+# (the sandbox loop, or a reused init thread), so CPU time is measured per
+# thread around the tool's own work: the exec() of its module body, and each
+# step of its main() coroutine between two awaits.
+# =============================================================================
+
+# Per-thread rusage is Linux-only; elsewhere fall back to thread_time()
+# (user and system time combined, reported as user time)
+_RUSAGE_THREAD = getattr(resource, "RUSAGE_THREAD", None)
+
+# Trace Python allocations to report per-execution peak memory. Costs
+# noticeably on every allocation, so it is opt-in.
+TRACK_MEMORY = os.environ.get("SANDBOX_TRACK_MEMORY", "false").lower() == "true"
+
+
+def _thread_cpu_times() -> tuple[float, float]:
+    """(user, system) CPU seconds consumed by the current thread."""
+    if _RUSAGE_THREAD is not None:
+        usage = resource.getrusage(_RUSAGE_THREAD)
+        return usage.ru_utime, usage.ru_stime
+    return time.thread_time(), 0.0
+
+
+def exec_metered(
+    code: CodeType,
+    namespace: dict,
+    usage: ResourceUsage,
+    profile: ExecutionProfile | None = None,
+) -> None:
+    """exec() *code*, adding the CPU time it takes to *usage*.
+
+    With *profile*, the module body is sampled while it runs.
+    """
+    start = _thread_cpu_times()
+    if profile is not None:
+        profile.enter(sys._getframe())
+    try:
+        exec(code, namespace)  # noqa: S102 - validated tool code
+    finally:
+        if profile is not None:
+            profile.leave()
+        usage.add_cpu_since(start)
+
+
+class _CpuMeteredCoroutine:
+    """Awaitable that drives a coroutine and meters CPU time per step.
+
+    With a profile, each step is sampled as running tool code and the
+    coroutine's await chain is sampled while it is suspended.
+    """
+
+    __slots__ = ("_coro", "_profile", "_usage")
+
+    def __init__(
+        self, coro, usage: ResourceUsage, profile: ExecutionProfile | None = None
+    ):
+        self._coro = coro
+        self._usage = usage
+        self._profile = profile
+
+    def __await__(self):
+        coro, usage, profile = self._coro, self._usage, self._profile
+        if profile is not None:
+            profile.watch(coro)
+        value, error = None, None
+        while True:
+            start = _thread_cpu_times()
+            if profile is not None:
+                profile.enter(sys._getframe())
+            try:
+                if error is None:
+                    yielded = coro.send(value)
+                elif isinstance(error, GeneratorExit):
+                    coro.close()
+                    raise error
+                else:
+                    yielded = coro.throw(error)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                if profile is not None:
+                    profile.leave()
+                usage.add_cpu_since(start)
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:  # noqa: BLE001 - forwarded to the tool
+                value, error = None, e
+
+
+async def run_metered(
+    coro, usage: ResourceUsage, profile: ExecutionProfile | None = None
+) -> Any:
+    """Await *coro*, adding the CPU time of each of its steps to *usage*."""
+    return await _CpuMeteredCoroutine(coro, usage, profile)
+
+
+class PeakMemoryTracker:
+    """Per-execution peak of traced Python memory.
+
+    tracemalloc only keeps one process-wide peak, so a peak is reported only
+    for executions that ran alone from start to finish; it is exact there
+    (always the case in process pool workers) and None for executions that
+    overlapped another one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+        self._starts = 0
+
+    def start(self) -> tuple[int, int] | None:
+        """Begin measuring; returns a token for stop() (None = not tracing)."""
+        if not tracemalloc.is_tracing():
+            return None
+        with self._lock:
+            self._active += 1
+            self._starts += 1
+            if self._active > 1:
+                return (-1, 0)  # overlaps a running execution
+            tracemalloc.reset_peak()
+            return (self._starts, tracemalloc.get_traced_memory()[0])
+
+    def stop(self, token: tuple[int, int] | None) -> int | None:
+        """Finish measuring; returns the peak in bytes above the start level."""
+        if token is None:
+            return None
+        with self._lock:
+            self._active -= 1
+            starts, baseline = token
+            if starts != self._starts:
+                return None  # another execution started meanwhile
+            return max(0, tracemalloc.get_traced_memory()[1] - baseline)
+
+
+peak_memory_tracker = PeakMemoryTracker()
+
+if TRACK_MEMORY and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+class MeteredHttpClient:
+    """Wrapper around the tool's HTTP client that counts calls and bytes."""
+
+    def __init__(self, client: httpx.AsyncClient, usage: ResourceUsage):
+        self._client = client
+        self._usage = usage
+
+    async def _send(self, method: str, url, kwargs: dict) -> httpx.Response:
+        self._usage.http_calls += 1
+        response = await self._client.request(method, url, **kwargs)
         try:
-            response = await self._client.request(method, url, **kwargs)
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                method, url, response=response, duration_ms=duration, **kwargs
-            )
-            return response
-        except Exception as e:
-            duration = int((time.monotonic() - start) * 1000)
-            await self._capture_request(
-                method, url, error=e, duration_ms=duration, **kwargs
-            )
-            raise
+            self._usage.http_bytes_sent += len(response.request.content)
+        except httpx.RequestNotRead:
+            pass  # streamed request body, size unknown
+        self._usage.http_bytes_received += response.num_bytes_downloaded
+        return response
+
+    async def get(self, url, **kwargs):
+        return await self._send("GET", url, kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self._send("POST", url, kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self._send("PUT", url, kwargs)
+
+    async def patch(self, url, **kwargs):
+        return await self._send("PATCH", url, kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self._send("DELETE", url, kwargs)
+
+    async def head(self, url, **kwargs):
+        return await self._send("HEAD", url, kwargs)
+
+    async def options(self, url, **kwargs):
+        return await self._send("OPTIONS", url, kwargs)
+
+    async def request(self, method, url, **kwargs):
+        return await self._send(method, url, kwargs)
 
 
 # Minimum secret length to attempt redaction (avoids false positives on short values)
 _MIN_SECRET_REDACTION_LENGTH = 8
 
+# Texts longer than this are checked for each secret with a plain substring
+# search before the pattern runs, if the server has at most
+# _REDACT_PREFILTER_MAX_SECRETS secrets. Per byte, str.find is much cheaper
+# than the pattern; with many secrets the pattern's single pass wins.
+_REDACT_PREFILTER_LENGTH = 4096
+_REDACT_PREFILTER_MAX_SECRETS = 32
+
+
+def _secret_trie_pattern(values: list[str]) -> re.Pattern:
+    """Compile *values* into one regex shaped as their prefix tree.
+
+    Each branch point is an alternation whose branches start with distinct
+    literal characters, so the engine follows at most one path through the
+    tree per text position: the cost of a pass depends on the text length,
+    not on the number of secrets (as it does for a flat alternation, which
+    tries every secret at every position). Where a secret ends inside a
+    longer one, the continuation is optional and greedy, so the longest
+    secret starting at a position wins.
+    """
+    trie: dict[str, Any] = {}
+    for value in values:
+        node = trie
+        for char in value:
+            node = node.setdefault(char, {})
+        node[""] = True  # a secret ends here
+
+    def emit(node: dict[str, Any]) -> str:
+        branches = []
+        for char in sorted(key for key in node if key):
+            # Follow single-child chains as one literal run
+            run = [char]
+            child = node[char]
+            while len(child) == 1 and "" not in child:
+                (next_char,) = child
+                run.append(next_char)
+                child = child[next_char]
+            branches.append(re.escape("".join(run)) + emit(child))
+        if not branches:
+            return ""
+        if "" in node:
+            return "(?:" + "|".join(branches) + ")?"
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return re.compile(emit(trie))
+
+
+class SecretRedactor:
+    """Redacts a fixed set of secret values from tool output.
+
+    Built once when a server's secrets are registered or updated, then reused
+    by every execution: all secrets are matched by a single pattern compiled
+    from their prefix tree (see _secret_trie_pattern()) in one left-to-right
+    pass. Where secrets overlap, the longest secret starting at the leftmost
+    position wins.
+
+    Only values >= _MIN_SECRET_REDACTION_LENGTH are redacted to avoid false
+    positives.
+    """
+
+    __slots__ = ("_min_length", "_needles", "_pattern", "_values")
+
+    def __init__(self, secrets: dict[str, str] | None = None):
+        values = sorted(
+            {
+                value
+                for value in (secrets or {}).values()
+                if value and len(value) >= _MIN_SECRET_REDACTION_LENGTH
+            },
+            key=len,
+            reverse=True,
+        )
+        self._values = tuple(values)
+        # Secrets as they appear in JSON text (quotes, backslashes, control
+        # and non-ASCII characters escaped), for checking encoded results
+        self._needles = tuple({*values, *(json.dumps(value)[1:-1] for value in values)})
+        self._pattern = None
+        if values:
+            try:
+                self._pattern = _secret_trie_pattern(values)
+            except (RecursionError, re.error):
+                # Thousands of secrets nested in each other: fall back to a
+                # flat alternation, longest first (re takes the first branch
+                # that matches)
+                self._pattern = re.compile("|".join(map(re.escape, values)))
+        self._min_length = len(values[-1]) if values else 0
+
+    def __bool__(self) -> bool:
+        return self._pattern is not None
+
+    def redact_text(self, text: str) -> str:
+        """Replace every secret value in *text* with [REDACTED]."""
+        if self._pattern is None or len(text) < self._min_length:
+            return text
+        if (
+            len(text) > _REDACT_PREFILTER_LENGTH
+            and len(self._values) <= _REDACT_PREFILTER_MAX_SECRETS
+            and not any(value in text for value in self._values)
+        ):
+            return text
+        return self._pattern.sub("[REDACTED]", text)
+
+    def redact_value(self, value: Any, encoded: str | None = None) -> Any:
+        """Redact secrets in a JSON-compatible value.
+
+        Returns a redacted copy; *value* itself is never modified (it may
+        still be referenced by the tool, e.g. a warm module's constant).
+        Strings anywhere in the structure (including dict keys) are
+        redacted, and numbers whose JSON text contains a secret are
+        replaced by the redacted text.
+
+        If *encoded* (the value's JSON text) is given and contains no
+        secret, the structure isn't walked at all and *value* is returned.
+        """
+        if self._pattern is None:
+            return value
+        if encoded is not None and not self.contains_secret(encoded):
+            return value
+        return self._redact(value)
+
+    def contains_secret(self, encoded: str) -> bool:
+        """Whether JSON text *encoded* contains any secret, raw or escaped."""
+        return any(needle in encoded for needle in self._needles)
+
+    def _redact(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self.redact_text(value)
+        if isinstance(value, dict):
+            redacted = {}
+            for key, item in value.items():
+                if isinstance(key, str):
+                    key = self.redact_text(key)
+                redacted[key] = self._redact(item)
+            return redacted
+        if isinstance(value, list):
+            return [self._redact(item) for item in value]
+        if isinstance(value, tuple):
+            return tuple(self._redact(item) for item in value)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            text = json.dumps(value)
+            redacted = self.redact_text(text)
+            return value if redacted == text else redacted
+        return value
+
 
 def _redact_secrets(text: str, secrets: dict[str, str] | None) -> str:
     """Redact known secret values from text to prevent accidental leakage.
 
     Scans the text for any secret value and replaces it with [REDACTED].
     Only redacts values >= _MIN_SECRET_REDACTION_LENGTH to avoid false positives.
+    Prefer a SecretRedactor built once when the same secrets are reused.
     """
     if not secrets or not text:
         return text
-    for value in secrets.values():
-        if value and len(value) >= _MIN_SECRET_REDACTION_LENGTH:
-            text = text.replace(value, "[REDACTED]")
-    return text
+    return SecretRedactor(secrets).redact_text(text)
+
+
+# =============================================================================
+# WARM TOOL NAMESPACES
+# =============================================================================
+#
+# Cold mode (default) exec()s the whole tool module on every call. Warm mode
+# runs the module body (imports, constants, helper definitions) once and keeps
+# the resulting namespace as a template. Each call gets a shallow copy of the
+# template with its own __builtins__ (per-call print capture), ``http`` and
+# ``secrets``, and every module-level function is re-bound to that copy so
+# main() and its helpers resolve globals per call.
+#
+# Trade-offs of warm mode (why it is opt-in):
+# - Module-level code runs once, so its print() output only appears in the
+#   first call's stdout and it sees the first call's secrets.
+# - Mutable module-level objects (e.g. a dict constant) are shared by calls.
+# - Only functions defined directly at module level are re-bound. Methods,
+#   closures, decorated functions and functions stored in containers would
+#   keep the template's globals (the first call's ``http`` and ``secrets``,
+#   a discarded print()), so a tool whose module namespace holds any of them
+#   is refused warm mode and runs cold.
+# =============================================================================
+
+# Whether tools run in warm mode when their definition doesn't say
+WARM_TOOLS_DEFAULT = os.environ.get("SANDBOX_WARM_TOOLS", "false").lower() == "true"
+
+# Namespace entries replaced with per-call values on every warm call
+_WARM_PER_CALL_NAMES = ("__builtins__", "http", "secrets")
+
+
+def _discard_print(*args, **kwargs) -> None:
+    """print() replacement for warm templates once initialization is done."""
+
+
+# Values that can't reference a function, skipped without recursing
+_WARM_LEAF_TYPES = (type(None), bool, int, float, complex, str, bytes)
+
+
+def _warm_template_supported(template: dict[str, Any]) -> bool:
+    """Whether every function bound to the template can be re-bound per call.
+
+    Only the module-level functions are re-bound, so the template is refused
+    if a function using its globals is reachable any other way: from a
+    closure, a default, a class, a container, a decorator's wrapper or an
+    object instance.
+    """
+    seen: set[int] = set()
+    pending: list[Any] = []
+    for name, value in template.items():
+        if name in _WARM_PER_CALL_NAMES:
+            continue
+        if isinstance(value, FunctionType) and value.__globals__ is template:
+            # Re-bound itself; what it captures is not
+            pending.extend(value.__defaults__ or ())
+            pending.extend((value.__kwdefaults__ or {}).values())
+            pending.extend(cell.cell_contents for cell in value.__closure__ or ())
+        else:
+            pending.append(value)
+
+    while pending:
+        value = pending.pop()
+        if isinstance(value, (*_WARM_LEAF_TYPES, ModuleType)):
+            continue
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        if isinstance(value, FunctionType):
+            if value.__globals__ is template:
+                return False
+            continue
+        if isinstance(value, (CoroutineType, GeneratorType)):
+            return False
+        if isinstance(value, dict):
+            pending.extend(value.keys())
+            pending.extend(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            pending.extend(value)
+        elif isinstance(value, type):
+            pending.extend(vars(value).values())
+        elif isinstance(value, (staticmethod, classmethod, MethodType)):
+            pending.append(value.__func__)
+        elif isinstance(value, property):
+            pending.extend((value.fget, value.fset, value.fdel))
+        elif isinstance(value, functools.partial):
+            pending.extend((value.func, value.args, value.keywords))
+        else:
+            pending.append(type(value))
+            pending.append(getattr(value, "__wrapped__", None))
+            instance_dict = getattr(value, "__dict__", None)
+            if isinstance(instance_dict, dict):
+                pending.append(instance_dict)
+    return True
+
+
+@dataclass
+class WarmSlot:
+    """Pre-initialized module namespace of a warm tool (filled on first call)."""
+
+    template: dict[str, Any] | None = None
+    # Hash of the code the template was built from
+    code_hash: str | None = None
+    # Hash of code whose namespace can't be re-bound per call (runs cold)
+    unsupported_code_hash: str | None = None
+
+    def reset(self) -> None:
+        """Drop the template so the next call re-runs the module body."""
+        self.template = None
+        self.code_hash = None
+        self.unsupported_code_hash = None
+
+
+# =============================================================================
+# ISOLATED EVENT LOOPS
+# =============================================================================
+#
+# Awaiting main() on the sandbox's own event loop means a tool doing blocking
+# or CPU-bound work inside main() freezes every concurrent execution, the
+# health endpoint and the MCP session pool, and asyncio.wait_for() can't fire
+# until the tool yields. In isolated mode each main() runs on an event loop in
+# a dedicated thread; the sandbox loop awaits the result through a future and
+# enforces the timeout from outside.
+#
+# Threads can't be killed: a timed-out tool that never yields keeps its loop
+# thread until it finishes, and that thread is not reused until then (it also
+# keeps its server's execution_pool slot as a zombie). Hard CPU limits need
+# the process pool (SANDBOX_PROCESS_POOL_SIZE).
+#
+# The HTTP client stays on the sandbox loop (its connection pool is bound to
+# it); tools get a bridge that forwards each request there.
+# =============================================================================
+
+# Whether main() runs on an isolated event loop thread
+ISOLATED_EXECUTION = (
+    os.environ.get("SANDBOX_ISOLATED_EXECUTION", "false").lower() == "true"
+)
+
+# Upper bound on loop threads (idle + busy + stuck on timed-out tools)
+ISOLATED_LOOP_MAX_THREADS = int(
+    os.environ.get("SANDBOX_ISOLATED_LOOP_MAX_THREADS", "64")
+)
+
+# Loop threads kept around when idle
+ISOLATED_LOOP_MAX_IDLE = int(os.environ.get("SANDBOX_ISOLATED_LOOP_MAX_IDLE", "4"))
+
+
+# Wrapped client and its loop for each LoopBridgedHttpClient. Kept out of the
+# bridge itself: anything stored on an object tools receive, even under a
+# mangled name, is reachable from tool code.
+_bridge_targets: "weakref.WeakKeyDictionary[LoopBridgedHttpClient, tuple]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def _bridged_request(
+    bridge: "LoopBridgedHttpClient", method: str, *args: Any, **kwargs: Any
+) -> Any:
+    client, loop = _bridge_targets[bridge]
+    coro = getattr(client, method)(*args, **kwargs)
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    return await asyncio.wrap_future(future)
+
+
+class LoopBridgedHttpClient:
+    """HTTP client handed to tools running on an isolated loop.
+
+    Each request is scheduled on the loop that owns the wrapped client and
+    awaited from the tool's loop. The bridge holds nothing itself: the
+    client and loop are looked up in _bridge_targets.
+    """
+
+    __slots__ = ("__weakref__",)
+
+    def __init__(
+        self,
+        client: SSRFProtectedAsyncHttpClient,
+        loop: asyncio.AbstractEventLoop,
+    ):
+        _bridge_targets[self] = (client, loop)
+
+    def __getattr__(self, name: str):
+        raise AttributeError(
+            f"Access to '{name}' is not allowed on the HTTP client. "
+            f"Use http.get(), http.post(), etc."
+        )
+
+    def __setattr__(self, name: str, value):
+        raise AttributeError("Cannot set attributes on the HTTP client")
+
+    async def get(self, url, **kwargs):
+        return await _bridged_request(self, "get", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await _bridged_request(self, "post", url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await _bridged_request(self, "put", url, **kwargs)
+
+    async def patch(self, url, **kwargs):
+        return await _bridged_request(self, "patch", url, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await _bridged_request(self, "delete", url, **kwargs)
+
+    async def head(self, url, **kwargs):
+        return await _bridged_request(self, "head", url, **kwargs)
+
+    async def options(self, url, **kwargs):
+        return await _bridged_request(self, "options", url, **kwargs)
+
+    async def request(self, method, url, **kwargs):
+        return await _bridged_request(self, "request", method, url, **kwargs)
+
+
+class _LoopThread:
+    """An event loop running forever in a daemon thread."""
+
+    def __init__(self, name: str):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+class IsolatedLoopPool:
+    """Pool of event loop threads that run one tool main() at a time each."""
+
+    def __init__(
+        self,
+        max_threads: int = ISOLATED_LOOP_MAX_THREADS,
+        max_idle: int = ISOLATED_LOOP_MAX_IDLE,
+    ):
+        self._max_threads = max_threads
+        self._max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle: list[_LoopThread] = []
+        self._busy: set[_LoopThread] = set()
+        # Loop threads still running a tool whose caller already timed out,
+        # with the callback that frees the caller's execution slot
+        self._stuck: dict[_LoopThread, Callable[[], None] | None] = {}
+        self._counter = 0
+        self.runs = 0
+        self.timeouts = 0
+
+    def _acquire(self) -> _LoopThread:
+        with self._lock:
+            if self._idle:
+                loop_thread = self._idle.pop()
+            elif len(self._busy) < self._max_threads:
+                self._counter += 1
+                loop_thread = _LoopThread(f"sandbox-loop-{self._counter}")
+            else:
+                raise RuntimeError(
+                    f"All {self._max_threads} isolated execution loops are busy"
+                )
+            self._busy.add(loop_thread)
+            self.runs += 1
+            return loop_thread
+
+    def _release(self, loop_thread: _LoopThread) -> None:
+        """Return a loop thread once its tool has really finished."""
+        with self._lock:
+            self._busy.discard(loop_thread)
+            unpin = self._stuck.pop(loop_thread, None)
+            if len(self._idle) < self._max_idle:
+                self._idle.append(loop_thread)
+                loop_thread = None
+        if unpin is not None:
+            unpin()
+        if loop_thread is not None:
+            loop_thread.stop()
+
+    async def run(
+        self, coro, timeout: float, lease: ExecutionLease | None = None
+    ) -> Any:
+        """Run *coro* on an isolated loop, awaiting it from the caller's loop.
+
+        Raises asyncio.TimeoutError after *timeout* seconds whether or not the
+        tool has yielded; the tool task is cancelled on its own loop and the
+        loop thread is reused only once the task has actually finished. Until
+        then the task also keeps *lease*'s execution slot as a zombie.
+        """
+        try:
+            loop_thread = self._acquire()
+        except RuntimeError:
+            coro.close()
+            raise
+
+        caller_loop = asyncio.get_running_loop()
+        outcome = caller_loop.create_future()
+        tasks: list[asyncio.Task] = []
+
+        def _deliver(task: asyncio.Task) -> None:
+            # Runs on the caller's loop
+            if outcome.done():
+                return
+            if task.cancelled():
+                outcome.cancel()
+            elif task.exception() is not None:
+                outcome.set_exception(task.exception())
+            else:
+                outcome.set_result(task.result())
+
+        def _on_done(task: asyncio.Task) -> None:
+            # Runs on the isolated loop
+            self._release(loop_thread)
+            try:
+                caller_loop.call_soon_threadsafe(_deliver, task)
+            except RuntimeError:
+                pass  # Caller's loop is gone (it stopped waiting long ago)
+
+        def _start() -> None:
+            task = loop_thread.loop.create_task(coro)
+            task.add_done_callback(_on_done)
+            tasks.append(task)
+
+        loop_thread.loop.call_soon_threadsafe(_start)
+        try:
+            return await asyncio.wait_for(outcome, timeout)
+        except (TimeoutError, asyncio.CancelledError) as e:
+            # Timed out, or the caller itself was cancelled
+            unpin = lease.pin() if lease is not None else None
+            with self._lock:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                if loop_thread in self._busy:
+                    self._stuck[loop_thread] = unpin
+                    unpin = None
+            if unpin is not None:
+                unpin()  # The task finished while we were timing out
+            # Callbacks run in order, so the task exists by the time this runs
+            loop_thread.loop.call_soon_threadsafe(lambda: tasks[0].cancel())
+            raise
+
+    def shutdown(self) -> None:
+        """Stop idle loop threads (busy threads are daemons)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for loop_thread in idle:
+            loop_thread.stop()
+
+    def stats(self) -> dict[str, Any]:
+        """Get pool statistics for monitoring."""
+        with self._lock:
+            return {
+                "enabled": ISOLATED_EXECUTION,
+                "idle": len(self._idle),
+                "busy": len(self._busy),
+                "stuck": len(self._stuck),
+                "max_threads": self._max_threads,
+                "runs": self.runs,
+                "timeouts": self.timeouts,
+            }
+
+
+# Global isolated loop pool
+isolated_loop_pool = IsolatedLoopPool()
 
 
 class PythonExecutor:
@@ -1797,6 +3063,9 @@ class PythonExecutor:
         allowed_modules: set[str] | None = None,
         secrets: dict[str, str] | None = None,
         allowed_hosts: set[str] | None = None,
+        http_cache: HttpResponseCache | None = None,
+        debug_info: DebugInfo | None = None,
+        outbound_limiter: OutboundLimiter | None = None,
     ) -> dict[str, Any]:
         """Create the execution namespace with injected dependencies.
 
@@ -1805,13 +3074,22 @@ class PythonExecutor:
             allowed_modules: Set of allowed module names (None = use defaults)
             secrets: Dict of secret key→value pairs (read-only)
             allowed_hosts: Set of approved network hostnames (None = no restriction)
+            http_cache: Server's HTTP response cache (None = caching off)
+            debug_info: Debug info collecting cache lookups and queue waits
+                (debug mode only)
+            outbound_limiter: Server's outbound request limits (None = none)
         """
         from types import MappingProxyType
 
         # Wrap HTTP client with SSRF protection to prevent access to internal IPs.
         # If allowed_hosts is set, also enforce per-server network allowlist.
         protected_client = SSRFProtectedAsyncHttpClient(
-            http_client, allowed_hosts=allowed_hosts
+            http_client,
+            allowed_hosts=allowed_hosts,
+            response_cache=http_cache,
+            cache_listener=debug_info.add_http_cache_lookup if debug_info else None,
+            outbound_limiter=outbound_limiter,
+            wait_listener=debug_info.add_outbound_wait if debug_info else None,
         )
 
         namespace = {
@@ -1828,6 +3106,61 @@ class PythonExecutor:
 
         return namespace
 
+    @staticmethod
+    def create_tool_http_client(
+        http_client: httpx.AsyncClient,
+        usage: ResourceUsage,
+        debug_info: DebugInfo | None = None,
+        allowed_hosts: set[str] | None = None,
+        http_cache: HttpResponseCache | None = None,
+        outbound_limiter: OutboundLimiter | None = None,
+    ) -> SSRFProtectedAsyncHttpClient:
+        """Build the ``http`` object execute() hands to tools.
+
+        Process pool workers forward their tools' requests to the sandbox
+        process, which sends them through this client: they get the same
+        SSRF checks, caching, limits and accounting as in-process calls.
+        """
+        if debug_info is not None:
+            http_client = DebugHttpClient(http_client, debug_info)
+        return SSRFProtectedAsyncHttpClient(
+            MeteredHttpClient(http_client, usage),
+            allowed_hosts=allowed_hosts,
+            response_cache=http_cache,
+            cache_listener=debug_info.add_http_cache_lookup if debug_info else None,
+            outbound_limiter=outbound_limiter,
+            wait_listener=debug_info.add_outbound_wait if debug_info else None,
+        )
+
+    @staticmethod
+    def _instantiate_warm_namespace(
+        template: dict[str, Any],
+        per_call: dict[str, Any],
+    ) -> dict[str, Any]:
+        """Create a per-call namespace from a warm template.
+
+        Copies the template, overrides the per-call names, and re-binds
+        every function defined at the template's module level to the copy
+        (so lookups of ``http``, ``secrets`` and ``print`` inside main()
+        and its helpers see this call's values).
+        """
+        namespace = dict(template)
+        namespace.update(per_call)
+        for name, value in template.items():
+            if isinstance(value, FunctionType) and value.__globals__ is template:
+                # FunctionType takes its builtins from namespace["__builtins__"]
+                clone = FunctionType(
+                    value.__code__,
+                    namespace,
+                    value.__name__,
+                    value.__defaults__,
+                    value.__closure__,
+                )
+                clone.__kwdefaults__ = value.__kwdefaults__
+                clone.__qualname__ = value.__qualname__
+                namespace[name] = clone
+        return namespace
+
     async def execute(
         self,
         python_code: str,
@@ -1838,6 +3171,14 @@ class PythonExecutor:
         allowed_modules: set[str] | None = None,
         secrets: dict[str, str] | None = None,
         allowed_hosts: set[str] | None = None,
+        warm_slot: WarmSlot | None = None,
+        isolated: bool | None = None,
+        redactor: SecretRedactor | None = None,
+        lease: ExecutionLease | None = None,
+        profile: bool = False,
+        http_cache: HttpResponseCache | None = None,
+        outbound_limiter: OutboundLimiter | None = None,
+        http_forwarded: bool = False,
     ) -> ExecutionResult:
         """Execute Python code with the provided arguments.
 
@@ -1849,36 +3190,116 @@ class PythonExecutor:
             debug_mode: If True, capture detailed debug info
             allowed_modules: Set of module names allowed for import (None = defaults)
             allowed_hosts: Set of approved network hostnames (None = no restriction)
+            warm_slot: Template holder for warm mode (None = cold, run the
+                module body on every call)
+            isolated: Run main() on an isolated event loop thread
+                (None = SANDBOX_ISOLATED_EXECUTION)
+            redactor: Pre-built redactor for ``secrets`` (None = build one)
+            lease: Execution slot from execution_pool, kept by work that
+                outlives its timeout until that work finishes
+            profile: If True, sample where the tool spends its time and
+                attach the aggregated profile to the result
+            http_cache: Server's HTTP response cache for the ``http`` client
+                (None = no caching)
+            outbound_limiter: Server's per-destination limits for the
+                ``http`` client's requests (None = unlimited)
+            http_forwarded: *http_client* sends requests to another process
+                that applies the SSRF checks, caching, limits and accounting
+                (see create_tool_http_client()); hand it to the tool as-is
 
         Returns:
             ExecutionResult with success/error and result
         """
+        usage = ResourceUsage()
+        execution_profile = sampling_profiler.start() if profile else None
+        memory = peak_memory_tracker.start()
+        try:
+            result = await self._execute(
+                python_code=python_code,
+                arguments=arguments,
+                http_client=http_client,
+                timeout=timeout,
+                debug_mode=debug_mode,
+                allowed_modules=allowed_modules,
+                secrets=secrets,
+                allowed_hosts=allowed_hosts,
+                warm_slot=warm_slot,
+                isolated=isolated,
+                redactor=redactor,
+                lease=lease,
+                http_cache=http_cache,
+                outbound_limiter=outbound_limiter,
+                http_forwarded=http_forwarded,
+                usage=usage,
+                execution_profile=execution_profile,
+            )
+        finally:
+            usage.peak_memory_bytes = peak_memory_tracker.stop(memory)
+            if execution_profile is not None:
+                sampling_profiler.stop(execution_profile)
+        result.resource_usage = usage
+        result.profile = execution_profile
+        return result
+
+    async def _execute(
+        self,
+        python_code: str,
+        arguments: dict[str, Any],
+        http_client: httpx.AsyncClient,
+        timeout: float = DEFAULT_TIMEOUT,
+        debug_mode: bool = False,
+        allowed_modules: set[str] | None = None,
+        secrets: dict[str, str] | None = None,
+        allowed_hosts: set[str] | None = None,
+        warm_slot: WarmSlot | None = None,
+        isolated: bool | None = None,
+        redactor: SecretRedactor | None = None,
+        lease: ExecutionLease | None = None,
+        http_cache: HttpResponseCache | None = None,
+        outbound_limiter: OutboundLimiter | None = None,
+        http_forwarded: bool = False,
+        *,
+        usage: ResourceUsage,
+        execution_profile: ExecutionProfile | None = None,
+    ) -> ExecutionResult:
+        """Body of execute(); *usage* collects the resources it consumes.
+
+        *execution_profile*, when set, samples the tool's code as it runs.
+        """
         start_time = time.monotonic()
         stdout_capture = SizeLimitedStringIO()  # Use size-limited to prevent OOM
         debug_info = DebugInfo() if debug_mode else None
+        if isolated is None:
+            isolated = ISOLATED_EXECUTION
 
-        # Wrap HTTP client to capture debug info
-        if debug_mode:
-            http_client = DebugHttpClient(http_client, debug_info)
-
-        # SECURITY: Validate code for sandbox escape patterns before execution
-        is_safe, error_msg = validate_code_safety(python_code, "<tool>")
-        if not is_safe:
-            error_detail = ErrorDetail(
-                message=error_msg,
-                error_type="SecurityError",
-                source_file="<tool>",
-            )
-            return ExecutionResult(
-                success=False,
-                error=error_msg,
-                error_detail=error_detail,
-                stdout="",
-                duration_ms=int((time.monotonic() - start_time) * 1000),
-                debug_info=debug_info,
-            )
+        if not http_forwarded:
+            # Wrap HTTP client to capture debug info
+            if debug_mode:
+                http_client = DebugHttpClient(http_client, debug_info)
+            # Count outbound calls and bytes for resource accounting
+            http_client = MeteredHttpClient(http_client, usage)
 
         try:
+            # SECURITY: Validate code for sandbox escape patterns before execution.
+            # The verdict and compiled code object are cached by content hash,
+            # so unchanged tool code is validated and compiled only once.
+            # SyntaxError propagates to the handler below.
+            compiled_entry = compiled_code_cache.get(python_code, "<tool>")
+            if not compiled_entry.is_safe:
+                error_detail = ErrorDetail(
+                    message=compiled_entry.error,
+                    error_type="SecurityError",
+                    source_file="<tool>",
+                )
+                return ExecutionResult(
+                    success=False,
+                    error=compiled_entry.error,
+                    error_detail=error_detail,
+                    stdout="",
+                    duration_ms=int((time.monotonic() - start_time) * 1000),
+                    debug_info=debug_info,
+                )
+
             # Create execution namespace
             try:
                 namespace = self._create_execution_namespace(
@@ -1886,6 +3307,9 @@ class PythonExecutor:
                     allowed_modules,
                     secrets,
                     allowed_hosts,
+                    http_cache,
+                    debug_info,
+                    outbound_limiter,
                 )
             except ValueError as e:
                 error_detail = ErrorDetail(
@@ -1902,6 +3326,15 @@ class PythonExecutor:
                     debug_info=debug_info,
                 )
 
+            if http_forwarded:
+                namespace["http"] = http_client
+
+            if isolated:
+                # main() runs on another loop; requests still run on this one
+                namespace["http"] = LoopBridgedHttpClient(
+                    namespace["http"], asyncio.get_running_loop()
+                )
+
             # SECURITY: Override print() in builtins to capture stdout per-execution
             # instead of replacing global sys.stdout. This prevents output leakage
             # between concurrent tool executions (race condition).
@@ -1909,33 +3342,75 @@ class PythonExecutor:
                 *args, file=stdout_capture, **kwargs
             )
 
-            # Compile and execute the user's code to define main()
-            # SECURITY (F-01): Run exec() in a thread with timeout to prevent
-            # module-level infinite loops from blocking the event loop.
-            # Without this, code outside main() (e.g., `while True: pass`)
-            # blocks the entire sandbox indefinitely.
-            compiled = compile(python_code, "<tool>", "exec")
-            loop = asyncio.get_event_loop()
-            try:
-                await asyncio.wait_for(
-                    loop.run_in_executor(None, exec, compiled, namespace),
-                    timeout=timeout,
+            warm_template = None
+            if (
+                warm_slot is not None
+                and warm_slot.code_hash == compiled_entry.code_hash
+            ):
+                warm_template = warm_slot.template
+
+            if warm_template is not None:
+                # Warm call: module body already ran; only swap per-call names
+                namespace = self._instantiate_warm_namespace(
+                    warm_template,
+                    {name: namespace[name] for name in _WARM_PER_CALL_NAMES},
                 )
-            except asyncio.TimeoutError:
-                error_detail = ErrorDetail(
-                    message=f"Code initialization timed out after {timeout} seconds. "
-                    "Check for expensive computation outside main().",
-                    error_type="TimeoutError",
-                    source_file="<tool>",
-                )
-                return ExecutionResult(
-                    success=False,
-                    error=f"Code initialization timed out after {timeout} seconds",
-                    error_detail=error_detail,
-                    stdout=stdout_capture.getvalue(),
-                    duration_ms=int(timeout * 1000),
-                    debug_info=debug_info,
+            else:
+                # Execute the (cached) compiled code to define main()
+                # SECURITY (F-01): Run exec() in a thread with timeout to prevent
+                # module-level infinite loops from blocking the event loop.
+                # Without this, code outside main() (e.g., `while True: pass`)
+                # blocks the entire sandbox indefinitely. The thread comes from
+                # the execution pool's dedicated init threads.
+                compiled = compiled_entry.code
+                try:
+                    await execution_pool.run_sync(
+                        exec_metered,
+                        compiled,
+                        namespace,
+                        usage,
+                        execution_profile,
+                        timeout=timeout,
+                        lease=lease,
+                    )
+                except asyncio.TimeoutError:
+                    error_detail = ErrorDetail(
+                        message=f"Code initialization timed out after {timeout} seconds. "
+                        "Check for expensive computation outside main().",
+                        error_type="TimeoutError",
+                        source_file="<tool>",
+                    )
+                    return ExecutionResult(
+                        success=False,
+                        error=f"Code initialization timed out after {timeout} seconds",
+                        error_detail=error_detail,
+                        stdout=stdout_capture.getvalue(),
+                        duration_ms=int(timeout * 1000),
+                        debug_info=debug_info,
+                    )
+
+                keep_template = (
+                    warm_slot is not None
+                    and warm_slot.unsupported_code_hash != compiled_entry.code_hash
                 )
+                if keep_template and not _warm_template_supported(namespace):
+                    logger.info(
+                        "Tool namespace holds functions that can't be re-bound "
+                        "per call; running it cold"
+                    )
+                    warm_slot.unsupported_code_hash = compiled_entry.code_hash
+                    keep_template = False
+                if keep_template:
+                    # Keep the freshly initialized namespace as the template and
+                    # run this call on a copy, like every later call.
+                    template = namespace
+                    per_call = {name: template[name] for name in _WARM_PER_CALL_NAMES}
+                    per_call["__builtins__"] = dict(template["__builtins__"])
+                    # Detach the template from this call's stdout capture
+                    template["__builtins__"]["print"] = _discard_print
+                    namespace = self._instantiate_warm_namespace(template, per_call)
+                    warm_slot.template = template
+                    warm_slot.code_hash = compiled_entry.code_hash
 
             # Verify main() exists and is async
             if "main" not in namespace:
@@ -1967,12 +3442,20 @@ class PythonExecutor:
                     debug_info=debug_info,
                 )
 
-            # Execute main() with timeout
+            # Execute main() with timeout. In isolated mode the timeout is
+            # enforced from this loop even if main() never yields.
             try:
-                result = await asyncio.wait_for(
-                    main_func(**arguments),
-                    timeout=timeout,
-                )
+                if isolated:
+                    result = await isolated_loop_pool.run(
+                        run_metered(main_func(**arguments), usage, execution_profile),
+                        timeout,
+                        lease,
+                    )
+                else:
+                    result = await asyncio.wait_for(
+                        run_metered(main_func(**arguments), usage, execution_profile),
+                        timeout=timeout,
+                    )
             except asyncio.TimeoutError:
                 error_detail = ErrorDetail(
                     message=f"Execution timed out after {timeout} seconds",
@@ -1987,24 +3470,20 @@ class PythonExecutor:
                     debug_info=debug_info,
                 )
 
-            # Ensure result is JSON-serializable
-            try:
-                json.dumps(result)
-            except (TypeError, ValueError):
-                result = str(result)
-
             # SECURITY: Redact any secret values that leaked into output.
             # This catches accidental leaks in return values and print statements.
-            stdout_text = _redact_secrets(stdout_capture.getvalue(), secrets)
-            if isinstance(result, str):
-                result = _redact_secrets(result, secrets)
-            elif isinstance(result, dict):
-                # Redact within JSON-serialized form, then parse back
-                redacted = _redact_secrets(json.dumps(result), secrets)
-                try:
-                    result = json.loads(redacted)
-                except (json.JSONDecodeError, ValueError):
-                    result = redacted
+            if redactor is None:
+                redactor = SecretRedactor(secrets)
+            stdout_text = redactor.redact_text(stdout_capture.getvalue())
+
+            # Encode the result once, within MAX_OUTPUT_SIZE. The JSON text
+            # tells whether any secret occurs at all, so clean results are
+            # never walked for redaction.
+            try:
+                result, result_json = encode_result(result, redactor=redactor)
+            except (TypeError, ValueError):
+                # Not JSON-serializable: report its string form
+                result, result_json = encode_result(str(result), redactor=redactor)
 
             return ExecutionResult(
                 success=True,
@@ -2012,6 +3491,7 @@ class PythonExecutor:
                 stdout=stdout_text,
                 duration_ms=int((time.monotonic() - start_time) * 1000),
                 debug_info=debug_info,
+                result_json=result_json,
             )
 
         except SyntaxError as e:
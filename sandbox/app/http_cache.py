@@ -0,0 +1,401 @@
+"""HTTP Cache - RFC 9111 response cache for the tool ``http`` client.
+
+Tools often fetch the same upstream resources (status JSON, feeds, config
+files) on every call, and can't cache them themselves because nothing
+survives between executions. A server with the cache enabled keeps the
+responses its tools receive and reuses them as HTTP allows:
+
+- Only GET requests without a body are served from the cache; unsafe
+  methods (POST, PUT, PATCH, DELETE) that succeed invalidate the URL
+- Freshness comes from Cache-Control max-age, then Expires, then the usual
+  heuristic (10% of the time since Last-Modified); Age is taken into account
+- A stale response with an ETag or Last-Modified is revalidated with a
+  conditional request, and reused if the upstream answers 304
+- no-store (request or response) bypasses the cache; no-cache and
+  max-age=0 force revalidation; ``Vary: *`` and responses setting cookies
+  are never stored
+
+The cache is private to one server, but its tools can forward per-user
+credentials in any header. Entries are therefore keyed on the URL and *all*
+request headers (not only those listed in Vary), so a response is only
+ever reused for an identical request.
+"""
+
+import email.utils
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Enable the cache for servers whose registration doesn't say
+HTTP_CACHE_DEFAULT = os.environ.get("SANDBOX_HTTP_CACHE", "false").lower() == "true"
+
+# Maximum number of cached responses per server (LRU-evicted)
+HTTP_CACHE_MAX_ENTRIES = int(os.environ.get("SANDBOX_HTTP_CACHE_SIZE", "256"))
+
+# Maximum total size of cached response bodies per server (default 16MB)
+HTTP_CACHE_MAX_BYTES = int(
+    os.environ.get("SANDBOX_HTTP_CACHE_MAX_BYTES", str(16 * 1024 * 1024))
+)
+
+# Upper bound on heuristic freshness (responses with Last-Modified only)
+_HEURISTIC_MAX_SECONDS = 24 * 3600
+
+# Status codes that may be cached without explicit freshness (RFC 9110 15.1)
+_HEURISTICALLY_CACHEABLE = {200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501}
+
+# Status codes this cache stores at all (no partial content)
+_STORABLE_STATUS = _HEURISTICALLY_CACHEABLE | {302, 307}
+
+_UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+# Request options that carry a body or credentials outside the headers
+_UNCACHEABLE_OPTIONS = ("content", "data", "files", "json", "auth", "cookies")
+
+_CONDITIONAL_HEADERS = (
+    "if-none-match",
+    "if-modified-since",
+    "if-match",
+    "if-unmodified-since",
+    "if-range",
+    "range",
+)
+
+# Headers of a stored response that describe the bytes on the wire
+_WIRE_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "age"}
+
+# Headers a 304 must not overwrite on the stored response
+_NOT_UPDATED_BY_304 = _WIRE_HEADERS | {"content-type", "content-range"}
+
+# Called with (method, url, outcome, status code) for every cache lookup
+CacheListener = Callable[[str, str, str, int], None]
+
+
+def _cache_control(headers: httpx.Headers) -> dict[str, str | None]:
+    """Cache-Control directives, lower-cased, with their (unquoted) values."""
+    directives: dict[str, str | None] = {}
+    for value in headers.get_list("cache-control", split_commas=True):
+        name, _, argument = value.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip().strip('"') or None
+    return directives
+
+
+def _seconds(value: str | None) -> int | None:
+    try:
+        return max(0, int(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _http_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+
+class _Entry:
+    """A stored response and what's needed to compute its age."""
+
+    __slots__ = (
+        "content",
+        "freshness",
+        "headers",
+        "no_cache",
+        "request_time",
+        "response_time",
+        "status_code",
+    )
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: httpx.Headers,
+        content: bytes,
+        request_time: float,
+        response_time: float,
+    ):
+        self.status_code = status_code
+        self.content = content
+        self.update(headers, request_time, response_time)
+
+    def update(
+        self, headers: httpx.Headers, request_time: float, response_time: float
+    ) -> None:
+        self.headers = headers
+        self.request_time = request_time
+        self.response_time = response_time
+        directives = _cache_control(headers)
+        self.no_cache = "no-cache" in directives
+        self.freshness = self._freshness_lifetime(directives)
+
+    def _freshness_lifetime(self, directives: dict[str, str | None]) -> float:
+        """RFC 9111 4.2.1, for a private cache."""
+        max_age = _seconds(directives.get("max-age"))
+        if max_age is not None:
+            return max_age
+        if "expires" in self.headers:
+            expires = _http_date(self.headers["expires"])
+            date = _http_date(self.headers.get("date")) or self.response_time
+            return max(0.0, expires - date) if expires is not None else 0.0
+        last_modified = _http_date(self.headers.get("last-modified"))
+        if last_modified is not None and self.status_code in _HEURISTICALLY_CACHEABLE:
+            date = _http_date(self.headers.get("date")) or self.response_time
+            return min(max(0.0, date - last_modified) / 10, _HEURISTIC_MAX_SECONDS)
+        return 0.0
+
+    def age(self, now: float) -> float:
+        """RFC 9111 4.2.3 current_age."""
+        date = _http_date(self.headers.get("date"))
+        apparent_age = max(0.0, self.response_time - date) if date else 0.0
+        response_delay = self.response_time - self.request_time
+        age_value = _seconds(self.headers.get("age")) or 0
+        corrected_initial_age = max(apparent_age, age_value + response_delay)
+        return corrected_initial_age + (now - self.response_time)
+
+    @property
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers that revalidate this response."""
+        conditions = {}
+        if "etag" in self.headers:
+            conditions["If-None-Match"] = self.headers["etag"]
+        if "last-modified" in self.headers:
+            conditions["If-Modified-Since"] = self.headers["last-modified"]
+        return conditions
+
+    @property
+    def size(self) -> int:
+        return len(self.content) + sum(len(k) + len(v) for k, v in self.headers.raw)
+
+    def to_response(
+        self, method: str, url: str, now: float, outcome: str
+    ) -> httpx.Response:
+        headers = [
+            (name, value)
+            for name, value in self.headers.multi_items()
+            if name not in _WIRE_HEADERS
+        ]
+        headers.append(("age", str(int(self.age(now)))))
+        response = httpx.Response(
+            self.status_code,
+            headers=headers,
+            content=self.content,
+            request=httpx.Request(method, url),
+            extensions={"http_cache": outcome},
+        )
+        response.elapsed = timedelta(0)
+        return response
+
+
+class HttpResponseCache:
+    """Responses received by one server's tools, reused per RFC 9111."""
+
+    def __init__(
+        self,
+        max_entries: int = HTTP_CACHE_MAX_ENTRIES,
+        max_bytes: int = HTTP_CACHE_MAX_BYTES,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple, _Entry] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.stores = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(url: str, kwargs: dict) -> tuple | None:
+        """Cache key for a GET, or None if the request can't use the cache."""
+        if any(kwargs.get(option) is not None for option in _UNCACHEABLE_OPTIONS):
+            return None
+        headers = httpx.Headers(kwargs.get("headers"))
+        if any(name in headers for name in _CONDITIONAL_HEADERS):
+            return None  # the tool revalidates itself and wants to see the 304
+        if "no-store" in _cache_control(headers):
+            return None
+        return (
+            str(httpx.URL(url, params=kwargs.get("params"))),
+            tuple(sorted(headers.multi_items())),
+        )
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        kwargs: dict,
+        send: Callable[[dict], Awaitable[httpx.Response]],
+        listener: CacheListener | None = None,
+    ) -> httpx.Response:
+        """Answer a request from the cache, or *send(kwargs)* it and store it.
+
+        *url* is the URL the tool asked for (the cache key); *send* performs
+        the actual (validated, IP-pinned) request with the given options.
+        """
+        method = method.upper()
+        if method != "GET":
+            response = await send(kwargs)
+            if method in _UNSAFE_METHODS and response.status_code < 400:
+                self._invalidate(url, kwargs)
+            return response
+
+        key = self._key(url, kwargs)
+        if key is None:
+            return await send(kwargs)
+
+        entry = self._entries.get(key)
+        now = time.time()
+        request_directives = _cache_control(httpx.Headers(kwargs.get("headers")))
+        if entry is not None:
+            self._entries.move_to_end(key)
+            must_revalidate = entry.no_cache or "no-cache" in request_directives
+            max_age = _seconds(request_directives.get("max-age"))
+            age = entry.age(now)
+            fresh = age < entry.freshness and (max_age is None or age < max_age)
+            if fresh and not must_revalidate:
+                self.hits += 1
+                self._notify(listener, method, url, "hit", entry.status_code)
+                return entry.to_response(method, url, now, "hit")
+            if entry.validators:
+                headers = dict(httpx.Headers(kwargs.get("headers")))
+                headers.update(entry.validators)
+                kwargs = {**kwargs, "headers": headers}
+            else:
+                self._remove(key)
+                entry = None
+
+        request_time = time.time()
+        response = await send(kwargs)
+        response_time = time.time()
+
+        if entry is not None and response.status_code == 304:
+            headers = httpx.Headers(
+                [
+                    (name, value)
+                    for name, value in entry.headers.multi_items()
+                    if name not in response.headers or name in _NOT_UPDATED_BY_304
+                ]
+                + [
+                    (name, value)
+                    for name, value in response.headers.multi_items()
+                    if name not in _NOT_UPDATED_BY_304
+                ]
+            )
+            self._bytes -= entry.size
+            entry.update(headers, request_time, response_time)
+            self._bytes += entry.size
+            self.revalidated += 1
+            self._notify(listener, method, url, "revalidated", entry.status_code)
+            return entry.to_response(method, url, response_time, "revalidated")
+
+        self.misses += 1
+        self._notify(listener, method, url, "miss", response.status_code)
+        if entry is not None:
+            self._remove(key)
+        self._store(key, response, request_time, response_time)
+        response.extensions["http_cache"] = "miss"
+        return response
+
+    def _store(
+        self,
+        key: tuple,
+        response: httpx.Response,
+        request_time: float,
+        response_time: float,
+    ) -> None:
+        if response.status_code not in _STORABLE_STATUS:
+            return
+        directives = _cache_control(response.headers)
+        if "no-store" in directives or "set-cookie" in response.headers:
+            return
+        if "*" in response.headers.get("vary", ""):
+            return
+        try:
+            content = response.content
+        except httpx.ResponseNotRead:
+            return  # streamed by the tool; the body isn't ours to keep
+        entry = _Entry(
+            response.status_code,
+            httpx.Headers(response.headers),
+            content,
+            request_time,
+            response_time,
+        )
+        if not entry.validators and (entry.freshness <= 0 or entry.no_cache):
+            return  # could never be reused
+        size = entry.size
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+
+        self._entries[key] = entry
+        self._bytes += size
+        self.stores += 1
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _invalidate(self, url: str, kwargs: dict) -> None:
+        """Drop every stored response for the URL of an unsafe request."""
+        target = str(httpx.URL(url, params=kwargs.get("params")))
+        for key in [key for key in self._entries if key[0] == target]:
+            self._remove(key)
+            self.invalidations += 1
+
+    @staticmethod
+    def _notify(
+        listener: CacheListener | None,
+        method: str,
+        url: str,
+        outcome: str,
+        status_code: int,
+    ) -> None:
+        if listener is not None:
+            try:
+                listener(method, url, outcome, status_code)
+            except Exception:
+                logger.debug("HTTP cache listener failed", exc_info=True)
+
+    def clear(self) -> None:
+        """Drop every stored response."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Get cache statistics for monitoring."""
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def http_cache_settings() -> dict[str, Any]:
+    """Cache configuration shared by every server's cache."""
+    return {
+        "default_enabled": HTTP_CACHE_DEFAULT,
+        "max_entries": HTTP_CACHE_MAX_ENTRIES,
+        "max_bytes": HTTP_CACHE_MAX_BYTES,
+    }
@@ -0,0 +1,250 @@
+"""HTTP Pool - long-lived HTTP clients for tool code, one per server.
+
+Every execution used to get a brand-new httpx client, paying fresh TCP and
+TLS handshakes to the same upstream APIs on every call. Each registered
+server now keeps one pooled client (keep-alive, optional HTTP/2) that its
+executions share through a per-call view:
+
+- The view applies the call's timeout to each request and keeps its own
+  cookie jar, so cookies never leak between calls; the pooled client
+  stores none
+- Tool code still only sees the view wrapped in SSRFProtectedAsyncHttpClient
+  (URL validation, IP pinning and the allowlist are applied per request)
+- In direct mode requests are pinned to an IP and carry the real hostname
+  as TLS SNI; connections are pooled per SNI hostname so a connection
+  verified for one hostname is never reused for another one on the same IP
+
+The pool is closed when its server is unregistered, once the executions
+still using it have finished.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import os
+import urllib.request
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Connections one server may have open at once (per destination in direct mode)
+HTTP_POOL_MAX_CONNECTIONS = int(
+    os.environ.get("SANDBOX_HTTP_POOL_MAX_CONNECTIONS", "100")
+)
+
+# Idle connections kept open for reuse
+HTTP_POOL_MAX_KEEPALIVE = int(os.environ.get("SANDBOX_HTTP_POOL_MAX_KEEPALIVE", "20"))
+
+# Seconds an idle connection is kept before it is closed
+HTTP_POOL_KEEPALIVE_EXPIRY = float(
+    os.environ.get("SANDBOX_HTTP_POOL_KEEPALIVE_EXPIRY", "30")
+)
+
+# Negotiate HTTP/2 with upstreams that support it (needs the h2 package)
+HTTP2_ENABLED = os.environ.get("SANDBOX_HTTP2", "false").lower() == "true"
+
+if HTTP2_ENABLED and importlib.util.find_spec("h2") is None:
+    logger.warning("SANDBOX_HTTP2 is set but the h2 package is missing; using HTTP/1.1")
+    HTTP2_ENABLED = False
+
+
+def _uses_env_proxy() -> bool:
+    """Whether httpx will route requests through an environment proxy."""
+    proxies = urllib.request.getproxies()
+    return any(proxies.get(scheme) for scheme in ("http", "https", "all"))
+
+
+class _SniKeyedTransport(httpx.AsyncBaseTransport):
+    """Routes each request to a connection pool of its TLS SNI hostname.
+
+    Pinned requests address the upstream by IP, and httpx pools connections
+    by URL origin: without this, a connection opened (and certificate
+    checked) for one hostname could serve another hostname on that IP.
+    """
+
+    def __init__(self, **transport_options: Any):
+        self._options = transport_options
+        self._transports: dict[bytes | None, httpx.AsyncHTTPTransport] = {}
+
+    def _transport(self, request: httpx.Request) -> httpx.AsyncHTTPTransport:
+        sni_hostname = request.extensions.get("sni_hostname")
+        transport = self._transports.get(sni_hostname)
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(**self._options)
+            self._transports[sni_hostname] = transport
+        return transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._transport(request).handle_async_request(request)
+
+    @property
+    def connections(self) -> int:
+        """Connections currently open across all hostnames."""
+        return sum(
+            len(getattr(getattr(t, "_pool", None), "connections", ()))
+            for t in self._transports.values()
+        )
+
+    async def aclose(self) -> None:
+        transports = list(self._transports.values())
+        self._transports.clear()
+        for transport in transports:
+            await transport.aclose()
+
+
+class PooledCallClient:
+    """One execution's view of a server's pooled client.
+
+    Offers the request methods tool code uses (wrapped in the SSRF client
+    by the executor). Requests default to the call's timeout and share a
+    cookie jar that lives as long as the call, like a per-call client did.
+    """
+
+    __slots__ = ("_client", "_cookies", "_timeout")
+
+    def __init__(self, client: httpx.AsyncClient, timeout: float):
+        self._client = client
+        self._timeout = timeout
+        self._cookies = httpx.Cookies()
+
+    async def request(self, method, url, **kwargs) -> httpx.Response:
+        auth = kwargs.pop("auth", httpx.USE_CLIENT_DEFAULT)
+        follow_redirects = kwargs.pop("follow_redirects", False)
+        kwargs.setdefault("timeout", self._timeout)
+        request = self._client.build_request(method, url, **kwargs)
+        if "cookie" not in request.headers:
+            self._cookies.set_cookie_header(request)
+        response = await self._client.send(
+            request, auth=auth, follow_redirects=follow_redirects
+        )
+        self._cookies.extract_cookies(response)
+        return response
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self.request("PUT", url, **kwargs)
+
+    async def patch(self, url, **kwargs):
+        return await self.request("PATCH", url, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self.request("DELETE", url, **kwargs)
+
+    async def head(self, url, **kwargs):
+        return await self.request("HEAD", url, **kwargs)
+
+    async def options(self, url, **kwargs):
+        return await self.request("OPTIONS", url, **kwargs)
+
+
+class ServerHttpPool:
+    """Pooled HTTP client shared by one server's executions."""
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_POOL_MAX_CONNECTIONS,
+        max_keepalive: int = HTTP_POOL_MAX_KEEPALIVE,
+        keepalive_expiry: float = HTTP_POOL_KEEPALIVE_EXPIRY,
+        http2: bool = HTTP2_ENABLED,
+    ):
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._http2 = http2
+        self._client: httpx.AsyncClient | None = None
+        self._transport: _SniKeyedTransport | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._active = 0
+        self._closing = False
+        self.calls = 0
+        self.clients_created = 0
+
+    def _build_client(self) -> httpx.AsyncClient:
+        # Cookies are kept per call by PooledCallClient, never on the client
+        no_cookies = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+        self._transport = None
+        if not _uses_env_proxy():
+            # With a custom transport httpx ignores environment proxies,
+            # so only direct (IP-pinned) mode gets one
+            self._transport = _SniKeyedTransport(limits=self._limits, http2=self._http2)
+        self.clients_created += 1
+        return httpx.AsyncClient(
+            transport=self._transport,
+            limits=self._limits,
+            http2=self._http2,
+            follow_redirects=False,
+            cookies=no_cookies,
+        )
+
+    def acquire(self, timeout: float) -> PooledCallClient:
+        """Client view for one execution; hand it back with release()."""
+        if self._closing:
+            raise RuntimeError("HTTP pool is closed")
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # Connections belong to the loop that opened them
+            self._client = self._build_client()
+            self._loop = loop
+        self._active += 1
+        self.calls += 1
+        return PooledCallClient(self._client, timeout)
+
+    def release(self) -> None:
+        """An execution is done with its view."""
+        self._active -= 1
+        if self._closing and self._active == 0:
+            self._schedule_close()
+
+    def close(self) -> None:
+        """Close the pool once no execution is using it any more."""
+        self._closing = True
+        if self._active == 0:
+            self._schedule_close()
+
+    def _schedule_close(self) -> None:
+        client, self._client = self._client, None
+        if client is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop to close on; sockets go with the client
+        if loop is self._loop:
+            loop.create_task(self._aclose(client))
+
+    @staticmethod
+    async def _aclose(client: httpx.AsyncClient) -> None:
+        try:
+            await client.aclose()
+        except Exception:
+            logger.warning("Error closing pooled HTTP client", exc_info=True)
+
+    def stats(self) -> dict[str, Any]:
+        """Get pool statistics for monitoring."""
+        transport = self._transport
+        return {
+            "active_calls": self._active,
+            "calls": self.calls,
+            "clients_created": self.clients_created,
+            "open_connections": transport.connections if transport else None,
+        }
+
+
+def http_pool_settings() -> dict[str, Any]:
+    """Pool configuration shared by every server's pool."""
+    return {
+        "max_connections": HTTP_POOL_MAX_CONNECTIONS,
+        "max_keepalive": HTTP_POOL_MAX_KEEPALIVE,
+        "keepalive_expiry": HTTP_POOL_KEEPALIVE_EXPIRY,
+        "http2": HTTP2_ENABLED,
+    }
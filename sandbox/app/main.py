@@ -17,7 +17,11 @@ from slowapi import Limiter
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 
+from app.execution_pool import execution_pool
+from app.executor import isolated_loop_pool
+from app.process_pool import process_pool
 from app.registry import tool_registry
+from app.registry_snapshot import registry_snapshot
 from app.routes import router
 from app.package_sync import startup_sync
 
@@ -124,6 +128,13 @@ async def lifespan(app: FastAPI):
     _check_security_configuration()
     _check_squid_acl_volume()
 
+    # Pre-fork tool execution workers (no-op unless SANDBOX_PROCESS_POOL_SIZE > 0)
+    await process_pool.start()
+
+    # Re-register the servers of the last registry snapshot (no-op unless
+    # SANDBOX_SNAPSHOT_PATH and SANDBOX_SNAPSHOT_KEY are set)
+    registry_snapshot.start()
+
     # Start background task to sync packages with backend
     # This runs asynchronously so the service can start accepting requests immediately
     sync_task = asyncio.create_task(startup_sync())
@@ -138,8 +149,13 @@ async def lifespan(app: FastAPI):
             await sync_task
         except asyncio.CancelledError:
             pass
+    # Save pending changes before clearing the registry (which isn't saved)
+    await registry_snapshot.stop()
     # Clean up any resources
     await tool_registry.clear_all()
+    await process_pool.shutdown()
+    isolated_loop_pool.shutdown()
+    execution_pool.shutdown()
 
 
 def _read_version() -> str:
@@ -0,0 +1,315 @@
+"""Outbound Limiter - per-destination concurrency and rate limits for tool HTTP.
+
+Nothing used to bound how hard a server's tools could hit an upstream: a
+burst of tool calls became a burst of requests, the upstream answered 429,
+and tools retrying made it worse. Each registered server now has a limiter
+the SSRF-protected ``http`` client passes every outgoing request through:
+
+- At most ``max_concurrent_per_host`` requests to one hostname are in
+  flight at once, and at most ``max_concurrent`` across all hostnames
+- Requests to one hostname start at most ``rate_per_host`` per second, and
+  at most ``rate`` per second overall; up to one second's worth may start
+  back to back (token bucket)
+- A request over a limit waits its turn (first come, first served) instead
+  of failing; if it can't start within ``queue_timeout`` seconds it fails
+  with OutboundQueueTimeout, an httpx.PoolTimeout
+
+Responses served from the HTTP response cache never reach the limiter.
+A limit of 0 means unlimited. Defaults come from the environment; the
+backend can override them per server at registration.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, fields, replace
+from typing import Any
+
+import httpx
+
+# Requests to one hostname in flight at once, per server (0 = unlimited)
+OUTBOUND_MAX_CONCURRENT_PER_HOST = int(
+    os.environ.get("SANDBOX_OUTBOUND_MAX_CONCURRENT_PER_HOST", "10")
+)
+
+# Requests per second to one hostname, per server (0 = unlimited)
+OUTBOUND_RATE_PER_HOST = float(os.environ.get("SANDBOX_OUTBOUND_RATE_PER_HOST", "0"))
+
+# Requests in flight at once across all hostnames, per server (0 = unlimited)
+OUTBOUND_MAX_CONCURRENT = int(os.environ.get("SANDBOX_OUTBOUND_MAX_CONCURRENT", "0"))
+
+# Requests per second across all hostnames, per server (0 = unlimited)
+OUTBOUND_RATE = float(os.environ.get("SANDBOX_OUTBOUND_RATE", "0"))
+
+# Seconds a request may wait for its turn before failing
+OUTBOUND_QUEUE_TIMEOUT = float(os.environ.get("SANDBOX_OUTBOUND_QUEUE_TIMEOUT", "10"))
+
+# Called for every limited request: (hostname, wait_ms, timed_out)
+WaitListener = Callable[[str, float, bool], None]
+
+
+class OutboundQueueTimeout(httpx.PoolTimeout):
+    """A request waited longer than the queue timeout for its turn."""
+
+
+@dataclass(frozen=True)
+class OutboundLimits:
+    """Limits of one server's outbound requests (0 = unlimited)."""
+
+    max_concurrent_per_host: int = OUTBOUND_MAX_CONCURRENT_PER_HOST
+    rate_per_host: float = OUTBOUND_RATE_PER_HOST
+    max_concurrent: int = OUTBOUND_MAX_CONCURRENT
+    rate: float = OUTBOUND_RATE
+    queue_timeout: float = OUTBOUND_QUEUE_TIMEOUT
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any] | None) -> "OutboundLimits":
+        """Sandbox defaults overridden by the non-None values of *config*."""
+        names = {f.name for f in fields(cls)}
+        overrides = {
+            name: value
+            for name, value in (config or {}).items()
+            if name in names and value is not None
+        }
+        return replace(cls(), **overrides)
+
+
+class _Slots:
+    """Counting semaphore with FIFO hand-off and a changeable limit."""
+
+    __slots__ = ("_waiters", "active", "limit")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    def _free(self) -> bool:
+        return self.limit <= 0 or self.active < self.limit
+
+    async def acquire(self, deadline: float) -> bool:
+        """Take a slot, waiting until *deadline* (event loop time) at most.
+
+        Returns whether the request had to wait.
+
+        Raises:
+            TimeoutError: If no slot became free before the deadline
+        """
+        if self._free() and not self._waiters:
+            self.active += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            async with asyncio.timeout_at(deadline):
+                await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over as we gave up: pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            raise
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+        self.wake()
+
+    def wake(self) -> None:
+        """Hand free slots to waiters, oldest first."""
+        while self._waiters and self._free():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(None)
+
+
+class _Rate:
+    """Token bucket as a theoretical arrival time (GCRA)."""
+
+    __slots__ = ("_tat", "rate")
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tat = 0.0
+
+    def start_at(self, now: float) -> float:
+        """Earliest time a request arriving at *now* may start."""
+        if self.rate <= 0:
+            return now
+        burst = max(1.0, self.rate)
+        return max(now, self._tat - (burst - 1) / self.rate)
+
+    def take(self, start: float) -> None:
+        """Spend a token for a request starting at *start*."""
+        if self.rate > 0:
+            self._tat = max(self._tat, start) + 1 / self.rate
+
+    def idle(self, now: float) -> bool:
+        return self._tat <= now
+
+
+class _Destination:
+    """Slots and rate of one hostname."""
+
+    __slots__ = ("rate", "slots")
+
+    def __init__(self, limits: OutboundLimits):
+        self.slots = _Slots(limits.max_concurrent_per_host)
+        self.rate = _Rate(limits.rate_per_host)
+
+
+class OutboundLimiter:
+    """Concurrency and rate limits of one server's outbound requests."""
+
+    def __init__(self, limits: OutboundLimits | None = None):
+        self.limits = limits or OutboundLimits()
+        self._slots = _Slots(self.limits.max_concurrent)
+        self._rate = _Rate(self.limits.rate)
+        self._hosts: dict[str, _Destination] = {}
+        # Table size at which idle hostnames are swept out
+        self._sweep_at = 64
+        self.requests = 0
+        self.queued = 0
+        self.timeouts = 0
+        self.wait_time_total_ms = 0.0
+        self.wait_time_max_ms = 0.0
+
+    def configure(self, limits: OutboundLimits) -> None:
+        """Apply new limits; requests in flight and waiting are kept."""
+        self.limits = limits
+        self._slots.limit = limits.max_concurrent
+        self._rate.rate = limits.rate
+        for destination in self._hosts.values():
+            destination.slots.limit = limits.max_concurrent_per_host
+            destination.rate.rate = limits.rate_per_host
+            destination.slots.wake()
+        self._slots.wake()
+
+    @asynccontextmanager
+    async def slot(
+        self, hostname: str, listener: WaitListener | None = None
+    ) -> AsyncIterator[float]:
+        """Wait for the turn of a request to *hostname*; yields the wait in ms.
+
+        Raises:
+            OutboundQueueTimeout: If the request couldn't start within the
+                queue timeout
+        """
+        loop = asyncio.get_running_loop()
+        hostname = hostname.lower()
+        started = time.perf_counter()
+        deadline = loop.time() + self.limits.queue_timeout
+        destination = self._hosts.get(hostname)
+        if destination is None:
+            if len(self._hosts) >= self._sweep_at:
+                self._sweep(loop.time())
+            destination = self._hosts[hostname] = _Destination(self.limits)
+        self.requests += 1
+
+        acquired: list[_Slots] = []
+        queued = False
+        try:
+            # Hostname first: a request waiting on the server-wide limit then
+            # only holds up requests to its own hostname
+            for slots in (destination.slots, self._slots):
+                queued |= await slots.acquire(deadline)
+                acquired.append(slots)
+            now = loop.time()
+            start = max(destination.rate.start_at(now), self._rate.start_at(now))
+            if start > deadline:
+                raise TimeoutError
+            destination.rate.take(start)
+            self._rate.take(start)
+            if start > now:
+                queued = True
+                await asyncio.sleep(start - now)
+        except TimeoutError:
+            for slots in reversed(acquired):
+                slots.release()
+            wait_ms = self._waited(started, queued=True, timed_out=True)
+            if listener is not None:
+                listener(hostname, wait_ms, True)
+            self._prune(hostname, destination, loop.time())
+            raise OutboundQueueTimeout(
+                f"Outbound request to '{hostname}' waited more than "
+                f"{self.limits.queue_timeout:g}s for its turn "
+                f"({destination.slots.active} in flight to this host)"
+            ) from None
+        except BaseException:
+            for slots in reversed(acquired):
+                slots.release()
+            self._prune(hostname, destination, loop.time())
+            raise
+
+        wait_ms = self._waited(started, queued, timed_out=False)
+        if listener is not None:
+            listener(hostname, wait_ms, False)
+        try:
+            yield wait_ms
+        finally:
+            self._slots.release()
+            destination.slots.release()
+            self._prune(hostname, destination, loop.time())
+
+    def _waited(self, started: float, queued: bool, timed_out: bool) -> float:
+        wait_ms = (time.perf_counter() - started) * 1000
+        if queued:
+            self.queued += 1
+        if timed_out:
+            self.timeouts += 1
+        self.wait_time_total_ms += wait_ms
+        self.wait_time_max_ms = max(self.wait_time_max_ms, wait_ms)
+        return wait_ms
+
+    def _prune(self, hostname: str, destination: _Destination, now: float) -> None:
+        """Forget an idle hostname so the table only holds active ones."""
+        if (
+            destination.slots.active == 0
+            and not destination.slots.waiting
+            and destination.rate.idle(now)
+            and self._hosts.get(hostname) is destination
+        ):
+            del self._hosts[hostname]
+
+    def _sweep(self, now: float) -> None:
+        """Forget every idle hostname (rate-limited ones linger after use)."""
+        for hostname, destination in list(self._hosts.items()):
+            self._prune(hostname, destination, now)
+        self._sweep_at = max(64, 2 * len(self._hosts))
+
+    def stats(self) -> dict[str, Any]:
+        """Get limiter statistics for monitoring."""
+        return {
+            "active": self._slots.active,
+            "waiting": sum(d.slots.waiting for d in self._hosts.values())
+            + self._slots.waiting,
+            "hosts": len(self._hosts),
+            "requests": self.requests,
+            "queued": self.queued,
+            "timeouts": self.timeouts,
+            "wait_time_avg_ms": (
+                round(self.wait_time_total_ms / self.requests, 2)
+                if self.requests
+                else 0.0
+            ),
+            "wait_time_max_ms": round(self.wait_time_max_ms, 2),
+        }
+
+
+def outbound_limit_settings() -> dict[str, Any]:
+    """Default limits of servers that don't set their own."""
+    limits = OutboundLimits()
+    return {f.name: getattr(limits, f.name) for f in fields(limits)}
@@ -0,0 +1,762 @@
+"""Process Pool - runs tool code in pre-forked worker processes.
+
+By default all tool code runs inside the single sandbox process, so one
+CPU-bound tool holds the GIL for every other tenant. When enabled
+(SANDBOX_PROCESS_POOL_SIZE > 0), python_code tools are dispatched to a pool
+of worker processes instead.
+
+Features:
+- Workers are forked from a forkserver that has already imported the
+  executor, so spawning a worker does not re-import the sandbox
+- Jobs and results travel over a duplex pipe (one in-flight job per worker)
+- The parent loads worker messages as plain data only: tool code runs in
+  the worker and may write to the pipe
+- Per-execution RLIMIT_AS and RLIMIT_CPU, enforced by the kernel
+- Hung or over-limit workers are killed and replaced; the parent never
+  waits longer than the job's wall-clock budget
+- Workers are recycled after a configurable number of executions
+- Tools' HTTP requests are forwarded over the pipe to the sandbox process,
+  which sends them through the server's pooled client with the same SSRF
+  checks, DNS cache, response cache, outbound limits and accounting as
+  in-process executions
+"""
+
+import asyncio
+import hashlib
+import io
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import os
+import pickle
+import resource
+import signal
+import threading
+import time
+import weakref
+from typing import Any
+
+import httpx
+
+from app.ssrf import SSRFError, SSRFProtectedAsyncHttpClient
+
+logger = logging.getLogger(__name__)
+
+# Number of worker processes (0 = disabled, tools run in-process)
+PROCESS_POOL_SIZE = int(os.environ.get("SANDBOX_PROCESS_POOL_SIZE", "0"))
+
+# Recycle a worker after this many executions (0 = never)
+WORKER_MAX_EXECUTIONS = int(os.environ.get("SANDBOX_WORKER_MAX_EXECUTIONS", "500"))
+
+# Per-execution address space limit inside a worker
+WORKER_MEMORY_BYTES = int(
+    os.environ.get("SANDBOX_WORKER_MEMORY_BYTES", str(256 * 1024 * 1024))
+)
+
+# Extra wall-clock time granted on top of the job budget before the parent
+# gives up on a worker and kills it
+WORKER_KILL_GRACE = 2.0
+
+
+def _set_job_limits(timeout: float, memory_bytes: int) -> None:
+    """Apply per-execution resource limits inside a worker.
+
+    RLIMIT_CPU is cumulative over the process lifetime, so the soft limit is
+    set relative to the CPU time already consumed. Exceeding it delivers
+    SIGXCPU, which terminates the worker.
+    """
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = usage.ru_utime + usage.ru_stime
+    # Module init and main() each get `timeout`, so allow both
+    cpu_budget = math.ceil(used + 2 * timeout) + 1
+    try:
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        if hard != resource.RLIM_INFINITY:
+            cpu_budget = min(cpu_budget, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_budget, hard))
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not set worker CPU limit: {e}")
+
+    if memory_bytes > 0:
+        from app.executor import _limit_malloc_arenas
+
+        try:
+            _, hard = resource.getrlimit(resource.RLIMIT_AS)
+            if hard != resource.RLIM_INFINITY:
+                memory_bytes = min(memory_bytes, hard)
+            resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, hard))
+            _limit_malloc_arenas()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not set worker memory limit: {e}")
+
+
+def _fingerprint(*values: Any) -> str:
+    """Hash of JSON-serializable job inputs."""
+    state = json.dumps(values, sort_keys=True)
+    return hashlib.sha256(state.encode()).hexdigest()
+
+
+# Pipe messages carrying a forwarded HTTP request (worker -> parent) or its
+# outcome (parent -> worker); jobs and results are plain dicts. The parent
+# loads what workers send with _MessageUnpickler.
+_HTTP_MESSAGE = "http"
+
+# Request ids are unique per worker: late answers to an earlier job's
+# requests must not resolve this job's requests
+_request_ids = itertools.count(1)
+
+# Response headers describing an encoding the forwarded body no longer has
+_DECODED_BODY_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+def _response_payload(response) -> dict[str, Any]:
+    """Picklable form of an httpx response (the body is already read)."""
+    return {
+        "status_code": response.status_code,
+        "headers": [
+            (name, value)
+            for name, value in response.headers.multi_items()
+            if name.lower() not in _DECODED_BODY_HEADERS
+        ],
+        "content": response.content,
+        "method": response.request.method,
+        "url": str(response.request.url),
+        "http_version": response.http_version,
+    }
+
+
+# Exceptions a forwarded request re-raises in the worker besides httpx's own
+_FORWARDED_ERRORS = {cls.__name__: cls for cls in (SSRFError, TypeError, ValueError)}
+
+
+def _error_payload(error: Exception) -> tuple[str, str]:
+    """Name of the closest exception type a worker can rebuild, and message."""
+    for cls in type(error).__mro__:
+        if _FORWARDED_ERRORS.get(cls.__name__) is cls:
+            return cls.__name__, str(error)
+        if getattr(httpx, cls.__name__, None) is cls:
+            return cls.__name__, str(error)
+    return "RuntimeError", f"{type(error).__name__}: {error}"
+
+
+def _rebuild_error(name: str, message: str) -> Exception:
+    """Exception for a request the parent failed (see _error_payload())."""
+    cls = _FORWARDED_ERRORS.get(name) or getattr(httpx, name, RuntimeError)
+    return cls(message)
+
+
+class _MessageUnpickler(pickle.Unpickler):
+    """Unpickler for what workers send: plain data only.
+
+    Tool code runs in the worker, so whatever arrives from it may have been
+    crafted. A pickle that names a class or function can call it when it is
+    loaded, so messages may only hold built-in values (dicts, lists, tuples,
+    strings, bytes, numbers, None).
+    """
+
+    def find_class(self, module: str, name: str):
+        raise pickle.UnpicklingError(f"{module}.{name} is not allowed here")
+
+
+def _load_plain(data: bytes) -> Any:
+    """Load a pickle made of built-in values only (see _MessageUnpickler)."""
+    return _MessageUnpickler(io.BytesIO(data)).load()
+
+
+def _decode_message(data: bytes) -> tuple | dict | None:
+    """Worker message in *data*: a forwarded request or a job result.
+
+    Returns None for anything else, including pickles that don't load.
+    """
+    try:
+        message = _load_plain(data)
+    except Exception:  # noqa: BLE001 - any malformed pickle
+        return None
+    if isinstance(message, dict):
+        if not isinstance(message.get("success"), bool):
+            return None
+        for key in ("resource_usage", "debug_info"):
+            if not isinstance(message.get(key, {}), dict):
+                return None
+        return message
+    if (
+        isinstance(message, tuple)
+        and len(message) == 5
+        and message[0] == _HTTP_MESSAGE
+        and type(message[1]) is int
+        and isinstance(message[2], str)
+        and isinstance(message[3], str)
+        and isinstance(message[4], bytes)
+    ):
+        return message
+    return None
+
+
+class _Channel:
+    """Worker side of the pipe while a job runs: forwards its HTTP requests.
+
+    Each request is sent to the parent and awaited until the parent answers
+    with the response (or the error it raised).
+    """
+
+    def __init__(self, conn, loop: asyncio.AbstractEventLoop):
+        self.conn = conn
+        self.loop = loop
+        self.pending: dict[int, asyncio.Future] = {}
+        self.reading = False
+
+    def _on_readable(self) -> None:
+        try:
+            message = self.conn.recv()
+        except (EOFError, OSError) as e:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(RuntimeError(f"Sandbox unavailable: {e}"))
+            self.close()
+            return
+        _, request_id, payload, error = message
+        future = self.pending.get(request_id)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(_rebuild_error(*error))
+        else:
+            future.set_result(payload)
+
+    def close(self) -> None:
+        """Stop reading answers (the job is done)."""
+        if self.reading:
+            self.loop.remove_reader(self.conn.fileno())
+            self.reading = False
+
+    async def forward(self, method: str, url, kwargs: dict) -> httpx.Response:
+        request_id = next(_request_ids)
+        try:
+            arguments = pickle.dumps(kwargs)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            raise TypeError(f"Request arguments can't be sent: {e}") from None
+        self.conn.send((_HTTP_MESSAGE, request_id, method, str(url), arguments))
+        future = self.loop.create_future()
+        self.pending[request_id] = future
+        if not self.reading:
+            self.loop.add_reader(self.conn.fileno(), self._on_readable)
+            self.reading = True
+        try:
+            payload = await future
+        finally:
+            del self.pending[request_id]
+        return httpx.Response(
+            payload["status_code"],
+            headers=payload["headers"],
+            content=payload["content"],
+            request=httpx.Request(payload["method"], payload["url"]),
+            extensions={"http_version": payload["http_version"].encode()},
+        )
+
+
+# Channel of each _ForwardedHttpClient. Kept out of the client itself:
+# anything stored on an object tools receive, even under a mangled name,
+# is reachable from tool code.
+_channels: "weakref.WeakKeyDictionary[_ForwardedHttpClient, _Channel]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def _forward_request(
+    client: "_ForwardedHttpClient", method: str, url, kwargs: dict
+):
+    channel = _channels.get(client)
+    if channel is None:
+        raise RuntimeError("The HTTP client is closed")
+    return await channel.forward(method, url, kwargs)
+
+
+class _ForwardedHttpClient:
+    """HTTP client handed to tools running in a worker.
+
+    Holds nothing itself: requests go through the job's _Channel, looked up
+    in _channels, so tool code can't reach the pipe.
+    """
+
+    __slots__ = ("__weakref__",)
+
+    def __init__(self, channel: _Channel):
+        _channels[self] = channel
+
+    def __getattr__(self, name: str):
+        raise AttributeError(
+            f"Access to '{name}' is not allowed on the HTTP client. "
+            f"Use http.get(), http.post(), etc."
+        )
+
+    def __setattr__(self, name: str, value):
+        raise AttributeError("Cannot set attributes on the HTTP client")
+
+    async def get(self, url, **kwargs):
+        return await _forward_request(self, "GET", url, kwargs)
+
+    async def post(self, url, **kwargs):
+        return await _forward_request(self, "POST", url, kwargs)
+
+    async def put(self, url, **kwargs):
+        return await _forward_request(self, "PUT", url, kwargs)
+
+    async def patch(self, url, **kwargs):
+        return await _forward_request(self, "PATCH", url, kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await _forward_request(self, "DELETE", url, kwargs)
+
+    async def head(self, url, **kwargs):
+        return await _forward_request(self, "HEAD", url, kwargs)
+
+    async def options(self, url, **kwargs):
+        return await _forward_request(self, "OPTIONS", url, kwargs)
+
+    async def request(self, method, url, **kwargs):
+        return await _forward_request(self, method, url, kwargs)
+
+
+class _WorkerState:
+    """What a worker keeps between jobs, per tool or server."""
+
+    def __init__(self):
+        # (server_id, tool_name) -> (fingerprint, WarmSlot)
+        self.warm_slots: dict[tuple[Any, Any], tuple[str, Any]] = {}
+        # server_id -> (secrets fingerprint, SecretRedactor)
+        self.redactors: dict[Any, tuple[str, Any]] = {}
+
+
+async def _run_job(conn, job: dict[str, Any], state: _WorkerState) -> dict[str, Any]:
+    """Execute one job inside a worker (runs on the worker's event loop)."""
+    from app.executor import SecretRedactor, WarmSlot, python_executor
+
+    secrets = job.get("secrets") or {}
+    allowed_modules = job.get("allowed_modules")
+    server_id = job.get("server_id")
+
+    warm_slot = None
+    if job.get("warm"):
+        # One template per tool, like in-process slots. It is rebuilt when
+        # the secrets or allowed modules change (the module body may have
+        # read them) and when the code changes (WarmSlot checks its hash).
+        key = (server_id, job.get("tool_name"))
+        fingerprint = _fingerprint(secrets, allowed_modules)
+        entry = state.warm_slots.get(key)
+        if entry is None or entry[0] != fingerprint:
+            entry = state.warm_slots[key] = (fingerprint, WarmSlot())
+        warm_slot = entry[1]
+
+    # Like the registry, compile each server's redactor once per secrets
+    fingerprint = _fingerprint(secrets)
+    entry = state.redactors.get(server_id)
+    if entry is None or entry[0] != fingerprint:
+        entry = state.redactors[server_id] = (fingerprint, SecretRedactor(secrets))
+    redactor = entry[1]
+
+    channel = _Channel(conn, asyncio.get_running_loop())
+    http_client = _ForwardedHttpClient(channel)
+    try:
+        result = await python_executor.execute(
+            python_code=job["python_code"],
+            arguments=job["arguments"],
+            http_client=http_client,
+            timeout=job["timeout"],
+            debug_mode=job.get("debug_mode", False),
+            profile=job.get("profile", False),
+            allowed_modules=set(allowed_modules) if allowed_modules else None,
+            secrets=secrets,
+            warm_slot=warm_slot,
+            redactor=redactor,
+            # The worker is already isolated: the parent enforces the
+            # timeout by killing it, which also stops a tool that never yields
+            isolated=False,
+            # The parent applies the server's allowlist and HTTP settings
+            http_forwarded=True,
+        )
+        result = result.to_dict(include_json=True)
+    finally:
+        _channels.pop(http_client, None)
+        channel.close()
+    if "result_json" in result:
+        # The parent only loads built-in values; the JSON text has the
+        # result in that form (the value may be e.g. a dict subclass)
+        result["result"] = json.loads(result["result_json"])
+    return result
+
+
+def _worker_main(conn, memory_bytes: int) -> None:
+    """Worker process entry point: serve jobs from *conn* until EOF or None."""
+    # The parent handles Ctrl-C / shutdown; workers exit when the pipe closes
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    state = _WorkerState()
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        if isinstance(job, tuple):
+            # Answer to a request of a job that already finished
+            continue
+
+        _set_job_limits(job["timeout"], memory_bytes)
+        try:
+            result = loop.run_until_complete(_run_job(conn, job, state))
+        except BaseException as e:  # noqa: BLE001 - never let a job kill the loop
+            result = {
+                "success": False,
+                "error": f"Worker error: {type(e).__name__}: {e}",
+                "stdout": "",
+                "duration_ms": 0,
+            }
+        try:
+            conn.send(result)
+        except (BrokenPipeError, OSError):
+            break
+
+    loop.close()
+
+
+class _Worker:
+    """Parent-side handle for one worker process."""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.executions = 0
+        self.started_at = time.monotonic()
+        # Answers to forwarded requests are sent from threads
+        self.send_lock = threading.Lock()
+
+    @property
+    def pid(self) -> int | None:
+        return self.process.pid
+
+    def send(self, message: Any) -> None:
+        """Send *message* to the worker, whole (callable from any thread)."""
+        with self.send_lock:
+            self.conn.send(message)
+
+    def kill(self) -> None:
+        """Terminate the worker immediately (reaped later by active_children)."""
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+
+
+class ProcessPool:
+    """Pool of pre-forked worker processes for tool execution.
+
+    One job runs per worker at a time; callers wait for an idle worker.
+    """
+
+    def __init__(
+        self,
+        size: int = PROCESS_POOL_SIZE,
+        max_executions: int = WORKER_MAX_EXECUTIONS,
+        memory_bytes: int = WORKER_MEMORY_BYTES,
+    ):
+        self._size = size
+        self._max_executions = max_executions
+        self._memory_bytes = memory_bytes
+        self._ctx = None
+        self._workers: list[_Worker] = []
+        self._idle: asyncio.Queue | None = None
+        self._started = False
+        self.executions = 0
+        self.recycled = 0
+        self.killed = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether jobs should be dispatched to the pool."""
+        return self._started and self._size > 0
+
+    def _spawn(self) -> _Worker:
+        # Spawning only asks the forkserver for a fork, so it is cheap enough
+        # to do on the event loop. Using a thread pool here would reserve a
+        # malloc arena per thread against the process RLIMIT_AS.
+        multiprocessing.active_children()  # reap retired workers
+        parent_conn, child_conn = self._ctx.Pipe(duplex=True)
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self._memory_bytes),
+            daemon=True,
+            name="sandbox-worker",
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(process, parent_conn)
+        self._workers.append(worker)
+        return worker
+
+    def _retire(self, worker: _Worker, kill: bool = False) -> None:
+        """Stop *worker* without waiting for it to exit."""
+        if worker in self._workers:
+            self._workers.remove(worker)
+        if kill:
+            worker.kill()
+            return
+        try:
+            worker.send(None)
+        except OSError:
+            worker.kill()
+            return
+        worker.conn.close()
+
+    def _replace(self, worker: _Worker, kill: bool) -> None:
+        """Retire *worker* and put a fresh worker in the idle queue."""
+        self._retire(worker, kill)
+        if not self._started:
+            return
+        try:
+            new_worker = self._spawn()
+        except Exception:
+            logger.exception("Failed to spawn replacement sandbox worker")
+            return
+        self._idle.put_nowait(new_worker)
+
+    async def start(self) -> None:
+        """Start the forkserver and spawn all workers."""
+        if self._size <= 0 or self._started:
+            return
+        self._ctx = multiprocessing.get_context("forkserver")
+        # Import the executor (and its dependencies) once in the forkserver
+        # so forked workers start with everything already loaded.
+        self._ctx.set_forkserver_preload(["app.executor", "httpx"])
+        self._idle = asyncio.Queue()
+        for _ in range(self._size):
+            self._idle.put_nowait(self._spawn())
+        self._started = True
+        logger.info(
+            f"Started sandbox process pool with {self._size} workers "
+            f"(recycle after {self._max_executions} executions)"
+        )
+
+    async def shutdown(self) -> None:
+        """Stop all workers."""
+        if not self._started:
+            return
+        self._started = False
+        for worker in list(self._workers):
+            self._retire(worker)
+        self._workers.clear()
+        logger.info("Sandbox process pool stopped")
+
+    async def _wait_readable(self, worker: _Worker, timeout: float) -> bool:
+        """Wait until the worker's pipe is readable (result or EOF)."""
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        fd = worker.conn.fileno()
+
+        def _on_readable():
+            if not ready.done():
+                ready.set_result(True)
+
+        loop.add_reader(fd, _on_readable)
+        try:
+            await asyncio.wait_for(ready, timeout=timeout)
+            return True
+        except TimeoutError:
+            return False
+        finally:
+            loop.remove_reader(fd)
+
+    async def execute(
+        self,
+        job: dict[str, Any],
+        http_client: SSRFProtectedAsyncHttpClient | None = None,
+    ) -> dict[str, Any]:
+        """Run a job on the next idle worker and return the result dict.
+
+        *job* holds the keyword arguments of ``PythonExecutor.execute()``
+        in picklable form (lists instead of sets), plus ``warm`` and the
+        ``server_id`` and ``tool_name`` that key its warm template.
+
+        The tool's HTTP requests are sent through *http_client* (see
+        PythonExecutor.create_tool_http_client()); without one they fail.
+        """
+        worker = await self._idle.get()
+        try:
+            return await self._run(worker, job, http_client)
+        except BaseException:
+            # Cancelled (or failed) mid-job: the job may still be running and
+            # its result would be read as the next job's, so the worker is
+            # never reused
+            self.killed += 1
+            self._replace(worker, kill=True)
+            raise
+
+    async def _forward(
+        self,
+        worker: _Worker,
+        http_client: SSRFProtectedAsyncHttpClient | None,
+        message: tuple,
+    ) -> None:
+        """Send a request forwarded by *worker* and answer with its outcome."""
+        _, request_id, method, url, arguments = message
+        payload, error = None, None
+        try:
+            kwargs = _load_plain(arguments)
+        except Exception:  # noqa: BLE001 - any malformed pickle
+            kwargs = None
+        if not isinstance(kwargs, dict) or not all(
+            isinstance(name, str) for name in kwargs
+        ):
+            error = ("TypeError", "Request arguments must be plain data")
+        elif http_client is None:
+            error = ("RuntimeError", "HTTP requests are not available here")
+        else:
+            try:
+                response = await http_client.request(method, url, **kwargs)
+                payload = _response_payload(response)
+            except Exception as e:  # noqa: BLE001 - re-raised in the tool
+                error = _error_payload(e)
+        try:
+            # A large body fills the pipe until the worker reads it, which a
+            # busy tool may not do for a while; keep the loop free meanwhile
+            await asyncio.to_thread(
+                worker.send, (_HTTP_MESSAGE, request_id, payload, error)
+            )
+        except OSError:
+            pass  # the worker is gone; so is the tool waiting for this
+
+    async def _run(
+        self,
+        worker: _Worker,
+        job: dict[str, Any],
+        http_client: SSRFProtectedAsyncHttpClient | None,
+    ) -> dict[str, Any]:
+        """Send *job* to *worker* and wait for its result.
+
+        Every path that returns either puts the worker back in the idle
+        queue or replaces it. Requests the worker forwards meanwhile are
+        sent concurrently; any still running when it is done are cancelled.
+        """
+        requests: set[asyncio.Task] = set()
+        try:
+            return await self._await_result(worker, job, http_client, requests)
+        finally:
+            for task in requests:
+                task.cancel()
+
+    async def _await_result(
+        self,
+        worker: _Worker,
+        job: dict[str, Any],
+        http_client: SSRFProtectedAsyncHttpClient | None,
+        requests: set[asyncio.Task],
+    ) -> dict[str, Any]:
+        timeout = float(job["timeout"])
+        start = time.monotonic()
+        try:
+            worker.send(job)
+        except OSError as e:
+            self._replace(worker, kill=True)
+            return {
+                "success": False,
+                "error": f"Sandbox worker unavailable: {e}",
+                "stdout": "",
+                "duration_ms": 0,
+            }
+
+        # Module init and main() are each bounded by `timeout` in the worker
+        budget = 2 * timeout + WORKER_KILL_GRACE
+        deadline = start + budget
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not await self._wait_readable(worker, remaining):
+                self.killed += 1
+                logger.warning(
+                    f"Sandbox worker {worker.pid} exceeded {budget:.0f}s; killing it"
+                )
+                self._replace(worker, kill=True)
+                return {
+                    "success": False,
+                    "error": f"Execution timed out after {timeout} seconds",
+                    "stdout": "",
+                    "duration_ms": int((time.monotonic() - start) * 1000),
+                }
+
+            try:
+                data = worker.conn.recv_bytes()
+            except (EOFError, OSError):
+                self.killed += 1
+                worker.process.join(timeout=1.0)
+                exitcode = worker.process.exitcode
+                self._replace(worker, kill=True)
+                if exitcode == -signal.SIGXCPU:
+                    error = "Execution exceeded its CPU time limit"
+                elif exitcode == -signal.SIGKILL:
+                    error = "Execution was killed (likely out of memory)"
+                else:
+                    error = f"Sandbox worker exited unexpectedly (exit code {exitcode})"
+                return {
+                    "success": False,
+                    "error": error,
+                    "stdout": "",
+                    "duration_ms": int((time.monotonic() - start) * 1000),
+                }
+
+            message = _decode_message(data)
+            if message is None:
+                self.killed += 1
+                logger.warning(
+                    f"Sandbox worker {worker.pid} sent an invalid message; killing it"
+                )
+                self._replace(worker, kill=True)
+                return {
+                    "success": False,
+                    "error": "Sandbox worker sent an invalid message",
+                    "stdout": "",
+                    "duration_ms": int((time.monotonic() - start) * 1000),
+                }
+            if isinstance(message, dict):
+                result = message
+                break
+            task = asyncio.create_task(self._forward(worker, http_client, message))
+            requests.add(task)
+            task.add_done_callback(requests.discard)
+
+        self.executions += 1
+        worker.executions += 1
+        if self._max_executions and worker.executions >= self._max_executions:
+            self.recycled += 1
+            self._replace(worker, kill=False)
+        else:
+            self._idle.put_nowait(worker)
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        """Get pool statistics for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "size": self._size,
+            "idle": self._idle.qsize() if self._idle is not None else 0,
+            "max_executions_per_worker": self._max_executions,
+            "executions": self.executions,
+            "recycled": self.recycled,
+            "killed": self.killed,
+            "workers": [
+                {
+                    "pid": w.pid,
+                    "executions": w.executions,
+                    "age_seconds": round(time.monotonic() - w.started_at, 1),
+                }
+                for w in self._workers
+            ],
+        }
+
+
+# Global process pool (started in the app lifespan when enabled)
+process_pool = ProcessPool()
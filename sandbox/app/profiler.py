@@ -0,0 +1,312 @@
+"""Sampling Profiler - where a tool execution spends its time.
+
+Opt-in per execution (``profile`` on /tools/{name}/call, /execute and
+mcpbox_test_code). One background thread samples every profiled execution
+each SANDBOX_PROFILE_INTERVAL_MS:
+
+- While the tool's code runs (module init, or a step of main() between two
+  awaits), the stack of the thread running it is sampled
+- While main() is suspended, the chain of coroutines it is awaiting is
+  sampled instead, so time spent waiting on HTTP shows up under the line
+  that awaited it
+
+Only frames of the tool's own code are kept: samples never include another
+execution sharing the thread, and sandbox internals are never exposed.
+Time spent inside a library is labelled with the first library function the
+tool called. Each sample is weighted by the time since the previous one, so
+the reported times stay right when the sampler falls behind (it needs the
+GIL like everything else).
+"""
+
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+from types import FrameType
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Time between two samples of a profiled execution
+PROFILE_INTERVAL_MS = float(os.environ.get("SANDBOX_PROFILE_INTERVAL_MS", "5"))
+
+# Distinct stacks kept per execution; samples of later new stacks are
+# only counted in the totals
+MAX_PROFILE_STACKS = 2000
+
+# Entries returned in the per-function and per-line tables
+PROFILE_TOP_N = 50
+
+# Leaf label for samples taken while main() was suspended at an await
+WAITING = "<await>"
+
+# Frames of the sandbox itself (wrappers around the tool's http client, the
+# executor) are never reported
+_SANDBOX_PACKAGE = __name__.split(".")[0] + "."
+
+# Deepest coroutine chain followed when main() is suspended
+_MAX_AWAIT_DEPTH = 100
+
+# (qualified name, first line, current line) of one frame of tool code
+_OwnFrame = tuple[str, int, int]
+
+
+class ExecutionProfile:
+    """Samples collected for one execution.
+
+    The executor marks the sections where the tool's code is on a thread's
+    stack with enter()/leave(), and hands over main()'s coroutine with
+    watch() so suspended time can be attributed too.
+    """
+
+    def __init__(self, filename: str = "<tool>", interval: float = 0.005):
+        self.filename = filename
+        self.interval = interval
+        self.started_at = time.monotonic()
+        self._last_sample = self.started_at
+        # Set while the tool's code runs: the thread running it and the frame
+        # the tool's frames are called from
+        self._thread_id: int | None = None
+        self._boundary: FrameType | None = None
+        self._coro: Any = None
+        # stack -> [seconds, samples]
+        self._stacks: dict[tuple, list] = {}
+        self.samples = 0
+        self.seconds = 0.0
+        self.waiting_seconds = 0.0
+        self.untracked_stacks = 0
+
+    def enter(self, boundary: FrameType) -> None:
+        """Tool code is about to run on this thread, called from *boundary*."""
+        self._boundary = boundary
+        self._thread_id = threading.get_ident()
+
+    def leave(self) -> None:
+        """Tool code is no longer on this thread's stack."""
+        self._thread_id = None
+        self._boundary = None
+
+    def watch(self, coro: Any) -> None:
+        """Sample *coro*'s await chain whenever it is suspended."""
+        self._coro = coro
+
+    # --- Sampling (sampler thread) ---
+
+    def _running_frames(self, top: FrameType | None) -> list[FrameType] | None:
+        """Frames above the boundary, outermost first (None = left meanwhile)."""
+        boundary = self._boundary
+        frames = []
+        frame = top
+        while frame is not None:
+            if frame is boundary:
+                frames.reverse()
+                return frames
+            frames.append(frame)
+            frame = frame.f_back
+        return None
+
+    def _awaiting_frames(self) -> list[FrameType]:
+        """Frames of the suspended coroutine chain, outermost first."""
+        coro = self._coro
+        if coro is None or inspect.getcoroutinestate(coro) != inspect.CORO_SUSPENDED:
+            return []
+        frames = []
+        awaitable = coro
+        while awaitable is not None and len(frames) < _MAX_AWAIT_DEPTH:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(
+                awaitable, "gi_frame", None
+            )
+            if frame is None:
+                break
+            frames.append(frame)
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(
+                awaitable, "gi_yieldfrom", None
+            )
+        return frames
+
+    def _stack_key(self, frames: list[FrameType], leaf: str | None) -> tuple | None:
+        """The tool's own frames plus a label for where time was spent below them."""
+        own: list[_OwnFrame] = []
+        callee = None
+        for frame in frames:
+            code = frame.f_code
+            if code.co_filename == self.filename:
+                own.append((code.co_qualname, code.co_firstlineno, frame.f_lineno))
+                callee = None
+            elif own and callee is None:
+                module = frame.f_globals.get("__name__") or "?"
+                if not module.startswith(_SANDBOX_PACKAGE):
+                    callee = f"{module}.{code.co_qualname}"
+        if not own:
+            return None
+        return (*own, leaf or callee)
+
+    def sample(self, frames: dict[int, FrameType], now: float) -> None:
+        """Record one sample from a sys._current_frames() snapshot."""
+        weight = now - self._last_sample
+        self._last_sample = now
+        thread_id = self._thread_id
+        if thread_id is not None:
+            running = self._running_frames(frames.get(thread_id))
+            key = self._stack_key(running, None) if running else None
+        else:
+            key = self._stack_key(self._awaiting_frames(), WAITING)
+        if key is None:
+            return  # between phases: no tool code running or suspended
+
+        self.samples += 1
+        self.seconds += weight
+        if key[-1] == WAITING:
+            self.waiting_seconds += weight
+        entry = self._stacks.get(key)
+        if entry is None:
+            if len(self._stacks) >= MAX_PROFILE_STACKS:
+                self.untracked_stacks += 1
+                return
+            entry = self._stacks[key] = [0.0, 0]
+        entry[0] += weight
+        entry[1] += 1
+
+    # --- Report ---
+
+    def to_dict(self) -> dict[str, Any]:
+        """Aggregate the samples into collapsed stacks and hot spots.
+
+        ``collapsed`` uses the folded-stack format flame graph tools read
+        (``frame;frame;frame count``), with counts in milliseconds. Frames
+        are ``function:line``; a last ``<await>`` frame marks time suspended
+        at that line, a ``module.function`` frame time spent in a library.
+        """
+        functions: dict[tuple[str, int], list] = {}
+        lines: dict[tuple[str, int], list] = {}
+        collapsed = []
+
+        def add(
+            table: dict, key: tuple, seconds: float, samples: int, own: bool
+        ) -> None:
+            entry = table.get(key)
+            if entry is None:
+                entry = table[key] = [0.0, 0.0, 0]  # self, total, samples
+            if own:
+                entry[0] += seconds
+            entry[1] += seconds
+            entry[2] += samples
+
+        for stack, (seconds, samples) in self._stacks.items():
+            own: tuple[_OwnFrame, ...] = stack[:-1]
+            leaf = stack[-1]
+            labels = [f"{name}:{line}" for name, _, line in own]
+            if leaf is not None:
+                labels.append(leaf)
+            count = max(1, round(seconds * 1000))
+            collapsed.append((seconds, f"{';'.join(labels)} {count}"))
+
+            last = len(own) - 1
+            seen_functions = set()
+            seen_lines = set()
+            for depth, (name, first_line, line) in enumerate(own):
+                # Recursive frames count once towards a total
+                if (name, first_line) not in seen_functions:
+                    seen_functions.add((name, first_line))
+                    add(functions, (name, first_line), seconds, samples, depth == last)
+                elif depth == last:
+                    functions[(name, first_line)][0] += seconds
+                if (name, line) not in seen_lines:
+                    seen_lines.add((name, line))
+                    add(lines, (name, line), seconds, samples, depth == last)
+                elif depth == last:
+                    lines[(name, line)][0] += seconds
+
+        def top(table: dict, line_key: str) -> list[dict[str, Any]]:
+            ranked = sorted(table.items(), key=lambda item: (-item[1][1], -item[1][0]))
+            return [
+                {
+                    "function": name,
+                    line_key: line,
+                    "self_ms": round(self_s * 1000, 1),
+                    "total_ms": round(total_s * 1000, 1),
+                    "samples": samples,
+                }
+                for (name, line), (self_s, total_s, samples) in ranked[:PROFILE_TOP_N]
+            ]
+
+        collapsed.sort(key=lambda item: -item[0])
+        return {
+            "interval_ms": round(self.interval * 1000, 3),
+            "samples": self.samples,
+            "sampled_ms": round(self.seconds * 1000, 1),
+            "waiting_ms": round(self.waiting_seconds * 1000, 1),
+            "untracked_stacks": self.untracked_stacks,
+            "collapsed": [line for _, line in collapsed],
+            "functions": top(functions, "first_line"),
+            "lines": top(lines, "line"),
+        }
+
+
+class SamplingProfiler:
+    """Background sampler shared by all profiled executions.
+
+    The thread only runs while at least one execution is being profiled.
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self._interval = max(0.001, interval_ms / 1000)
+        self._lock = threading.Lock()
+        self._profiles: dict[ExecutionProfile, None] = {}
+        self._thread: threading.Thread | None = None
+        self.profiles_started = 0
+        self.sample_ticks = 0
+
+    def start(self, filename: str = "<tool>") -> ExecutionProfile:
+        """Begin profiling an execution whose code is compiled as *filename*."""
+        profile = ExecutionProfile(filename, self._interval)
+        with self._lock:
+            self._profiles[profile] = None
+            self.profiles_started += 1
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="sandbox-profiler", daemon=True
+                )
+                self._thread.start()
+        return profile
+
+    def stop(self, profile: ExecutionProfile) -> None:
+        """Stop sampling *profile*; its samples stay readable."""
+        with self._lock:
+            self._profiles.pop(profile, None)
+        profile.leave()
+        profile.watch(None)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self._interval)
+            with self._lock:
+                if not self._profiles:
+                    self._thread = None
+                    return
+                self.sample_ticks += 1
+                frames = sys._current_frames()
+                now = time.monotonic()
+                for profile in self._profiles:
+                    try:
+                        profile.sample(frames, now)
+                    except Exception:  # never let one profile stop the sampler
+                        logger.debug("Profile sample failed", exc_info=True)
+                del frames
+
+    def stats(self) -> dict[str, Any]:
+        """Get profiler statistics for monitoring."""
+        with self._lock:
+            return {
+                "interval_ms": round(self._interval * 1000, 3),
+                "active": len(self._profiles),
+                "profiles_started": self.profiles_started,
+                "sample_ticks": self.sample_ticks,
+                "running": self._thread is not None,
+            }
+
+
+# Global sampling profiler
+sampling_profiler = SamplingProfiler()
@@ -1,15 +1,39 @@
 """Tool Registry - manages tool definitions and execution."""
 
+import asyncio
+import hashlib
 import ipaddress
+import json
 import logging
 import os
+import threading
+import time
+from collections.abc import AsyncIterator, Callable
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Optional
 
-import httpx
-
-from app.executor import python_executor
+from app.execution_pool import execution_pool
+from app.executor import (
+    WARM_TOOLS_DEFAULT,
+    DebugInfo,
+    ResourceUsage,
+    SecretRedactor,
+    WarmSlot,
+    code_hash,
+    compiled_code_cache,
+    python_executor,
+)
+from app.http_cache import HTTP_CACHE_DEFAULT, HttpResponseCache, http_cache_settings
+from app.http_pool import PooledCallClient, ServerHttpPool, http_pool_settings
+from app.outbound_limiter import (
+    OutboundLimiter,
+    OutboundLimits,
+    outbound_limit_settings,
+)
+from app.process_pool import process_pool
+from app.result_cache import RESULT_CACHE_DEFAULT_TTL, result_cache
+from app.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +44,12 @@ _SQUID_ACL_PATH = Path(
     os.environ.get("SQUID_ACL_PATH", "/shared/squid-acl/approved-private.txt")
 )
 
+# Seconds registry changes are collected before the squid ACL file is rebuilt
+SQUID_ACL_DELAY = float(os.environ.get("SANDBOX_SQUID_ACL_DELAY", "0.05"))
+
+# Calls of one batch run at once (a batch may ask for fewer)
+BATCH_MAX_CONCURRENCY = int(os.environ.get("SANDBOX_BATCH_MAX_CONCURRENCY", "8"))
+
 
 @dataclass
 class ExternalSourceConfig:
@@ -46,6 +76,17 @@ class Tool:
     tool_type: str = "python_code"
     external_source_id: Optional[str] = None
     external_tool_name: Optional[str] = None
+    # Content hash of python_code (key into the compiled code cache)
+    code_hash: str | None = None
+    # Warm mode: module body runs once, template kept in warm_slot
+    warm: bool = False
+    warm_slot: WarmSlot | None = None
+    # Result memoization: successful results are reused for cache_ttl_seconds
+    # (None = sandbox default) for calls with the same arguments
+    cacheable: bool = False
+    cache_ttl_seconds: float | None = None
+    # Identical concurrent calls share one execution (implied by cacheable)
+    coalesce: bool = False
 
     @property
     def full_name(self) -> str:
@@ -71,6 +112,32 @@ class RegisteredServer:
     external_sources: dict[str, ExternalSourceConfig] = field(default_factory=dict)
     # Network access control: None = no restriction, set = only these hosts allowed
     allowed_hosts: Optional[set[str]] = None
+    # Secret matcher for output redaction, rebuilt whenever secrets change
+    redactor: SecretRedactor = field(default_factory=SecretRedactor)
+    # Concurrent python_code executions allowed (None = sandbox default)
+    max_concurrency: int | None = None
+    # Keep-alive HTTP client shared by the server's executions
+    http_pool: ServerHttpPool = field(default_factory=ServerHttpPool)
+    # Response cache for the tools' http client (None = caching off)
+    http_cache: HttpResponseCache | None = None
+    # Per-destination concurrency and rate limits of the tools' http client
+    outbound_limiter: OutboundLimiter = field(default_factory=OutboundLimiter)
+    # Version stamped by the backend on the last registration or update
+    # (0 = unversioned: any update applies)
+    version: int = 0
+
+
+class StaleVersionError(Exception):
+    """A registration or update is older than what the sandbox already has."""
+
+    def __init__(self, server_id: str, version: int, current: int):
+        super().__init__(
+            f"Version {version} of server {server_id} is stale"
+            f" (registered version is {current})"
+        )
+        self.server_id = server_id
+        self.version = version
+        self.current = current
 
 
 def _parse_host_from_entry(entry: str) -> str:
@@ -115,28 +182,128 @@ def _filter_private_hosts(hosts: set[str]) -> list[str]:
     return private
 
 
-def _write_squid_acl(private_hosts: list[str]) -> None:
-    """Write private hosts to the squid ACL file (low-level)."""
-    try:
-        _SQUID_ACL_PATH.parent.mkdir(parents=True, exist_ok=True)
-        _SQUID_ACL_PATH.write_text(
-            "\n".join(private_hosts) + "\n" if private_hosts else ""
-        )
-        logger.debug(
-            "Updated squid ACL file with %d approved private host(s)",
-            len(private_hosts),
-        )
-    except OSError as e:
-        if not _SQUID_ACL_PATH.parent.exists():
-            logger.debug("Squid ACL volume not mounted, skipping: %s", e)
-        else:
-            logger.error(
-                "Failed to write squid ACL file %s: %s. "
-                "Approved private hosts will be blocked by the proxy. "
-                "Check volume permissions (sandbox user needs write access).",
-                _SQUID_ACL_PATH,
-                e,
+# (path, SHA-256 of the content) last written to the squid ACL file
+_squid_acl_written: tuple[Path, str] | None = None
+_squid_acl_lock = threading.Lock()
+
+
+def _write_squid_acl(private_hosts: list[str]) -> str:
+    """Write private hosts to the squid ACL file (low-level).
+
+    The file is replaced atomically, so the squid ACL helper never reads
+    a partial file. Content equal to the last write is not written again.
+
+    Returns:
+        "written", "unchanged" (not written again) or "failed".
+    """
+    global _squid_acl_written
+    content = "\n".join(private_hosts) + "\n" if private_hosts else ""
+    written = (_SQUID_ACL_PATH, hashlib.sha256(content.encode()).hexdigest())
+    with _squid_acl_lock:
+        if written == _squid_acl_written:
+            return "unchanged"
+        tmp_path = _SQUID_ACL_PATH.with_name(f".{_SQUID_ACL_PATH.name}.tmp")
+        try:
+            _SQUID_ACL_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(content)
+            os.replace(tmp_path, _SQUID_ACL_PATH)
+            _squid_acl_written = written
+            logger.debug(
+                "Updated squid ACL file with %d approved private host(s)",
+                len(private_hosts),
             )
+            return "written"
+        except OSError as e:
+            if not _SQUID_ACL_PATH.parent.exists():
+                logger.debug("Squid ACL volume not mounted, skipping: %s", e)
+            else:
+                tmp_path.unlink(missing_ok=True)
+                logger.error(
+                    "Failed to write squid ACL file %s: %s. "
+                    "Approved private hosts will be blocked by the proxy. "
+                    "Check volume permissions (sandbox user needs write access).",
+                    _SQUID_ACL_PATH,
+                    e,
+                )
+            return "failed"
+
+
+class SquidAclWriter:
+    """Rebuilds the squid ACL file after registry changes, coalescing them.
+
+    On a running event loop a rebuild is written SANDBOX_SQUID_ACL_DELAY
+    seconds after it was requested, off the loop, and requests made in the
+    meantime are written with it: recovery or a bulk approval re-registering
+    hundreds of servers writes the file a few times instead of once per
+    registration. Without a loop (startup, scripts) it is written at once.
+    """
+
+    def __init__(self, delay: float = SQUID_ACL_DELAY):
+        self.delay = delay
+        self._task: asyncio.Task | None = None
+        # Returns the private hosts to write; set by the latest request
+        self._hosts: Callable[[], list[str]] | None = None
+        self._dirty = False
+        self.requests = 0
+        # Rebuilds by outcome of writing them (see _write_squid_acl)
+        self.written = 0
+        self.unchanged = 0
+        self.failed = 0
+
+    @property
+    def pending(self) -> bool:
+        """Whether a requested rebuild hasn't been written yet."""
+        return self._task is not None and not self._task.done()
+
+    def request(self, hosts: Callable[[], list[str]]) -> None:
+        """Rebuild the file with the private hosts *hosts* returns."""
+        self.requests += 1
+        self._hosts = hosts
+        self._dirty = True
+        if self.pending:
+            return  # The pending rebuild picks this request up
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._dirty = False
+            self._count(_write_squid_acl(self._hosts()))
+            return
+        self._task = loop.create_task(self._write_later())
+
+    async def wait(self) -> None:
+        """Wait until the requested rebuilds are written."""
+        if self.pending:
+            await asyncio.shield(self._task)
+
+    async def _write_later(self) -> None:
+        # Requests made while writing are written by another round
+        while self._dirty:
+            await asyncio.sleep(self.delay)
+            self._dirty = False
+            # Hosts are collected on the loop, where the registry changes
+            hosts = self._hosts()
+            self._count(await asyncio.to_thread(_write_squid_acl, hosts))
+
+    def _count(self, outcome: str) -> None:
+        if outcome == "written":
+            self.written += 1
+        elif outcome == "unchanged":
+            self.unchanged += 1
+        else:
+            self.failed += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Get rebuild statistics for monitoring."""
+        return {
+            "delay_seconds": self.delay,
+            "requests": self.requests,
+            "written": self.written,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            # Requests that were written together with a later one
+            "coalesced": self.requests - self.written - self.unchanged - self.failed,
+            "pending": self.pending,
+        }
 
 
 def ensure_private_hosts_in_squid_acl(hosts: list[str] | None) -> None:
@@ -182,12 +349,37 @@ class ToolRegistry:
 
     def __init__(self):
         self.servers: dict[str, RegisteredServer] = {}
+        # full_name -> (tool, owning server), kept in step with self.servers.
+        # When two servers expose the same full name, the one registered
+        # first owns it (the order the servers are looked through).
+        self._tool_index: dict[str, tuple[Tool, RegisteredServer]] = {}
+        # Bumped on every change of the registrations. Tagged with an ID of
+        # this registry so a restarted sandbox never repeats a generation.
+        self.generation = 0
+        self._generation_id = os.urandom(6).hex()
+        # (JSON of list_tools(), tool count) of the current generation
+        self._tools_list_json: tuple[bytes, int] | None = None
+        # Called after every change (e.g. to write a registry snapshot)
+        self.on_change: Callable[[], None] | None = None
+        self._squid_acl = SquidAclWriter()
 
     @property
     def tool_count(self) -> int:
         """Total number of registered tools."""
         return sum(len(s.tools) for s in self.servers.values())
 
+    @property
+    def generation_tag(self) -> str:
+        """Opaque tag of the current generation (used as the tools list ETag)."""
+        return f"{self._generation_id}-{self.generation}"
+
+    def _changed(self) -> None:
+        """Start a new generation after a change of the registrations."""
+        self.generation += 1
+        self._tools_list_json = None
+        if self.on_change is not None:
+            self.on_change()
+
     def register_server(
         self,
         server_id: str,
@@ -197,6 +389,10 @@ class ToolRegistry:
         secrets: dict[str, str] | None = None,
         external_sources: list[dict[str, Any]] | None = None,
         allowed_hosts: list[str] | None = None,
+        max_concurrency: int | None = None,
+        http_cache: bool | None = None,
+        outbound_limits: dict[str, Any] | None = None,
+        version: int | None = None,
     ) -> int:
         """Register a server with its tools.
 
@@ -208,11 +404,31 @@ class ToolRegistry:
             secrets: Dict of secret key→value pairs for injection into tool namespace
             external_sources: List of external MCP source configs for passthrough tools
             allowed_hosts: List of approved network hostnames (None = no restriction)
+            max_concurrency: Cap on concurrent executions (None = sandbox default)
+            http_cache: Cache the HTTP responses its tools receive
+                (None = SANDBOX_HTTP_CACHE)
+            outbound_limits: Overrides of the sandbox's outbound request
+                limits (see OutboundLimits; None = sandbox defaults)
+            version: Backend version of this registration (None = unversioned)
 
         Returns:
             The number of tools registered.
+
+        Raises:
+            StaleVersionError: If the server is registered with a newer version
         """
+        http_pool = None
+        response_cache = None
+        limiter = None
         if server_id in self.servers:
+            # A retried registration carries the same version and still applies
+            self._check_version(self.servers[server_id], version, allow_same=True)
+            # Keep open connections and cached responses across re-registration
+            http_pool = self.servers[server_id].http_pool
+            self.servers[server_id].http_pool = ServerHttpPool()
+            response_cache = self.servers[server_id].http_cache
+            # Requests in flight and queued keep counting against the limits
+            limiter = self.servers[server_id].outbound_limiter
             # Unregister existing first
             self.unregister_server(server_id)
 
@@ -222,34 +438,33 @@ class ToolRegistry:
             allowed_modules=allowed_modules,
             secrets=secrets or {},
             allowed_hosts=set(allowed_hosts) if allowed_hosts is not None else None,
+            redactor=SecretRedactor(secrets),
+            max_concurrency=max_concurrency,
+            version=version or 0,
         )
+        if http_pool is not None:
+            server.http_pool = http_pool
+        if HTTP_CACHE_DEFAULT if http_cache is None else http_cache:
+            server.http_cache = response_cache or HttpResponseCache()
+        limits = OutboundLimits.from_config(outbound_limits)
+        if limiter is not None:
+            limiter.configure(limits)
+            server.outbound_limiter = limiter
+        else:
+            server.outbound_limiter = OutboundLimiter(limits)
 
         # Register external MCP sources
         for source_data in external_sources or []:
-            source = ExternalSourceConfig(
-                source_id=source_data["source_id"],
-                url=source_data["url"],
-                auth_headers=source_data.get("auth_headers", {}),
-                transport_type=source_data.get("transport_type", "streamable_http"),
-            )
+            source = self._build_external_source(source_data)
             server.external_sources[source.source_id] = source
 
         for tool_def in tools:
-            tool = Tool(
-                name=tool_def["name"],
-                description=tool_def.get("description", ""),
-                server_id=server_id,
-                server_name=server_name,
-                parameters=tool_def.get("parameters", {}),
-                python_code=tool_def.get("python_code"),
-                timeout_ms=tool_def.get("timeout_ms", 30000),
-                tool_type=tool_def.get("tool_type", "python_code"),
-                external_source_id=tool_def.get("external_source_id"),
-                external_tool_name=tool_def.get("external_tool_name"),
-            )
+            tool = self._build_tool(server, tool_def)
             server.tools[tool.name] = tool
 
         self.servers[server_id] = server
+        self._index_server(server)
+        self._changed()
         logger.info(
             f"Registered server {server_name} ({server_id}) with {len(server.tools)} tools"
             f" ({len(server.external_sources)} external sources)"
@@ -257,6 +472,94 @@ class ToolRegistry:
         self._update_squid_approved_hosts()
         return len(server.tools)
 
+    def _index_server(self, server: RegisteredServer) -> None:
+        """Add a newly registered server's tools to the tool index."""
+        for tool in server.tools.values():
+            self._tool_index.setdefault(tool.full_name, (tool, server))
+
+    def _unindex_server(self, server: RegisteredServer) -> None:
+        """Drop an unregistered server's tools from the tool index.
+
+        A name it owned passes to the next server exposing the same name.
+        """
+        for tool in server.tools.values():
+            entry = self._tool_index.get(tool.full_name)
+            if entry is not None and entry[1] is server:
+                self._reindex(tool.full_name)
+
+    def _reindex(self, full_name: str) -> None:
+        """Point *full_name* at the first server that exposes it, if any."""
+        self._tool_index.pop(full_name, None)
+        for server in self.servers.values():
+            prefix = f"{server.server_name}__"
+            if full_name.startswith(prefix):
+                tool = server.tools.get(full_name[len(prefix) :])
+                if tool is not None:
+                    self._tool_index[full_name] = (tool, server)
+                    return
+
+    @staticmethod
+    def _check_version(
+        server: RegisteredServer, version: int | None, allow_same: bool = False
+    ) -> None:
+        """Reject a versioned change older than the server's current version.
+
+        Raises:
+            StaleVersionError: If *version* is older than (or, unless
+                *allow_same*, equal to) the registered version
+        """
+        if version is None or not server.version:
+            return
+        if version < server.version or (version == server.version and not allow_same):
+            raise StaleVersionError(server.server_id, version, server.version)
+
+    @staticmethod
+    def _build_external_source(source_data: dict[str, Any]) -> ExternalSourceConfig:
+        return ExternalSourceConfig(
+            source_id=source_data["source_id"],
+            url=source_data["url"],
+            auth_headers=source_data.get("auth_headers", {}),
+            transport_type=source_data.get("transport_type", "streamable_http"),
+        )
+
+    def _build_tool(self, server: RegisteredServer, tool_def: dict[str, Any]) -> Tool:
+        """Create a server's tool from its definition, ready to execute."""
+        tool = Tool(
+            name=tool_def["name"],
+            description=tool_def.get("description", ""),
+            server_id=server.server_id,
+            server_name=server.server_name,
+            parameters=tool_def.get("parameters", {}),
+            python_code=tool_def.get("python_code"),
+            timeout_ms=tool_def.get("timeout_ms", 30000),
+            tool_type=tool_def.get("tool_type", "python_code"),
+            external_source_id=tool_def.get("external_source_id"),
+            external_tool_name=tool_def.get("external_tool_name"),
+            cacheable=bool(tool_def.get("cacheable", False)),
+            cache_ttl_seconds=tool_def.get("cache_ttl_seconds"),
+            coalesce=bool(tool_def.get("coalesce", False)),
+        )
+        if tool.python_code and not tool.is_passthrough:
+            self._warm_code_cache(tool)
+            warm = tool_def.get("warm")
+            tool.warm = WARM_TOOLS_DEFAULT if warm is None else bool(warm)
+            if tool.warm:
+                tool.warm_slot = WarmSlot()
+        return tool
+
+    @staticmethod
+    def _warm_code_cache(tool: Tool) -> None:
+        """Validate and compile a tool's code ahead of its first call.
+
+        Fills the compiled code cache so ``execute_tool()`` skips validation
+        and compile() entirely. Unsafe or syntactically invalid code is not
+        rejected here — it still fails at call time with the usual error.
+        """
+        try:
+            tool.code_hash = compiled_code_cache.get(tool.python_code).code_hash
+        except SyntaxError:
+            tool.code_hash = code_hash(tool.python_code)
+
     def _update_squid_approved_hosts(self) -> None:
         """Rebuild the squid ACL file from all registered servers.
 
@@ -266,13 +569,17 @@ class ToolRegistry:
 
         This is a full rebuild (not a merge) so that host removals from
         server unregistration or revocation are reflected immediately.
+        Rebuilds requested in quick succession are written together.
         """
+        self._squid_acl.request(self._squid_private_hosts)
+
+    def _squid_private_hosts(self) -> list[str]:
+        """Private hosts of all registered servers, for the squid ACL file."""
         all_hosts: set[str] = set()
         for server in self.servers.values():
             if server.allowed_hosts:
                 all_hosts.update(server.allowed_hosts)
-
-        _write_squid_acl(_filter_private_hosts(all_hosts))
+        return _filter_private_hosts(all_hosts)
 
     def update_secrets(self, server_id: str, secrets: dict[str, str]) -> bool:
         """Update secrets for a running server.
@@ -290,37 +597,175 @@ class ToolRegistry:
         """
         if server_id not in self.servers:
             return False
-        self.servers[server_id].secrets = secrets
+        self._set_secrets(self.servers[server_id], secrets)
+        self._changed()
         logger.info(
             f"Updated secrets for server {self.servers[server_id].server_name}"
             f" ({server_id}): {len(secrets)} secret(s)"
         )
         return True
 
+    @staticmethod
+    def _set_secrets(server: RegisteredServer, secrets: dict[str, str]) -> None:
+        """Replace a server's secrets and drop everything derived from them."""
+        server.secrets = secrets
+        server.redactor = SecretRedactor(secrets)
+        # Cached results may depend on the old secrets too
+        result_cache.invalidate_server(server.server_id)
+        if server.http_cache is not None:
+            server.http_cache.clear()
+        # Warm templates ran their module body with the old secrets
+        for tool in server.tools.values():
+            if tool.warm_slot is not None:
+                tool.warm_slot.reset()
+
+    def update_server(
+        self,
+        server_id: str,
+        version: int,
+        tools: list[dict[str, Any]] | None = None,
+        remove_tools: list[str] | None = None,
+        secrets: dict[str, str] | None = None,
+        remove_secrets: list[str] | None = None,
+        external_sources: list[dict[str, Any]] | None = None,
+        remove_external_sources: list[str] | None = None,
+    ) -> bool:
+        """Apply a delta to a registered server, keeping everything it doesn't touch.
+
+        Unlike re-registration, only the state of what changed is dropped:
+        cached results of the added, replaced and removed tools (and of
+        passthrough tools whose external source changed). A change of
+        secrets still resets every tool, as all of them can read secrets.
+
+        Args:
+            server_id: Server to update
+            version: Backend version of this update; must be newer than the
+                server's registration and every update applied since
+            tools: Tool definitions to add, or replace by name
+            remove_tools: Names of tools to remove
+            secrets: Secret key→value pairs to add or replace
+            remove_secrets: Secret keys to remove
+            external_sources: External MCP source configs to add or replace
+            remove_external_sources: Source IDs of external sources to remove
+
+        Returns:
+            True if server was found and updated, False if not found.
+
+        Raises:
+            StaleVersionError: If the server already has this or a newer version
+        """
+        server = self.servers.get(server_id)
+        if server is None:
+            return False
+        self._check_version(server, version)
+        # Build everything before changing anything: a delta that fails
+        # partway must leave the server, and its version, as they were
+        new_sources = [self._build_external_source(s) for s in external_sources or []]
+        new_tools = [self._build_tool(server, tool_def) for tool_def in tools or []]
+
+        changed_sources = set(remove_external_sources or [])
+        for source_id in remove_external_sources or []:
+            server.external_sources.pop(source_id, None)
+        for source in new_sources:
+            server.external_sources[source.source_id] = source
+            changed_sources.add(source.source_id)
+
+        if secrets or remove_secrets:
+            updated = {**server.secrets, **(secrets or {})}
+            for key in remove_secrets or []:
+                updated.pop(key, None)
+            self._set_secrets(server, updated)
+
+        changed_tools = set(remove_tools or [])
+        for name in remove_tools or []:
+            server.tools.pop(name, None)
+        for tool in new_tools:
+            server.tools[tool.name] = tool
+            changed_tools.add(tool.name)
+        for name in changed_tools:
+            self._reindex(f"{server.server_name}__{name}")
+        changed_tools.update(
+            tool.name
+            for tool in server.tools.values()
+            if tool.external_source_id in changed_sources
+        )
+        for name in changed_tools:
+            result_cache.invalidate_tool(server_id, name)
+        server.version = version
+        self._changed()
+
+        logger.info(
+            f"Updated server {server.server_name} ({server_id}) to version {version}:"
+            f" {len(tools or [])} tool(s) set, {len(remove_tools or [])} removed"
+        )
+        return True
+
     def unregister_server(self, server_id: str) -> bool:
         """Unregister a server and all its tools."""
         if server_id in self.servers:
             server = self.servers.pop(server_id)
+            self._unindex_server(server)
+            self._changed()
+            server.http_pool.close()
+            result_cache.invalidate_server(server_id)
             logger.info(f"Unregistered server {server.server_name} ({server_id})")
             self._update_squid_approved_hosts()
             return True
         return False
 
+    def http_pool_stats(self) -> dict[str, Any]:
+        """Pooled HTTP client settings and totals across servers."""
+        pools = [server.http_pool.stats() for server in self.servers.values()]
+        return {
+            **http_pool_settings(),
+            "servers": len(pools),
+            "active_calls": sum(p["active_calls"] for p in pools),
+            "calls": sum(p["calls"] for p in pools),
+            "open_connections": sum(p["open_connections"] or 0 for p in pools),
+        }
+
+    def http_cache_stats(self) -> dict[str, Any]:
+        """HTTP response cache settings and totals across servers."""
+        caches = [
+            server.http_cache.stats()
+            for server in self.servers.values()
+            if server.http_cache is not None
+        ]
+        totals = {
+            name: sum(c[name] for c in caches)
+            for name in ("entries", "bytes", "hits", "misses", "revalidated")
+        }
+        return {**http_cache_settings(), "servers": len(caches), **totals}
+
+    def squid_acl_stats(self) -> dict[str, Any]:
+        """Squid ACL file rebuild counters."""
+        return self._squid_acl.stats()
+
+    def outbound_limit_stats(self) -> dict[str, Any]:
+        """Default outbound limits and queueing totals across servers."""
+        limiters = [server.outbound_limiter.stats() for server in self.servers.values()]
+        totals = {
+            name: sum(s[name] for s in limiters)
+            for name in ("active", "waiting", "requests", "queued", "timeouts")
+        }
+        return {
+            **outbound_limit_settings(),
+            "servers": len(limiters),
+            **totals,
+            "wait_time_max_ms": max(
+                (s["wait_time_max_ms"] for s in limiters), default=0.0
+            ),
+        }
+
     def get_tool(self, full_name: str) -> Optional[Tool]:
         """Get a tool by its full name (servername__toolname)."""
-        for server in self.servers.values():
-            for tool in server.tools.values():
-                if tool.full_name == full_name:
-                    return tool
-        return None
+        entry = self._tool_index.get(full_name)
+        return entry[0] if entry is not None else None
 
     def get_server_for_tool(self, full_name: str) -> Optional[RegisteredServer]:
         """Get the server that owns a tool."""
-        for server in self.servers.values():
-            for tool in server.tools.values():
-                if tool.full_name == full_name:
-                    return server
-        return None
+        entry = self._tool_index.get(full_name)
+        return entry[1] if entry is not None else None
 
     def list_tools(self) -> list[dict[str, Any]]:
         """List all registered tools in MCP format."""
@@ -336,6 +781,16 @@ class ToolRegistry:
                 )
         return tools
 
+    def list_tools_json(self) -> tuple[bytes, int]:
+        """JSON of list_tools() and its length, serialized once per generation."""
+        if self._tools_list_json is None:
+            tools = self.list_tools()
+            self._tools_list_json = (
+                json.dumps(tools, ensure_ascii=False, separators=(",", ":")).encode(),
+                len(tools),
+            )
+        return self._tools_list_json
+
     def list_tools_for_server(self, server_id: str) -> list[dict[str, Any]]:
         """List tools for a specific server."""
         server = self.servers.get(server_id)
@@ -356,10 +811,14 @@ class ToolRegistry:
         full_name: str,
         arguments: dict[str, Any],
         debug_mode: bool = False,
+        profile: bool = False,
+        timeout: float | None = None,
     ) -> dict[str, Any]:
         """Execute a tool with the given arguments.
 
         Routes to Python execution or MCP passthrough based on tool_type.
+        profile samples where a Python tool spends its time (ignored for
+        passthrough tools). timeout caps the tool's own timeout.
         """
         tool = self.get_tool(full_name)
         if not tool:
@@ -367,19 +826,153 @@ class ToolRegistry:
                 "error": f"Tool not found: {full_name}",
                 "success": False,
             }
+        return await self._execute_resolved_tool(
+            tool, arguments, debug_mode, profile, timeout
+        )
+
+    async def execute_batch(
+        self,
+        calls: list[tuple[str, dict[str, Any], float | None]],
+        max_concurrency: int | None = None,
+        debug_mode: bool = False,
+    ) -> AsyncIterator[tuple[int, dict[str, Any]]]:
+        """Run (full_name, arguments, timeout) calls concurrently.
+
+        Yields (index, result) pairs as calls finish. Each distinct tool is
+        looked up once for the whole batch. At most *max_concurrency* calls
+        run at once (capped by SANDBOX_BATCH_MAX_CONCURRENCY), and each still
+        waits for its server's slot in the execution pool. A failing call
+        only fails its own result. Closing the iterator early cancels the
+        calls still running.
+        """
+        tools: dict[str, Tool | None] = {}
+        for full_name, _, _ in calls:
+            if full_name not in tools:
+                tools[full_name] = self.get_tool(full_name)
+        fan_out = min(max_concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+        limit = asyncio.Semaphore(max(1, fan_out))
+
+        async def run(
+            index: int,
+            full_name: str,
+            arguments: dict[str, Any],
+            timeout: float | None,
+        ) -> tuple[int, dict[str, Any]]:
+            tool = tools[full_name]
+            if tool is None:
+                return index, {
+                    "error": f"Tool not found: {full_name}",
+                    "success": False,
+                }
+            async with limit:
+                try:
+                    result = await self._execute_resolved_tool(
+                        tool, arguments, debug_mode, False, timeout
+                    )
+                except Exception:
+                    logger.exception(f"Batch call to {full_name} failed")
+                    result = {
+                        "success": False,
+                        "error": "Internal error during tool execution",
+                    }
+            return index, result
 
-        if tool.is_passthrough:
+        tasks = [
+            asyncio.ensure_future(run(index, *call)) for index, call in enumerate(calls)
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _execute_resolved_tool(
+        self,
+        tool: Tool,
+        arguments: dict[str, Any],
+        debug_mode: bool,
+        profile: bool,
+        timeout: float | None,
+    ) -> dict[str, Any]:
+        """Execute an already looked-up tool (see execute_tool).
+
+        Calls to cacheable tools are answered from the result cache when
+        possible, and their successful results stored in it; the result
+        then carries ``cache_hit``. Identical concurrent calls to coalescing
+        (or cacheable) tools share one execution; results of calls that
+        joined another one carry ``coalesced``. Debug and profiled calls
+        always run on their own.
+        """
+        key = None
+        if (tool.cacheable or tool.coalesce) and not debug_mode and not profile:
+            key = result_cache.key(tool.server_id, tool.name, tool.code_hash, arguments)
+        if key is None:
+            return await self._execute_uncached_tool(
+                tool, arguments, debug_mode, profile, timeout
+            )
+
+        if tool.cacheable:
+            start_time = time.monotonic()
+            cached = result_cache.get(key)
+            if cached is not None:
+                cached["cache_hit"] = True
+                cached["duration_ms"] = int((time.monotonic() - start_time) * 1000)
+                return cached
+
+        async def execute() -> dict[str, Any]:
+            result = await self._execute_uncached_tool(
+                tool, arguments, debug_mode, profile, timeout
+            )
+            if tool.cacheable:
+                ttl = tool.cache_ttl_seconds
+                result_cache.put(
+                    key, result, RESULT_CACHE_DEFAULT_TTL if ttl is None else ttl
+                )
+                result["cache_hit"] = False
+            return result
+
+        # Calls with a different timeout may end differently: not identical
+        result, coalesced = await single_flight.run((key, timeout), execute)
+        if coalesced:
+            result["coalesced"] = True
+        return result
+
+    async def _execute_uncached_tool(
+        self,
+        tool: Tool,
+        arguments: dict[str, Any],
+        debug_mode: bool,
+        profile: bool,
+        timeout: float | None,
+    ) -> dict[str, Any]:
+        """Run a tool, routing to Python execution or MCP passthrough."""
+        if not tool.is_passthrough:
+            return await self._execute_python_tool(
+                tool, arguments, debug_mode, profile, timeout
+            )
+        if timeout is None:
             return await self._execute_passthrough_tool(tool, arguments)
-        else:
-            return await self._execute_python_tool(tool, arguments, debug_mode)
+        try:
+            return await asyncio.wait_for(
+                self._execute_passthrough_tool(tool, arguments), timeout
+            )
+        except TimeoutError:
+            return {
+                "success": False,
+                "error": f"Tool call timed out after {timeout} seconds",
+            }
 
     async def _execute_python_tool(
         self,
         tool: Tool,
         arguments: dict[str, Any],
         debug_mode: bool = False,
+        profile: bool = False,
+        timeout: float | None = None,
     ) -> dict[str, Any]:
-        """Execute a python_code mode tool."""
+        """Execute a python_code mode tool (timeout caps the tool's own)."""
         if not tool.python_code:
             return {
                 "success": False,
@@ -387,43 +980,135 @@ class ToolRegistry:
             }
 
         # Get the server for allowed modules, secrets, and network config
-        server = self.get_server_for_tool(tool.full_name)
+        server = self.servers.get(tool.server_id)
         allowed_modules = (
             set(server.allowed_modules) if server and server.allowed_modules else None
         )
         secrets = server.secrets if server else {}
+        # Newly approved private hosts must reach the squid ACL file first
+        if server is not None and server.allowed_hosts:
+            await self._squid_acl.wait()
         allowed_hosts = server.allowed_hosts if server else None
+        tool_timeout = tool.timeout_ms / 1000
+        timeout = tool_timeout if timeout is None else min(timeout, tool_timeout)
 
-        # Build HTTP client (unauthenticated — tools use secrets for auth)
-        http_client = httpx.AsyncClient(
-            timeout=tool.timeout_ms / 1000,
-            follow_redirects=False,
-        )
-
+        # Wait for this server's turn; queuing counts against the tool timeout
         try:
-            # Execute the Python code
-            result = await python_executor.execute(
-                python_code=tool.python_code,
-                arguments=arguments,
-                http_client=http_client,
-                timeout=tool.timeout_ms / 1000,
-                debug_mode=debug_mode,
-                allowed_modules=allowed_modules,
-                secrets=secrets,
-                allowed_hosts=allowed_hosts,
+            lease = await execution_pool.acquire(
+                tool.server_id,
+                max_concurrency=server.max_concurrency if server else None,
+                timeout=timeout,
             )
+        except TimeoutError:
+            return {
+                "success": False,
+                "error": (
+                    f"Execution queue timed out after {timeout} seconds "
+                    f"(server {tool.server_name} is at its concurrency limit)"
+                ),
+                "stdout": "",
+                "duration_ms": int(timeout * 1000),
+            }
+        try:
+            # Borrow the server's pooled HTTP client (unauthenticated — tools
+            # use secrets for auth); connections stay open for later calls
+            http_pool = server.http_pool if server else ServerHttpPool()
+            http_client = http_pool.acquire(timeout)
 
-            return result.to_dict()
+            try:
+                if process_pool.enabled:
+                    return await self._execute_in_process_pool(
+                        tool,
+                        server,
+                        arguments,
+                        http_client,
+                        timeout=timeout,
+                        debug_mode=debug_mode,
+                        profile=profile,
+                    )
+
+                # Execute the Python code
+                result = await python_executor.execute(
+                    python_code=tool.python_code,
+                    arguments=arguments,
+                    http_client=http_client,
+                    timeout=timeout,
+                    debug_mode=debug_mode,
+                    allowed_modules=allowed_modules,
+                    secrets=secrets,
+                    allowed_hosts=allowed_hosts,
+                    warm_slot=tool.warm_slot,
+                    redactor=server.redactor if server else None,
+                    lease=lease,
+                    profile=profile,
+                    http_cache=server.http_cache if server else None,
+                    outbound_limiter=server.outbound_limiter if server else None,
+                )
+
+                return result.to_dict(include_json=True)
 
+            finally:
+                http_pool.release()
+                if server is None:
+                    http_pool.close()
         finally:
-            # Always close the per-request client.
-            # Catch exceptions to prevent aclose() failures from
-            # suppressing the execution result (the finally block
-            # would replace a successful return with an exception).
-            try:
-                await http_client.aclose()
-            except Exception as e:
-                logger.warning(f"Error closing HTTP client: {e}")
+            lease.close()
+
+    async def _execute_in_process_pool(
+        self,
+        tool: Tool,
+        server: RegisteredServer | None,
+        arguments: dict[str, Any],
+        http_client: PooledCallClient,
+        timeout: float,
+        debug_mode: bool,
+        profile: bool,
+    ) -> dict[str, Any]:
+        """Run a python_code tool in a pre-forked worker process.
+
+        The worker has its own GIL and kernel-enforced CPU/memory limits. Its
+        HTTP requests come back here and go through the same client stack as
+        in-process executions (allowlist, pooled connections, DNS cache,
+        response cache, outbound limits); their accounting and debug info
+        are added to the worker's result.
+        """
+        usage = ResourceUsage()
+        debug_info = DebugInfo() if debug_mode else None
+        tool_http = python_executor.create_tool_http_client(
+            http_client,
+            usage,
+            debug_info,
+            allowed_hosts=server.allowed_hosts if server else None,
+            http_cache=server.http_cache if server else None,
+            outbound_limiter=server.outbound_limiter if server else None,
+        )
+        allowed_modules = server.allowed_modules if server else None
+        result = await process_pool.execute(
+            {
+                "python_code": tool.python_code,
+                "arguments": arguments,
+                "timeout": timeout,
+                "debug_mode": debug_mode,
+                "profile": profile,
+                "allowed_modules": sorted(allowed_modules) if allowed_modules else None,
+                "secrets": dict(server.secrets) if server else {},
+                "warm": tool.warm,
+                "server_id": tool.server_id,
+                "tool_name": tool.name,
+            },
+            http_client=tool_http,
+        )
+        if "resource_usage" in result:
+            worker_usage = result["resource_usage"]
+            for key, value in usage.to_dict().items():
+                if key.startswith("http_"):
+                    worker_usage[key] = value
+        if debug_info is not None:
+            result["debug_info"] = {
+                **result.get("debug_info", {}),
+                **debug_info.to_dict(),
+            }
+        return result
 
     async def _execute_passthrough_tool(
         self,
@@ -440,9 +1125,9 @@ class ToolRegistry:
         traffic to internal infrastructure.
         """
         from app.mcp_session_pool import mcp_session_pool
-        from app.ssrf import SSRFError, validate_url_with_pinning
+        from app.ssrf import SSRFError, validate_url_with_pinning_async
 
-        server = self.get_server_for_tool(tool.full_name)
+        server = self.servers.get(tool.server_id)
         if not server:
             return {
                 "success": False,
@@ -466,7 +1151,7 @@ class ToolRegistry:
         # SECURITY: Validate external URL doesn't resolve to internal IPs.
         # DNS can change between registration and call time; re-validate now.
         try:
-            validate_url_with_pinning(source.url)
+            await validate_url_with_pinning_async(source.url)
         except SSRFError as e:
             logger.warning(
                 f"Blocked passthrough tool {tool.full_name}: "
@@ -494,7 +1179,12 @@ class ToolRegistry:
 
     async def clear_all(self):
         """Clear all registrations."""
+        for server in self.servers.values():
+            server.http_pool.close()
         self.servers.clear()
+        self._tool_index.clear()
+        result_cache.clear()
+        self._changed()
 
 
 # Global registry instance
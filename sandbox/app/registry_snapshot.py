@@ -0,0 +1,386 @@
+"""Registry Snapshot - encrypted copy of the registrations for warm restarts.
+
+Registrations only live in memory, so a restarted sandbox starts empty and
+the backend has to re-register every running server, each costing several
+database queries and secret decryptions. With SANDBOX_SNAPSHOT_PATH and
+SANDBOX_SNAPSHOT_KEY set, the registry is written to a snapshot file
+shortly after every change and registered again from it at startup. The
+backend then compares what ``GET /servers`` reports against its database
+and only re-registers the servers that changed in the meantime.
+
+A snapshot holds decrypted secrets, so it is encrypted (AES-256-GCM) with a
+key of the sandbox's own — never the backend's MCPBOX_ENCRYPTION_KEY, which
+the sandbox must not have. With SANDBOX_SNAPSHOT_CODE_CACHE, the compiled
+code cache goes into the snapshot too; it is only loaded again by the same
+validator and Python version that compiled it.
+"""
+
+import asyncio
+import base64
+import hashlib
+import importlib.util
+import json
+import logging
+import marshal
+import os
+import time
+from dataclasses import fields
+from pathlib import Path
+from typing import Any
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from app import executor
+from app.executor import CompiledCode, compiled_code_cache
+from app.outbound_limiter import OutboundLimits
+from app.registry import RegisteredServer, Tool, ToolRegistry, tool_registry
+
+logger = logging.getLogger(__name__)
+
+# Snapshot file (empty = snapshots off)
+SNAPSHOT_PATH = os.environ.get("SANDBOX_SNAPSHOT_PATH", "")
+
+# AES-256 key of the snapshot file, as 64 hex characters (empty = snapshots off)
+SNAPSHOT_KEY = os.environ.get("SANDBOX_SNAPSHOT_KEY", "")
+
+# Seconds after a change before the snapshot is written; changes in between
+# are written together
+SNAPSHOT_DELAY = float(os.environ.get("SANDBOX_SNAPSHOT_DELAY", "2"))
+
+# Whether compiled tool code is included in the snapshot
+SNAPSHOT_CODE_CACHE = (
+    os.environ.get("SANDBOX_SNAPSHOT_CODE_CACHE", "false").lower() == "true"
+)
+
+# File header; also authenticated as associated data of the ciphertext
+_MAGIC = b"MCPBOXSNAP1\n"
+_NONCE_SIZE = 12
+
+
+def _code_fingerprint() -> str:
+    """Identifies the validator and bytecode format of compiled code.
+
+    Cached entries carry validation verdicts, so entries compiled by
+    another version of the validator must not be trusted.
+    """
+    digest = hashlib.sha256(importlib.util.MAGIC_NUMBER)
+    digest.update(Path(executor.__file__).read_bytes())
+    return digest.hexdigest()
+
+
+def _parse_key(raw: str) -> bytes | None:
+    """Decode a hex AES-256 key (None if it isn't one)."""
+    try:
+        key = bytes.fromhex(raw)
+    except ValueError:
+        return None
+    return key if len(key) == 32 else None
+
+
+def _tool_data(tool: Tool) -> dict[str, Any]:
+    """A tool's definition, as passed to register_server()."""
+    return {
+        "name": tool.name,
+        "description": tool.description,
+        "parameters": tool.parameters,
+        "python_code": tool.python_code,
+        "timeout_ms": tool.timeout_ms,
+        "tool_type": tool.tool_type,
+        "external_source_id": tool.external_source_id,
+        "external_tool_name": tool.external_tool_name,
+        "cacheable": tool.cacheable,
+        "cache_ttl_seconds": tool.cache_ttl_seconds,
+        "coalesce": tool.coalesce,
+        "warm": tool.warm,
+    }
+
+
+def _server_data(server: RegisteredServer) -> dict[str, Any]:
+    """A server's registration, as keyword arguments of register_server()."""
+    defaults = OutboundLimits()
+    limits = server.outbound_limiter.limits
+    return {
+        "server_id": server.server_id,
+        "server_name": server.server_name,
+        "tools": [_tool_data(tool) for tool in server.tools.values()],
+        "allowed_modules": server.allowed_modules,
+        "secrets": dict(server.secrets),
+        "external_sources": [
+            {
+                "source_id": source.source_id,
+                "url": source.url,
+                "auth_headers": source.auth_headers,
+                "transport_type": source.transport_type,
+            }
+            for source in server.external_sources.values()
+        ],
+        "allowed_hosts": (
+            sorted(server.allowed_hosts) if server.allowed_hosts is not None else None
+        ),
+        "max_concurrency": server.max_concurrency,
+        "http_cache": server.http_cache is not None,
+        # Only overrides: changed sandbox defaults apply after a restart
+        "outbound_limits": {
+            f.name: getattr(limits, f.name)
+            for f in fields(limits)
+            if getattr(limits, f.name) != getattr(defaults, f.name)
+        },
+        "version": server.version,
+    }
+
+
+def _code_entry_data(entry: CompiledCode) -> dict[str, Any]:
+    return {
+        "code_hash": entry.code_hash,
+        "code": (
+            base64.b64encode(marshal.dumps(entry.code)).decode()
+            if entry.code is not None
+            else None
+        ),
+        "error": entry.error,
+    }
+
+
+def _code_entry(data: dict[str, Any]) -> CompiledCode:
+    return CompiledCode(
+        code_hash=data["code_hash"],
+        code=marshal.loads(base64.b64decode(data["code"])) if data["code"] else None,
+        error=data["error"],
+    )
+
+
+class RegistrySnapshot:
+    """Writes a registry to an encrypted snapshot file and restores it."""
+
+    def __init__(
+        self,
+        registry: ToolRegistry,
+        path: str | Path,
+        key: bytes | None,
+        delay: float = SNAPSHOT_DELAY,
+        include_code_cache: bool = SNAPSHOT_CODE_CACHE,
+    ):
+        self._registry = registry
+        self.path = Path(path) if path else None
+        self._aead = AESGCM(key) if key else None
+        self.delay = delay
+        self.include_code_cache = include_code_cache
+        self._task: asyncio.Task | None = None
+        # Registry generation the snapshot file matches
+        self._saved_generation: int | None = None
+        self.saves = 0
+        self.save_failures = 0
+        self.last_save_ms = 0.0
+        self.last_size_bytes = 0
+        self.restored_servers = 0
+        self.restored_code_entries = 0
+        self.restore_ms = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None and self._aead is not None
+
+    def start(self) -> int:
+        """Restore the snapshot, then keep it up to date with the registry.
+
+        Returns:
+            The number of servers restored.
+        """
+        if not self.enabled:
+            return 0
+        restored = self.restore()
+        self._saved_generation = self._registry.generation
+        self._registry.on_change = self.schedule
+        return restored
+
+    async def stop(self) -> None:
+        """Stop following the registry, writing any change not yet saved."""
+        if not self.enabled or self._registry.on_change != self.schedule:
+            return
+        self._registry.on_change = None
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._registry.generation != self._saved_generation:
+            await self.save()
+
+    def schedule(self) -> None:
+        """Write the snapshot after SANDBOX_SNAPSHOT_DELAY (registry change hook)."""
+        if self._task is not None and not self._task.done():
+            return  # The pending write picks this change up
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No loop (startup): stop() writes it
+        self._task = loop.create_task(self._save_later())
+
+    async def _save_later(self) -> None:
+        while True:
+            await asyncio.sleep(self.delay)
+            generation = self._registry.generation
+            await self.save()
+            # Changes made while writing didn't schedule another write
+            if self._registry.generation == generation:
+                return
+
+    async def save(self) -> bool:
+        """Write the registry's current state to the snapshot file.
+
+        Returns:
+            True if the snapshot was written.
+        """
+        if not self.enabled:
+            return False
+        start = time.perf_counter()
+        # Read on the event loop, where the registry is changed
+        generation = self._registry.generation
+        state = {
+            "created_at": time.time(),
+            "generation": self._registry.generation_tag,
+            "servers": [_server_data(s) for s in self._registry.servers.values()],
+        }
+        code_entries = compiled_code_cache.export() if self.include_code_cache else []
+        try:
+            size = await asyncio.to_thread(self._write, state, code_entries)
+        except Exception:
+            self.save_failures += 1
+            logger.warning(
+                f"Failed to write registry snapshot {self.path}", exc_info=True
+            )
+            return False
+        self._saved_generation = generation
+        self.saves += 1
+        self.last_size_bytes = size
+        self.last_save_ms = (time.perf_counter() - start) * 1000
+        return True
+
+    def _write(self, state: dict[str, Any], code_entries: list[CompiledCode]) -> int:
+        """Encrypt *state* and atomically replace the snapshot file with it."""
+        if code_entries:
+            state["code_cache"] = {
+                "fingerprint": _code_fingerprint(),
+                "entries": [_code_entry_data(entry) for entry in code_entries],
+            }
+        nonce = os.urandom(_NONCE_SIZE)
+        blob = (
+            _MAGIC
+            + nonce
+            + self._aead.encrypt(nonce, json.dumps(state).encode(), _MAGIC)
+        )
+        # Written next to the snapshot and renamed over it, so a crash
+        # mid-write never leaves a partial file behind
+        tmp_path = self.path.with_name(f".{self.path.name}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(blob)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return len(blob)
+
+    def _read(self) -> dict[str, Any] | None:
+        """Decrypt the snapshot file (None if missing or unusable)."""
+        try:
+            blob = self.path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Cannot read registry snapshot {self.path}: {e}")
+            return None
+        if not blob.startswith(_MAGIC):
+            logger.warning(f"Ignoring registry snapshot {self.path}: unknown format")
+            return None
+        nonce = blob[len(_MAGIC) : len(_MAGIC) + _NONCE_SIZE]
+        try:
+            plaintext = self._aead.decrypt(
+                nonce, blob[len(_MAGIC) + _NONCE_SIZE :], _MAGIC
+            )
+        except (InvalidTag, ValueError):
+            logger.warning(
+                f"Ignoring registry snapshot {self.path}: it cannot be decrypted"
+                " (was SANDBOX_SNAPSHOT_KEY changed?)"
+            )
+            return None
+        return json.loads(plaintext)
+
+    def restore(self) -> int:
+        """Register the servers of the snapshot file.
+
+        Returns:
+            The number of servers restored.
+        """
+        if not self.enabled:
+            return 0
+        start = time.perf_counter()
+        state = self._read()
+        if state is None:
+            return 0
+
+        # Loaded first, so registering the tools below finds their code compiled
+        code_cache = state.get("code_cache")
+        if code_cache and self.include_code_cache:
+            if code_cache["fingerprint"] == _code_fingerprint():
+                entries = [_code_entry(data) for data in code_cache["entries"]]
+                compiled_code_cache.load(entries)
+                self.restored_code_entries = len(entries)
+            else:
+                logger.info("Not restoring compiled code: the sandbox was updated")
+
+        restored = 0
+        for server_data in state["servers"]:
+            try:
+                self._registry.register_server(**server_data)
+            except Exception:
+                logger.warning(
+                    f"Failed to restore server {server_data.get('server_id')}"
+                    " from the registry snapshot",
+                    exc_info=True,
+                )
+                continue
+            restored += 1
+
+        self.restored_servers = restored
+        self.restore_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            f"Restored {restored} server(s) from registry snapshot"
+            f" {state['generation']} in {self.restore_ms:.0f}ms"
+        )
+        return restored
+
+    def stats(self) -> dict[str, Any]:
+        """Get snapshot statistics for monitoring."""
+        return {
+            "enabled": self.enabled,
+            "include_code_cache": self.include_code_cache,
+            "saves": self.saves,
+            "save_failures": self.save_failures,
+            "last_save_ms": round(self.last_save_ms, 2),
+            "last_size_bytes": self.last_size_bytes,
+            "restored_servers": self.restored_servers,
+            "restored_code_entries": self.restored_code_entries,
+            "restore_ms": round(self.restore_ms, 2),
+        }
+
+
+def _snapshot_key() -> bytes | None:
+    if not SNAPSHOT_KEY:
+        return None
+    key = _parse_key(SNAPSHOT_KEY)
+    if key is None:
+        logger.error(
+            "SANDBOX_SNAPSHOT_KEY must be 64 hex characters (32 bytes);"
+            " registry snapshots are disabled"
+        )
+    return key
+
+
+# Global registry snapshot of the global registry (off unless configured)
+registry_snapshot = RegistrySnapshot(tool_registry, SNAPSHOT_PATH, _snapshot_key())
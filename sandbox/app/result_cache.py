@@ -0,0 +1,214 @@
+"""Result Cache - memoized results of idempotent tools.
+
+Tools registered with ``cacheable`` (pure lookups: status pages, exchange
+rates, ...) have their successful results kept for the tool's
+``cache_ttl_seconds`` (SANDBOX_RESULT_CACHE_TTL when not set). A call with
+the same arguments within that time is answered from the cache without
+running the tool or making any outbound request.
+
+Entries are keyed by (server, tool, code hash, canonical arguments), so a
+changed tool body never serves an old result, and are dropped whenever
+their server is re-registered, unregistered or gets new secrets, or their
+tool is replaced or removed by an update. The cache
+is a bounded LRU capped both in entries and in (approximate) bytes.
+Failures, debug and profiled calls are never cached.
+"""
+
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of cached results (LRU-evicted)
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("SANDBOX_RESULT_CACHE_SIZE", "1024"))
+
+# Maximum total size of cached results, in bytes of their JSON encoding
+RESULT_CACHE_MAX_BYTES = int(
+    os.environ.get("SANDBOX_RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+)
+
+# Time to live for tools that don't set cache_ttl_seconds
+RESULT_CACHE_DEFAULT_TTL = float(os.environ.get("SANDBOX_RESULT_CACHE_TTL", "300"))
+
+# Per-execution fields that describe the call that filled the cache, not the
+# result; they are not replayed on a hit
+_UNCACHED_FIELDS = frozenset(
+    {"debug_info", "profile", "resource_usage", "duration_ms", "cache_hit"}
+)
+
+# Rough bookkeeping cost of one entry on top of its payload
+_ENTRY_OVERHEAD = 256
+
+# (server_id, tool name, code hash, canonical arguments)
+ResultCacheKey = tuple[str, str, str, str]
+
+
+def canonical_arguments(arguments: dict[str, Any]) -> str | None:
+    """Canonical JSON text of *arguments* (None if not JSON-serializable).
+
+    Key order and whitespace don't matter; values of different JSON types
+    (``1`` and ``"1"``, ``1`` and ``1.0``) stay distinct.
+    """
+    try:
+        return json.dumps(
+            arguments,
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            allow_nan=False,
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def _result_size(result: dict[str, Any]) -> int:
+    """Approximate memory held by a cached result."""
+    result_json = result.get("result_json")
+    if result_json is not None:
+        size = len(result_json)
+    else:
+        try:
+            size = len(json.dumps(result.get("result"), default=str))
+        except (TypeError, ValueError):
+            size = len(str(result.get("result")))
+    return size + len(result.get("stdout") or "") + _ENTRY_OVERHEAD
+
+
+@dataclass
+class CachedResult:
+    """A cached tool result and when it stops being served."""
+
+    result: dict[str, Any]
+    size: int
+    expires_at: float
+
+
+class ResultCache:
+    """Bounded, memory-capped LRU of successful tool results.
+
+    Only used from the event loop, so it needs no locking.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        max_bytes: int = RESULT_CACHE_MAX_BYTES,
+    ):
+        self._entries: OrderedDict[ResultCacheKey, CachedResult] = OrderedDict()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(
+        server_id: str, tool_name: str, code_hash: str | None, arguments: dict
+    ) -> ResultCacheKey | None:
+        """Cache key for a call (None if the arguments can't be keyed)."""
+        canonical = canonical_arguments(arguments)
+        if canonical is None:
+            return None
+        return (server_id, tool_name, code_hash or "", canonical)
+
+    def get(self, key: ResultCacheKey) -> dict[str, Any] | None:
+        """Return a copy of the cached result for *key*, or None."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return dict(entry.result)
+
+    def put(self, key: ResultCacheKey, result: dict[str, Any], ttl: float) -> bool:
+        """Cache a successful *result* for *ttl* seconds.
+
+        Returns:
+            Whether the result was stored (failures, non-positive TTLs and
+            results larger than the whole cache are not).
+        """
+        if ttl <= 0 or not result.get("success"):
+            return False
+        cached = {k: v for k, v in result.items() if k not in _UNCACHED_FIELDS}
+        size = _result_size(cached)
+        if size > self._max_bytes:
+            return False
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = CachedResult(
+            result=cached, size=size, expires_at=time.monotonic() + ttl
+        )
+        self._bytes += size
+        self.stores += 1
+        while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return True
+
+    def invalidate_server(self, server_id: str) -> int:
+        """Drop every cached result of *server_id*; returns how many."""
+        stale = [key for key in self._entries if key[0] == server_id]
+        for key in stale:
+            self._remove(key)
+        self.invalidations += len(stale)
+        if stale:
+            logger.debug(f"Dropped {len(stale)} cached result(s) of server {server_id}")
+        return len(stale)
+
+    def invalidate_tool(self, server_id: str, tool_name: str) -> int:
+        """Drop every cached result of one tool; returns how many."""
+        stale = [
+            key for key in self._entries if key[0] == server_id and key[1] == tool_name
+        ]
+        for key in stale:
+            self._remove(key)
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        """Drop all cached results (counters are kept)."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: ResultCacheKey) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    @property
+    def size(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        """Get cache statistics for monitoring."""
+        return {
+            "size": self.size,
+            "max_size": self._max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+# Global result cache (shared by all servers; entries keyed by server)
+result_cache = ResultCache()
@@ -11,20 +11,40 @@ from contextlib import redirect_stdout
 from typing import Any, Optional
 
 import httpx
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
 from app.auth import verify_api_key
+from app.dns_resolver import dns_resolver
+from app.execution_pool import execution_pool
 from app.executor import (
     DEFAULT_ALLOWED_MODULES,
+    ISOLATED_EXECUTION,
+    LoopBridgedHttpClient,
+    MeteredHttpClient,
+    ResourceUsage,
     SafeModuleProxy,
     SizeLimitedStringIO,
+    compiled_code_cache,
     create_safe_builtins,
+    encode_result,
+    exec_metered,
+    isolated_loop_pool,
+    run_metered,
+    safe_builtins_cache,
     validate_code_safety,
 )
-from app.registry import ensure_private_hosts_in_squid_acl, tool_registry
+from app.profiler import sampling_profiler
+from app.registry import (
+    StaleVersionError,
+    ensure_private_hosts_in_squid_acl,
+    tool_registry,
+)
+from app.result_cache import result_cache
+from app.single_flight import single_flight
 from app.ssrf import SSRFError
 from app.ssrf import SSRFProtectedAsyncHttpClient
 
@@ -49,6 +69,9 @@ MAX_CODE_SIZE = 100 * 1024  # 100KB
 # Maximum result size (return value from main()), configurable, default 1MB
 MAX_RESULT_SIZE = int(os.environ.get("SANDBOX_MAX_RESULT_SIZE", 1024 * 1024))
 
+# Maximum number of calls in one /tools/batch request
+BATCH_MAX_CALLS = int(os.environ.get("SANDBOX_BATCH_MAX_CALLS", "100"))
+
 
 class ToolDef(BaseModel):
     """Tool definition for registration.
@@ -66,6 +89,14 @@ class ToolDef(BaseModel):
     tool_type: str = "python_code"
     external_source_id: Optional[str] = None
     external_tool_name: Optional[str] = None
+    # Warm execution mode (module body runs once); None = sandbox default
+    warm: bool | None = None
+    # Idempotent tool: reuse successful results for the same arguments
+    cacheable: bool = False
+    # How long a cached result is reused (None = SANDBOX_RESULT_CACHE_TTL)
+    cache_ttl_seconds: float | None = None
+    # Identical concurrent calls share one execution (implied by cacheable)
+    coalesce: bool = False
 
     def model_post_init(self, __context: Any) -> None:
         """Validate code size limits after model initialization."""
@@ -73,6 +104,8 @@ class ToolDef(BaseModel):
             raise ValueError(
                 f"python_code exceeds maximum size of {MAX_CODE_SIZE} bytes"
             )
+        if self.cache_ttl_seconds is not None and self.cache_ttl_seconds <= 0:
+            raise ValueError("cache_ttl_seconds must be positive")
 
 
 class ExternalSourceDef(BaseModel):
@@ -84,6 +117,30 @@ class ExternalSourceDef(BaseModel):
     transport_type: str = "streamable_http"
 
 
+class OutboundLimitsDef(BaseModel):
+    """Outbound request limits of a server's tools (None = sandbox default).
+
+    Limits are per server; 0 means unlimited.
+    """
+
+    # Requests to one hostname in flight at once
+    max_concurrent_per_host: int | None = None
+    # Requests per second to one hostname
+    rate_per_host: float | None = None
+    # Requests in flight at once across all hostnames
+    max_concurrent: int | None = None
+    # Requests per second across all hostnames
+    rate: float | None = None
+    # Seconds a request may wait for its turn before failing
+    queue_timeout: float | None = None
+
+    def model_post_init(self, context: Any, /) -> None:
+        """Reject negative limits."""
+        for name, value in self.model_dump().items():
+            if value is not None and value < 0:
+                raise ValueError(f"{name} must not be negative")
+
+
 class RegisterServerRequest(BaseModel):
     """Request to register a server with tools."""
 
@@ -97,6 +154,14 @@ class RegisterServerRequest(BaseModel):
     external_sources: list[ExternalSourceDef] = []  # External MCP source configs
     # Network access control: approved hostnames (None = no restriction)
     allowed_hosts: Optional[list[str]] = None
+    # Concurrent tool executions for this server (None = sandbox default)
+    max_concurrency: int | None = None
+    # Cache HTTP responses for the tools' http client (None = sandbox default)
+    http_cache: bool | None = None
+    # Per-destination limits of the tools' http client (None = sandbox defaults)
+    outbound_limits: OutboundLimitsDef | None = None
+    # Backend version of the registration; older ones are rejected (None = unversioned)
+    version: int | None = None
 
 
 class RegisterServerResponse(BaseModel):
@@ -107,6 +172,28 @@ class RegisterServerResponse(BaseModel):
     tools_registered: int
 
 
+class UpdateServerRequest(BaseModel):
+    """Delta of a registered server's tools, secrets and external sources."""
+
+    # Backend version of the update; must be newer than the server's current one
+    version: int
+    tools: list[ToolDef] = []  # Added, or replacing the tool of the same name
+    remove_tools: list[str] = []
+    secrets: dict[str, str] = {}  # Added, or replacing the secret of the same key
+    remove_secrets: list[str] = []
+    external_sources: list[ExternalSourceDef] = []  # Added or replaced by source_id
+    remove_external_sources: list[str] = []
+
+
+class UpdateServerResponse(BaseModel):
+    """Response from a server update."""
+
+    success: bool
+    server_id: str
+    version: int
+    tools_registered: int
+
+
 class UnregisterServerResponse(BaseModel):
     """Response from server unregistration."""
 
@@ -119,6 +206,8 @@ class ToolCallRequest(BaseModel):
 
     arguments: dict[str, Any] = {}
     debug_mode: bool = False
+    # Sample where the tool spends its time and return the profile
+    profile: bool = False
 
 
 class ErrorDetailResponse(BaseModel):
@@ -142,6 +231,16 @@ class HttpCallInfoResponse(BaseModel):
     request_headers: Optional[dict[str, str]] = None
     response_preview: Optional[str] = None
     error: Optional[str] = None
+    # "hit" when answered from the server's HTTP response cache
+    cache: str | None = None
+    # Phase durations in ms: dns_ms, connect_ms, tls_ms, send_ms, ttfb_ms,
+    # download_ms (phases the call didn't go through are left out)
+    timings: dict[str, float] | None = None
+    # Whether the request went out on an already open connection
+    connection_reused: bool | None = None
+    # Request body and response body bytes on the wire
+    request_bytes: int | None = None
+    response_bytes: int | None = None
 
 
 class DebugInfoResponse(BaseModel):
@@ -149,6 +248,10 @@ class DebugInfoResponse(BaseModel):
 
     http_calls: list[HttpCallInfoResponse] = []
     timing_breakdown: dict[str, int] = {}
+    # HTTP response cache lookups by outcome (hits, misses, revalidated)
+    http_cache: dict[str, int] | None = None
+    # Time requests waited for the server's outbound limits
+    outbound_queue: dict[str, float] | None = None
 
 
 class ToolCallResponse(BaseModel):
@@ -162,6 +265,58 @@ class ToolCallResponse(BaseModel):
     stdout: Optional[str] = None
     duration_ms: Optional[int] = None
     debug_info: Optional[DebugInfoResponse] = None
+    resource_usage: dict[str, Any] | None = None
+    profile: dict[str, Any] | None = None
+    # Set for cacheable tools: whether the result came from the result cache
+    cache_hit: bool | None = None
+    # True when the call joined an identical one already running
+    coalesced: bool | None = None
+
+
+class BatchToolCall(BaseModel):
+    """One call in a batch."""
+
+    name: str  # Full tool name: servername__toolname
+    arguments: dict[str, Any] = {}
+    # Caps the tool's own timeout for this call (None = tool timeout)
+    timeout_seconds: float | None = None
+
+
+class BatchToolCallRequest(BaseModel):
+    """Request to execute several tool calls concurrently."""
+
+    calls: list[BatchToolCall]
+    # Calls run at once (None or above SANDBOX_BATCH_MAX_CONCURRENCY = that cap)
+    max_concurrency: int | None = None
+    debug_mode: bool = False
+    # Stream results as NDJSON lines in completion order
+    stream: bool = False
+
+    def model_post_init(self, context: Any, /) -> None:
+        """Validate batch limits after model initialization."""
+        if not self.calls:
+            raise ValueError("calls must not be empty")
+        if len(self.calls) > BATCH_MAX_CALLS:
+            raise ValueError(f"calls exceeds maximum of {BATCH_MAX_CALLS} per batch")
+        if self.max_concurrency is not None and self.max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        for call in self.calls:
+            if call.timeout_seconds is not None and call.timeout_seconds <= 0:
+                raise ValueError("timeout_seconds must be positive")
+
+
+class BatchToolCallResult(ToolCallResponse):
+    """Result of one call in a batch."""
+
+    index: int  # Position of the call in the request
+    name: str
+
+
+class BatchToolCallResponse(BaseModel):
+    """Results of a batch, in request order."""
+
+    results: list[BatchToolCallResult]
+    duration_ms: int
 
 
 class ToolInfo(BaseModel):
@@ -185,6 +340,14 @@ class ServerInfo(BaseModel):
     server_id: str
     server_name: str
     tool_count: int
+    # What the registration holds, for the backend to compare with its
+    # database after a restore from a registry snapshot (no secret values)
+    version: int = 0
+    tools: list[str] = []
+    secret_keys: list[str] = []
+    external_source_ids: list[str] = []
+    allowed_hosts: list[str] | None = None
+    allowed_modules: list[str] | None = None
 
 
 class ListServersResponse(BaseModel):
@@ -194,12 +357,61 @@ class ListServersResponse(BaseModel):
     total: int
 
 
+def _encode_with_result(model: BaseModel, result_json: bytes | None) -> bytes:
+    """JSON-encode *model*, splicing in its pre-encoded ``result`` if any.
+
+    The result was already encoded (and size-checked) by encode_result(),
+    so it is spliced into the body instead of being validated and
+    serialized again.
+    """
+    if result_json is None:
+        return model.model_dump_json().encode()
+    body = model.model_dump_json(exclude={"result"}).encode()
+    return b'{"result": ' + result_json + b", " + body[1:]
+
+
+def _response_with_encoded_result(model: BaseModel, result_json: bytes) -> Response:
+    """Send *model* with its ``result`` field replaced by pre-encoded JSON."""
+    return Response(
+        content=_encode_with_result(model, result_json),
+        media_type="application/json",
+    )
+
+
 # --- Lifecycle Endpoints ---
 
 
 # --- Server Management ---
 
 
+def _tool_data(t: ToolDef) -> dict[str, Any]:
+    """Registry tool definition of a ToolDef."""
+    return {
+        "name": t.name,
+        "description": t.description,
+        "parameters": t.parameters,
+        "python_code": t.python_code,
+        "timeout_ms": t.timeout_ms,
+        "tool_type": t.tool_type,
+        "external_source_id": t.external_source_id,
+        "external_tool_name": t.external_tool_name,
+        "warm": t.warm,
+        "cacheable": t.cacheable,
+        "cache_ttl_seconds": t.cache_ttl_seconds,
+        "coalesce": t.coalesce,
+    }
+
+
+def _source_data(s: ExternalSourceDef) -> dict[str, Any]:
+    """Registry external source config of an ExternalSourceDef."""
+    return {
+        "source_id": s.source_id,
+        "url": s.url,
+        "auth_headers": s.auth_headers,
+        "transport_type": s.transport_type,
+    }
+
+
 @router.post("/servers/register", response_model=RegisterServerResponse)
 async def register_server(request: RegisterServerRequest):
     """Register a server with its tools.
@@ -209,41 +421,26 @@ async def register_server(request: RegisterServerRequest):
 
     Tools can be Python code (with async main() function) or MCP passthrough.
     """
-    tools_data = []
-
-    for t in request.tools:
-        tool_data = {
-            "name": t.name,
-            "description": t.description,
-            "parameters": t.parameters,
-            "python_code": t.python_code,
-            "timeout_ms": t.timeout_ms,
-            "tool_type": t.tool_type,
-            "external_source_id": t.external_source_id,
-            "external_tool_name": t.external_tool_name,
-        }
-        tools_data.append(tool_data)
-
-    # Build external source configs
-    external_sources_data = [
-        {
-            "source_id": s.source_id,
-            "url": s.url,
-            "auth_headers": s.auth_headers,
-            "transport_type": s.transport_type,
-        }
-        for s in request.external_sources
-    ]
-
-    count = tool_registry.register_server(
-        server_id=request.server_id,
-        server_name=request.server_name,
-        tools=tools_data,
-        allowed_modules=request.allowed_modules,
-        secrets=request.secrets,
-        external_sources=external_sources_data,
-        allowed_hosts=request.allowed_hosts,
-    )
+    try:
+        count = tool_registry.register_server(
+            server_id=request.server_id,
+            server_name=request.server_name,
+            tools=[_tool_data(t) for t in request.tools],
+            allowed_modules=request.allowed_modules,
+            secrets=request.secrets,
+            external_sources=[_source_data(s) for s in request.external_sources],
+            allowed_hosts=request.allowed_hosts,
+            max_concurrency=request.max_concurrency,
+            http_cache=request.http_cache,
+            outbound_limits=(
+                request.outbound_limits.model_dump(exclude_none=True)
+                if request.outbound_limits is not None
+                else None
+            ),
+            version=request.version,
+        )
+    except StaleVersionError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
 
     return RegisterServerResponse(
         success=True,
@@ -252,6 +449,43 @@ async def register_server(request: RegisterServerRequest):
     )
 
 
+@router.patch("/servers/{server_id}", response_model=UpdateServerResponse)
+async def update_server(server_id: str, request: UpdateServerRequest):
+    """Add, replace or remove individual tools, secrets and external sources.
+
+    Everything the update doesn't name stays registered as it is, along
+    with its caches and warm state. Updates are versioned by the backend:
+    one that isn't newer than the server's current version is rejected
+    with 409, and the backend re-registers the server in full instead.
+    """
+    try:
+        found = tool_registry.update_server(
+            server_id,
+            request.version,
+            tools=[_tool_data(t) for t in request.tools],
+            remove_tools=request.remove_tools,
+            secrets=request.secrets,
+            remove_secrets=request.remove_secrets,
+            external_sources=[_source_data(s) for s in request.external_sources],
+            remove_external_sources=request.remove_external_sources,
+        )
+    except StaleVersionError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e)) from e
+
+    if not found:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Server not found: {server_id}",
+        )
+
+    return UpdateServerResponse(
+        success=True,
+        server_id=server_id,
+        version=request.version,
+        tools_registered=len(tool_registry.servers[server_id].tools),
+    )
+
+
 @router.post("/servers/{server_id}/unregister", response_model=UnregisterServerResponse)
 async def unregister_server(server_id: str):
     """Unregister a server and remove all its tools."""
@@ -306,6 +540,14 @@ async def list_servers():
             server_id=s.server_id,
             server_name=s.server_name,
             tool_count=len(s.tools),
+            version=s.version,
+            tools=sorted(s.tools),
+            secret_keys=sorted(s.secrets),
+            external_source_ids=sorted(s.external_sources),
+            allowed_hosts=(
+                sorted(s.allowed_hosts) if s.allowed_hosts is not None else None
+            ),
+            allowed_modules=s.allowed_modules,
         )
         for s in tool_registry.servers.values()
     ]
@@ -316,20 +558,47 @@ async def list_servers():
 # --- Tool Management ---
 
 
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header value matches *etag* (weak comparison)."""
+    if not if_none_match:
+        return False
+    return any(
+        candidate.strip().removeprefix("W/") in (etag, "*")
+        for candidate in if_none_match.split(",")
+    )
+
+
 @router.get("/tools", response_model=ListToolsResponse)
-async def list_tools(server_id: Optional[str] = None):
+async def list_tools(request: Request, server_id: str | None = None):
     """List all registered tools.
 
-    Optionally filter by server_id.
+    Optionally filter by server_id. The response carries an ETag of the
+    registry generation; with a matching If-None-Match the list is not
+    sent again (304).
     """
+    etag = f'"{tool_registry.generation_tag}"'
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+
     if server_id:
         tools = tool_registry.list_tools_for_server(server_id)
-    else:
-        tools = tool_registry.list_tools()
+        response = ListToolsResponse(
+            tools=[ToolInfo(**t) for t in tools],
+            total=len(tools),
+        )
+        return Response(
+            content=response.model_dump_json(),
+            media_type="application/json",
+            headers={"ETag": etag},
+        )
 
-    return ListToolsResponse(
-        tools=[ToolInfo(**t) for t in tools],
-        total=len(tools),
+    tools_json, total = tool_registry.list_tools_json()
+    return Response(
+        content=b'{"tools":' + tools_json + b',"total":' + str(total).encode() + b"}",
+        media_type="application/json",
+        headers={"ETag": etag},
     )
 
 
@@ -341,7 +610,8 @@ async def call_tool(request: Request, tool_name: str, body: ToolCallRequest):
     tool_name should be the full name: servername__toolname
 
     For python_code tools, the response includes stdout and duration_ms.
-    Set debug_mode=true for detailed execution info.
+    Set debug_mode=true for detailed execution info, and profile=true for
+    sampled per-function and per-line timings (collapsed stacks).
     """
     start_time = time.monotonic()
 
@@ -351,6 +621,7 @@ async def call_tool(request: Request, tool_name: str, body: ToolCallRequest):
         extra={
             "tool_name": tool_name,
             "debug_mode": body.debug_mode,
+            "profile": body.profile,
             "argument_keys": list(body.arguments.keys()),
         },
     )
@@ -359,6 +630,7 @@ async def call_tool(request: Request, tool_name: str, body: ToolCallRequest):
         tool_name,
         body.arguments,
         debug_mode=body.debug_mode,
+        profile=body.profile,
     )
 
     # Calculate duration
@@ -386,6 +658,23 @@ async def call_tool(request: Request, tool_name: str, body: ToolCallRequest):
             },
         )
 
+    response = _tool_call_response(result)
+    result_json = result.get("result_json")
+    if result_json is not None:
+        return _response_with_encoded_result(response, result_json)
+    return response
+
+
+def _tool_call_response(
+    result: dict[str, Any],
+    model: type[ToolCallResponse] = ToolCallResponse,
+    **fields: Any,
+) -> ToolCallResponse:
+    """Build a ToolCallResponse (or subclass) from a registry result dict.
+
+    A pre-encoded result (``result_json``) is left out of the model; send
+    it with _encode_with_result().
+    """
     # Build error_detail response if present
     error_detail = None
     if result.get("error_detail"):
@@ -407,17 +696,93 @@ async def call_tool(request: Request, tool_name: str, body: ToolCallRequest):
         debug_info = DebugInfoResponse(
             http_calls=http_calls,
             timing_breakdown=di.get("timing_breakdown", {}),
+            http_cache=di.get("http_cache"),
+            outbound_queue=di.get("outbound_queue"),
         )
 
-    return ToolCallResponse(
+    return model(
         success=result.get("success", False),
-        result=result.get("result"),
+        result=result.get("result") if result.get("result_json") is None else None,
         error=result.get("error"),
         error_detail=error_detail,
         status_code=result.get("status_code"),
         stdout=result.get("stdout"),
         duration_ms=result.get("duration_ms"),
         debug_info=debug_info,
+        resource_usage=result.get("resource_usage"),
+        profile=result.get("profile"),
+        cache_hit=result.get("cache_hit"),
+        coalesced=result.get("coalesced"),
+        **fields,
+    )
+
+
+@router.post("/tools/batch", response_model=BatchToolCallResponse)
+@limiter.limit(TOOL_RATE_LIMIT)
+async def call_tools_batch(request: Request, body: BatchToolCallRequest):
+    """Execute several tool calls concurrently in one request.
+
+    Each call runs like /tools/{name}/call: same admission, timeouts and
+    result limits, and one failing call only fails its own result. Results
+    are returned in request order, or with stream=true as NDJSON lines
+    (one BatchToolCallResult each) in the order calls finish.
+    """
+    start_time = time.monotonic()
+    calls = [(call.name, call.arguments, call.timeout_seconds) for call in body.calls]
+    logger.info(
+        f"Tool batch started: {len(calls)} call(s)",
+        extra={
+            "calls": len(calls),
+            "tools": sorted({call.name for call in body.calls}),
+            "max_concurrency": body.max_concurrency,
+        },
+    )
+    results = tool_registry.execute_batch(
+        calls, max_concurrency=body.max_concurrency, debug_mode=body.debug_mode
+    )
+
+    def encode(index: int, result: dict[str, Any]) -> bytes:
+        item = _tool_call_response(
+            result, BatchToolCallResult, index=index, name=calls[index][0]
+        )
+        return _encode_with_result(item, result.get("result_json"))
+
+    def log_finished(failed: int) -> int:
+        duration_ms = int((time.monotonic() - start_time) * 1000)
+        logger.info(
+            f"Tool batch completed: {len(calls)} call(s), {failed} failed "
+            f"({duration_ms}ms)",
+            extra={"calls": len(calls), "failed": failed, "duration_ms": duration_ms},
+        )
+        return duration_ms
+
+    if body.stream:
+
+        async def stream_results():
+            failed = 0
+            try:
+                async for index, result in results:
+                    failed += not result.get("success", False)
+                    yield encode(index, result) + b"\n"
+            finally:
+                await results.aclose()
+                log_finished(failed)
+
+        return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+    encoded: list[bytes] = [b""] * len(calls)
+    failed = 0
+    async for index, result in results:
+        failed += not result.get("success", False)
+        encoded[index] = encode(index, result)
+    duration_ms = log_finished(failed)
+    return Response(
+        content=b'{"results": ['
+        + b", ".join(encoded)
+        + b'], "duration_ms": '
+        + str(duration_ms).encode()
+        + b"}",
+        media_type="application/json",
     )
 
 
@@ -429,7 +794,10 @@ async def call_tool(request: Request, tool_name: str, body: ToolCallRequest):
 async def mcp_endpoint(request: Request, body: dict[str, Any]):
     """MCP JSON-RPC endpoint.
 
-    Handles tools/list and tools/call methods.
+    Handles tools/list and tools/call methods. A tools/list result carries
+    the registry ``generation``; a tools/list request passing the current
+    one as ``params.generation`` gets ``{"unchanged": true}`` instead of the
+    tools.
     """
     method = body.get("method")
     params = body.get("params", {})
@@ -441,13 +809,27 @@ async def mcp_endpoint(request: Request, body: dict[str, Any]):
     )
 
     if method == "tools/list":
-        tools = tool_registry.list_tools()
-        logger.info(f"MCP tools/list: returning {len(tools)} tools")
-        return {
-            "jsonrpc": "2.0",
-            "id": request_id,
-            "result": {"tools": tools},
-        }
+        generation = tool_registry.generation_tag
+        if params.get("generation") == generation:
+            logger.info("MCP tools/list: unchanged")
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "result": {"generation": generation, "unchanged": True},
+            }
+        tools_json, total = tool_registry.list_tools_json()
+        logger.info(f"MCP tools/list: returning {total} tools")
+        # The tools are serialized once per generation; only the envelope is new
+        return Response(
+            content=b'{"jsonrpc":"2.0","id":'
+            + json_module.dumps(request_id).encode()
+            + b',"result":{"tools":'
+            + tools_json
+            + b',"generation":'
+            + json_module.dumps(generation).encode()
+            + b"}}",
+            media_type="application/json",
+        )
 
     elif method == "tools/call":
         tool_name = params.get("name")
@@ -508,6 +890,12 @@ async def mcp_endpoint(request: Request, body: dict[str, Any]):
         }
         if result.get("error_detail"):
             execution_meta["error_detail"] = result["error_detail"]
+        if result.get("resource_usage"):
+            execution_meta["resource_usage"] = result["resource_usage"]
+        if "cache_hit" in result:
+            execution_meta["cache_hit"] = result["cache_hit"]
+        if result.get("coalesced"):
+            execution_meta["coalesced"] = True
 
         if result.get("success"):
             return {
@@ -687,6 +1075,49 @@ async def get_pool_stats():
     return SessionPoolStatsResponse(**stats)
 
 
+class ExecutionStatsResponse(BaseModel):
+    """Response with tool execution engine statistics."""
+
+    code_cache: dict[str, Any]
+    process_pool: dict[str, Any]
+    isolated_loops: dict[str, Any]
+    builtins_cache: dict[str, Any]
+    execution_pool: dict[str, Any]
+    profiler: dict[str, Any]
+    result_cache: dict[str, Any]
+    coalescing: dict[str, Any]
+    http_pools: dict[str, Any]
+    dns: dict[str, Any]
+    http_cache: dict[str, Any]
+    outbound_limits: dict[str, Any]
+    squid_acl: dict[str, Any]
+    registry_snapshot: dict[str, Any]
+
+
+@router.get("/execution-stats", response_model=ExecutionStatsResponse)
+async def get_execution_stats():
+    """Get tool execution engine statistics for monitoring."""
+    from app.process_pool import process_pool
+    from app.registry_snapshot import registry_snapshot
+
+    return ExecutionStatsResponse(
+        code_cache=compiled_code_cache.stats(),
+        process_pool=process_pool.stats(),
+        isolated_loops=isolated_loop_pool.stats(),
+        builtins_cache=safe_builtins_cache.stats(),
+        execution_pool=execution_pool.stats(),
+        profiler=sampling_profiler.stats(),
+        result_cache=result_cache.stats(),
+        coalescing=single_flight.stats(),
+        http_pools=tool_registry.http_pool_stats(),
+        dns=dns_resolver.stats(),
+        http_cache=tool_registry.http_cache_stats(),
+        outbound_limits=tool_registry.outbound_limit_stats(),
+        squid_acl=tool_registry.squid_acl_stats(),
+        registry_snapshot=registry_snapshot.stats(),
+    )
+
+
 # --- Python Code Execution (Direct Endpoint for Testing) ---
 
 
@@ -707,6 +1138,8 @@ class ExecuteCodeRequest(BaseModel):
     # [] = block all outbound network access.
     # ["api.example.com"] = only that host is reachable.
     allowed_hosts: Optional[list[str]] = None
+    # Sample where the code spends its time and return the profile
+    profile: bool = False
 
 
 class ExecuteCodeResponse(BaseModel):
@@ -716,6 +1149,8 @@ class ExecuteCodeResponse(BaseModel):
     result: Optional[Any] = None
     error: Optional[str] = None
     stdout: Optional[str] = None
+    resource_usage: dict[str, Any] | None = None
+    profile: dict[str, Any] | None = None
 
 
 # Safe builtins are provided by create_safe_builtins() from executor.py
@@ -810,12 +1245,28 @@ async def execute_python_code(request: Request, body: ExecuteCodeRequest):
     # Phase 1: exec() the code to define functions (synchronous, just defines main())
     # Phase 2: If async main() is defined, create http client on THIS loop and await it
     # This mirrors PythonExecutor.execute() which does exec() then await main_func()
+    # CPU time and HTTP traffic are metered like production executions;
+    # with body.profile, the code is also sampled as it runs
+    usage = ResourceUsage()
+    profile = sampling_profiler.start("<string>") if body.profile else None
+
+    def _respond(**fields: Any) -> ExecuteCodeResponse:
+        if profile is not None:
+            sampling_profiler.stop(profile)
+        return ExecuteCodeResponse(
+            resource_usage=usage.to_dict(),
+            profile=profile.to_dict() if profile is not None else None,
+            **fields,
+        )
+
     _http_client = None
     try:
         try:
             # Phase 1: Define functions by executing the code
             with redirect_stdout(stdout_capture):
-                exec(body.code, namespace)
+                exec_metered(
+                    compile(body.code, "<string>", "exec"), namespace, usage, profile
+                )
 
             # Phase 2: Check if an async main() was defined
             main_func = namespace.get("main")
@@ -829,15 +1280,25 @@ async def execute_python_code(request: Request, body: ExecuteCodeRequest):
                     set(body.allowed_hosts) if body.allowed_hosts is not None else None
                 )
                 _protected_http = SSRFProtectedAsyncHttpClient(
-                    _http_client, allowed_hosts=_allowed_hosts
+                    MeteredHttpClient(_http_client, usage), allowed_hosts=_allowed_hosts
                 )
                 namespace["http"] = _protected_http
 
-                # Await main() directly on this event loop (matches production executor)
-                result = await asyncio.wait_for(
-                    main_func(**body.arguments),
-                    timeout=timeout_seconds,
-                )
+                # Await main() the same way the production executor does:
+                # on an isolated loop thread, or directly on this loop
+                if ISOLATED_EXECUTION:
+                    namespace["http"] = LoopBridgedHttpClient(
+                        _protected_http, asyncio.get_running_loop()
+                    )
+                    result = await isolated_loop_pool.run(
+                        run_metered(main_func(**body.arguments), usage, profile),
+                        timeout_seconds,
+                    )
+                else:
+                    result = await asyncio.wait_for(
+                        run_metered(main_func(**body.arguments), usage, profile),
+                        timeout=timeout_seconds,
+                    )
                 namespace["result"] = result
             elif main_func is not None and callable(main_func):
                 # Synchronous main() — call it directly
@@ -845,7 +1306,7 @@ async def execute_python_code(request: Request, body: ExecuteCodeRequest):
                 namespace["result"] = result
 
         except asyncio.TimeoutError:
-            return ExecuteCodeResponse(
+            return _respond(
                 success=False,
                 error=f"Execution timed out after {timeout_seconds} seconds",
                 stdout=stdout_capture.getvalue()[:10000],
@@ -854,7 +1315,7 @@ async def execute_python_code(request: Request, body: ExecuteCodeRequest):
             # Network access blocked — surface the specific host and hint so the
             # LLM can immediately call mcpbox_request_network_access rather than
             # guessing why the HTTP call failed silently.
-            return ExecuteCodeResponse(
+            return _respond(
                 success=False,
                 error=f"Network access blocked: {e}",
                 stdout=stdout_capture.getvalue()[:10000],
@@ -874,7 +1335,7 @@ async def execute_python_code(request: Request, body: ExecuteCodeRequest):
             LookupError,
         ) as e:
             # Known safe exceptions — return details to help debugging
-            return ExecuteCodeResponse(
+            return _respond(
                 success=False,
                 error=f"Execution error: {type(e).__name__}: {str(e)}",
                 stdout=stdout_capture.getvalue()[:10000],
@@ -884,34 +1345,31 @@ async def execute_python_code(request: Request, body: ExecuteCodeRequest):
             # (e.g., database connection strings, file paths, infrastructure info).
             # Return a generic error message and log the real error server-side.
             logger.error(f"Unexpected execution error: {type(e).__name__}: {e}")
-            return ExecuteCodeResponse(
+            return _respond(
                 success=False,
                 error="An internal error occurred during code execution",
                 stdout=stdout_capture.getvalue()[:10000],
             )
 
-        # Get result and enforce size limit to prevent memory exhaustion
+        # Get result and enforce size limit to prevent memory exhaustion.
+        # The result is encoded once and sent as-is.
         result = namespace.get("result")
-        if result is not None:
-            try:
-                result_str = (
-                    json_module.dumps(result) if not isinstance(result, str) else result
-                )
-                if len(result_str) > MAX_RESULT_SIZE:
-                    result = (
-                        result_str[:MAX_RESULT_SIZE]
-                        + f"\n... [RESULT TRUNCATED - exceeded"
-                        f" {MAX_RESULT_SIZE // 1024}KB limit] ..."
-                    )
-            except (TypeError, ValueError):
-                pass  # Non-serializable results handled downstream
+        try:
+            _, result_json = encode_result(result, MAX_RESULT_SIZE)
+        except (TypeError, ValueError):
+            result_json = None  # Non-serializable results handled downstream
 
-        return ExecuteCodeResponse(
+        response = _respond(
             success=True,
-            result=result,
+            result=result if result_json is None else None,
             stdout=stdout_capture.getvalue()[:10000],  # Limit stdout
         )
+        if result_json is not None:
+            return _response_with_encoded_result(response, result_json)
+        return response
     finally:
+        if profile is not None:
+            sampling_profiler.stop(profile)
         # Clean up HTTP client
         if _http_client is not None:
             await _http_client.aclose()
@@ -1021,6 +1479,9 @@ async def install_package_endpoint(body: PackageInstallRequest):
     result = await install_package(body.module_name, body.version)
     data = install_result_to_dict(result)
 
+    # Cached module proxies may wrap a module this install replaced
+    safe_builtins_cache.invalidate()
+
     return PackageInstallResponse(**data)
 
 
@@ -1039,6 +1500,9 @@ async def sync_packages_endpoint(body: PackageSyncRequest):
 
     results = await install_packages(body.modules)
 
+    # The backend syncs whenever the global module allowlist changes
+    safe_builtins_cache.invalidate()
+
     installed_count = sum(1 for r in results if r.status == InstallStatus.INSTALLED)
     failed_count = sum(1 for r in results if r.status == InstallStatus.FAILED)
     stdlib_count = sum(1 for r in results if r.status == InstallStatus.NOT_REQUIRED)
@@ -0,0 +1,99 @@
+"""Single-Flight - one execution for identical concurrent tool calls.
+
+When several clients (or one client retrying) make the same call to a tool
+that opted in while the first one is still running, the later calls don't
+start an execution of their own: they wait for the one in flight and all
+get its result. Calls are identical when they have the same key (the
+registry uses tool, code hash, canonical arguments and timeout).
+
+The shared execution runs in its own task, so a caller going away (client
+disconnect, batch cancelled) doesn't cancel it for the others. It is only
+cancelled once every caller waiting for it is gone.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """An execution in flight and the number of callers waiting for it."""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution."""
+
+    def __init__(self) -> None:
+        self._flights: dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    async def run(
+        self,
+        key: Hashable,
+        execute: Callable[[], Awaitable[dict[str, Any]]],
+    ) -> tuple[dict[str, Any], bool]:
+        """Run *execute()*, or join the execution already in flight for *key*.
+
+        Returns:
+            (result, coalesced): a copy of the result for this caller, and
+            whether it joined an execution started by another caller.
+        """
+        self.calls += 1
+        flight = self._flights.get(key)
+        coalesced = flight is not None
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(execute()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._finished(key, flight))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to take the result
+                flight.task.cancel()
+                self.abandoned += 1
+        return dict(result), coalesced
+
+    def _finished(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled() and flight.task.exception() is not None:
+            # Retrieved here so a failure nobody awaited isn't logged as
+            # "exception was never retrieved"; waiters get it from shield()
+            logger.debug(f"Shared execution failed: {flight.task.exception()!r}")
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> dict[str, Any]:
+        """Get coalescing statistics for monitoring."""
+        return {
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+        }
+
+
+# Global single-flight group for tool calls
+single_flight = SingleFlight()
@@ -13,21 +13,86 @@ Two operating modes:
   tunnels.
 """
 
+import bisect
 import ipaddress
 import os
 import socket
+import time
+from collections.abc import Sequence
 from dataclasses import dataclass
-from typing import Optional
 from urllib.parse import urlparse, urlunparse
 
 import httpx
 
+from app.dns_resolver import dns_resolver
+from app.http_cache import CacheListener, HttpResponseCache
+from app.outbound_limiter import OutboundLimiter, WaitListener
+
 # Auto-detect proxy mode from environment.
 # When set, the sandbox routes all traffic through squid; IP pinning is
 # delegated to the proxy (squid blocks private IPs via dst ACLs).
 _PROXY_MODE = bool(os.environ.get("HTTPS_PROXY"))
 
 
+class _IPRangeIndex:
+    """Blocked networks compiled into sorted integer intervals per IP version.
+
+    Overlapping and adjacent networks are merged, so a lookup is one binary
+    search instead of an ``ip in network`` test per network. Membership
+    matches that test exactly: an address only matches networks of its own
+    version.
+    """
+
+    __slots__ = ("_ends", "_starts")
+
+    def __init__(self, networks: Sequence[ipaddress._BaseNetwork]):
+        self._starts: dict[int, list[int]] = {}
+        self._ends: dict[int, list[int]] = {}
+        for version in (4, 6):
+            intervals = sorted(
+                (int(n.network_address), int(n.broadcast_address))
+                for n in networks
+                if n.version == version
+            )
+            starts: list[int] = []
+            ends: list[int] = []
+            for start, end in intervals:
+                if ends and start <= ends[-1] + 1:
+                    ends[-1] = max(ends[-1], end)
+                else:
+                    starts.append(start)
+                    ends.append(end)
+            self._starts[version] = starts
+            self._ends[version] = ends
+
+    def contains(self, version: int, value: int) -> bool:
+        """Whether the address with integer *value* is in a blocked network."""
+        i = bisect.bisect_right(self._starts[version], value) - 1
+        return i >= 0 and value <= self._ends[version][i]
+
+    def __contains__(self, ip: ipaddress._BaseAddress) -> bool:
+        return self.contains(ip.version, int(ip))
+
+
+def _parse_ip(ip_str: str) -> tuple[int, int] | None:
+    """(version, integer value) of an IP address, None if *ip_str* isn't one.
+
+    inet_pton() is several times faster than ipaddress.ip_address() and
+    accepts the same notations; forms it rejects (IPv6 scope IDs) fall
+    back to ipaddress.
+    """
+    try:
+        if ":" in ip_str:
+            return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, ip_str), "big")
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip_str), "big")
+    except OSError:
+        try:
+            ip = ipaddress.ip_address(ip_str)
+        except ValueError:
+            return None
+        return ip.version, int(ip)
+
+
 # Ranges that are ALWAYS blocked, even for admin-approved hosts.
 # These cover loopback, link-local/cloud-metadata, and "this network".
 # Admin approval can only override RFC 1918 private ranges (10/8, 172.16/12,
@@ -42,20 +107,16 @@ _ALWAYS_BLOCKED_NETWORKS = [
     ipaddress.ip_network("ff00::/8"),
 ]
 
+_ALWAYS_BLOCKED_INDEX = _IPRangeIndex(_ALWAYS_BLOCKED_NETWORKS)
+
 
 def _is_always_blocked_ip(ip_str: str) -> bool:
     """Check if an IP is in a range that can never be overridden by admin approval.
 
     Covers loopback, link-local, cloud metadata, and "this network" ranges.
     """
-    try:
-        ip = ipaddress.ip_address(ip_str)
-        for network in _ALWAYS_BLOCKED_NETWORKS:
-            if ip in network:
-                return True
-        return False
-    except ValueError:
-        return False
+    parsed = _parse_ip(ip_str)
+    return parsed is not None and _ALWAYS_BLOCKED_INDEX.contains(*parsed)
 
 
 # Blocked IP ranges (private, loopback, link-local, metadata endpoints)
@@ -73,6 +134,9 @@ BLOCKED_IP_RANGES = [
     ipaddress.ip_network("ff00::/8"),  # IPv6 multicast
 ]
 
+# BLOCKED_IP_RANGES compiled for lookups; rebuild it if the list changes
+_BLOCKED_INDEX = _IPRangeIndex(BLOCKED_IP_RANGES)
+
 BLOCKED_HOSTNAMES = {
     # Loopback addresses
     "localhost",
@@ -118,6 +182,8 @@ class ValidatedURL:
     hostname: str
     port: int
     scheme: str
+    # Time spent resolving the hostname (None = IP literal or not measured)
+    dns_ms: float | None = None
 
     def get_pinned_url(self) -> str:
         """Get URL with IP instead of hostname for direct connection."""
@@ -151,60 +217,30 @@ def _is_private_ip(ip_str: str) -> bool:
     Handles IPv4-mapped IPv6 addresses (e.g., ::ffff:127.0.0.1) by extracting
     the embedded IPv4 address and checking it separately.
     """
-    try:
-        ip = ipaddress.ip_address(ip_str)
-
-        # Handle IPv4-mapped IPv6 addresses (e.g., ::ffff:127.0.0.1)
-        # These embed an IPv4 address in IPv6 format and could bypass checks
-        if isinstance(ip, ipaddress.IPv6Address):
-            # Check if it's an IPv4-mapped address
-            if ip.ipv4_mapped is not None:
-                # Extract the IPv4 address and check it
-                ipv4 = ip.ipv4_mapped
-                for network in BLOCKED_IP_RANGES:
-                    # Only check against IPv4 networks
-                    if isinstance(network, ipaddress.IPv4Network) and ipv4 in network:
-                        return True
-            # Also check for IPv4-compatible addresses (deprecated but possible)
-            # These are in the format ::x.x.x.x
-            if ip.packed[:12] == b"\x00" * 12:
-                ipv4_bytes = ip.packed[12:]
-                try:
-                    ipv4 = ipaddress.IPv4Address(ipv4_bytes)
-                    for network in BLOCKED_IP_RANGES:
-                        if (
-                            isinstance(network, ipaddress.IPv4Network)
-                            and ipv4 in network
-                        ):
-                            return True
-                except ValueError:
-                    pass
-
-        # Standard check against all blocked ranges
-        for network in BLOCKED_IP_RANGES:
-            if ip in network:
-                return True
-        return False
-    except ValueError:
+    parsed = _parse_ip(ip_str)
+    if parsed is None:
         return False
+    version, value = parsed
 
+    if version == 6:
+        # IPv4-mapped addresses (::ffff:x.x.x.x) embed an IPv4 address in
+        # IPv6 format and could bypass checks; so could IPv4-compatible
+        # ones (::x.x.x.x, deprecated but possible)
+        if value >> 32 == 0xFFFF and _BLOCKED_INDEX.contains(4, value & 0xFFFFFFFF):
+            return True
+        if value >> 32 == 0 and _BLOCKED_INDEX.contains(4, value):
+            return True
 
-def validate_url_with_pinning(
-    url: str, *, admin_approved: bool = False
-) -> ValidatedURL:
-    """Validate a URL and return pinned IP to prevent DNS rebinding.
+    # Standard check against all blocked ranges
+    return _BLOCKED_INDEX.contains(version, value)
 
-    Args:
-        url: The URL to validate
-        admin_approved: When True, the host was explicitly approved by an admin
-            via the network-access-request flow.  RFC 1918 private IPs are
-            allowed; loopback / link-local / metadata are still blocked.
 
-    Returns:
-        ValidatedURL with pinned IP address
+def _check_target(url: str, admin_approved: bool) -> tuple[str, str, int, str | None]:
+    """Run the checks of validate_url_with_pinning() that don't need DNS.
 
-    Raises:
-        SSRFError: If the URL targets internal resources
+    Returns:
+        (scheme, hostname, port, ip): ip is the hostname itself when it is
+        an (allowed) IP literal, None when it still has to be resolved
     """
     if not url:
         raise SSRFError("URL cannot be empty")
@@ -229,62 +265,119 @@ def validate_url_with_pinning(
     if port is None:
         port = 443 if parsed.scheme == "https" else 80
 
-    pinned_ip: Optional[str] = None
-
     # Check if hostname is an IP address in blocked range
     try:
         ip = ipaddress.ip_address(hostname)
-        if admin_approved:
-            # Admin approved — only block truly dangerous ranges
-            if _is_always_blocked_ip(hostname):
-                raise SSRFError(f"URL targets blocked IP range: {hostname}")
-        else:
-            for blocked_range in BLOCKED_IP_RANGES:
-                if ip in blocked_range:
-                    raise SSRFError(f"URL targets blocked IP range: {hostname}")
-        pinned_ip = hostname
     except ValueError:
-        # Not an IP address, it's a hostname - resolve it
+        return parsed.scheme, hostname, port, None  # a hostname - resolve it
+
+    if admin_approved:
+        # Admin approved — only block truly dangerous ranges
+        if _is_always_blocked_ip(hostname):
+            raise SSRFError(f"URL targets blocked IP range: {hostname}")
+    else:
+        if ip in _BLOCKED_INDEX:
+            raise SSRFError(f"URL targets blocked IP range: {hostname}")
+    return parsed.scheme, hostname, port, hostname
+
+
+def _check_resolved_ips(
+    hostname: str, addresses: Sequence[str], admin_approved: bool
+) -> str:
+    """Check every address *hostname* resolved to; return the one to pin.
+
+    All of them are checked, not just the pinned one, so a hostname with
+    one public and one internal address is rejected outright.
+    """
+    for ip_str in addresses:
+        if admin_approved:
+            if _is_always_blocked_ip(ip_str):
+                raise SSRFError(f"Hostname {hostname} resolves to blocked IP: {ip_str}")
+        elif _is_private_ip(ip_str):
+            raise SSRFError(f"Hostname {hostname} resolves to blocked IP: {ip_str}")
+
+    if not addresses:
+        raise SSRFError(f"No valid IP addresses found for '{hostname}'")
+    return addresses[0]
+
+
+def validate_url_with_pinning(
+    url: str, *, admin_approved: bool = False
+) -> ValidatedURL:
+    """Validate a URL and return pinned IP to prevent DNS rebinding.
+
+    Resolves with a blocking lookup; code running on the event loop uses
+    validate_url_with_pinning_async() instead.
+
+    Args:
+        url: The URL to validate
+        admin_approved: When True, the host was explicitly approved by an admin
+            via the network-access-request flow.  RFC 1918 private IPs are
+            allowed; loopback / link-local / metadata are still blocked.
+
+    Returns:
+        ValidatedURL with pinned IP address
+
+    Raises:
+        SSRFError: If the URL targets internal resources
+    """
+    scheme, hostname, port, pinned_ip = _check_target(url, admin_approved)
+
+    if pinned_ip is None:
         try:
             addr_info = socket.getaddrinfo(
                 hostname, port, socket.AF_UNSPEC, socket.SOCK_STREAM
             )
-            for result in addr_info:
-                ip_str = result[4][0]
-                if admin_approved:
-                    if _is_always_blocked_ip(ip_str):
-                        raise SSRFError(
-                            f"Hostname {hostname} resolves to blocked IP: {ip_str}"
-                        )
-                elif _is_private_ip(ip_str):
-                    raise SSRFError(
-                        f"Hostname {hostname} resolves to blocked IP: {ip_str}"
-                    )
-                if pinned_ip is None:
-                    pinned_ip = ip_str
         except socket.gaierror as e:
             raise SSRFError(f"DNS resolution failed for {hostname}: {e}")
+        addresses = [result[4][0] for result in addr_info]
+        pinned_ip = _check_resolved_ips(hostname, addresses, admin_approved)
+
+    return ValidatedURL(
+        original_url=url,
+        pinned_ip=pinned_ip,
+        hostname=hostname,
+        port=port,
+        scheme=scheme,
+    )
+
 
+async def validate_url_with_pinning_async(
+    url: str, *, admin_approved: bool = False
+) -> ValidatedURL:
+    """Non-blocking validate_url_with_pinning().
+
+    Resolves through the cached resolver in app.dns_resolver. The addresses
+    are checked on every call and the request is pinned to a checked one,
+    so a cached answer can't be used to slip past the blocklist.
+    """
+    scheme, hostname, port, pinned_ip = _check_target(url, admin_approved)
+
+    dns_ms = None
     if pinned_ip is None:
-        raise SSRFError(f"No valid IP addresses found for '{hostname}'")
+        started = time.perf_counter()
+        try:
+            addresses = await dns_resolver.resolve(hostname)
+        except socket.gaierror as e:
+            raise SSRFError(f"DNS resolution failed for {hostname}: {e}")
+        dns_ms = round((time.perf_counter() - started) * 1000, 2)
+        pinned_ip = _check_resolved_ips(hostname, addresses, admin_approved)
 
     return ValidatedURL(
         original_url=url,
         pinned_ip=pinned_ip,
         hostname=hostname,
         port=port,
-        scheme=parsed.scheme,
+        scheme=scheme,
+        dns_ms=dns_ms,
     )
 
 
-def _prepare_pinned_request(
-    url: str, kwargs: dict, *, admin_approved: bool = False
-) -> tuple[str, dict]:
-    """Validate URL and prepare request with IP pinning.
+def _pin_request(validated: ValidatedURL, kwargs: dict) -> tuple[str, dict]:
+    """Rewrite a request to the validated IP.
 
     Returns the pinned URL and updated kwargs with Host header and SNI hostname.
     """
-    validated = validate_url_with_pinning(str(url), admin_approved=admin_approved)
     pinned_url = validated.get_pinned_url()
 
     # Set Host header to original hostname
@@ -303,9 +396,32 @@ def _prepare_pinned_request(
         extensions["sni_hostname"] = validated.hostname.encode("ascii")
         kwargs["extensions"] = extensions
 
+    # Reported by debug mode as the call's DNS phase; transports ignore it
+    if validated.dns_ms is not None:
+        extensions = kwargs.get("extensions", {})
+        kwargs["extensions"] = {**extensions, "dns_ms": validated.dns_ms}
+
     return pinned_url, kwargs
 
 
+def _prepare_pinned_request(
+    url: str, kwargs: dict, *, admin_approved: bool = False
+) -> tuple[str, dict]:
+    """Validate URL and prepare request with IP pinning."""
+    validated = validate_url_with_pinning(str(url), admin_approved=admin_approved)
+    return _pin_request(validated, kwargs)
+
+
+async def _prepare_pinned_request_async(
+    url: str, kwargs: dict, *, admin_approved: bool = False
+) -> tuple[str, dict]:
+    """Validate URL and prepare request with IP pinning, without blocking."""
+    validated = await validate_url_with_pinning_async(
+        str(url), admin_approved=admin_approved
+    )
+    return _pin_request(validated, kwargs)
+
+
 def _validate_hostname_only(
     url: str, kwargs: dict, *, admin_approved: bool = False
 ) -> tuple[str, dict]:
@@ -424,15 +540,35 @@ class SSRFProtectedAsyncHttpClient:
     Optionally enforces a per-server network allowlist: if allowed_hosts is
     provided, only those hostnames can be contacted (in addition to the
     standard SSRF blocklist checks).
+
+    Optionally answers requests from the server's HTTP response cache;
+    *cache_listener* is told the outcome of every cache lookup. Requests
+    are validated before the cache is consulted, hits included.
+
+    Optionally passes requests that reach the network through the server's
+    *outbound_limiter*, which queues them per destination; *wait_listener*
+    is told how long each one waited.
     """
 
-    __slots__ = ("__wrapped_client", "__allowed_hosts", "__proxy_mode")
+    __slots__ = (
+        "__allowed_hosts",
+        "__cache_listener",
+        "__outbound_limiter",
+        "__proxy_mode",
+        "__response_cache",
+        "__wait_listener",
+        "__wrapped_client",
+    )
 
     def __init__(
         self,
         client: httpx.AsyncClient,
         allowed_hosts: set[str] | None = None,
         proxy_mode: bool | None = None,
+        response_cache: HttpResponseCache | None = None,
+        cache_listener: CacheListener | None = None,
+        outbound_limiter: OutboundLimiter | None = None,
+        wait_listener: WaitListener | None = None,
     ):
         # Use object.__setattr__ to bypass our __setattr__ guard
         object.__setattr__(
@@ -449,6 +585,18 @@ class SSRFProtectedAsyncHttpClient:
             "_SSRFProtectedAsyncHttpClient__proxy_mode",
             proxy_mode if proxy_mode is not None else _PROXY_MODE,
         )
+        object.__setattr__(
+            self, "_SSRFProtectedAsyncHttpClient__response_cache", response_cache
+        )
+        object.__setattr__(
+            self, "_SSRFProtectedAsyncHttpClient__cache_listener", cache_listener
+        )
+        object.__setattr__(
+            self, "_SSRFProtectedAsyncHttpClient__outbound_limiter", outbound_limiter
+        )
+        object.__setattr__(
+            self, "_SSRFProtectedAsyncHttpClient__wait_listener", wait_listener
+        )
 
     def __getattr__(self, name: str):
         raise AttributeError(
@@ -459,12 +607,8 @@ class SSRFProtectedAsyncHttpClient:
     def __setattr__(self, name: str, value):
         raise AttributeError("Cannot set attributes on the HTTP client")
 
-    def _prepare_request(self, url: str, kwargs: dict) -> tuple[str, dict]:
-        """Validate URL and prepare request.
-
-        In direct mode: full IP pinning with DNS resolution.
-        In proxy mode: hostname-only validation (proxy handles DNS/IP checks).
-        Also enforces the per-server network allowlist if configured.
+    def _check_request(self, url: str, kwargs: dict) -> bool:
+        """Apply the checks that don't depend on the mode; return admin approval.
 
         When a host passes the ``allowed_hosts`` check (admin approved it via
         the network-access-request flow), ``admin_approved=True`` is forwarded
@@ -476,7 +620,8 @@ class SSRFProtectedAsyncHttpClient:
         # per-request kwargs override the client-level setting in httpx.
         kwargs["follow_redirects"] = False
 
-        # Enforce network allowlist before SSRF validation.
+        # Enforce network allowlist before SSRF validation (and before any
+        # DNS lookup, which could itself leak data to an unapproved host).
         # If allowed_hosts is set (even if empty), only those hosts are permitted.
         # A host that passes this check was explicitly approved by an admin.
         #
@@ -497,39 +642,85 @@ class SSRFProtectedAsyncHttpClient:
                     f"Use mcpbox_request_network_access to request access."
                 )
             admin_approved = True
+        return admin_approved
 
+    def _prepare_request(self, url: str, kwargs: dict) -> tuple[str, dict]:
+        """Validate URL and prepare request.
+
+        In direct mode: full IP pinning with DNS resolution.
+        In proxy mode: hostname-only validation (proxy handles DNS/IP checks).
+        Also enforces the per-server network allowlist if configured.
+
+        Resolves with a blocking lookup; the request methods use
+        _prepare_request_async().
+        """
+        admin_approved = self._check_request(url, kwargs)
         if self.__proxy_mode:
             return _validate_hostname_only(url, kwargs, admin_approved=admin_approved)
         return _prepare_pinned_request(url, kwargs, admin_approved=admin_approved)
 
+    async def _prepare_request_async(self, url: str, kwargs: dict) -> tuple[str, dict]:
+        """Non-blocking _prepare_request(), resolving through the DNS cache."""
+        admin_approved = self._check_request(url, kwargs)
+        if self.__proxy_mode:
+            return _validate_hostname_only(url, kwargs, admin_approved=admin_approved)
+        return await _prepare_pinned_request_async(
+            url, kwargs, admin_approved=admin_approved
+        )
+
+    async def __send(self, method: str, url, kwargs: dict, send) -> httpx.Response:
+        """Validate and pin the request, then *send* it (or use the cache)."""
+        pinned_url, kwargs = await self._prepare_request_async(url, kwargs)
+        if self.__outbound_limiter is not None:
+            send = self.__limited(urlparse(str(url)).hostname or "", send)
+        if self.__response_cache is None:
+            return await send(pinned_url, **kwargs)
+        return await self.__response_cache.request(
+            method,
+            str(url),
+            kwargs,
+            lambda options: send(pinned_url, **options),
+            self.__cache_listener,
+        )
+
+    def __limited(self, hostname: str, send):
+        """*send*, waiting for the limiter's go-ahead for *hostname* first."""
+        limiter = self.__outbound_limiter
+        listener = self.__wait_listener
+
+        async def limited_send(target_url, **options):
+            async with limiter.slot(hostname, listener):
+                return await send(target_url, **options)
+
+        return limited_send
+
     async def get(self, url, **kwargs):
-        pinned_url, kwargs = self._prepare_request(url, kwargs)
-        return await self.__wrapped_client.get(pinned_url, **kwargs)
+        return await self.__send("GET", url, kwargs, self.__wrapped_client.get)
 
     async def post(self, url, **kwargs):
-        pinned_url, kwargs = self._prepare_request(url, kwargs)
-        return await self.__wrapped_client.post(pinned_url, **kwargs)
+        return await self.__send("POST", url, kwargs, self.__wrapped_client.post)
 
     async def put(self, url, **kwargs):
-        pinned_url, kwargs = self._prepare_request(url, kwargs)
-        return await self.__wrapped_client.put(pinned_url, **kwargs)
+        return await self.__send("PUT", url, kwargs, self.__wrapped_client.put)
 
     async def patch(self, url, **kwargs):
-        pinned_url, kwargs = self._prepare_request(url, kwargs)
-        return await self.__wrapped_client.patch(pinned_url, **kwargs)
+        return await self.__send("PATCH", url, kwargs, self.__wrapped_client.patch)
 
     async def delete(self, url, **kwargs):
-        pinned_url, kwargs = self._prepare_request(url, kwargs)
-        return await self.__wrapped_client.delete(pinned_url, **kwargs)
+        return await self.__send("DELETE", url, kwargs, self.__wrapped_client.delete)
 
     async def head(self, url, **kwargs):
-        pinned_url, kwargs = self._prepare_request(url, kwargs)
-        return await self.__wrapped_client.head(pinned_url, **kwargs)
+        return await self.__send("HEAD", url, kwargs, self.__wrapped_client.head)
 
     async def options(self, url, **kwargs):
-        pinned_url, kwargs = self._prepare_request(url, kwargs)
-        return await self.__wrapped_client.options(pinned_url, **kwargs)
+        return await self.__send("OPTIONS", url, kwargs, self.__wrapped_client.options)
 
     async def request(self, method, url, **kwargs):
-        pinned_url, kwargs = self._prepare_request(url, kwargs)
-        return await self.__wrapped_client.request(method, pinned_url, **kwargs)
+        return await self.__send(
+            method,
+            url,
+            kwargs,
+            lambda pinned_url, **options: self.__wrapped_client.request(
+                method, pinned_url, **options
+            ),
+        )
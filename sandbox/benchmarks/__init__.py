@@ -0,0 +1 @@
+"""Micro-benchmarks for sandbox hot paths (run with ``python -m benchmarks.<name>``)."""
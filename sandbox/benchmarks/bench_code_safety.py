@@ -0,0 +1,143 @@
+"""Micro-benchmark: validate_code_safety() vs. the previous implementation.
+
+The previous validator ran one ``regex.search()`` per FORBIDDEN_PATTERNS
+entry (compiling each through the regex module's cache on every call) and
+then parsed and walked the AST. It is kept here as the reference for the
+benchmark and for the parity tests in tests/test_code_safety.py.
+
+Usage (from the sandbox/ directory):
+
+    python -m benchmarks.bench_code_safety [--number N]
+"""
+
+import argparse
+import ast
+import timeit
+
+import regex
+
+from app.executor import FORBIDDEN_PATTERNS, REGEX_TIMEOUT, validate_code_safety
+
+
+def legacy_validate_code_safety(
+    code: str, source_name: str = "<tool>"
+) -> tuple[bool, str | None]:
+    """The validator as it was before the single-pass rewrite."""
+    for pattern in FORBIDDEN_PATTERNS:
+        try:
+            match = regex.search(pattern, code, timeout=REGEX_TIMEOUT)
+            if match:
+                matched_text = match.group(0)
+                return False, (
+                    f"Security violation in {source_name}: "
+                    f"Access to '{matched_text}' is forbidden. "
+                    f"This pattern can be used to escape the sandbox."
+                )
+        except regex.TimeoutError:
+            return False, (
+                f"Security violation in {source_name}: "
+                f"Code pattern analysis timed out (possible ReDoS attempt)"
+            )
+
+    try:
+        tree = ast.parse(code, filename=source_name, mode="exec")
+    except SyntaxError:
+        return True, None
+
+    forbidden_attrs = {
+        "__class__",
+        "__bases__",
+        "__mro__",
+        "__subclasses__",
+        "__globals__",
+        "__code__",
+        "__builtins__",
+        "__import__",
+        "__loader__",
+        "__spec__",
+        "__dict__",
+        "__traceback__",
+        "__init_subclass__",
+        "__set_name__",
+        "__del__",
+        "__reduce__",
+        "__reduce_ex__",
+    }
+    forbidden_calls = {"getattr", "setattr", "hasattr", "delattr", "vars", "dir"}
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute) and node.attr in forbidden_attrs:
+            return False, (
+                f"Security violation in {source_name}: "
+                f"Access to '.{node.attr}' is forbidden (line {node.lineno})."
+            )
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            if node.func.id in forbidden_calls:
+                return False, (
+                    f"Security violation in {source_name}: "
+                    f"Call to '{node.func.id}()' is forbidden (line {node.lineno})."
+                )
+
+    return True, None
+
+
+def _typical_tool(helpers: int) -> str:
+    """A safe tool of realistic shape: imports, helpers and an async main()."""
+    lines = [
+        "import json",
+        "from datetime import datetime, timedelta",
+        "",
+        "API_URL = 'https://api.example.com/v1'",
+        "",
+    ]
+    for i in range(helpers):
+        lines += [
+            f"def helper_{i}(items, key='id'):",
+            f'    """Helper number {i}."""',
+            "    result = {}",
+            "    for item in items:",
+            "        if item.get(key) is not None:",
+            "            result[item[key]] = [x * 2 for x in item.get('values', [])]",
+            "    return result",
+            "",
+        ]
+    lines += [
+        "async def main(query: str, limit: int = 10):",
+        "    response = await http.get(f'{API_URL}/search', params={'q': query})",
+        "    data = response.json()",
+        "    since = datetime.now() - timedelta(days=7)",
+        "    return {'items': helper_0(data['items'][:limit]), 'since': str(since)}",
+    ]
+    return "\n".join(lines)
+
+
+CASES = {
+    "small tool": _typical_tool(1),
+    "large tool": _typical_tool(40),
+    "rejected (regex)": _typical_tool(10) + "\nx = ().__class__\n",
+    "rejected (ast)": _typical_tool(10) + "\nx = hasattr(json, 'loads')\n",
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'case':<20} {'bytes':>7} {'legacy µs':>11} {'current µs':>11} {'speedup':>8}")
+    for name, code in CASES.items():
+        assert validate_code_safety(code) == legacy_validate_code_safety(code)
+        legacy = timeit.timeit(
+            lambda: legacy_validate_code_safety(code), number=args.number
+        )
+        current = timeit.timeit(lambda: validate_code_safety(code), number=args.number)
+        print(
+            f"{name:<20} {len(code):>7} "
+            f"{legacy / args.number * 1e6:>11.1f} "
+            f"{current / args.number * 1e6:>11.1f} "
+            f"{legacy / current:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
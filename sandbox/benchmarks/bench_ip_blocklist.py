@@ -0,0 +1,147 @@
+"""Micro-benchmark: SSRF IP blocklist checks vs. the previous implementation.
+
+The previous checks tested ``ip in network`` for every entry of
+BLOCKED_IP_RANGES / _ALWAYS_BLOCKED_NETWORKS, for every address of every
+lookup. They are kept here as the reference for the benchmark and for the
+parity tests in tests/test_url_validation.py.
+
+Usage (from the sandbox/ directory):
+
+    python -m benchmarks.bench_ip_blocklist [--number N]
+"""
+
+import argparse
+import ipaddress
+import random
+import timeit
+
+from app.ssrf import (
+    _ALWAYS_BLOCKED_NETWORKS,
+    BLOCKED_IP_RANGES,
+    _is_always_blocked_ip,
+    _is_private_ip,
+)
+
+
+def legacy_is_always_blocked_ip(ip_str: str) -> bool:
+    """_is_always_blocked_ip() as it was before the interval index."""
+    try:
+        ip = ipaddress.ip_address(ip_str)
+        for network in _ALWAYS_BLOCKED_NETWORKS:
+            if ip in network:
+                return True
+        return False
+    except ValueError:
+        return False
+
+
+def legacy_is_private_ip(ip_str: str) -> bool:
+    """_is_private_ip() as it was before the interval index."""
+    try:
+        ip = ipaddress.ip_address(ip_str)
+
+        if isinstance(ip, ipaddress.IPv6Address):
+            if ip.ipv4_mapped is not None:
+                ipv4 = ip.ipv4_mapped
+                for network in BLOCKED_IP_RANGES:
+                    if isinstance(network, ipaddress.IPv4Network) and ipv4 in network:
+                        return True
+            if ip.packed[:12] == b"\x00" * 12:
+                ipv4_bytes = ip.packed[12:]
+                try:
+                    ipv4 = ipaddress.IPv4Address(ipv4_bytes)
+                    for network in BLOCKED_IP_RANGES:
+                        if (
+                            isinstance(network, ipaddress.IPv4Network)
+                            and ipv4 in network
+                        ):
+                            return True
+                except ValueError:
+                    pass
+
+        for network in BLOCKED_IP_RANGES:
+            if ip in network:
+                return True
+        return False
+    except ValueError:
+        return False
+
+
+def boundary_addresses() -> list[str]:
+    """First/last address of every blocked network and their neighbours."""
+    addresses = []
+    for network in BLOCKED_IP_RANGES + _ALWAYS_BLOCKED_NETWORKS:
+        first = int(network.network_address)
+        last = int(network.broadcast_address)
+        top = 2**network.max_prefixlen - 1
+        for value in (first - 1, first, first + 1, last - 1, last, last + 1):
+            if 0 <= value <= top:
+                if network.version == 4:
+                    ip = ipaddress.IPv4Address(value)
+                else:
+                    ip = ipaddress.IPv6Address(value)
+                addresses.append(str(ip))
+                if network.version == 4:
+                    addresses.append(f"::ffff:{ip}")
+                    addresses.append(f"::{ip}")
+    return addresses
+
+
+def random_addresses(count: int, seed: int = 0) -> list[str]:
+    """Random IPv4, IPv6, IPv4-mapped and IPv4-compatible addresses."""
+    rng = random.Random(seed)
+    addresses = []
+    for _ in range(count):
+        v4 = ipaddress.IPv4Address(rng.getrandbits(32))
+        addresses += [
+            str(v4),
+            str(ipaddress.IPv6Address(rng.getrandbits(128))),
+            f"::ffff:{v4}",
+            f"::{v4}",
+        ]
+    return addresses
+
+
+CASES = {
+    "public ipv4": ["93.184.216.34", "8.8.8.8", "1.1.1.1", "140.82.112.3"],
+    "private ipv4": ["10.1.2.3", "192.168.0.10", "172.20.0.5", "127.0.0.1"],
+    "public ipv6": ["2606:2800:220:1:248:1893:25c8:1946", "2001:4860:4860::8888"],
+    "mapped ipv6": ["::ffff:93.184.216.34", "::ffff:10.0.0.1"],
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(
+        f"{'case':<16} {'check':<16} "
+        f"{'legacy µs':>10} {'current µs':>11} {'speedup':>8}"
+    )
+    checks = [
+        ("private", legacy_is_private_ip, _is_private_ip),
+        ("always-blocked", legacy_is_always_blocked_ip, _is_always_blocked_ip),
+    ]
+    for name, addresses in CASES.items():
+        for check, legacy_fn, current_fn in checks:
+            for ip in addresses:
+                assert legacy_fn(ip) == current_fn(ip), ip
+
+            def run(fn=legacy_fn):
+                for ip in addresses:
+                    fn(ip)
+
+            legacy = timeit.timeit(run, number=args.number)
+            current = timeit.timeit(lambda: run(current_fn), number=args.number)
+            per_call = args.number * len(addresses)
+            print(
+                f"{name:<16} {check:<16} "
+                f"{legacy / per_call * 1e6:>10.2f} "
+                f"{current / per_call * 1e6:>11.2f} "
+                f"{legacy / current:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Micro-benchmark: SecretRedactor's prefix-tree pattern vs. other matchers.
+
+Compares, per number of secrets and text size:
+
+- the flat alternation SecretRedactor used before (every secret is tried
+  at every text position, so a pass costs O(text * secrets))
+- a pure-Python Aho-Corasick automaton (one dict lookup per character,
+  linear in the text but interpreted)
+- the current prefix-tree pattern (see app.executor._secret_trie_pattern)
+
+The legacy alternation is kept here as the reference for the parity tests
+in tests/test_security_hardening.py.
+
+Usage (from the sandbox/ directory):
+
+    python -m benchmarks.bench_secret_redaction [--number N]
+"""
+
+import argparse
+import random
+import re
+import string
+import timeit
+from collections import deque
+from functools import partial
+
+from app.executor import SecretRedactor
+
+
+def legacy_pattern(values: list[str]) -> re.Pattern:
+    """The flat alternation SecretRedactor compiled before, longest first."""
+    values = sorted(set(values), key=len, reverse=True)
+    return re.compile("|".join(re.escape(value) for value in values))
+
+
+class AhoCorasick:
+    """Leftmost-longest, non-overlapping matching with an Aho-Corasick DFA."""
+
+    def __init__(self, values: list[str]):
+        goto: list[dict[str, int]] = [{}]
+        # Lengths of the secrets ending in each state
+        self.ending: list[tuple[int, ...]] = [()]
+        for value in values:
+            state = 0
+            for char in value:
+                if char not in goto[state]:
+                    goto[state][char] = len(goto)
+                    goto.append({})
+                    self.ending.append(())
+                state = goto[state][char]
+            self.ending[state] += (len(value),)
+
+        # Complete the transitions along failure links (breadth first)
+        self.delta = [dict(transitions) for transitions in goto]
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, target in goto[state].items():
+                queue.append(target)
+                if state:
+                    fail[target] = self.delta[fail[state]].get(char, 0)
+                self.ending[target] += self.ending[fail[target]]
+            for char, target in self.delta[fail[state]].items():
+                self.delta[state].setdefault(char, target)
+
+    def sub(self, replacement: str, text: str) -> str:
+        # Longest match per start position, then keep leftmost ones
+        matches: dict[int, int] = {}
+        delta = self.delta
+        ending = self.ending
+        state = 0
+        for index, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            for length in ending[state]:
+                start = index + 1 - length
+                if matches.get(start, 0) < index + 1:
+                    matches[start] = index + 1
+        parts = []
+        position = 0
+        for start in sorted(matches):
+            if start < position:
+                continue
+            parts.append(text[position:start])
+            parts.append(replacement)
+            position = matches[start]
+        parts.append(text[position:])
+        return "".join(parts)
+
+
+def make_secrets(count: int, rng: random.Random) -> list[str]:
+    alphabet = string.ascii_letters + string.digits
+    return [
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(16, 48)))
+        for _ in range(count)
+    ]
+
+
+def make_text(size: int, secrets: list[str], rng: random.Random) -> str:
+    """JSON-ish text with an occasional secret in it."""
+    words = ['"name": "value", ', "hello world ", '{"id": 12345, "n": 7} ']
+    parts = []
+    length = 0
+    while length < size:
+        word = rng.choice(secrets) if rng.random() < 0.01 else rng.choice(words)
+        parts.append(word)
+        length += len(word)
+    return "".join(parts)[:size]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=3)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    print(
+        f"{'secrets':>7} {'text KB':>8} {'legacy ms':>10} "
+        f"{'aho-corasick ms':>16} {'current ms':>11}"
+    )
+    for count in (1, 10, 100, 1000):
+        secrets = make_secrets(count, rng)
+        redactor = SecretRedactor({str(i): s for i, s in enumerate(secrets)})
+        legacy = legacy_pattern(secrets)
+        automaton = AhoCorasick(secrets)
+        for size in (64 * 1024, 1024 * 1024):
+            text = make_text(size, secrets, rng)
+            expected = legacy.sub("[REDACTED]", text)
+            assert redactor.redact_text(text) == expected
+            assert automaton.sub("[REDACTED]", text) == expected
+
+            timings = [
+                timeit.timeit(run, number=args.number) / args.number
+                for run in (
+                    partial(legacy.sub, "[REDACTED]", text),
+                    partial(automaton.sub, "[REDACTED]", text),
+                    partial(redactor.redact_text, text),
+                )
+            ]
+            print(
+                f"{count:>7} {size // 1024:>8} "
+                f"{timings[0] * 1e3:>10.2f} "
+                f"{timings[1] * 1e3:>16.2f} "
+                f"{timings[2] * 1e3:>11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Micro-benchmark: ToolRegistry tool lookups vs. the previous implementation.
+
+The previous get_tool() / get_server_for_tool() scanned every tool of every
+server, building each tool's full name, on every lookup. They are kept here
+as the reference for the benchmark and for the parity tests in
+tests/test_registry.py.
+
+Usage (from the sandbox/ directory):
+
+    python -m benchmarks.bench_tool_lookup [--number N]
+"""
+
+import argparse
+import random
+import timeit
+from typing import Optional
+
+from app.registry import RegisteredServer, Tool, ToolRegistry
+
+TOOLS_PER_SERVER = 10
+
+
+def legacy_get_tool(registry: ToolRegistry, full_name: str) -> Optional[Tool]:
+    """get_tool() as it was before the tool index."""
+    for server in registry.servers.values():
+        for tool in server.tools.values():
+            if tool.full_name == full_name:
+                return tool
+    return None
+
+
+def legacy_get_server_for_tool(
+    registry: ToolRegistry, full_name: str
+) -> Optional[RegisteredServer]:
+    """get_server_for_tool() as it was before the tool index."""
+    for server in registry.servers.values():
+        for tool in server.tools.values():
+            if tool.full_name == full_name:
+                return server
+    return None
+
+
+def build_registry(tool_count: int) -> ToolRegistry:
+    """A registry with *tool_count* tools, TOOLS_PER_SERVER per server."""
+    registry = ToolRegistry()
+    # Registration rewrites the squid ACL file; not what is measured here
+    registry._update_squid_approved_hosts = lambda: None
+    for s in range(max(1, tool_count // TOOLS_PER_SERVER)):
+        registry.register_server(
+            f"server-{s}",
+            f"server{s}",
+            [{"name": f"tool{t}"} for t in range(TOOLS_PER_SERVER)],
+        )
+    return registry
+
+
+def lookup_names(registry: ToolRegistry, count: int, seed: int = 0) -> list[str]:
+    """Random registered full names, plus one that isn't registered."""
+    names = [
+        tool.full_name
+        for server in registry.servers.values()
+        for tool in server.tools.values()
+    ]
+    rng = random.Random(seed)
+    return [rng.choice(names) for _ in range(count)] + ["missing__tool"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'tools':>7} {'legacy µs':>11} {'current µs':>11} {'speedup':>9}")
+    for tool_count in (10, 100, 1000, 10000):
+        registry = build_registry(tool_count)
+        names = lookup_names(registry, 100)
+        for name in names:
+            assert registry.get_tool(name) is legacy_get_tool(registry, name)
+
+        def run_legacy():
+            for name in names:
+                legacy_get_tool(registry, name)
+
+        def run_current():
+            for name in names:
+                registry.get_tool(name)
+
+        legacy = timeit.timeit(run_legacy, number=args.number)
+        current = timeit.timeit(run_current, number=args.number)
+        per_call = args.number * len(names)
+        print(
+            f"{tool_count:>7} "
+            f"{legacy / per_call * 1e6:>11.2f} "
+            f"{current / per_call * 1e6:>11.3f} "
+            f"{legacy / current:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -49,6 +49,12 @@ class AuthenticatedTestClient:
         headers.update(self._headers)
         return self._client.put(url, headers=headers, **kwargs)
 
+    def patch(self, url: str, **kwargs):
+        """PATCH with authentication header."""
+        headers = kwargs.pop("headers", {})
+        headers.update(self._headers)
+        return self._client.patch(url, headers=headers, **kwargs)
+
     def delete(self, url: str, **kwargs):
         """DELETE with authentication header."""
         headers = kwargs.pop("headers", {})
@@ -0,0 +1,226 @@
+"""Tests for batch tool invocation."""
+
+import asyncio
+import json
+
+import pytest
+
+from app.registry import ToolRegistry
+
+ECHO_CODE = "async def main(value: int = 0):\n    return {'value': value}\n"
+FAIL_CODE = "async def main():\n    raise ValueError('boom')\n"
+
+
+def _register(client, tools, **server):
+    response = client.post(
+        "/servers/register",
+        json={
+            "server_id": "batch-srv",
+            "server_name": "Batch",
+            **server,
+            "tools": [
+                {"name": name, "description": name, "parameters": {}, "python_code": code}
+                for name, code in tools.items()
+            ],
+        },
+    )
+    assert response.status_code == 200
+
+
+class TestBatchEndpoint:
+    """Tests for POST /tools/batch."""
+
+    def test_results_in_request_order(self, authenticated_client):
+        """Results come back in request order with their index and name."""
+        _register(authenticated_client, {"echo": ECHO_CODE})
+
+        response = authenticated_client.post(
+            "/tools/batch",
+            json={
+                "calls": [
+                    {"name": "Batch__echo", "arguments": {"value": i}} for i in range(5)
+                ]
+            },
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [r["index"] for r in data["results"]] == [0, 1, 2, 3, 4]
+        assert [r["result"] for r in data["results"]] == [{"value": i} for i in range(5)]
+        assert all(r["name"] == "Batch__echo" for r in data["results"])
+        assert data["duration_ms"] >= 0
+
+    def test_failures_are_per_item(self, authenticated_client):
+        """A failing or unknown tool only fails its own result."""
+        _register(authenticated_client, {"echo": ECHO_CODE, "fail": FAIL_CODE})
+
+        response = authenticated_client.post(
+            "/tools/batch",
+            json={
+                "calls": [
+                    {"name": "Batch__fail"},
+                    {"name": "Batch__missing"},
+                    {"name": "Batch__echo", "arguments": {"value": 7}},
+                ]
+            },
+        )
+
+        results = response.json()["results"]
+        assert results[0]["success"] is False
+        assert "boom" in results[0]["error"]
+        assert results[1]["error"] == "Tool not found: Batch__missing"
+        assert results[2]["success"] is True
+        assert results[2]["result"] == {"value": 7}
+
+    def test_per_item_timeout(self, authenticated_client):
+        """timeout_seconds caps the tool's timeout for that call only."""
+        slow = (
+            "import asyncio\n"
+            "async def main(delay: float = 0):\n"
+            "    await asyncio.sleep(delay)\n"
+            "    return delay\n"
+        )
+        _register(authenticated_client, {"slow": slow}, allowed_modules=["asyncio"])
+
+        response = authenticated_client.post(
+            "/tools/batch",
+            json={
+                "calls": [
+                    {
+                        "name": "Batch__slow",
+                        "arguments": {"delay": 5},
+                        "timeout_seconds": 0.2,
+                    },
+                    {"name": "Batch__slow", "arguments": {"delay": 0.3}},
+                ]
+            },
+        )
+
+        results = response.json()["results"]
+        assert results[0]["success"] is False
+        assert "timed out" in results[0]["error"]
+        assert results[1]["result"] == 0.3
+
+    def test_stream_returns_ndjson(self, authenticated_client):
+        """stream=true sends one JSON line per call."""
+        _register(authenticated_client, {"echo": ECHO_CODE})
+
+        response = authenticated_client.post(
+            "/tools/batch",
+            json={
+                "calls": [
+                    {"name": "Batch__echo", "arguments": {"value": i}} for i in range(3)
+                ],
+                "stream": True,
+            },
+        )
+
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["index"] for line in lines) == [0, 1, 2]
+        assert {line["index"]: line["result"]["value"] for line in lines} == {
+            0: 0,
+            1: 1,
+            2: 2,
+        }
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            {"calls": []},
+            {"calls": [{"name": "x"}] * 101},
+            {"calls": [{"name": "x", "timeout_seconds": 0}]},
+            {"calls": [{"name": "x"}], "max_concurrency": 0},
+        ],
+    )
+    def test_rejects_invalid_batches(self, authenticated_client, body):
+        """Empty, oversized and badly parameterized batches are rejected."""
+        response = authenticated_client.post("/tools/batch", json=body)
+
+        assert response.status_code == 422
+
+
+class TestExecuteBatch:
+    """Tests for ToolRegistry.execute_batch()."""
+
+    def _registry(self) -> ToolRegistry:
+        registry = ToolRegistry()
+        registry.register_server(
+            server_id="srv",
+            server_name="Srv",
+            tools=[
+                {
+                    "name": "echo",
+                    "description": "",
+                    "parameters": {},
+                    "python_code": ECHO_CODE,
+                }
+            ],
+        )
+        return registry
+
+    async def test_fan_out_limit(self, monkeypatch):
+        """No more than max_concurrency calls of a batch run at once."""
+        registry = self._registry()
+        running = 0
+        peak = 0
+
+        async def fake_execute(tool, arguments, debug_mode, profile, timeout):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return {"success": True, "result": arguments["value"]}
+
+        monkeypatch.setattr(registry, "_execute_resolved_tool", fake_execute)
+        calls = [("Srv__echo", {"value": i}, None) for i in range(10)]
+
+        results = [item async for item in registry.execute_batch(calls, 3)]
+
+        assert peak == 3
+        assert sorted(index for index, _ in results) == list(range(10))
+
+    async def test_tool_looked_up_once(self, monkeypatch):
+        """Each distinct tool is resolved once per batch."""
+        registry = self._registry()
+        lookups = []
+        get_tool = registry.get_tool
+
+        def counting_get_tool(full_name):
+            lookups.append(full_name)
+            return get_tool(full_name)
+
+        monkeypatch.setattr(registry, "get_tool", counting_get_tool)
+        calls = [("Srv__echo", {"value": i}, None) for i in range(4)]
+
+        results = dict([item async for item in registry.execute_batch(calls)])
+
+        assert lookups == ["Srv__echo"]
+        assert results[3]["result"] == {"value": 3}
+
+    async def test_closing_cancels_pending_calls(self, monkeypatch):
+        """Stopping the iteration cancels calls that haven't finished."""
+        registry = self._registry()
+        cancelled = 0
+
+        async def fake_execute(tool, arguments, debug_mode, profile, timeout):
+            nonlocal cancelled
+            if arguments["value"] == 0:
+                return {"success": True}
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled += 1
+                raise
+            return {"success": True}
+
+        monkeypatch.setattr(registry, "_execute_resolved_tool", fake_execute)
+        calls = [("Srv__echo", {"value": i}, None) for i in range(3)]
+
+        batch = registry.execute_batch(calls)
+        first = await batch.__anext__()
+        await batch.aclose()
+
+        assert first[0] == 0
+        assert cancelled == 2
@@ -0,0 +1,109 @@
+"""Tests for cached safe builtins templates and module proxies."""
+
+import pytest
+
+from app.executor import (
+    DEFAULT_ALLOWED_MODULES,
+    SafeBuiltinsCache,
+    SafeModuleProxy,
+    TimeoutProtectedRegex,
+    create_safe_builtins,
+    safe_builtins_cache,
+)
+
+
+class TestSafeBuiltinsCache:
+    """Tests for SafeBuiltinsCache and create_safe_builtins()."""
+
+    def test_returns_independent_copies(self):
+        """Overriding print in one copy doesn't affect other executions."""
+        first = create_safe_builtins()
+        second = create_safe_builtins()
+
+        first["print"] = lambda *args, **kwargs: None
+
+        assert first is not second
+        assert second["print"] is print
+        assert create_safe_builtins()["print"] is print
+
+    def test_template_shared_per_allowed_set(self):
+        """Equal allowed-module sets share one template, regardless of type."""
+        a = create_safe_builtins({"json", "math"})
+        b = create_safe_builtins(frozenset({"math", "json"}))
+        c = create_safe_builtins({"json"})
+
+        assert a["__import__"] is b["__import__"]
+        assert a["__import__"] is not c["__import__"]
+
+    def test_default_set_when_none(self):
+        explicit = create_safe_builtins(set(DEFAULT_ALLOWED_MODULES))
+        default = create_safe_builtins()
+
+        assert explicit["__import__"] is default["__import__"]
+
+    def test_module_proxies_reused(self):
+        """Repeated imports return the same cached proxy."""
+        safe_import = create_safe_builtins({"json", "regex"})["__import__"]
+
+        json_proxy = safe_import("json")
+        regex_proxy = safe_import("regex")
+
+        assert isinstance(json_proxy, SafeModuleProxy)
+        assert isinstance(regex_proxy, TimeoutProtectedRegex)
+        assert safe_import("json") is json_proxy
+        assert safe_import("regex") is regex_proxy
+
+    def test_fromlist_cached_separately(self):
+        safe_import = create_safe_builtins({"collections"})["__import__"]
+
+        plain = safe_import("collections")
+        with_fromlist = safe_import("collections", fromlist=("abc",))
+
+        assert plain is not with_fromlist
+        assert safe_import("collections", fromlist=("abc",)) is with_fromlist
+
+    def test_disallowed_import_still_rejected(self):
+        """A module allowed for one set is not importable through another."""
+        create_safe_builtins({"json", "math"})["__import__"]("math")
+        safe_import = create_safe_builtins({"json"})["__import__"]
+
+        with pytest.raises(ImportError, match="not allowed"):
+            safe_import("math")
+
+    def test_lru_eviction(self):
+        cache = SafeBuiltinsCache(max_entries=2)
+
+        cache.get(frozenset({"a"}))
+        cache.get(frozenset({"b"}))
+        cache.get(frozenset({"a"}))
+        cache.get(frozenset({"c"}))  # evicts {"b"}
+
+        assert cache.stats()["size"] == 2
+        cache.get(frozenset({"b"}))
+        assert cache.stats()["misses"] == 4
+        assert cache.stats()["hits"] == 1
+
+    def test_invalidate_rebuilds_templates_and_proxies(self):
+        cache = SafeBuiltinsCache()
+        allowed = frozenset({"json"})
+        old_import = cache.get(allowed)["__import__"]
+        old_proxy = old_import("json")
+
+        cache.invalidate()
+        new_import = cache.get(allowed)["__import__"]
+
+        assert new_import is not old_import
+        assert new_import("json") is not old_proxy
+        assert cache.stats()["invalidations"] == 1
+
+
+class TestExecutionStats:
+    def test_reports_builtins_cache(self, authenticated_client):
+        safe_builtins_cache.get(frozenset({"json"}))
+
+        response = authenticated_client.get("/execution-stats")
+
+        assert response.status_code == 200
+        stats = response.json()["builtins_cache"]
+        for key in ("size", "max_size", "hits", "misses", "invalidations"):
+            assert key in stats
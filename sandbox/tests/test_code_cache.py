@@ -0,0 +1,155 @@
+"""Tests for the compiled code cache used by tool execution."""
+
+import httpx
+import pytest
+
+from app.executor import (
+    CompiledCodeCache,
+    PythonExecutor,
+    code_hash,
+    compiled_code_cache,
+    validate_code_safety,
+)
+
+SAFE_CODE = "async def main(x: int = 1):\n    return x * 2\n"
+
+
+class TestCompiledCodeCache:
+    """Tests for CompiledCodeCache."""
+
+    def test_miss_then_hit(self):
+        """First lookup compiles, second lookup is served from cache."""
+        cache = CompiledCodeCache(max_entries=4)
+
+        first = cache.get(SAFE_CODE)
+        second = cache.get(SAFE_CODE)
+
+        assert first is second
+        assert first.is_safe
+        assert first.code is not None
+        assert cache.stats()["misses"] == 1
+        assert cache.stats()["hits"] == 1
+
+    def test_keyed_by_content_hash(self):
+        """Entries are keyed by the SHA-256 of the source."""
+        cache = CompiledCodeCache(max_entries=4)
+
+        entry = cache.get(SAFE_CODE)
+
+        assert entry.code_hash == code_hash(SAFE_CODE)
+        assert cache.get(SAFE_CODE + "\n").code_hash != entry.code_hash
+
+    def test_unsafe_code_cached_with_same_error(self):
+        """Security violations are cached with the validator's exact message."""
+        cache = CompiledCodeCache(max_entries=4)
+        code = "x = ().__class__"
+
+        entry = cache.get(code)
+        _, expected = validate_code_safety(code, "<tool>")
+
+        assert not entry.is_safe
+        assert entry.code is None
+        assert entry.error == expected
+        assert cache.get(code) is entry
+
+    def test_syntax_error_not_cached(self):
+        """SyntaxError propagates and is not stored."""
+        cache = CompiledCodeCache(max_entries=4)
+
+        with pytest.raises(SyntaxError):
+            cache.get("def broken(:\n")
+
+        assert cache.size == 0
+
+    def test_lru_eviction(self):
+        """Least recently used entries are evicted past max_entries."""
+        cache = CompiledCodeCache(max_entries=2)
+        a, b, c = "a = 1", "b = 2", "c = 3"
+
+        cache.get(a)
+        cache.get(b)
+        cache.get(a)  # a is now most recently used
+        cache.get(c)  # evicts b
+
+        assert cache.size == 2
+        assert cache.stats()["evictions"] == 1
+        cache.get(a)
+        assert cache.stats()["hits"] == 2
+        cache.get(b)
+        assert cache.stats()["misses"] == 4
+
+
+class TestRegistryWarmsCache:
+    """Tests for cache pre-filling at registration time."""
+
+    def test_register_server_fills_cache(self, tool_registry):
+        """Registering a python tool compiles it before the first call."""
+        code = "async def main():\n    return 'warm-cache-register'\n"
+        misses_before = compiled_code_cache.misses
+
+        tool_registry.register_server(
+            server_id="cache-srv",
+            server_name="CacheSrv",
+            tools=[{"name": "t", "python_code": code}],
+        )
+
+        tool = tool_registry.get_tool("CacheSrv__t")
+        assert tool.code_hash == code_hash(code)
+        assert compiled_code_cache.misses == misses_before + 1
+
+    def test_register_server_tolerates_syntax_error(self, tool_registry):
+        """Invalid code still registers; the error surfaces at call time."""
+        code = "async def main(:\n    return 1\n"
+
+        count = tool_registry.register_server(
+            server_id="cache-bad-srv",
+            server_name="CacheBadSrv",
+            tools=[{"name": "t", "python_code": code}],
+        )
+
+        assert count == 1
+        assert tool_registry.get_tool("CacheBadSrv__t").code_hash == code_hash(code)
+
+    @pytest.mark.asyncio
+    async def test_execution_hits_cache(self):
+        """Repeated executions of the same code are cache hits."""
+        code = "async def main(x):\n    return x + 'executed-from-cache'\n"
+        executor = PythonExecutor()
+        compiled_code_cache.get(code)
+        hits_before = compiled_code_cache.hits
+
+        async with httpx.AsyncClient() as client:
+            for _ in range(3):
+                result = await executor.execute(
+                    python_code=code, arguments={"x": "ok-"}, http_client=client
+                )
+                assert result.success is True
+                assert result.result == "ok-executed-from-cache"
+
+        assert compiled_code_cache.hits == hits_before + 3
+
+    @pytest.mark.asyncio
+    async def test_cached_security_violation_still_rejected(self):
+        """Unsafe code is rejected on every call, not just the first."""
+        code = "async def main():\n    return ().__class__\n"
+        executor = PythonExecutor()
+
+        async with httpx.AsyncClient() as client:
+            for _ in range(2):
+                result = await executor.execute(
+                    python_code=code, arguments={}, http_client=client
+                )
+                assert result.success is False
+                assert result.error_detail.error_type == "SecurityError"
+
+
+class TestExecutionStatsEndpoint:
+    """Tests for GET /execution-stats."""
+
+    def test_reports_code_cache_counters(self, authenticated_client):
+        response = authenticated_client.get("/execution-stats")
+
+        assert response.status_code == 200
+        stats = response.json()["code_cache"]
+        for key in ("size", "max_size", "hits", "misses", "evictions"):
+            assert key in stats
@@ -4,7 +4,10 @@ Tests the code safety validator directly without going through the HTTP API.
 This covers the regex-based pattern detection that prevents sandbox escapes.
 """
 
+import itertools
+
 from app.executor import validate_code_safety
+from benchmarks.bench_code_safety import CASES, legacy_validate_code_safety
 
 
 class TestValidateCodeSafety:
@@ -193,3 +196,53 @@ class TestASTValidation:
         """Syntax errors don't crash AST validation (caught later by exec)."""
         is_safe, error = validate_code_safety("def f(:\n  pass")
         assert is_safe is True  # Let exec() report the syntax error
+
+
+# Fragments combined pairwise for the parity check: safe code, regex-layer
+# violations, AST-only violations, look-alikes and non-ASCII spellings.
+_PARITY_FRAGMENTS = [
+    "result = 1 + 1",
+    "direction = 'north'\nvariables = {}",
+    "def f(x):\n    return x",
+    "x = [].__class__",
+    "y = obj.__dict__",
+    "import sys\nz = sys['path']",
+    "m = datetime.sys",
+    "d = {}['os']",
+    "getattr(obj, '__globals__')",
+    "getattr(obj, 'name')",
+    "setattr(obj, 'x', 1)",
+    "hasattr(\n    obj, 'x')",
+    "v = vars (obj)",
+    "dir\n(obj)",
+    "class A:\n    def __init_subclass__(cls):\n        pass",
+    "obj.__reduce_ex__(2)",
+    "if False:\n    delattr(obj, 'x')",
+    "x = obj.__\uff43lass__",
+    "s = 'caf\u00e9'",
+    "f'{obj.__del__}'",
+    "def broken(:\n    pass",
+    "async def main():\n    return await http.get('https://example.com')",
+]
+
+
+class TestValidatorParity:
+    """The validator gives the same verdict and message as before the rewrite."""
+
+    def test_fragments(self):
+        for fragment in _PARITY_FRAGMENTS:
+            assert validate_code_safety(fragment, "<t>") == legacy_validate_code_safety(
+                fragment, "<t>"
+            ), fragment
+
+    def test_fragment_pairs(self):
+        """Order of violations matters: the first reported one must match."""
+        for a, b in itertools.permutations(_PARITY_FRAGMENTS, 2):
+            code = f"{a}\n{b}\n"
+            assert validate_code_safety(code) == legacy_validate_code_safety(
+                code
+            ), code
+
+    def test_benchmark_cases(self):
+        for code in CASES.values():
+            assert validate_code_safety(code) == legacy_validate_code_safety(code)
@@ -0,0 +1,218 @@
+"""Tests for the cached, non-blocking DNS resolver used by SSRF validation."""
+
+import asyncio
+import socket
+import threading
+import time
+from unittest.mock import ANY, AsyncMock
+
+import httpx
+import pytest
+
+from app.dns_resolver import DnsResolver
+from app.ssrf import (
+    SSRFError,
+    SSRFProtectedAsyncHttpClient,
+    validate_url_with_pinning_async,
+)
+
+
+def _answer(*ips):
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", (ip, 0)) for ip in ips]
+
+
+@pytest.fixture
+def dns(monkeypatch):
+    """Fake system resolver: hostname -> addresses, counting real lookups."""
+    records = {"api.example.com": ["93.184.216.34"]}
+    calls = []
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        calls.append(host)
+        if host not in records:
+            raise socket.gaierror(socket.EAI_NONAME, "Name or service not known")
+        return _answer(*records[host])
+
+    monkeypatch.setattr("socket.getaddrinfo", getaddrinfo)
+    return records, calls
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    resolver = DnsResolver(ttl=30, negative_ttl=5)
+    monkeypatch.setattr("app.ssrf.dns_resolver", resolver)
+    return resolver
+
+
+class TestDnsResolver:
+    """Tests for DnsResolver."""
+
+    async def test_answers_cached(self, dns, resolver):
+        """Repeated lookups of a hostname are answered from the cache."""
+        _, calls = dns
+
+        first = await resolver.resolve("api.example.com")
+        second = await resolver.resolve("API.example.com")
+
+        assert first == second == ("93.184.216.34",)
+        assert calls == ["api.example.com"]
+        assert resolver.stats()["hits"] == 1
+        assert resolver.stats()["hit_rate"] == 0.5
+
+    async def test_answers_expire(self, dns, resolver, monkeypatch):
+        """An answer is looked up again once its TTL has passed."""
+        records, calls = dns
+        await resolver.resolve("api.example.com")
+        records["api.example.com"] = ["93.184.216.35"]
+
+        now = time.monotonic()
+        monkeypatch.setattr("app.dns_resolver.time.monotonic", lambda: now + 31)
+
+        assert await resolver.resolve("api.example.com") == ("93.184.216.35",)
+        assert len(calls) == 2
+
+    async def test_failures_cached(self, dns, resolver):
+        """Failed lookups are remembered for the negative TTL."""
+        _, calls = dns
+
+        for _ in range(2):
+            with pytest.raises(socket.gaierror):
+                await resolver.resolve("missing.example.com")
+
+        assert calls == ["missing.example.com"]
+        assert resolver.stats()["negative_hits"] == 1
+        assert resolver.stats()["failures"] == 1
+
+    async def test_duplicate_addresses_dropped(self, dns, resolver):
+        """Each address is listed once, in resolver order."""
+        records, _ = dns
+        records["multi.example.com"] = ["1.1.1.1", "8.8.8.8", "1.1.1.1"]
+
+        assert await resolver.resolve("multi.example.com") == ("1.1.1.1", "8.8.8.8")
+
+    async def test_concurrent_lookups_share_resolution(self, dns, resolver):
+        """Concurrent lookups of one hostname resolve it once."""
+        _, calls = dns
+
+        results = await asyncio.gather(
+            *(resolver.resolve("api.example.com") for _ in range(3))
+        )
+
+        assert len(set(results)) == 1
+        assert calls == ["api.example.com"]
+        assert resolver.stats()["coalesced"] == 2
+
+    async def test_lookup_does_not_block_event_loop(self, monkeypatch, resolver):
+        """A slow lookup leaves the event loop free for other work."""
+        release = threading.Event()
+
+        def slow_getaddrinfo(host, *args, **kwargs):
+            release.wait(2)
+            return _answer("93.184.216.34")
+
+        monkeypatch.setattr("socket.getaddrinfo", slow_getaddrinfo)
+
+        lookup = asyncio.ensure_future(resolver.resolve("slow.example.com"))
+        await asyncio.sleep(0.01)
+        assert not lookup.done()  # loop kept running while the lookup waits
+        release.set()
+
+        assert await lookup == ("93.184.216.34",)
+        assert resolver.stats()["resolutions"] == 1
+        assert resolver.stats()["resolve_time_max_ms"] > 0
+
+    async def test_cache_size_bounded(self, dns, resolver):
+        """The least recently used hostname is evicted first."""
+        records, _ = dns
+        resolver.max_entries = 2
+        for name in ("a", "b", "c"):
+            records[f"{name}.example.com"] = ["93.184.216.34"]
+            await resolver.resolve(f"{name}.example.com")
+
+        assert resolver.stats()["entries"] == 2
+
+
+class TestAsyncValidation:
+    """Tests for validate_url_with_pinning_async and the async client."""
+
+    async def test_pins_resolved_ip(self, dns, resolver):
+        """The request is pinned to the resolved address."""
+        validated = await validate_url_with_pinning_async("https://api.example.com/x")
+
+        assert validated.pinned_ip == "93.184.216.34"
+        assert validated.get_pinned_url() == "https://93.184.216.34/x"
+
+    async def test_cached_private_answer_still_blocked(self, dns, resolver):
+        """Cached addresses are checked on every call, not only when resolved."""
+        records, _ = dns
+        records["rebind.example.com"] = ["10.0.0.5"]
+
+        for _ in range(2):
+            with pytest.raises(SSRFError, match="blocked IP"):
+                await validate_url_with_pinning_async("http://rebind.example.com/")
+
+        # Admin approval allows the same cached RFC 1918 answer
+        validated = await validate_url_with_pinning_async(
+            "http://rebind.example.com/", admin_approved=True
+        )
+        assert validated.pinned_ip == "10.0.0.5"
+
+    async def test_any_private_address_blocks(self, dns, resolver):
+        """A hostname with one internal address among public ones is blocked."""
+        records, _ = dns
+        records["mixed.example.com"] = ["93.184.216.34", "127.0.0.1"]
+
+        with pytest.raises(SSRFError, match="blocked IP"):
+            await validate_url_with_pinning_async("http://mixed.example.com/")
+
+    async def test_resolution_failure(self, dns, resolver):
+        """Unresolvable hostnames are reported as SSRF errors."""
+        with pytest.raises(SSRFError, match="DNS resolution failed"):
+            await validate_url_with_pinning_async("http://missing.example.com/")
+
+    async def test_client_uses_cached_resolver(self, dns, resolver):
+        """The protected client resolves through the cache."""
+        _, calls = dns
+        wrapped = AsyncMock(spec=httpx.AsyncClient)
+        client = SSRFProtectedAsyncHttpClient(wrapped, proxy_mode=False)
+
+        await client.get("https://api.example.com/a")
+        await client.get("https://api.example.com/b")
+
+        assert calls == ["api.example.com"]
+        pinned_url = wrapped.get.call_args.args[0]
+        assert pinned_url == "https://93.184.216.34/b"
+        assert wrapped.get.call_args.kwargs["extensions"] == {
+            "sni_hostname": b"api.example.com",
+            "dns_ms": ANY,
+        }
+
+    async def test_unapproved_host_never_resolved(self, dns, resolver):
+        """The allowlist is checked before any DNS lookup is made."""
+        _, calls = dns
+        wrapped = AsyncMock(spec=httpx.AsyncClient)
+        client = SSRFProtectedAsyncHttpClient(
+            wrapped, allowed_hosts={"api.example.com"}, proxy_mode=False
+        )
+
+        with pytest.raises(SSRFError, match="not approved"):
+            await client.get("https://exfil.attacker.example/")
+
+        assert calls == []
+
+
+class TestDnsStats:
+    """Tests for resolver metrics in /execution-stats."""
+
+    def test_execution_stats(self, authenticated_client, monkeypatch):
+        """/execution-stats includes the DNS cache metrics."""
+        resolver = DnsResolver()
+        resolver.lookups = 4
+        resolver.hits = 3
+        monkeypatch.setattr("app.routes.dns_resolver", resolver)
+
+        response = authenticated_client.get("/execution-stats")
+
+        stats = response.json()["dns"]
+        assert stats["lookups"] == 4
+        assert stats["hit_rate"] == 0.75
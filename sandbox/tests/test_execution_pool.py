@@ -0,0 +1,239 @@
+"""Tests for fair execution admission and the module init thread pool."""
+
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from app.execution_pool import ExecutionPool
+from app.executor import IsolatedLoopPool, PythonExecutor
+
+
+async def _wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met"
+        await asyncio.sleep(0.01)
+
+
+class TestAdmission:
+    """Tests for ExecutionPool.acquire()."""
+
+    @pytest.mark.asyncio
+    async def test_admits_immediately_under_caps(self):
+        """Calls within the caps get a slot without queuing."""
+        pool = ExecutionPool(max_concurrent=4, server_max_concurrency=2)
+
+        first = await pool.acquire("a")
+        second = await pool.acquire("a")
+
+        stats = pool.stats()
+        assert stats["active"] == 2
+        assert stats["queued"] == 0
+        assert stats["servers"]["a"]["active"] == 2
+        first.close()
+        second.close()
+        assert pool.stats()["active"] == 0
+        assert pool.stats()["servers"] == {}
+
+    @pytest.mark.asyncio
+    async def test_server_cap_queues_only_that_server(self):
+        """A server at its cap waits while other servers still get slots."""
+        pool = ExecutionPool(max_concurrent=4, server_max_concurrency=1)
+        held = await pool.acquire("busy")
+
+        waiting = asyncio.create_task(pool.acquire("busy"))
+        await _wait_until(lambda: pool.stats()["queue_depth"] == 1)
+        other = await asyncio.wait_for(pool.acquire("quiet"), timeout=1)
+
+        assert not waiting.done()
+        held.close()
+        (await waiting).close()
+        other.close()
+
+    @pytest.mark.asyncio
+    async def test_per_server_cap_override(self):
+        """A server's own cap replaces the default."""
+        pool = ExecutionPool(max_concurrent=8, server_max_concurrency=1)
+
+        leases = [await pool.acquire("wide", max_concurrency=3) for _ in range(3)]
+
+        assert pool.stats()["servers"]["wide"]["max_concurrency"] == 3
+        for lease in leases:
+            lease.close()
+
+    @pytest.mark.asyncio
+    async def test_unlimited_by_default(self):
+        """Without caps configured, no call waits for a slot."""
+        pool = ExecutionPool()
+
+        leases = [await pool.acquire("a", timeout=0.05) for _ in range(100)]
+
+        assert pool.stats()["queued"] == 0
+        for lease in leases:
+            lease.close()
+        assert pool.stats()["active"] == 0
+
+    @pytest.mark.asyncio
+    async def test_server_cap_without_global_cap(self):
+        """A server's own cap still applies when the caps are unlimited."""
+        pool = ExecutionPool(max_concurrent=0, server_max_concurrency=0)
+        held = await pool.acquire("a", max_concurrency=1)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.acquire("a", max_concurrency=1, timeout=0.05)
+        (await pool.acquire("b", timeout=0.05)).close()
+        held.close()
+
+    @pytest.mark.asyncio
+    async def test_slots_handed_out_round_robin(self):
+        """Freed slots alternate between waiting servers instead of FIFO."""
+        pool = ExecutionPool(max_concurrent=1, server_max_concurrency=4)
+        held = await pool.acquire("a")
+        order: list[str] = []
+
+        async def call(key: str):
+            lease = await pool.acquire(key)
+            order.append(key)
+            await asyncio.sleep(0)
+            lease.close()
+
+        tasks = []
+        for key in ("a", "a", "a", "b"):
+            tasks.append(asyncio.create_task(call(key)))
+            await asyncio.sleep(0)
+        held.close()
+        await asyncio.gather(*tasks)
+
+        assert order == ["a", "b", "a", "a"]
+        assert pool.stats()["wait_ms_max"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_queue_timeout(self):
+        """Waiting longer than the timeout raises and leaves the queue empty."""
+        pool = ExecutionPool(max_concurrent=1)
+        held = await pool.acquire("a")
+
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.acquire("b", timeout=0.05)
+
+        stats = pool.stats()
+        assert stats["queue_timeouts"] == 1
+        assert stats["queue_depth"] == 0
+        held.close()
+        assert pool.stats()["active"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        """A waiter cancelled while queued never holds a slot."""
+        pool = ExecutionPool(max_concurrent=1)
+        held = await pool.acquire("a")
+        waiting = asyncio.create_task(pool.acquire("b"))
+        await _wait_until(lambda: pool.stats()["queue_depth"] == 1)
+
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        held.close()
+
+        assert pool.stats()["active"] == 0
+        (await pool.acquire("c")).close()
+
+
+class TestZombies:
+    """Tests for work that outlives its timeout."""
+
+    @pytest.mark.asyncio
+    async def test_timed_out_thread_keeps_slot_until_done(self):
+        """A timed-out init thread is a zombie holding its server's slot."""
+        pool = ExecutionPool(threads=2, max_concurrent=4, server_max_concurrency=1)
+        release = threading.Event()
+        lease = await pool.acquire("hot")
+
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await pool.run_sync(release.wait, timeout=0.05, lease=lease)
+            lease.close()
+
+            stats = pool.stats()
+            assert stats["zombies"] == 1
+            assert stats["zombie_threads"] == 1
+            assert stats["servers"]["hot"]["active"] == 1
+            with pytest.raises(asyncio.TimeoutError):
+                await pool.acquire("hot", timeout=0.05)
+        finally:
+            release.set()
+
+        await _wait_until(lambda: pool.stats()["active"] == 0)
+        stats = pool.stats()
+        assert stats["zombies"] == 0
+        assert stats["zombie_threads"] == 0
+        assert stats["zombies_finished"] == 1
+        (await pool.acquire("hot", timeout=1)).close()
+        pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_run_sync_returns_result(self):
+        """Calls that finish in time return their value on a pool thread."""
+        pool = ExecutionPool(threads=1)
+
+        name = await pool.run_sync(lambda: threading.current_thread().name, timeout=5)
+
+        assert name.startswith("sandbox-exec")
+        assert pool.stats()["zombie_threads"] == 0
+        pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_stuck_isolated_loop_keeps_slot(self):
+        """A main() stuck after timeout on an isolated loop pins the lease."""
+        pool = ExecutionPool(max_concurrent=4)
+        loops = IsolatedLoopPool(max_threads=2, max_idle=1)
+        release = threading.Event()
+        lease = await pool.acquire("hot")
+
+        async def blocking():
+            release.wait()
+
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await loops.run(blocking(), timeout=0.05, lease=lease)
+            lease.close()
+            assert pool.stats()["servers"]["hot"]["zombies"] == 1
+        finally:
+            release.set()
+
+        await _wait_until(lambda: pool.stats()["active"] == 0)
+        assert loops.stats()["stuck"] == 0
+        loops.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_executor_init_timeout_counts_zombie(self, monkeypatch):
+        """Module-level loops that time out show up as zombie init threads."""
+        pool = ExecutionPool(threads=2)
+        monkeypatch.setattr("app.executor.execution_pool", pool)
+        code = (
+            "import time\n"
+            "time.sleep(0.5)\n"
+            "async def main():\n"
+            "    return 1\n"
+        )
+        lease = await pool.acquire("srv")
+
+        async with httpx.AsyncClient() as client:
+            result = await PythonExecutor().execute(
+                python_code=code,
+                arguments={},
+                http_client=client,
+                timeout=0.05,
+                allowed_modules={"time"},
+                lease=lease,
+            )
+        lease.close()
+
+        assert result.success is False
+        assert "initialization timed out" in result.error
+        assert pool.stats()["zombie_threads"] == 1
+        await _wait_until(lambda: pool.stats()["zombie_threads"] == 0)
+        assert pool.stats()["active"] == 0
+        pool.shutdown()
@@ -0,0 +1,377 @@
+"""Tests for the RFC 9111 HTTP response cache of the tool http client."""
+
+import email.utils
+import gzip
+import json
+import time
+
+import httpx
+import pytest
+
+from app.executor import PythonExecutor
+from app.http_cache import HttpResponseCache
+from app.registry import ToolRegistry
+from app.ssrf import SSRFProtectedAsyncHttpClient
+
+URL = "https://api.example.com/status"
+
+
+def _http_date(offset: float = 0) -> str:
+    return email.utils.formatdate(time.time() + offset, usegmt=True)
+
+
+class Upstream:
+    """Mock upstream: replies with the queued responses, records requests."""
+
+    def __init__(self):
+        self.requests: list[httpx.Request] = []
+        self.replies: list[tuple[int, dict, bytes]] = []
+
+    def reply(self, status=200, headers=None, body=b'{"ok": true}'):
+        self.replies.append((status, headers or {}, body))
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        status, headers, body = (
+            self.replies.pop(0) if len(self.replies) > 1 else self.replies[0]
+        )
+        return httpx.Response(status, headers=headers, content=body)
+
+
+@pytest.fixture
+def upstream():
+    return Upstream()
+
+
+@pytest.fixture
+def cache():
+    return HttpResponseCache(max_entries=16, max_bytes=1024 * 1024)
+
+
+@pytest.fixture
+def client(upstream, cache):
+    """SSRF-protected client in proxy mode (no DNS) with the cache enabled."""
+    wrapped = httpx.AsyncClient(transport=httpx.MockTransport(upstream.handler))
+    return SSRFProtectedAsyncHttpClient(
+        wrapped, proxy_mode=True, response_cache=cache
+    )
+
+
+class TestFreshness:
+    """Tests for serving fresh responses from the cache."""
+
+    async def test_max_age_response_reused(self, client, upstream, cache):
+        """A response with max-age is served from the cache while fresh."""
+        upstream.reply(headers={"Cache-Control": "max-age=60"})
+
+        first = await client.get(URL)
+        second = await client.get(URL)
+
+        assert len(upstream.requests) == 1
+        assert first.extensions["http_cache"] == "miss"
+        assert second.extensions["http_cache"] == "hit"
+        assert second.json() == {"ok": True}
+        assert second.headers["age"] == "0"
+        assert cache.stats()["hits"] == 1
+
+    async def test_expired_response_fetched_again(
+        self, client, upstream, monkeypatch
+    ):
+        """Once max-age has passed the response is fetched again."""
+        upstream.reply(headers={"Cache-Control": "max-age=60"})
+        await client.get(URL)
+
+        now = time.time()
+        monkeypatch.setattr("app.http_cache.time.time", lambda: now + 61)
+        await client.get(URL)
+
+        assert len(upstream.requests) == 2
+
+    async def test_age_header_counts(self, client, upstream):
+        """Time the response already spent in upstream caches is counted."""
+        upstream.reply(headers={"Cache-Control": "max-age=60", "Age": "60"})
+
+        await client.get(URL)
+        await client.get(URL)
+
+        assert len(upstream.requests) == 2
+
+    async def test_expires_header(self, client, upstream):
+        """Expires relative to Date gives the freshness lifetime."""
+        upstream.reply(headers={"Date": _http_date(), "Expires": _http_date(120)})
+
+        await client.get(URL)
+        response = await client.get(URL)
+
+        assert response.extensions["http_cache"] == "hit"
+
+    async def test_heuristic_freshness_from_last_modified(self, client, upstream):
+        """Without explicit freshness, Last-Modified gives a heuristic one."""
+        upstream.reply(
+            headers={"Date": _http_date(), "Last-Modified": _http_date(-10 * 86400)}
+        )
+
+        await client.get(URL)
+        response = await client.get(URL)
+
+        assert response.extensions["http_cache"] == "hit"
+
+    async def test_query_params_part_of_key(self, client, upstream):
+        """Requests for different query strings are cached separately."""
+        upstream.reply(headers={"Cache-Control": "max-age=60"})
+
+        await client.get(URL, params={"page": 1})
+        await client.get(URL, params={"page": 2})
+        await client.get(URL, params={"page": 1})
+
+        assert len(upstream.requests) == 2
+
+    async def test_compressed_response_served_decoded(self, client, upstream):
+        """Cached bodies are stored decoded and served without Content-Encoding."""
+        upstream.reply(
+            headers={"Cache-Control": "max-age=60", "Content-Encoding": "gzip"},
+            body=gzip.compress(json.dumps({"ok": True}).encode()),
+        )
+
+        await client.get(URL)
+        response = await client.get(URL)
+
+        assert "content-encoding" not in response.headers
+        assert response.json() == {"ok": True}
+
+
+class TestRevalidation:
+    """Tests for conditional revalidation of stale responses."""
+
+    async def test_etag_revalidated_with_304(self, client, upstream, cache):
+        """A stale response with an ETag is revalidated, and reused on 304."""
+        upstream.reply(headers={"Cache-Control": "max-age=0", "ETag": '"v1"'})
+        upstream.reply(status=304, headers={"ETag": '"v1"'}, body=b"")
+
+        await client.get(URL)
+        response = await client.get(URL)
+
+        assert upstream.requests[1].headers["if-none-match"] == '"v1"'
+        assert response.status_code == 200
+        assert response.json() == {"ok": True}
+        assert response.extensions["http_cache"] == "revalidated"
+        assert cache.stats()["revalidated"] == 1
+
+    async def test_304_refreshes_freshness(self, client, upstream):
+        """Headers of the 304 update the stored response."""
+        upstream.reply(headers={"Cache-Control": "max-age=0", "ETag": '"v1"'})
+        upstream.reply(
+            status=304, headers={"Cache-Control": "max-age=60", "ETag": '"v1"'}
+        )
+
+        await client.get(URL)
+        await client.get(URL)
+        response = await client.get(URL)
+
+        assert len(upstream.requests) == 2
+        assert response.extensions["http_cache"] == "hit"
+
+    async def test_changed_resource_replaces_entry(self, client, upstream):
+        """A full response to a revalidation replaces the stored one."""
+        upstream.reply(headers={"Cache-Control": "max-age=0", "ETag": '"v1"'})
+        upstream.reply(
+            headers={"Cache-Control": "max-age=60", "ETag": '"v2"'}, body=b"new"
+        )
+
+        await client.get(URL)
+        changed = await client.get(URL)
+        cached = await client.get(URL)
+
+        assert changed.text == cached.text == "new"
+        assert cached.extensions["http_cache"] == "hit"
+
+    async def test_last_modified_revalidation(self, client, upstream):
+        """Last-Modified is sent back as If-Modified-Since."""
+        last_modified = _http_date(-3600)
+        upstream.reply(
+            headers={"Cache-Control": "no-cache", "Last-Modified": last_modified}
+        )
+
+        await client.get(URL)
+        await client.get(URL)
+
+        assert upstream.requests[1].headers["if-modified-since"] == last_modified
+
+    async def test_request_no_cache_forces_revalidation(self, client, upstream):
+        """A request with Cache-Control: no-cache is never answered unchecked."""
+        upstream.reply(headers={"Cache-Control": "max-age=60", "ETag": '"v1"'})
+
+        await client.get(URL)
+        await client.get(URL, headers={"Cache-Control": "no-cache"})
+
+        assert len(upstream.requests) == 2
+
+
+class TestNotCached:
+    """Tests for requests and responses the cache leaves alone."""
+
+    @pytest.mark.parametrize(
+        "headers",
+        [
+            {"Cache-Control": "no-store, max-age=60"},
+            {"Cache-Control": "max-age=60", "Set-Cookie": "session=1"},
+            {"Cache-Control": "max-age=60", "Vary": "*"},
+            {"Expires": "0"},
+            {},
+        ],
+    )
+    async def test_response_not_stored(self, client, upstream, cache, headers):
+        """Responses HTTP doesn't allow (or that could never be reused) aren't kept."""
+        upstream.reply(headers=headers)
+
+        await client.get(URL)
+        await client.get(URL)
+
+        assert len(upstream.requests) == 2
+        assert cache.stats()["entries"] == 0
+
+    async def test_different_credentials_not_shared(self, client, upstream):
+        """Responses are only reused for requests with identical headers."""
+        upstream.reply(headers={"Cache-Control": "max-age=60"})
+
+        await client.get(URL, headers={"Authorization": "Bearer alice"})
+        await client.get(URL, headers={"Authorization": "Bearer bob"})
+        await client.get(URL, headers={"X-Api-Key": "k1"})
+
+        assert len(upstream.requests) == 3
+
+    async def test_tool_conditional_request_passed_through(self, client, upstream):
+        """A tool doing its own revalidation gets the upstream's answer."""
+        upstream.reply(headers={"Cache-Control": "max-age=60", "ETag": '"v1"'})
+        await client.get(URL)
+        upstream.replies = []
+        upstream.reply(status=304)
+
+        response = await client.get(URL, headers={"If-None-Match": '"v1"'})
+
+        assert response.status_code == 304
+
+    async def test_unsafe_method_invalidates(self, client, upstream, cache):
+        """A successful POST to a URL drops its cached responses."""
+        upstream.reply(headers={"Cache-Control": "max-age=60"})
+        await client.get(URL)
+
+        await client.post(URL, json={"update": 1})
+        await client.get(URL)
+
+        assert [r.method for r in upstream.requests] == ["GET", "POST", "GET"]
+        assert cache.stats()["invalidations"] == 1
+
+
+class TestLimits:
+    """Tests for the cache's entry and memory limits."""
+
+    async def test_entry_limit(self, upstream):
+        """The least recently used response is evicted first."""
+        cache = HttpResponseCache(max_entries=2)
+        wrapped = httpx.AsyncClient(transport=httpx.MockTransport(upstream.handler))
+        client = SSRFProtectedAsyncHttpClient(
+            wrapped, proxy_mode=True, response_cache=cache
+        )
+        upstream.reply(headers={"Cache-Control": "max-age=60"})
+
+        for path in ("a", "b", "c"):
+            await client.get(f"https://api.example.com/{path}")
+
+        assert cache.stats()["entries"] == 2
+        assert cache.stats()["evictions"] == 1
+
+    async def test_byte_limit(self, upstream):
+        """Responses larger than the cache are not stored."""
+        cache = HttpResponseCache(max_bytes=1024)
+        wrapped = httpx.AsyncClient(transport=httpx.MockTransport(upstream.handler))
+        client = SSRFProtectedAsyncHttpClient(
+            wrapped, proxy_mode=True, response_cache=cache
+        )
+        upstream.reply(headers={"Cache-Control": "max-age=60"}, body=b"x" * 2048)
+
+        await client.get(URL)
+
+        assert cache.stats()["entries"] == 0
+        assert cache.stats()["bytes"] == 0
+
+
+class TestToolIntegration:
+    """Tests for the cache as seen by tool code."""
+
+    TOOL = (
+        "async def main():\n"
+        "    response = await http.get('https://api.example.com/status')\n"
+        "    return response.json()\n"
+    )
+
+    async def test_debug_info_reports_cache_lookups(
+        self, upstream, cache, monkeypatch
+    ):
+        """Debug mode reports hits and misses; hits appear as HTTP calls."""
+        monkeypatch.setattr("app.ssrf._PROXY_MODE", True)
+        upstream.reply(headers={"Cache-Control": "max-age=60"})
+        executor = PythonExecutor()
+
+        results = []
+        for _ in range(2):
+            async with httpx.AsyncClient(
+                transport=httpx.MockTransport(upstream.handler)
+            ) as http_client:
+                results.append(
+                    await executor.execute(
+                        self.TOOL,
+                        {},
+                        http_client,
+                        debug_mode=True,
+                        http_cache=cache,
+                    )
+                )
+
+        assert [r.result for r in results] == [{"ok": True}] * 2
+        first, second = (r.debug_info.to_dict() for r in results)
+        assert first["http_cache"] == {"misses": 1}
+        assert second["http_cache"] == {"hits": 1}
+        assert second["http_calls"][0]["cache"] == "hit"
+        assert second["http_calls"][0]["status_code"] == 200
+        assert len(upstream.requests) == 1
+
+    def test_enabled_per_server(self):
+        """Only servers registered with http_cache get a cache."""
+        registry = ToolRegistry()
+        registry.register_server("on", "On", [], http_cache=True)
+        registry.register_server("off", "Off", [])
+
+        assert registry.servers["on"].http_cache is not None
+        assert registry.servers["off"].http_cache is None
+        assert registry.http_cache_stats()["servers"] == 1
+
+    def test_kept_across_reregistration(self):
+        """Re-registering a server keeps its cached responses."""
+        registry = ToolRegistry()
+        registry.register_server("on", "On", [], http_cache=True)
+        cache = registry.servers["on"].http_cache
+
+        registry.register_server("on", "On", [], http_cache=True)
+
+        assert registry.servers["on"].http_cache is cache
+
+    def test_cleared_on_secret_update(self, monkeypatch):
+        """New secrets drop responses fetched with the old ones."""
+        registry = ToolRegistry()
+        registry.register_server("on", "On", [], http_cache=True)
+        cache = registry.servers["on"].http_cache
+        cleared = []
+        monkeypatch.setattr(cache, "clear", lambda: cleared.append(True))
+
+        registry.update_secrets("on", {"TOKEN": "new-token-value"})
+
+        assert cleared == [True]
+
+    def test_execution_stats(self, authenticated_client):
+        """/execution-stats includes the HTTP cache totals."""
+        response = authenticated_client.get("/execution-stats")
+
+        stats = response.json()["http_cache"]
+        assert "max_entries" in stats
+        assert "hits" in stats
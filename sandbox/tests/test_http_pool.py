@@ -0,0 +1,216 @@
+"""Tests for pooled per-server HTTP clients."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app import http_pool as http_pool_module
+from app.http_pool import PooledCallClient, ServerHttpPool, _SniKeyedTransport
+from app.registry import ToolRegistry
+
+
+@pytest.fixture
+async def keepalive_server():
+    """Local HTTP/1.1 server that counts the TCP connections it accepts."""
+    connections = []
+
+    async def handle(reader, writer):
+        connections.append(writer)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                if not head:
+                    break
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n"
+                    b"Connection: keep-alive\r\n\r\nok"
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/", connections
+    server.close()
+    await server.wait_closed()
+
+
+def _recording_client(seen: list, **kwargs) -> httpx.AsyncClient:
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(
+            200, headers={"Set-Cookie": "session=abc"}, json={"ok": True}
+        )
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler), **kwargs)
+
+
+class TestServerHttpPool:
+    """Tests for ServerHttpPool."""
+
+    async def test_connections_reused_across_calls(self, keepalive_server):
+        """Two executions of a server share one keep-alive connection."""
+        url, connections = keepalive_server
+        pool = ServerHttpPool()
+
+        for _ in range(2):
+            client = pool.acquire(timeout=5)
+            response = await client.get(url)
+            pool.release()
+            assert response.text == "ok"
+
+        assert len(connections) == 1
+        assert pool.stats()["calls"] == 2
+        assert pool.stats()["clients_created"] == 1
+        pool.close()
+        await asyncio.sleep(0)
+
+    async def test_close_waits_for_active_calls(self, monkeypatch):
+        """The client is only closed once the last execution released it."""
+        pool = ServerHttpPool()
+        closed = []
+
+        async def record_close(client):
+            closed.append(client)
+
+        monkeypatch.setattr(pool, "_aclose", record_close)
+        pool.acquire(timeout=5)
+
+        pool.close()
+        await asyncio.sleep(0)
+        assert closed == []
+
+        pool.release()
+        await asyncio.sleep(0)
+        assert len(closed) == 1
+        with pytest.raises(RuntimeError):
+            pool.acquire(timeout=5)
+
+    async def test_env_proxy_keeps_default_transport(self, monkeypatch):
+        """With a proxy configured, httpx's proxy handling is left in place."""
+        monkeypatch.setattr(http_pool_module, "_uses_env_proxy", lambda: True)
+        pool = ServerHttpPool()
+
+        pool.acquire(timeout=5)
+        pool.release()
+
+        assert pool.stats()["open_connections"] is None
+        pool.close()
+
+
+class TestSniKeyedTransport:
+    """Tests for _SniKeyedTransport."""
+
+    def test_separate_pool_per_sni_hostname(self):
+        """Requests pinned to one IP for different hostnames never share a pool."""
+        transport = _SniKeyedTransport()
+
+        def request(sni):
+            extensions = {"sni_hostname": sni} if sni else {}
+            return httpx.Request("GET", "https://93.184.216.34/", extensions=extensions)
+
+        a = transport._transport(request(b"a.example.com"))
+        b = transport._transport(request(b"b.example.com"))
+
+        assert a is not b
+        assert transport._transport(request(b"a.example.com")) is a
+        assert transport._transport(request(None)) not in (a, b)
+
+
+class TestPooledCallClient:
+    """Tests for PooledCallClient."""
+
+    async def test_applies_call_timeout(self):
+        """Requests default to the call's timeout; tool code can override it."""
+        seen = []
+        async with _recording_client(seen) as client:
+            view = PooledCallClient(client, timeout=7)
+            await view.get("http://example.test/")
+            await view.get("http://example.test/", timeout=2)
+
+        assert seen[0].extensions["timeout"]["read"] == 7
+        assert seen[1].extensions["timeout"]["read"] == 2
+
+    async def test_cookies_scoped_to_call(self):
+        """Cookies set during one call are sent in that call only."""
+        seen = []
+        no_cookies = http_pool_module.CookieJar(
+            policy=http_pool_module.DefaultCookiePolicy(allowed_domains=[])
+        )
+        async with _recording_client(seen, cookies=no_cookies) as client:
+            first = PooledCallClient(client, timeout=5)
+            await first.get("http://example.test/login")
+            await first.get("http://example.test/data")
+            second = PooledCallClient(client, timeout=5)
+            await second.get("http://example.test/data")
+
+        assert "cookie" not in seen[0].headers
+        assert seen[1].headers["cookie"] == "session=abc"
+        assert "cookie" not in seen[2].headers
+
+    async def test_redirects_not_followed(self):
+        """Redirects are returned to the tool, never followed."""
+
+        def handler(request):
+            return httpx.Response(302, headers={"Location": "http://169.254.169.254/"})
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            response = await PooledCallClient(client, 5).get("http://example.test/")
+
+        assert response.status_code == 302
+
+
+class TestRegistryPools:
+    """Tests for per-server pools in ToolRegistry."""
+
+    def _register(self, registry):
+        registry.register_server(
+            server_id="srv",
+            server_name="Srv",
+            tools=[
+                {
+                    "name": "noop",
+                    "description": "",
+                    "parameters": {},
+                    "python_code": "async def main():\n    return 1\n",
+                }
+            ],
+        )
+
+    async def test_executions_use_server_pool(self):
+        """Tool executions borrow the server's pooled client."""
+        registry = ToolRegistry()
+        self._register(registry)
+
+        await registry.execute_tool("Srv__noop", {})
+        await registry.execute_tool("Srv__noop", {})
+
+        pool = registry.servers["srv"].http_pool
+        assert pool.stats()["calls"] == 2
+        assert pool.stats()["clients_created"] == 1
+        assert registry.http_pool_stats()["calls"] == 2
+
+    async def test_pool_survives_reregistration(self):
+        """Re-registering a server keeps its open connections."""
+        registry = ToolRegistry()
+        self._register(registry)
+        pool = registry.servers["srv"].http_pool
+
+        self._register(registry)
+
+        assert registry.servers["srv"].http_pool is pool
+
+    async def test_unregister_closes_pool(self):
+        """Unregistering a server tears its pool down."""
+        registry = ToolRegistry()
+        self._register(registry)
+        pool = registry.servers["srv"].http_pool
+
+        registry.unregister_server("srv")
+
+        with pytest.raises(RuntimeError):
+            pool.acquire(timeout=5)
@@ -0,0 +1,164 @@
+"""Tests for per-phase HTTP call timings in debug mode."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.executor import DebugHttpClient, DebugInfo, _HttpPhaseTimer
+from app.routes import HttpCallInfoResponse
+
+BODY = b"x" * 2048
+
+
+@pytest.fixture
+async def slow_server():
+    """Local keep-alive HTTP/1.1 server that waits 50ms before responding."""
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+                await asyncio.sleep(0.05)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n"
+                    b"Connection: keep-alive\r\n\r\n" % len(BODY) + BODY
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/"
+    server.close()
+    await server.wait_closed()
+
+
+class TestPhaseTimings:
+    """Tests for the timings DebugHttpClient records."""
+
+    async def test_new_connection_phases(self, slow_server):
+        """A first request reports connect, send, TTFB and download times."""
+        debug_info = DebugInfo()
+        async with httpx.AsyncClient() as client:
+            await DebugHttpClient(client, debug_info).get(slow_server)
+
+        call = debug_info.http_calls[0]
+        assert call["connection_reused"] is False
+        assert {"connect_ms", "send_ms", "ttfb_ms", "download_ms"} <= set(
+            call["timings"]
+        )
+        assert "tls_ms" not in call["timings"]
+        assert call["timings"]["ttfb_ms"] >= 40
+        assert call["response_bytes"] == len(BODY)
+
+    async def test_reused_connection(self, slow_server):
+        """A request on a pooled connection has no connect phase."""
+        debug_info = DebugInfo()
+        async with httpx.AsyncClient() as client:
+            debug_client = DebugHttpClient(client, debug_info)
+            await debug_client.get(slow_server)
+            await debug_client.get(slow_server)
+
+        second = debug_info.http_calls[1]
+        assert second["connection_reused"] is True
+        assert "connect_ms" not in second["timings"]
+
+    async def test_request_bytes(self, slow_server):
+        """The request body size is recorded."""
+        debug_info = DebugInfo()
+        async with httpx.AsyncClient() as client:
+            await DebugHttpClient(client, debug_info).post(
+                slow_server, content=b"y" * 100
+            )
+
+        assert debug_info.http_calls[0]["request_bytes"] == 100
+
+    async def test_tool_trace_still_called(self, slow_server):
+        """A trace callback the tool passed itself still gets every event."""
+        events = []
+
+        async def trace(event_name, info):
+            events.append(event_name)
+
+        debug_info = DebugInfo()
+        async with httpx.AsyncClient() as client:
+            await DebugHttpClient(client, debug_info).get(
+                slow_server, extensions={"trace": trace}
+            )
+
+        assert "connection.connect_tcp.started" in events
+        assert "timings" in debug_info.http_calls[0]
+
+    async def test_dns_time_from_ssrf_validation(self):
+        """Time SSRF validation spent resolving the hostname is reported."""
+        debug_info = DebugInfo()
+        transport = httpx.MockTransport(lambda request: httpx.Response(200))
+        async with httpx.AsyncClient(transport=transport) as client:
+            await DebugHttpClient(client, debug_info).get(
+                "https://93.184.216.34/", extensions={"dns_ms": 12.5}
+            )
+
+        call = debug_info.http_calls[0]
+        assert call["timings"] == {"dns_ms": 12.5}
+        # No transport events: whether a connection was reused is unknown
+        assert "connection_reused" not in call
+
+    async def test_failed_request_keeps_phases(self):
+        """A call that fails still reports the phases it got through."""
+        debug_info = DebugInfo()
+        async with httpx.AsyncClient() as client:
+            with pytest.raises(httpx.ConnectError):
+                # Nothing listens on port 1
+                await DebugHttpClient(client, debug_info).get("http://127.0.0.1:1/")
+
+        call = debug_info.http_calls[0]
+        assert call["error"]
+        assert call["connection_reused"] is False
+
+    def test_phase_spans(self):
+        """Phases are measured between the matching httpcore events."""
+        timer = _HttpPhaseTimer()
+        timer._marks = {
+            "connect.started": 1.000,
+            "connect.complete": 1.010,
+            "tls.started": 1.010,
+            "tls.complete": 1.030,
+            "send_headers.started": 1.030,
+            "send_body.complete": 1.031,
+            "response_headers.complete": 1.131,
+            "response_body.started": 1.131,
+            "response_body.complete": 1.141,
+        }
+
+        assert timer.timings() == {
+            "connect_ms": 10.0,
+            "tls_ms": 20.0,
+            "send_ms": 1.0,
+            "ttfb_ms": 100.0,
+            "download_ms": 10.0,
+        }
+
+    def test_response_model(self):
+        """The API response carries the new fields."""
+        call = HttpCallInfoResponse(
+            method="GET",
+            url="https://api.example.com/",
+            timings={"ttfb_ms": 5.0},
+            connection_reused=True,
+            request_bytes=0,
+            response_bytes=10,
+        )
+
+        assert call.model_dump()["timings"] == {"ttfb_ms": 5.0}
+        assert call.connection_reused is True
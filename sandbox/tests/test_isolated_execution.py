@@ -0,0 +1,231 @@
+"""Tests for running tool main() on isolated event loop threads."""
+
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from app.executor import IsolatedLoopPool, LoopBridgedHttpClient, PythonExecutor
+
+BLOCKING_CODE = (
+    "import time\n"
+    "async def main(seconds):\n"
+    "    time.sleep(seconds)\n"
+    "    return 'done'\n"
+)
+
+
+async def _ticker(ticks: list, stop: asyncio.Event):
+    while not stop.is_set():
+        ticks.append(time.monotonic())
+        await asyncio.sleep(0.01)
+
+
+class TestIsolatedLoopPool:
+    """Tests for IsolatedLoopPool."""
+
+    @pytest.mark.asyncio
+    async def test_runs_on_another_thread(self):
+        """The coroutine runs on a loop owned by a different thread."""
+        pool = IsolatedLoopPool(max_threads=2, max_idle=1)
+
+        async def where():
+            return threading.get_ident()
+
+        try:
+            assert await pool.run(where(), timeout=5) != threading.get_ident()
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_exceptions_propagate(self):
+        pool = IsolatedLoopPool(max_threads=2, max_idle=1)
+
+        async def boom():
+            raise ValueError("bad input")
+
+        try:
+            with pytest.raises(ValueError, match="bad input"):
+                await pool.run(boom(), timeout=5)
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_timeout_enforced_while_blocking(self):
+        """The caller times out even though the coroutine never yields."""
+        pool = IsolatedLoopPool(max_threads=2, max_idle=1)
+
+        async def block():
+            time.sleep(0.5)
+
+        try:
+            start = time.monotonic()
+            with pytest.raises(asyncio.TimeoutError):
+                await pool.run(block(), timeout=0.1)
+            assert time.monotonic() - start < 0.4
+            assert pool.stats()["timeouts"] == 1
+            assert pool.stats()["stuck"] == 1
+
+            # The thread is released once the blocking call returns
+            await asyncio.sleep(0.6)
+            assert pool.stats()["stuck"] == 0
+            assert pool.stats()["idle"] == 1
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_max_threads(self):
+        """No more than max_threads tools run at once."""
+        pool = IsolatedLoopPool(max_threads=1, max_idle=1)
+        release = threading.Event()
+
+        async def wait():
+            release.wait(2)
+
+        try:
+            first = asyncio.create_task(pool.run(wait(), timeout=5))
+            await asyncio.sleep(0.05)
+            with pytest.raises(RuntimeError, match="busy"):
+                await pool.run(wait(), timeout=5)
+            release.set()
+            await first
+        finally:
+            pool.shutdown()
+
+
+class TestLoopBridgedHttpClient:
+    """Tests for LoopBridgedHttpClient."""
+
+    @pytest.mark.asyncio
+    async def test_requests_run_on_owning_loop(self):
+        """Requests made from an isolated loop execute on the client's loop."""
+        main_loop = asyncio.get_running_loop()
+        seen = []
+
+        class FakeClient:
+            async def get(self, url, **kwargs):
+                seen.append(asyncio.get_running_loop())
+                return url
+
+        bridge = LoopBridgedHttpClient(FakeClient(), main_loop)
+        pool = IsolatedLoopPool(max_threads=1, max_idle=1)
+
+        async def tool():
+            return await bridge.get("https://example.com")
+
+        try:
+            assert await pool.run(tool(), timeout=5) == "https://example.com"
+        finally:
+            pool.shutdown()
+        assert seen == [main_loop]
+
+    def test_wrapped_client_not_accessible(self):
+        bridge = LoopBridgedHttpClient(object(), asyncio.new_event_loop())
+
+        with pytest.raises(AttributeError):
+            bridge._client
+        with pytest.raises(AttributeError):
+            bridge._LoopBridgedHttpClient__client
+        with pytest.raises(AttributeError):
+            bridge._LoopBridgedHttpClient__loop
+        with pytest.raises(AttributeError):
+            bridge.timeout = 1
+
+
+class TestIsolatedExecutor:
+    """Tests for PythonExecutor in isolated mode."""
+
+    @pytest.mark.asyncio
+    async def test_blocking_tool_does_not_stall_event_loop(self):
+        """A tool blocking inside main() leaves the sandbox loop responsive."""
+        executor = PythonExecutor()
+        ticks: list = []
+        stop = asyncio.Event()
+        ticker = asyncio.create_task(_ticker(ticks, stop))
+
+        async with httpx.AsyncClient() as client:
+            result = await executor.execute(
+                python_code=BLOCKING_CODE,
+                arguments={"seconds": 0.5},
+                http_client=client,
+                allowed_modules={"time"},
+                isolated=True,
+            )
+        stop.set()
+        await ticker
+
+        assert result.success is True
+        assert result.result == "done"
+        # The ticker kept running while the tool slept
+        assert len(ticks) >= 10
+
+    @pytest.mark.asyncio
+    async def test_timeout_fires_for_blocking_tool(self):
+        """The timeout fires on time even if main() never yields."""
+        executor = PythonExecutor()
+
+        async with httpx.AsyncClient() as client:
+            start = time.monotonic()
+            result = await executor.execute(
+                python_code=BLOCKING_CODE,
+                arguments={"seconds": 1.0},
+                http_client=client,
+                timeout=0.2,
+                allowed_modules={"time"},
+                isolated=True,
+            )
+            elapsed = time.monotonic() - start
+
+        assert result.success is False
+        assert result.error_detail.error_type == "TimeoutError"
+        assert elapsed < 0.8
+
+    @pytest.mark.asyncio
+    async def test_print_and_errors_match_inline_mode(self):
+        """Isolated and inline mode produce the same results."""
+        executor = PythonExecutor()
+        code = (
+            "async def main(x):\n"
+            "    print('x is', x)\n"
+            "    if x < 0:\n"
+            "        raise ValueError('negative')\n"
+            "    return x + 1\n"
+        )
+
+        async with httpx.AsyncClient() as client:
+            for x in (1, -1):
+                results = [
+                    await executor.execute(
+                        python_code=code,
+                        arguments={"x": x},
+                        http_client=client,
+                        isolated=isolated,
+                    )
+                    for isolated in (True, False)
+                ]
+                isolated_result, inline_result = results
+                assert isolated_result.success == inline_result.success
+                assert isolated_result.result == inline_result.result
+                assert isolated_result.stdout == inline_result.stdout
+                assert isolated_result.error == inline_result.error
+
+    @pytest.mark.asyncio
+    async def test_sandbox_loop_not_reachable(self):
+        """Tools on an isolated loop can't get hold of the sandbox's loop."""
+        executor = PythonExecutor()
+        code = (
+            "async def main():\n"
+            "    try:\n"
+            "        return str(http._LoopBridgedHttpClient__loop)\n"
+            "    except AttributeError:\n"
+            "        return 'hidden'\n"
+        )
+
+        async with httpx.AsyncClient() as client:
+            result = await executor.execute(
+                python_code=code, arguments={}, http_client=client, isolated=True
+            )
+
+        assert result.result == "hidden"
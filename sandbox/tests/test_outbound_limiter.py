@@ -0,0 +1,346 @@
+"""Tests for per-destination outbound limits of the tool http client."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.executor import PythonExecutor
+from app.http_cache import HttpResponseCache
+from app.outbound_limiter import (
+    OutboundLimiter,
+    OutboundLimits,
+    OutboundQueueTimeout,
+    _Rate,
+)
+from app.registry import ToolRegistry
+from app.ssrf import SSRFProtectedAsyncHttpClient
+
+
+class Upstream:
+    """Mock upstream that holds requests until released, tracking concurrency."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.in_flight: dict[str, int] = {}
+        self.max_in_flight: dict[str, int] = {}
+        self.total_in_flight = 0
+        self.max_total_in_flight = 0
+        self.requests = 0
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.requests += 1
+        self.in_flight[host] = self.in_flight.get(host, 0) + 1
+        self.max_in_flight[host] = max(
+            self.max_in_flight.get(host, 0), self.in_flight[host]
+        )
+        self.total_in_flight += 1
+        self.max_total_in_flight = max(
+            self.max_total_in_flight, self.total_in_flight
+        )
+        try:
+            await self.release.wait()
+        finally:
+            self.in_flight[host] -= 1
+            self.total_in_flight -= 1
+        return httpx.Response(
+            200, headers={"Cache-Control": "max-age=60"}, json={"ok": True}
+        )
+
+
+@pytest.fixture
+def upstream():
+    return Upstream()
+
+
+def _client(upstream, limiter, **kwargs):
+    wrapped = httpx.AsyncClient(transport=httpx.MockTransport(upstream.handler))
+    return SSRFProtectedAsyncHttpClient(
+        wrapped, proxy_mode=True, outbound_limiter=limiter, **kwargs
+    )
+
+
+def _limiter(**limits):
+    defaults = {
+        "max_concurrent_per_host": 0,
+        "rate_per_host": 0,
+        "max_concurrent": 0,
+        "rate": 0,
+        "queue_timeout": 5,
+    }
+    return OutboundLimiter(OutboundLimits(**{**defaults, **limits}))
+
+
+async def _settle(predicate=lambda: False):
+    """Let queued requests run until *predicate* holds (or the loop is idle)."""
+    for _ in range(100):
+        if predicate():
+            return
+        await asyncio.sleep(0)
+
+
+class TestConcurrencyLimits:
+    """Tests for the per-host and per-server concurrency limits."""
+
+    async def test_per_host_limit_queues_requests(self, upstream):
+        """Requests over the per-host limit wait instead of failing."""
+        limiter = _limiter(max_concurrent_per_host=2)
+        client = _client(upstream, limiter)
+
+        calls = [
+            asyncio.ensure_future(client.get("https://api.example.com/"))
+            for _ in range(5)
+        ]
+        await _settle(lambda: limiter.stats()["waiting"] == 3)
+        assert upstream.in_flight["api.example.com"] == 2
+        assert limiter.stats()["waiting"] == 3
+
+        upstream.release.set()
+        responses = await asyncio.gather(*calls)
+
+        assert all(r.status_code == 200 for r in responses)
+        assert upstream.max_in_flight["api.example.com"] == 2
+        assert limiter.stats()["queued"] == 3
+
+    async def test_hosts_limited_independently(self, upstream):
+        """A busy hostname doesn't hold up requests to other hostnames."""
+        limiter = _limiter(max_concurrent_per_host=1)
+        client = _client(upstream, limiter)
+
+        calls = [
+            asyncio.ensure_future(client.get(f"https://{host}.example.com/"))
+            for host in ("a", "a", "b", "c")
+        ]
+        await _settle(lambda: upstream.total_in_flight == 3)
+
+        assert upstream.total_in_flight == 3
+        upstream.release.set()
+        await asyncio.gather(*calls)
+
+    async def test_server_limit(self, upstream):
+        """max_concurrent bounds requests across all hostnames."""
+        limiter = _limiter(max_concurrent=2)
+        client = _client(upstream, limiter)
+
+        calls = [
+            asyncio.ensure_future(client.get(f"https://h{i}.example.com/"))
+            for i in range(4)
+        ]
+        await _settle(lambda: upstream.total_in_flight == 2)
+        assert upstream.total_in_flight == 2
+
+        upstream.release.set()
+        await asyncio.gather(*calls)
+        assert upstream.max_total_in_flight == 2
+
+    async def test_queue_timeout(self, upstream):
+        """A request that can't start within the queue timeout fails."""
+        limiter = _limiter(max_concurrent_per_host=1, queue_timeout=0.05)
+        client = _client(upstream, limiter)
+        first = asyncio.ensure_future(client.get("https://api.example.com/"))
+        await _settle(lambda: upstream.total_in_flight == 1)
+
+        with pytest.raises(OutboundQueueTimeout, match="waited more than 0.05s"):
+            await client.get("https://api.example.com/")
+
+        upstream.release.set()
+        await first
+        stats = limiter.stats()
+        assert stats["timeouts"] == 1
+        assert stats["waiting"] == 0
+        assert stats["active"] == 0
+
+    async def test_queue_timeout_is_httpx_timeout(self):
+        """Tools handling httpx timeouts handle queue timeouts too."""
+        assert issubclass(OutboundQueueTimeout, httpx.TimeoutException)
+
+    async def test_cancelled_waiter_gives_up_its_place(self, upstream):
+        """Cancelling a queued request lets the next one through."""
+        limiter = _limiter(max_concurrent_per_host=1)
+        client = _client(upstream, limiter)
+        first = asyncio.ensure_future(client.get("https://api.example.com/"))
+        second = asyncio.ensure_future(client.get("https://api.example.com/"))
+        third = asyncio.ensure_future(client.get("https://api.example.com/"))
+        await _settle(lambda: limiter.stats()["waiting"] == 2)
+
+        second.cancel()
+        upstream.release.set()
+        await asyncio.gather(first, third)
+
+        assert second.cancelled()
+        assert upstream.requests == 2
+        assert limiter.stats()["active"] == 0
+
+    async def test_raising_limit_wakes_waiters(self, upstream):
+        """New limits apply to requests already queued."""
+        limiter = _limiter(max_concurrent_per_host=1)
+        client = _client(upstream, limiter)
+        calls = [
+            asyncio.ensure_future(client.get("https://api.example.com/"))
+            for _ in range(3)
+        ]
+        await _settle(lambda: limiter.stats()["waiting"] == 2)
+
+        limiter.configure(OutboundLimits(max_concurrent_per_host=3))
+        await _settle(lambda: upstream.total_in_flight == 3)
+
+        assert upstream.in_flight["api.example.com"] == 3
+        upstream.release.set()
+        await asyncio.gather(*calls)
+
+    async def test_idle_hosts_forgotten(self, upstream):
+        """Hostnames with nothing in flight are dropped from the table."""
+        limiter = _limiter(max_concurrent_per_host=1)
+        client = _client(upstream, limiter)
+        upstream.release.set()
+
+        for host in ("a", "b", "c"):
+            await client.get(f"https://{host}.example.com/")
+
+        assert limiter.stats()["hosts"] == 0
+
+
+class TestRateLimits:
+    """Tests for token-bucket rate shaping."""
+
+    def test_burst_then_spaced(self):
+        """A second's worth of requests start at once, then one per interval."""
+        rate = _Rate(4)
+        starts = []
+        for _ in range(6):
+            start = rate.start_at(100.0)
+            rate.take(start)
+            starts.append(start)
+
+        assert starts == [100.0, 100.0, 100.0, 100.0, 100.25, 100.5]
+
+    def test_tokens_refill(self):
+        """Unused time refills the bucket."""
+        rate = _Rate(2)
+        for _ in range(3):
+            rate.take(rate.start_at(0.0))
+
+        assert rate.start_at(10.0) == 10.0
+
+    async def test_requests_spaced_out(self, upstream):
+        """Requests over the rate wait for their slot."""
+        limiter = _limiter(rate_per_host=10)
+        client = _client(upstream, limiter)
+        upstream.release.set()
+
+        await asyncio.gather(
+            *(client.get("https://api.example.com/") for _ in range(11))
+        )
+
+        assert limiter.stats()["queued"] == 1
+        # The eleventh request waits a tenth of a second for its token
+        assert limiter.stats()["wait_time_max_ms"] >= 50
+
+    async def test_rate_wait_past_deadline_fails_at_once(self, upstream):
+        """A request whose slot is past the queue timeout fails without waiting."""
+        limiter = _limiter(rate=1, queue_timeout=0.5)
+        client = _client(upstream, limiter)
+        upstream.release.set()
+        await client.get("https://api.example.com/")
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with pytest.raises(OutboundQueueTimeout):
+            await client.get("https://api.example.com/")
+
+        assert loop.time() - started < 0.2
+
+    async def test_cache_hits_not_limited(self, upstream):
+        """Responses served from the response cache never wait."""
+        limiter = _limiter(rate_per_host=1, queue_timeout=0.1)
+        client = _client(upstream, limiter, response_cache=HttpResponseCache())
+        upstream.release.set()
+
+        for _ in range(3):
+            await client.get("https://api.example.com/")
+
+        assert limiter.stats()["requests"] == 1
+
+
+class TestLimitsConfig:
+    """Tests for per-server configuration and reporting."""
+
+    def test_from_config_overrides_defaults(self):
+        """Only the values set in the registration replace the defaults."""
+        limits = OutboundLimits.from_config(
+            {"rate_per_host": 5, "max_concurrent": None, "unknown": 1}
+        )
+
+        assert limits.rate_per_host == 5
+        assert limits.max_concurrent == OutboundLimits().max_concurrent
+
+    def test_registration_applies_limits(self):
+        """Limits from the registration are used by the server's limiter."""
+        registry = ToolRegistry()
+        registry.register_server(
+            "s1", "S1", [], outbound_limits={"max_concurrent_per_host": 3}
+        )
+
+        limiter = registry.servers["s1"].outbound_limiter
+        assert limiter.limits.max_concurrent_per_host == 3
+
+    def test_limiter_kept_across_reregistration(self):
+        """Re-registering keeps the limiter so in-flight requests still count."""
+        registry = ToolRegistry()
+        registry.register_server("s1", "S1", [])
+        limiter = registry.servers["s1"].outbound_limiter
+
+        registry.register_server("s1", "S1", [], outbound_limits={"rate": 2})
+
+        assert registry.servers["s1"].outbound_limiter is limiter
+        assert limiter.limits.rate == 2
+
+    async def test_debug_info_reports_queue_wait(self, upstream, monkeypatch):
+        """Debug mode reports how long requests waited for their turn."""
+        monkeypatch.setattr("app.ssrf._PROXY_MODE", True)
+        limiter = _limiter(rate_per_host=1, queue_timeout=0.1)
+        upstream.release.set()
+        code = (
+            "async def main():\n"
+            "    await http.get('https://api.example.com/')\n"
+            "    try:\n"
+            "        await http.get('https://api.example.com/')\n"
+            "    except Exception as e:\n"
+            "        return str(e)\n"
+        )
+
+        async with httpx.AsyncClient(
+            transport=httpx.MockTransport(upstream.handler)
+        ) as http_client:
+            result = await PythonExecutor().execute(
+                code, {}, http_client, debug_mode=True, outbound_limiter=limiter
+            )
+
+        assert "waited more than" in result.result
+        queue = result.debug_info.to_dict()["outbound_queue"]
+        assert queue["requests"] == 2
+        assert queue["timeouts"] == 1
+        assert queue["max_wait_ms"] < 100
+
+    def test_negative_limit_rejected(self, authenticated_client):
+        """Registration rejects negative limits."""
+        response = authenticated_client.post(
+            "/servers/register",
+            json={
+                "server_id": "s1",
+                "server_name": "S1",
+                "tools": [],
+                "outbound_limits": {"rate_per_host": -1},
+            },
+        )
+
+        assert response.status_code == 422
+
+    def test_execution_stats(self, authenticated_client):
+        """/execution-stats includes the default limits and queue totals."""
+        response = authenticated_client.get("/execution-stats")
+
+        stats = response.json()["outbound_limits"]
+        assert "max_concurrent_per_host" in stats
+        assert "queued" in stats
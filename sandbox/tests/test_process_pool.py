@@ -0,0 +1,403 @@
+"""Tests for the pre-forked process pool execution engine."""
+
+import asyncio
+import os
+import pickle
+
+import httpx
+import pytest
+
+from app.executor import PythonExecutor, ResourceUsage
+from app.process_pool import ProcessPool, _decode_message
+
+
+def _job(code: str, **overrides) -> dict:
+    job = {
+        "python_code": code,
+        "arguments": {},
+        "timeout": 5.0,
+        "debug_mode": False,
+        "allowed_modules": None,
+        "secrets": {},
+        "allowed_hosts": None,
+        "warm": False,
+    }
+    job.update(overrides)
+    return job
+
+
+@pytest.fixture
+async def pool():
+    """A small process pool, shut down after the test."""
+    p = ProcessPool(size=1, max_executions=3, memory_bytes=0)
+    await p.start()
+    yield p
+    await p.shutdown()
+
+
+class TestProcessPool:
+    """Tests for ProcessPool."""
+
+    def test_disabled_by_default(self):
+        """A pool with size 0 never reports itself as enabled."""
+        assert ProcessPool(size=0).enabled is False
+
+    @pytest.mark.asyncio
+    async def test_executes_in_worker_process(self, pool):
+        """Jobs run in a separate process and return the executor result dict."""
+        code = "async def main(x):\n    print('hi')\n    return x * 2\n"
+
+        result = await pool.execute(_job(code, arguments={"x": 21}))
+
+        assert result["success"] is True
+        assert result["result"] == 42
+        assert "hi" in result["stdout"]
+        worker_pids = {w["pid"] for w in pool.stats()["workers"]}
+        assert os.getpid() not in worker_pids
+
+    @pytest.mark.asyncio
+    async def test_secrets_redacted_in_worker(self, pool):
+        """Secret redaction still applies to results produced in workers."""
+        code = "async def main():\n    return secrets['TOKEN']\n"
+
+        result = await pool.execute(
+            _job(code, secrets={"TOKEN": "super-secret-token-value"})
+        )
+
+        assert result["result"] == "[REDACTED]"
+
+    @pytest.mark.asyncio
+    async def test_security_validation_applies(self, pool):
+        """Code safety validation runs inside the worker."""
+        result = await pool.execute(
+            _job("async def main():\n    return ().__class__\n")
+        )
+
+        assert result["success"] is False
+        assert result["error_detail"]["error_type"] == "SecurityError"
+
+    @pytest.mark.asyncio
+    async def test_worker_recycled_after_max_executions(self, pool):
+        """A worker is replaced after max_executions jobs."""
+        code = "async def main():\n    return 1\n"
+        first_pid = pool.stats()["workers"][0]["pid"]
+
+        for _ in range(3):
+            assert (await pool.execute(_job(code)))["success"] is True
+
+        stats = pool.stats()
+        assert stats["recycled"] == 1
+        assert stats["workers"][0]["pid"] != first_pid
+        assert (await pool.execute(_job(code)))["result"] == 1
+
+    @pytest.mark.asyncio
+    async def test_blocking_tool_is_killed(self, pool):
+        """A tool blocking the worker's loop is killed after its budget."""
+        code = "import time\nasync def main():\n    while True:\n        pass\n"
+
+        result = await pool.execute(_job(code, timeout=0.5, allowed_modules=["time"]))
+
+        assert result["success"] is False
+        assert pool.stats()["killed"] == 1
+        # The replacement worker serves the next job
+        ok = await pool.execute(_job("async def main():\n    return 'alive'\n"))
+        assert ok["result"] == "alive"
+
+    @pytest.mark.asyncio
+    async def test_cancelled_job_replaces_worker(self, pool):
+        """A caller cancelled mid-job doesn't leave its worker behind."""
+        code = "import asyncio\nasync def main():\n    await asyncio.sleep(5)\n"
+        first_pid = pool.stats()["workers"][0]["pid"]
+        task = asyncio.create_task(
+            pool.execute(_job(code, allowed_modules=["asyncio"]))
+        )
+        await asyncio.sleep(0.5)
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        stats = pool.stats()
+        assert stats["killed"] == 1
+        assert stats["workers"][0]["pid"] != first_pid
+        ok = await pool.execute(_job("async def main():\n    return 'alive'\n"))
+        assert ok["result"] == "alive"
+
+    @pytest.mark.asyncio
+    async def test_warm_mode_runs_module_body_once(self, pool):
+        """Warm jobs keep their template inside the worker."""
+        code = "print('init')\nasync def main():\n    return 1\n"
+
+        first = await pool.execute(_job(code, warm=True))
+        second = await pool.execute(_job(code, warm=True))
+
+        assert "init" in first["stdout"]
+        assert "init" not in second["stdout"]
+
+    @pytest.mark.asyncio
+    async def test_warm_template_not_shared_between_servers(self, pool):
+        """Identical code on two servers doesn't share a template (or secrets)."""
+        code = "TOKEN = secrets['TOKEN']\nasync def main():\n    return TOKEN[:3]\n"
+
+        job = _job(code, warm=True, tool_name="t")
+
+        first = await pool.execute(
+            {**job, "server_id": "a", "secrets": {"TOKEN": "aaa-1"}}
+        )
+        second = await pool.execute(
+            {**job, "server_id": "b", "secrets": {"TOKEN": "bbb-2"}}
+        )
+
+        assert first["result"] == "aaa"
+        assert second["result"] == "bbb"
+
+    @pytest.mark.asyncio
+    async def test_warm_template_rebuilt_on_secret_change(self, pool):
+        code = "TOKEN = secrets['TOKEN']\nasync def main():\n    return TOKEN[:3]\n"
+        job = _job(code, warm=True, server_id="a", tool_name="t")
+
+        await pool.execute({**job, "secrets": {"TOKEN": "old-1"}})
+        result = await pool.execute({**job, "secrets": {"TOKEN": "new-2"}})
+
+        assert result["result"] == "new"
+
+
+class TestHttpForwarding:
+    """Tests for tool HTTP requests sent through the parent's client."""
+
+    @pytest.fixture
+    def upstream(self, monkeypatch):
+        # Proxy mode validates hostnames without resolving them
+        monkeypatch.setattr("app.ssrf._PROXY_MODE", True)
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(
+                201, json={"path": request.url.path}, headers={"X-Up": "1"}
+            )
+
+        return requests, httpx.MockTransport(handler)
+
+    @pytest.mark.asyncio
+    async def test_request_sent_by_parent(self, pool, upstream):
+        """The parent sends the request, meters it and returns the response."""
+        requests, transport = upstream
+        code = (
+            "async def main():\n"
+            "    r = await http.post('https://api.example.com/items', json={'a': 1})\n"
+            "    return [r.status_code, r.json(), r.headers['x-up']]\n"
+        )
+        usage = ResourceUsage()
+
+        async with httpx.AsyncClient(transport=transport) as client:
+            http_client = PythonExecutor.create_tool_http_client(
+                client, usage, allowed_hosts={"api.example.com"}
+            )
+            result = await pool.execute(_job(code), http_client=http_client)
+
+        assert result["result"] == [201, {"path": "/items"}, "1"]
+        assert requests[0].content == b'{"a":1}'
+        assert usage.http_calls == 1
+
+    @pytest.mark.asyncio
+    async def test_allowlist_enforced_by_parent(self, pool, upstream):
+        requests, transport = upstream
+        code = (
+            "async def main():\n"
+            "    try:\n"
+            "        await http.get('https://other.example.com/')\n"
+            "    except Exception as e:\n"
+            "        return str(e)\n"
+        )
+
+        async with httpx.AsyncClient(transport=transport) as client:
+            http_client = PythonExecutor.create_tool_http_client(
+                client, ResourceUsage(), allowed_hosts={"api.example.com"}
+            )
+            result = await pool.execute(_job(code), http_client=http_client)
+
+        assert "is not approved for this server" in result["result"]
+        assert requests == []
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests(self, pool, upstream):
+        _, transport = upstream
+        code = (
+            "import asyncio\n"
+            "async def main():\n"
+            "    paths = ['/a', '/b', '/c']\n"
+            "    responses = await asyncio.gather(\n"
+            "        *(http.get('https://api.example.com' + p) for p in paths)\n"
+            "    )\n"
+            "    return [r.json()['path'] for r in responses]\n"
+        )
+
+        async with httpx.AsyncClient(transport=transport) as client:
+            http_client = PythonExecutor.create_tool_http_client(
+                client, ResourceUsage()
+            )
+            result = await pool.execute(
+                _job(code, allowed_modules=["asyncio"]), http_client=http_client
+            )
+
+        assert result["result"] == ["/a", "/b", "/c"]
+
+    @pytest.mark.asyncio
+    async def test_without_http_client(self, pool):
+        code = "async def main():\n    await http.get('https://api.example.com/')\n"
+
+        result = await pool.execute(_job(code))
+
+        assert result["success"] is False
+        assert "not available" in result["error"]
+
+    @pytest.mark.asyncio
+    async def test_arguments_must_be_plain_data(self, pool, upstream):
+        """Arguments that only load by importing something are refused."""
+        requests, transport = upstream
+        code = (
+            "import datetime\n"
+            "async def main():\n"
+            "    try:\n"
+            "        await http.get(\n"
+            "            'https://api.example.com/',\n"
+            "            params={'day': datetime.date(2024, 1, 1)},\n"
+            "        )\n"
+            "    except TypeError as e:\n"
+            "        return str(e)\n"
+        )
+
+        async with httpx.AsyncClient(transport=transport) as client:
+            http_client = PythonExecutor.create_tool_http_client(
+                client, ResourceUsage()
+            )
+            result = await pool.execute(
+                _job(code, allowed_modules=["datetime"]), http_client=http_client
+            )
+
+        assert result["result"] == "Request arguments must be plain data"
+        assert requests == []
+
+
+class _Exploit:
+    """Pickles to a call that creates *path* when loaded."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return (open, (str(self.path), "w"))
+
+
+class TestWorkerMessages:
+    """Tests for the parent not trusting what workers send."""
+
+    @pytest.mark.asyncio
+    async def test_pipe_not_reachable(self, pool):
+        code = (
+            "async def main():\n"
+            "    try:\n"
+            "        return str(http._ForwardedHttpClient__conn)\n"
+            "    except AttributeError:\n"
+            "        return 'hidden'\n"
+        )
+
+        result = await pool.execute(_job(code))
+
+        assert result["result"] == "hidden"
+
+    def test_pickled_calls_not_run(self, tmp_path):
+        path = tmp_path / "pwned"
+        result = {"success": True, "result": _Exploit(path)}
+        request = ("http", 1, "GET", "https://x/", pickle.dumps(_Exploit(path)))
+
+        assert _decode_message(pickle.dumps(result)) is None
+        assert _decode_message(pickle.dumps(request)) is not None
+        assert not path.exists()
+
+    def test_unexpected_shapes(self):
+        assert _decode_message(b"not a pickle") is None
+        assert _decode_message(pickle.dumps([1, 2])) is None
+        assert _decode_message(pickle.dumps({"success": "yes"})) is None
+        assert _decode_message(pickle.dumps({"success": True, "debug_info": 1})) is None
+        assert _decode_message(pickle.dumps(("http", "1", "GET", "u", b""))) is None
+        assert _decode_message(pickle.dumps({"success": True})) == {"success": True}
+
+    @pytest.mark.asyncio
+    async def test_invalid_message_replaces_worker(self, pool, monkeypatch):
+        monkeypatch.setattr("app.process_pool._decode_message", lambda data: None)
+        pid = pool.stats()["workers"][0]["pid"]
+
+        result = await pool.execute(_job("async def main():\n    return 1\n"))
+
+        assert result["success"] is False
+        assert "invalid message" in result["error"]
+        assert pool.killed == 1
+        assert pool.stats()["workers"][0]["pid"] != pid
+
+
+class TestRegistryDispatch:
+    """Tests for registry dispatch to the process pool."""
+
+    @pytest.mark.asyncio
+    async def test_registry_uses_pool_when_enabled(self, tool_registry, monkeypatch):
+        import app.registry as registry_module
+
+        pool = ProcessPool(size=1, max_executions=0, memory_bytes=0)
+        await pool.start()
+        monkeypatch.setattr(registry_module, "process_pool", pool)
+        try:
+            tool_registry.register_server(
+                server_id="pool-srv",
+                server_name="PoolSrv",
+                tools=[{"name": "t", "python_code": "async def main(): return 7"}],
+            )
+
+            result = await tool_registry.execute_tool("PoolSrv__t", {})
+
+            assert result["success"] is True
+            assert result["result"] == 7
+            assert pool.stats()["executions"] == 1
+        finally:
+            await pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_http_uses_server_client(self, tool_registry, monkeypatch):
+        """Requests go through the server's pooled client and are accounted."""
+        import app.registry as registry_module
+        from app.http_pool import ServerHttpPool
+
+        monkeypatch.setattr("app.ssrf._PROXY_MODE", True)
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, text="up"))
+        monkeypatch.setattr(
+            ServerHttpPool,
+            "_build_client",
+            lambda self: httpx.AsyncClient(transport=transport),
+        )
+        pool = ProcessPool(size=1, max_executions=0, memory_bytes=0)
+        await pool.start()
+        monkeypatch.setattr(registry_module, "process_pool", pool)
+        code = (
+            "async def main():\n"
+            "    return (await http.get('https://api.example.com/')).text\n"
+        )
+        try:
+            tool_registry.register_server(
+                server_id="pool-http",
+                server_name="PoolHttp",
+                tools=[{"name": "t", "python_code": code}],
+            )
+
+            result = await tool_registry.execute_tool(
+                "PoolHttp__t", {}, debug_mode=True
+            )
+
+            assert result["result"] == "up"
+            assert result["resource_usage"]["http_calls"] == 1
+            assert len(result["debug_info"]["http_calls"]) == 1
+            server = tool_registry.servers["pool-http"]
+            assert server.http_pool.stats()["calls"] == 1
+        finally:
+            tool_registry.unregister_server("pool-http")
+            await pool.shutdown()
@@ -0,0 +1,227 @@
+"""Tests for the sampling profiler."""
+
+import asyncio
+
+import httpx
+
+from app.executor import PythonExecutor
+from app.profiler import SamplingProfiler
+
+# Public IP literal: passes SSRF validation without a DNS lookup
+PUBLIC_URL = "http://93.184.216.34/slow"
+
+BUSY_CODE = """
+def crunch(n):
+    total = 0
+    for i in range(n):
+        total += i * i
+    return total
+
+async def main():
+    return crunch(3000000)
+"""
+
+
+def _slow_transport(delay: float) -> httpx.MockTransport:
+    async def handler(request):
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={"ok": True})
+
+    return httpx.MockTransport(handler)
+
+
+async def _execute(code: str, client: httpx.AsyncClient, **kwargs):
+    return await PythonExecutor().execute(
+        python_code=code, arguments={}, http_client=client, profile=True, **kwargs
+    )
+
+
+class TestExecutionProfile:
+    """Tests for profiles attached by PythonExecutor.execute()."""
+
+    async def test_not_profiled_by_default(self):
+        """Without profile=True no profile is collected."""
+        async with httpx.AsyncClient() as client:
+            result = await PythonExecutor().execute(
+                python_code=BUSY_CODE, arguments={}, http_client=client
+            )
+
+        assert "profile" not in result.to_dict()
+
+    async def test_hot_function_and_line(self):
+        """CPU-bound code is attributed to the function and line doing the work."""
+        async with httpx.AsyncClient() as client:
+            result = await _execute(BUSY_CODE, client)
+
+        profile = result.to_dict()["profile"]
+        assert result.success is True
+        assert profile["samples"] > 0
+        assert profile["functions"][0]["function"] in ("main", "crunch")
+        crunch = next(f for f in profile["functions"] if f["function"] == "crunch")
+        assert crunch["first_line"] == 2
+        assert crunch["self_ms"] > 0
+        hot_lines = {entry["line"] for entry in profile["lines"][:3]}
+        assert hot_lines & {4, 5}
+        assert profile["collapsed"][0].startswith("main:9;crunch:")
+
+    async def test_waiting_attributed_to_awaiting_line(self):
+        """Time suspended at an await is counted under that line."""
+        code = (
+            "async def fetch():\n"
+            f"    return await http.get('{PUBLIC_URL}')\n"
+            "\n"
+            "async def main():\n"
+            "    response = await fetch()\n"
+            "    return response.status_code\n"
+        )
+
+        async with httpx.AsyncClient(transport=_slow_transport(0.2)) as client:
+            result = await _execute(code, client)
+
+        profile = result.profile.to_dict()
+        assert result.success is True, result.error
+        assert profile["waiting_ms"] > 100
+        assert any(
+            line.startswith("main:5;fetch:2;<await> ") for line in profile["collapsed"]
+        )
+
+    async def test_module_init_profiled(self):
+        """Work done at import time shows up under <module>."""
+        code = (
+            "total = 0\n"
+            "for i in range(3000000):\n"
+            "    total += i\n"
+            "async def main():\n"
+            "    return total\n"
+        )
+
+        async with httpx.AsyncClient() as client:
+            result = await _execute(code, client)
+
+        functions = {f["function"] for f in result.profile.to_dict()["functions"]}
+        assert "<module>" in functions
+
+    async def test_timed_out_execution_keeps_profile(self):
+        """A tool that times out still reports where it was stuck."""
+        code = (
+            "async def main():\n"
+            f"    return await http.get('{PUBLIC_URL}')\n"
+        )
+
+        async with httpx.AsyncClient(transport=_slow_transport(5)) as client:
+            result = await _execute(code, client, timeout=0.2)
+
+        assert result.success is False
+        profile = result.to_dict()["profile"]
+        assert profile["collapsed"][0].startswith("main:2;<await> ")
+
+    async def test_concurrent_execution_not_sampled(self):
+        """Another tool running on the same loop never shows up in a profile."""
+        other = (
+            "def other_work():\n"
+            "    total = 0\n"
+            "    for i in range(3000000):\n"
+            "        total += i\n"
+            "    return total\n"
+            "\n"
+            "async def main():\n"
+            "    return other_work()\n"
+        )
+        profiled = (
+            "async def main():\n"
+            f"    return (await http.get('{PUBLIC_URL}')).status_code\n"
+        )
+
+        async with httpx.AsyncClient(transport=_slow_transport(0.3)) as client:
+            executor = PythonExecutor()
+            result, _ = await asyncio.gather(
+                executor.execute(
+                    python_code=profiled,
+                    arguments={},
+                    http_client=client,
+                    profile=True,
+                    isolated=False,
+                ),
+                executor.execute(
+                    python_code=other,
+                    arguments={},
+                    http_client=client,
+                    isolated=False,
+                ),
+            )
+
+        profile = result.profile.to_dict()
+        assert profile["samples"] > 0
+        assert all(f["function"] == "main" for f in profile["functions"])
+
+
+class TestSamplingProfiler:
+    """Tests for the shared sampler thread."""
+
+    async def test_thread_stops_when_idle(self):
+        """The sampler thread exits once no execution is profiled."""
+        profiler = SamplingProfiler(interval_ms=1)
+
+        profile = profiler.start()
+        assert profiler.stats()["running"] is True
+        profiler.stop(profile)
+        for _ in range(100):
+            if not profiler.stats()["running"]:
+                break
+            await asyncio.sleep(0.01)
+
+        stats = profiler.stats()
+        assert stats["running"] is False
+        assert stats["active"] == 0
+        assert stats["profiles_started"] == 1
+
+
+class TestProfileEndpoints:
+    """Tests for the profile option on the HTTP API."""
+
+    def test_execute_returns_profile(self, authenticated_client):
+        """/execute returns a profile and resource usage when asked."""
+        response = authenticated_client.post(
+            "/execute",
+            json={"code": BUSY_CODE, "arguments": {}, "profile": True},
+        )
+
+        data = response.json()
+        assert data["success"] is True
+        assert data["profile"]["samples"] > 0
+        assert any(f["function"] == "crunch" for f in data["profile"]["functions"])
+        assert data["resource_usage"]["cpu_user_ms"] > 0
+
+    def test_execute_without_profile(self, authenticated_client):
+        """Profiles are opt-in on /execute."""
+        response = authenticated_client.post(
+            "/execute", json={"code": "async def main():\n    return 1\n"}
+        )
+
+        assert response.json()["profile"] is None
+
+    def test_tool_call_returns_profile(self, authenticated_client):
+        """/tools/{name}/call returns a profile when asked."""
+        authenticated_client.post(
+            "/servers/register",
+            json={
+                "server_id": "prof-srv",
+                "server_name": "ProfSrv",
+                "tools": [
+                    {
+                        "name": "busy",
+                        "description": "Busy work",
+                        "parameters": {},
+                        "python_code": BUSY_CODE,
+                    }
+                ],
+            },
+        )
+
+        response = authenticated_client.post(
+            "/tools/ProfSrv__busy/call", json={"arguments": {}, "profile": True}
+        )
+
+        profile = response.json()["profile"]
+        assert profile["interval_ms"] > 0
+        assert any(f["function"] == "crunch" for f in profile["functions"])
@@ -1,9 +1,13 @@
 """Unit tests for the tool registry."""
 
+import asyncio
+import os
+import random
 import stat
 from unittest.mock import patch
 
 from app.registry import Tool, _filter_private_hosts, ensure_private_hosts_in_squid_acl
+from benchmarks.bench_tool_lookup import legacy_get_server_for_tool, legacy_get_tool
 
 
 class TestToolRegistry:
@@ -322,6 +326,79 @@ class TestToolFullName:
         assert tool.full_name == "MyServer__my_tool"
 
 
+class TestToolIndex:
+    """Tests for the full-name tool index behind get_tool()."""
+
+    def test_reregistration_replaces_tools(self, tool_registry):
+        """Tools dropped by a re-registration can no longer be looked up."""
+        tool_registry.register_server("s1", "Srv", [{"name": "a"}, {"name": "b"}])
+        tool_registry.register_server("s1", "Srv", [{"name": "b"}])
+
+        assert tool_registry.get_tool("Srv__a") is None
+        assert tool_registry.get_tool("Srv__b") is (
+            tool_registry.servers["s1"].tools["b"]
+        )
+
+    def test_renamed_server(self, tool_registry):
+        """Re-registering under a new name moves the tools to the new prefix."""
+        tool_registry.register_server("s1", "Old", [{"name": "a"}])
+        tool_registry.register_server("s1", "New", [{"name": "a"}])
+
+        assert tool_registry.get_tool("Old__a") is None
+        assert tool_registry.get_server_for_tool("New__a") is (
+            tool_registry.servers["s1"]
+        )
+
+    def test_name_collision_passes_to_next_owner(self, tool_registry):
+        """A shared full name stays resolvable when its owner leaves."""
+        tool_registry.register_server("s1", "Srv", [{"name": "a"}])
+        tool_registry.register_server("s2", "Srv", [{"name": "a"}])
+        assert tool_registry.get_server_for_tool("Srv__a").server_id == "s1"
+
+        tool_registry.unregister_server("s1")
+
+        assert tool_registry.get_server_for_tool("Srv__a").server_id == "s2"
+
+    def test_secret_update_keeps_index(self, tool_registry):
+        """Secret updates are seen through the index."""
+        tool_registry.register_server("s1", "Srv", [{"name": "a"}])
+
+        tool_registry.update_secrets("s1", {"KEY": "value"})
+
+        assert tool_registry.get_server_for_tool("Srv__a").secrets == {"KEY": "value"}
+
+    async def test_clear_all(self, tool_registry):
+        """clear_all() empties the index."""
+        tool_registry.register_server("s1", "Srv", [{"name": "a"}])
+
+        await tool_registry.clear_all()
+
+        assert tool_registry.get_tool("Srv__a") is None
+
+    def test_parity_with_scan(self, tool_registry):
+        """Random (re-/un)registrations resolve like the previous full scan."""
+        rng = random.Random(7)
+        names = ["Srv", "Srv__x", "Other"]
+        tools = ["a", "b", "x__a"]
+        for _ in range(200):
+            server_id = f"s{rng.randrange(5)}"
+            if rng.random() < 0.3:
+                tool_registry.unregister_server(server_id)
+            else:
+                tool_registry.register_server(
+                    server_id,
+                    rng.choice(names),
+                    [{"name": t} for t in tools if rng.random() < 0.6],
+                )
+            for full_name in [f"{n}__{t}" for n in names for t in tools]:
+                assert tool_registry.get_tool(full_name) is legacy_get_tool(
+                    tool_registry, full_name
+                )
+                assert tool_registry.get_server_for_tool(
+                    full_name
+                ) is legacy_get_server_for_tool(tool_registry, full_name)
+
+
 class TestSquidACLFileUpdates:
     """Tests for _update_squid_approved_hosts writing the ACL file."""
 
@@ -467,6 +544,96 @@ class TestSquidACLFileUpdates:
         assert "Failed to write squid ACL file" not in caplog.text
 
 
+class TestSquidACLCoalescing:
+    """Tests for coalesced, atomic rebuilds of the ACL file on an event loop."""
+
+    async def test_burst_written_once(self, tool_registry, sample_tool_def, tmp_path):
+        """Registrations in quick succession are written together."""
+        acl_file = tmp_path / "approved-private.txt"
+        with patch("app.registry._SQUID_ACL_PATH", acl_file):
+            for i in range(20):
+                tool_registry.register_server(
+                    server_id=f"s{i}",
+                    server_name=f"S{i}",
+                    tools=[sample_tool_def],
+                    allowed_hosts=[f"10.0.0.{i}"],
+                )
+            assert not acl_file.exists()
+
+            await tool_registry._squid_acl.wait()
+
+        stats = tool_registry.squid_acl_stats()
+        assert acl_file.read_text().count("\n") == 20
+        assert stats["requests"] == 20
+        assert stats["written"] == 1
+        assert stats["coalesced"] == 19
+
+    async def test_unchanged_content_not_written(
+        self, tool_registry, sample_tool_def, tmp_path
+    ):
+        """Changes that keep the same private hosts don't rewrite the file."""
+        acl_file = tmp_path / "approved-private.txt"
+        with patch("app.registry._SQUID_ACL_PATH", acl_file):
+            tool_registry.register_server(
+                "s1", "S1", [sample_tool_def], allowed_hosts=["10.0.0.1"]
+            )
+            await tool_registry._squid_acl.wait()
+            mtime = acl_file.stat().st_mtime_ns
+
+            # Only public hosts: the private host list stays the same
+            tool_registry.register_server(
+                "s2", "S2", [sample_tool_def], allowed_hosts=["api.example.com"]
+            )
+            await tool_registry._squid_acl.wait()
+
+        assert tool_registry.squid_acl_stats()["unchanged"] == 1
+        assert acl_file.stat().st_mtime_ns == mtime
+
+    async def test_change_while_writing(self, tool_registry, sample_tool_def, tmp_path):
+        """A change made while the file is written gets its own write."""
+        acl_file = tmp_path / "approved-private.txt"
+        tool_registry._squid_acl.delay = 0
+        with patch("app.registry._SQUID_ACL_PATH", acl_file):
+            tool_registry.register_server(
+                "s1", "S1", [sample_tool_def], allowed_hosts=["10.0.0.1"]
+            )
+            await asyncio.sleep(0)
+            tool_registry.register_server(
+                "s2", "S2", [sample_tool_def], allowed_hosts=["10.0.0.2"]
+            )
+            await tool_registry._squid_acl.wait()
+
+        assert acl_file.read_text() == "10.0.0.1\n10.0.0.2\n"
+
+    async def test_written_atomically(self, tool_registry, sample_tool_def, tmp_path):
+        """The file is replaced by rename; no temporary file is left behind."""
+        acl_file = tmp_path / "approved-private.txt"
+        with patch("app.registry._SQUID_ACL_PATH", acl_file):
+            tool_registry.register_server(
+                "s1", "S1", [sample_tool_def], allowed_hosts=["10.0.0.1"]
+            )
+            await tool_registry._squid_acl.wait()
+
+        assert os.listdir(tmp_path) == ["approved-private.txt"]
+
+    async def test_call_waits_for_pending_write(self, tool_registry, tmp_path):
+        """A tool with approved hosts runs after its hosts reach the file."""
+        acl_file = tmp_path / "approved-private.txt"
+        code = "async def main():\n    return 1\n"
+        with patch("app.registry._SQUID_ACL_PATH", acl_file):
+            tool_registry.register_server(
+                "s1",
+                "S1",
+                [{"name": "t", "python_code": code}],
+                allowed_hosts=["10.0.0.1"],
+            )
+
+            result = await tool_registry.execute_tool("S1__t", {})
+
+            assert result["success"]
+            assert acl_file.read_text() == "10.0.0.1\n"
+
+
 class TestEnsurePrivateHostsInSquidACL:
     """Tests for ensure_private_hosts_in_squid_acl (used by /execute)."""
 
@@ -0,0 +1,266 @@
+"""Tests for versioned delta updates of registered servers."""
+
+import pytest
+
+from app.registry import StaleVersionError, ToolRegistry
+from app.result_cache import result_cache
+
+CODE = "async def main():\n    return {code!r}\n"
+
+
+def _tool(name, result="ok", **extra):
+    return {"name": name, "python_code": CODE.format(code=result), **extra}
+
+
+@pytest.fixture
+def registry():
+    registry = ToolRegistry()
+    registry.register_server(
+        "s1",
+        "S1",
+        [_tool("a"), _tool("b", warm=True)],
+        secrets={"TOKEN": "old-token"},
+        external_sources=[{"source_id": "src", "url": "https://mcp.example.com/"}],
+        version=10,
+    )
+    yield registry
+    result_cache.clear()
+
+
+def _cache_result(server_id, tool_name, code_hash):
+    key = result_cache.key(server_id, tool_name, code_hash, {})
+    result_cache.put(key, {"success": True, "result": "cached"}, ttl=60)
+    return key
+
+
+class TestToolDeltas:
+    """Tests for adding, replacing and removing single tools."""
+
+    def test_add_tool(self, registry):
+        """An added tool is indexed and executable next to the existing ones."""
+        assert registry.update_server("s1", 11, tools=[_tool("c")])
+
+        assert registry.get_tool("S1__c").name == "c"
+        assert set(registry.servers["s1"].tools) == {"a", "b", "c"}
+
+    async def test_replace_tool(self, registry):
+        """A replaced tool runs its new code; other tools are the same objects."""
+        untouched = registry.servers["s1"].tools["b"]
+
+        registry.update_server("s1", 11, tools=[_tool("a", result="new")])
+
+        result = await registry.execute_tool("S1__a", {})
+        assert result["result"] == "new"
+        assert registry.servers["s1"].tools["b"] is untouched
+        assert registry.get_tool("S1__a") is registry.servers["s1"].tools["a"]
+
+    def test_remove_tool(self, registry):
+        """A removed tool is gone from the server and the index."""
+        registry.update_server("s1", 11, remove_tools=["a"])
+
+        assert registry.get_tool("S1__a") is None
+        assert list(registry.servers["s1"].tools) == ["b"]
+
+    def test_rename_tool(self, registry):
+        """Removing and adding in one update renames a tool."""
+        registry.update_server("s1", 11, tools=[_tool("a2")], remove_tools=["a"])
+
+        assert registry.get_tool("S1__a") is None
+        assert registry.get_tool("S1__a2") is not None
+
+    def test_only_changed_tool_results_dropped(self, registry):
+        """Cached results of the tools an update doesn't touch are kept."""
+        tools = registry.servers["s1"].tools
+        key_a = _cache_result("s1", "a", tools["a"].code_hash)
+        key_b = _cache_result("s1", "b", tools["b"].code_hash)
+
+        registry.update_server("s1", 11, tools=[_tool("a", result="new")])
+
+        assert result_cache.get(key_a) is None
+        assert result_cache.get(key_b) is not None
+
+    def test_warm_state_kept(self, registry):
+        """Warm templates of untouched tools survive a tool update."""
+        slot = registry.servers["s1"].tools["b"].warm_slot
+        slot.template = object()
+
+        registry.update_server("s1", 11, tools=[_tool("c")])
+
+        assert registry.servers["s1"].tools["b"].warm_slot.template is not None
+
+    def test_removed_name_passes_to_other_server(self, registry):
+        """When the owning server drops a name another server exposes, it moves."""
+        registry.register_server("s2", "S1", [_tool("a")])
+
+        registry.update_server("s1", 11, remove_tools=["a"])
+
+        assert registry.get_server_for_tool("S1__a").server_id == "s2"
+
+
+class TestSecretAndSourceDeltas:
+    """Tests for secret and external source deltas."""
+
+    def test_set_and_remove_secrets(self, registry):
+        """Secrets are merged into the existing ones."""
+        registry.update_server(
+            "s1", 11, secrets={"NEW": "new-value"}, remove_secrets=["TOKEN"]
+        )
+
+        assert registry.servers["s1"].secrets == {"NEW": "new-value"}
+        assert registry.servers["s1"].redactor.redact_text("new-value") != "new-value"
+
+    def test_secret_change_resets_all_tools(self, registry):
+        """Every tool can read secrets, so a secret change drops all results."""
+        tools = registry.servers["s1"].tools
+        key = _cache_result("s1", "b", tools["b"].code_hash)
+
+        registry.update_server("s1", 11, secrets={"TOKEN": "new-token"})
+
+        assert result_cache.get(key) is None
+
+    def test_source_change_drops_its_passthrough_results(self, registry):
+        """Results of passthrough tools of a changed source are dropped."""
+        registry.update_server(
+            "s1",
+            11,
+            tools=[
+                {
+                    "name": "p",
+                    "tool_type": "mcp_passthrough",
+                    "external_source_id": "src",
+                }
+            ],
+        )
+        key = _cache_result("s1", "p", None)
+
+        registry.update_server(
+            "s1",
+            12,
+            external_sources=[{"source_id": "src", "url": "https://new.example.com/"}],
+        )
+
+        assert result_cache.get(key) is None
+        source = registry.servers["s1"].external_sources["src"]
+        assert source.url == "https://new.example.com/"
+
+    def test_remove_source(self, registry):
+        registry.update_server("s1", 11, remove_external_sources=["src"])
+
+        assert registry.servers["s1"].external_sources == {}
+
+
+class TestVersions:
+    """Tests for rejecting out-of-order updates."""
+
+    def test_stale_update_rejected(self, registry):
+        """An update older than the last applied one changes nothing."""
+        registry.update_server("s1", 12, tools=[_tool("c")])
+
+        with pytest.raises(StaleVersionError) as exc_info:
+            registry.update_server("s1", 11, remove_tools=["c"])
+
+        assert exc_info.value.current == 12
+        assert registry.get_tool("S1__c") is not None
+
+    def test_same_version_update_rejected(self, registry):
+        """An update is applied at most once."""
+        with pytest.raises(StaleVersionError):
+            registry.update_server("s1", 10, tools=[_tool("c")])
+
+    def test_failed_update_changes_nothing(self, registry):
+        """A delta that fails partway can be retried at the same version."""
+        with pytest.raises(KeyError):
+            registry.update_server(
+                "s1", 11, tools=[_tool("c"), {"python_code": CODE}], remove_tools=["a"]
+            )
+
+        server = registry.servers["s1"]
+        assert server.version == 10
+        assert set(server.tools) == {"a", "b"}
+        assert registry.update_server("s1", 11, tools=[_tool("c")])
+
+    def test_stale_registration_rejected(self, registry):
+        """A full registration older than the server's version is rejected."""
+        registry.update_server("s1", 12, tools=[_tool("c")])
+
+        with pytest.raises(StaleVersionError):
+            registry.register_server("s1", "S1", [], version=11)
+
+        assert registry.get_tool("S1__c") is not None
+
+    def test_retried_registration_applies(self, registry):
+        registry.register_server("s1", "S1", [_tool("z")], version=10)
+
+        assert list(registry.servers["s1"].tools) == ["z"]
+
+    def test_unversioned_server_accepts_updates(self):
+        registry = ToolRegistry()
+        registry.register_server("s1", "S1", [])
+
+        assert registry.update_server("s1", 1, tools=[_tool("a")])
+        assert registry.servers["s1"].version == 1
+
+    def test_unknown_server(self, registry):
+        assert registry.update_server("missing", 1, tools=[_tool("a")]) is False
+
+
+class TestUpdateEndpoint:
+    """Tests for PATCH /servers/{server_id}."""
+
+    def _register(self, client):
+        # The app's registry outlives tests: start from a fresh registration
+        client.post("/servers/delta-server/unregister")
+        response = client.post(
+            "/servers/register",
+            json={
+                "server_id": "delta-server",
+                "server_name": "delta",
+                "tools": [_tool("a"), _tool("b")],
+                "version": 5,
+            },
+        )
+        assert response.status_code == 200
+
+    def test_update(self, authenticated_client):
+        self._register(authenticated_client)
+
+        response = authenticated_client.patch(
+            "/servers/delta-server",
+            json={"version": 6, "tools": [_tool("c")], "remove_tools": ["a"]},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["tools_registered"] == 2
+        assert response.json()["version"] == 6
+
+    def test_stale_update_conflict(self, authenticated_client):
+        self._register(authenticated_client)
+
+        response = authenticated_client.patch(
+            "/servers/delta-server", json={"version": 4, "remove_tools": ["a"]}
+        )
+
+        assert response.status_code == 409
+        assert "stale" in response.json()["detail"]
+
+    def test_stale_registration_conflict(self, authenticated_client):
+        self._register(authenticated_client)
+
+        response = authenticated_client.post(
+            "/servers/register",
+            json={
+                "server_id": "delta-server",
+                "server_name": "delta",
+                "tools": [],
+                "version": 4,
+            },
+        )
+
+        assert response.status_code == 409
+
+    def test_unknown_server(self, authenticated_client):
+        response = authenticated_client.patch(
+            "/servers/not-registered", json={"version": 1}
+        )
+
+        assert response.status_code == 404
@@ -0,0 +1,256 @@
+"""Tests for encrypted registry snapshots."""
+
+import asyncio
+import os
+
+import pytest
+
+from app.executor import compiled_code_cache
+from app.registry import ToolRegistry
+from app.registry_snapshot import RegistrySnapshot
+
+CODE = "async def main():\n    return {code!r}\n"
+KEY = bytes(range(32))
+
+
+def _tool(name, result="ok", **extra):
+    return {"name": name, "python_code": CODE.format(code=result), **extra}
+
+
+def _register(registry):
+    registry.register_server(
+        "s1",
+        "S1",
+        [_tool("a", cacheable=True, cache_ttl_seconds=30), _tool("b", warm=True)],
+        allowed_modules=["json"],
+        secrets={"TOKEN": "secret-token-value"},
+        external_sources=[
+            {
+                "source_id": "src",
+                "url": "https://mcp.example.com/",
+                "auth_headers": {"Authorization": "Bearer x"},
+            }
+        ],
+        allowed_hosts=["api.example.com"],
+        max_concurrency=3,
+        outbound_limits={"rate_per_host": 5},
+        version=42,
+    )
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "registry.snapshot"
+
+
+@pytest.fixture
+def registry():
+    registry = ToolRegistry()
+    # Registration rewrites the squid ACL file; not what is tested here
+    registry._update_squid_approved_hosts = lambda: None
+    return registry
+
+
+def _restored(path, key=KEY, **kwargs):
+    registry = ToolRegistry()
+    registry._update_squid_approved_hosts = lambda: None
+    snapshot = RegistrySnapshot(registry, path, key, **kwargs)
+    return registry, snapshot.restore()
+
+
+class TestSaveAndRestore:
+    """Tests for writing a snapshot and registering it again."""
+
+    async def test_round_trip(self, registry, path):
+        """A restored registry has the same servers, tools and settings."""
+        _register(registry)
+        assert await RegistrySnapshot(registry, path, KEY).save()
+
+        restored, count = _restored(path)
+
+        assert count == 1
+        server = restored.servers["s1"]
+        assert server.version == 42
+        assert server.secrets == {"TOKEN": "secret-token-value"}
+        assert server.allowed_modules == ["json"]
+        assert server.allowed_hosts == {"api.example.com"}
+        assert server.max_concurrency == 3
+        assert server.outbound_limiter.limits.rate_per_host == 5
+        assert server.external_sources["src"].auth_headers == {
+            "Authorization": "Bearer x"
+        }
+        assert server.tools["a"].cacheable and server.tools["a"].cache_ttl_seconds == 30
+        assert server.tools["b"].warm
+        result = await restored.execute_tool("S1__a", {})
+        assert result["result"] == "ok"
+
+    async def test_encrypted(self, registry, path):
+        """Secrets are not readable from the file."""
+        _register(registry)
+        await RegistrySnapshot(registry, path, KEY).save()
+
+        assert b"secret-token-value" not in path.read_bytes()
+        assert oct(path.stat().st_mode & 0o777) == "0o600"
+
+    async def test_wrong_key(self, registry, path):
+        """A snapshot that can't be decrypted is ignored."""
+        _register(registry)
+        await RegistrySnapshot(registry, path, KEY).save()
+
+        restored, count = _restored(path, key=bytes(32))
+
+        assert count == 0
+        assert restored.servers == {}
+
+    async def test_tampered(self, registry, path):
+        _register(registry)
+        await RegistrySnapshot(registry, path, KEY).save()
+        blob = bytearray(path.read_bytes())
+        blob[-1] ^= 1
+        path.write_bytes(bytes(blob))
+
+        assert _restored(path)[1] == 0
+
+    def test_missing_file(self, path):
+        assert _restored(path)[1] == 0
+
+    async def test_replaced_atomically(self, registry, path):
+        """No temporary file is left next to the snapshot."""
+        _register(registry)
+        snapshot = RegistrySnapshot(registry, path, KEY)
+        await snapshot.save()
+        registry.unregister_server("s1")
+        await snapshot.save()
+
+        assert os.listdir(path.parent) == [path.name]
+        assert _restored(path)[1] == 0
+
+    async def test_disabled_without_key(self, registry, path):
+        snapshot = RegistrySnapshot(registry, path, None)
+
+        assert not snapshot.enabled
+        assert await snapshot.save() is False
+        assert not path.exists()
+
+
+class TestCodeCache:
+    """Tests for including compiled code in the snapshot."""
+
+    async def test_code_restored(self, registry, path):
+        """Restored tools find their code compiled."""
+        _register(registry)
+        await RegistrySnapshot(registry, path, KEY, include_code_cache=True).save()
+        compiled_code_cache.clear()
+        misses = compiled_code_cache.misses
+
+        registry, _ = _restored(path, include_code_cache=True)
+        await registry.execute_tool("S1__a", {})
+
+        assert compiled_code_cache.misses == misses
+
+    async def test_other_validator_not_trusted(self, registry, path, monkeypatch):
+        """Code compiled by another sandbox version is compiled again."""
+        _register(registry)
+        await RegistrySnapshot(registry, path, KEY, include_code_cache=True).save()
+        compiled_code_cache.clear()
+        monkeypatch.setattr(
+            "app.registry_snapshot._code_fingerprint", lambda: "other-version"
+        )
+
+        snapshot = RegistrySnapshot(ToolRegistry(), path, KEY, include_code_cache=True)
+        snapshot._registry._update_squid_approved_hosts = lambda: None
+        snapshot.restore()
+
+        assert snapshot.restored_code_entries == 0
+        assert snapshot.restored_servers == 1
+
+    async def test_left_out_by_default(self, registry, path):
+        _register(registry)
+        await RegistrySnapshot(registry, path, KEY).save()
+
+        snapshot = RegistrySnapshot(ToolRegistry(), path, KEY, include_code_cache=True)
+        snapshot._registry._update_squid_approved_hosts = lambda: None
+        snapshot.restore()
+
+        assert snapshot.restored_code_entries == 0
+
+
+class TestFollowingChanges:
+    """Tests for writing the snapshot after registry changes."""
+
+    async def test_change_written_after_delay(self, registry, path):
+        """Changes in quick succession are written once."""
+        snapshot = RegistrySnapshot(registry, path, KEY, delay=0.05)
+        snapshot.start()
+
+        _register(registry)
+        registry.update_server("s1", 43, tools=[_tool("c")])
+        await asyncio.sleep(0.2)
+
+        assert snapshot.saves == 1
+        restored, _ = _restored(path)
+        assert set(restored.servers["s1"].tools) == {"a", "b", "c"}
+        await snapshot.stop()
+
+    async def test_stop_writes_pending_change(self, registry, path):
+        snapshot = RegistrySnapshot(registry, path, KEY, delay=60)
+        snapshot.start()
+
+        _register(registry)
+        await snapshot.stop()
+
+        assert snapshot.saves == 1
+        assert registry.on_change is None
+        assert _restored(path)[1] == 1
+
+    async def test_start_restores(self, registry, path):
+        """Starting restores the snapshot without writing it again."""
+        _register(registry)
+        await RegistrySnapshot(registry, path, KEY).save()
+
+        other = ToolRegistry()
+        other._update_squid_approved_hosts = lambda: None
+        snapshot = RegistrySnapshot(other, path, KEY)
+
+        assert snapshot.start() == 1
+        await snapshot.stop()
+        assert snapshot.saves == 0
+
+    async def test_write_failure_counted(self, registry, tmp_path):
+        snapshot = RegistrySnapshot(registry, tmp_path / "missing" / "s", KEY)
+
+        assert await snapshot.save() is False
+        assert snapshot.save_failures == 1
+
+
+class TestServerList:
+    """Tests for the registration details GET /servers reports."""
+
+    def test_registration_details(self, authenticated_client):
+        authenticated_client.post("/servers/snapshot-server/unregister")
+        authenticated_client.post(
+            "/servers/register",
+            json={
+                "server_id": "snapshot-server",
+                "server_name": "snap",
+                "tools": [_tool("b"), _tool("a")],
+                "secrets": {"TOKEN": "secret-token-value"},
+                "allowed_hosts": ["api.example.com"],
+                "version": 7,
+            },
+        )
+
+        servers = authenticated_client.get("/servers").json()["servers"]
+        info = next(s for s in servers if s["server_id"] == "snapshot-server")
+
+        assert info["version"] == 7
+        assert info["tools"] == ["a", "b"]
+        assert info["secret_keys"] == ["TOKEN"]
+        assert info["allowed_hosts"] == ["api.example.com"]
+        assert "secret-token-value" not in str(servers)
+        authenticated_client.post("/servers/snapshot-server/unregister")
+
+    def test_stats(self, authenticated_client):
+        stats = authenticated_client.get("/execution-stats").json()
+
+        assert stats["registry_snapshot"]["enabled"] is False
@@ -0,0 +1,208 @@
+"""Tests for per-execution resource accounting."""
+
+import tracemalloc
+
+import httpx
+import pytest
+
+from app.executor import (
+    MeteredHttpClient,
+    PeakMemoryTracker,
+    PythonExecutor,
+    ResourceUsage,
+)
+
+# Public IP literal: passes SSRF validation without a DNS lookup
+PUBLIC_URL = "http://93.184.216.34/echo"
+
+
+def _echo_transport() -> httpx.MockTransport:
+    # Streamed like a real network response, so downloaded bytes are counted
+    return httpx.MockTransport(
+        lambda request: httpx.Response(
+            200, stream=httpx.ByteStream(b"x" * 100 + request.content)
+        )
+    )
+
+
+class TestExecutorUsage:
+    """Tests for the resource_usage attached by PythonExecutor.execute()."""
+
+    async def test_reports_cpu_time(self):
+        """CPU spent in main() is reported in milliseconds."""
+        code = (
+            "async def main():\n"
+            "    total = 0\n"
+            "    for i in range(300000):\n"
+            "        total += i\n"
+            "    return total\n"
+        )
+
+        async with httpx.AsyncClient() as client:
+            result = await PythonExecutor().execute(
+                python_code=code, arguments={}, http_client=client
+            )
+
+        usage = result.to_dict()["resource_usage"]
+        assert result.success is True
+        assert usage["cpu_user_ms"] + usage["cpu_sys_ms"] > 0
+        assert usage["http_calls"] == 0
+
+    async def test_counts_http_calls_and_bytes(self):
+        """Calls through the injected client are counted with their body sizes."""
+        code = (
+            "async def main():\n"
+            f"    await http.get('{PUBLIC_URL}')\n"
+            f"    response = await http.post('{PUBLIC_URL}', content=b'hello')\n"
+            "    return response.status_code\n"
+        )
+
+        async with httpx.AsyncClient(transport=_echo_transport()) as client:
+            result = await PythonExecutor().execute(
+                python_code=code, arguments={}, http_client=client
+            )
+
+        assert result.success is True, result.error
+        usage = result.resource_usage.to_dict()
+        assert usage["http_calls"] == 2
+        assert usage["http_bytes_sent"] == 5
+        assert usage["http_bytes_received"] == 205
+
+    async def test_reported_on_failure(self):
+        """Failed executions still report what they used."""
+        code = "async def main():\n    raise ValueError('boom')\n"
+
+        async with httpx.AsyncClient() as client:
+            result = await PythonExecutor().execute(
+                python_code=code, arguments={}, http_client=client
+            )
+
+        assert result.success is False
+        assert "resource_usage" in result.to_dict()
+
+    async def test_counts_through_debug_client(self):
+        """Debug mode still counts calls made through the debug wrapper."""
+        code = f"async def main():\n    await http.get('{PUBLIC_URL}')\n"
+
+        async with httpx.AsyncClient(transport=_echo_transport()) as client:
+            result = await PythonExecutor().execute(
+                python_code=code, arguments={}, http_client=client, debug_mode=True
+            )
+
+        assert result.resource_usage.http_calls == 1
+        assert len(result.debug_info.http_calls) == 1
+
+
+class TestMeteredHttpClient:
+    """Tests for MeteredHttpClient."""
+
+    async def test_streamed_request_body_not_counted(self):
+        """Request bodies of unknown size don't break the call."""
+
+        async def body():
+            yield b"chunk"
+
+        usage = ResourceUsage()
+        async with httpx.AsyncClient(transport=_echo_transport()) as client:
+            metered = MeteredHttpClient(client, usage)
+            response = await metered.post("http://example.test/", content=body())
+
+        assert response.status_code == 200
+        assert usage.http_calls == 1
+
+
+class TestPeakMemoryTracker:
+    """Tests for PeakMemoryTracker."""
+
+    def test_not_tracing_reports_none(self):
+        """Without tracemalloc there is no peak."""
+        tracker = PeakMemoryTracker()
+        was_tracing = tracemalloc.is_tracing()
+        tracemalloc.stop()
+        try:
+            assert tracker.stop(tracker.start()) is None
+        finally:
+            if was_tracing:
+                tracemalloc.start()
+
+    @pytest.fixture
+    def tracing(self):
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        yield
+        if not was_tracing:
+            tracemalloc.stop()
+
+    def test_peak_of_single_execution(self, tracing):
+        """A lone execution reports the peak above its starting level."""
+        tracker = PeakMemoryTracker()
+
+        token = tracker.start()
+        data = bytearray(2_000_000)
+        del data
+        peak = tracker.stop(token)
+
+        assert peak is not None
+        assert peak >= 2_000_000
+
+    def test_overlapping_executions_report_none(self, tracing):
+        """Executions that overlap can't be told apart and report no peak."""
+        tracker = PeakMemoryTracker()
+
+        first = tracker.start()
+        second = tracker.start()
+
+        assert tracker.stop(second) is None
+        assert tracker.stop(first) is None
+        assert tracker.stop(tracker.start()) is not None
+
+
+class TestResponses:
+    """Tests for resource usage in API responses."""
+
+    def _register(self, client):
+        client.post(
+            "/servers/register",
+            json={
+                "server_id": "usage-srv",
+                "server_name": "UsageSrv",
+                "tools": [
+                    {
+                        "name": "work",
+                        "description": "Does some work",
+                        "parameters": {},
+                        "python_code": "async def main():\n    return sum(range(1000))\n",
+                    }
+                ],
+            },
+        )
+
+    def test_tool_call_response(self, authenticated_client):
+        """/tools/{name}/call includes resource_usage."""
+        self._register(authenticated_client)
+
+        response = authenticated_client.post(
+            "/tools/UsageSrv__work/call", json={"arguments": {}}
+        )
+
+        usage = response.json()["resource_usage"]
+        assert usage["http_calls"] == 0
+        assert "cpu_user_ms" in usage
+
+    def test_mcp_meta(self, authenticated_client):
+        """/mcp tools/call carries resource_usage in _meta.execution."""
+        self._register(authenticated_client)
+
+        response = authenticated_client.post(
+            "/mcp",
+            json={
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "tools/call",
+                "params": {"name": "UsageSrv__work", "arguments": {}},
+            },
+        )
+
+        execution = response.json()["result"]["_meta"]["execution"]
+        assert execution["resource_usage"]["http_bytes_received"] == 0
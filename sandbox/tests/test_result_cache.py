@@ -0,0 +1,289 @@
+"""Tests for result memoization of cacheable tools."""
+
+import pytest
+
+from app import result_cache as result_cache_module
+from app.registry import ToolRegistry
+from app.result_cache import ResultCache, canonical_arguments
+
+ECHO_CODE = "async def main(value: int = 0):\n    return {'value': value}\n"
+
+
+def _ok(value, **extra):
+    return {"success": True, "result": value, "stdout": "", **extra}
+
+
+class TestCanonicalArguments:
+    """Tests for canonical_arguments()."""
+
+    def test_key_order_ignored(self):
+        """Argument order doesn't change the key."""
+        assert canonical_arguments({"a": 1, "b": [1, 2]}) == canonical_arguments(
+            {"b": [1, 2], "a": 1}
+        )
+
+    def test_types_kept_apart(self):
+        """Values that only look alike stay distinct."""
+        assert canonical_arguments({"a": 1}) != canonical_arguments({"a": "1"})
+        assert canonical_arguments({"a": 1}) != canonical_arguments({"a": 1.0})
+
+    def test_unserializable_returns_none(self):
+        """Arguments that aren't JSON can't be keyed."""
+        assert canonical_arguments({"a": object()}) is None
+        assert canonical_arguments({"a": float("nan")}) is None
+
+
+class TestResultCache:
+    """Tests for ResultCache."""
+
+    def test_hit_returns_copy_without_per_call_fields(self):
+        """Hits replay the result but not the original call's usage or timing."""
+        cache = ResultCache()
+        key = cache.key("srv", "tool", "hash", {"x": 1})
+
+        cache.put(key, _ok(1, duration_ms=50, resource_usage={"http_calls": 1}), 60)
+        cached = cache.get(key)
+        cached["result"] = "changed"
+
+        assert cache.get(key) == {"success": True, "result": 1, "stdout": ""}
+        assert cache.stats()["hits"] == 2
+
+    def test_failures_not_cached(self):
+        """Only successful results are stored."""
+        cache = ResultCache()
+        key = cache.key("srv", "tool", "hash", {})
+
+        assert cache.put(key, {"success": False, "error": "boom"}, 60) is False
+        assert cache.get(key) is None
+
+    def test_expired_entry_dropped(self, monkeypatch):
+        """Entries stop being served once their TTL has passed."""
+        now = [1000.0]
+        monkeypatch.setattr(result_cache_module.time, "monotonic", lambda: now[0])
+        cache = ResultCache()
+        key = cache.key("srv", "tool", "hash", {})
+        cache.put(key, _ok(1), 10)
+
+        now[0] += 9
+        assert cache.get(key) is not None
+        now[0] += 2
+        assert cache.get(key) is None
+        assert cache.stats()["expirations"] == 1
+        assert cache.size == 0
+
+    def test_entry_limit_evicts_least_recently_used(self):
+        """The least recently used entry goes first."""
+        cache = ResultCache(max_entries=2)
+        keys = [cache.key("srv", "tool", "hash", {"i": i}) for i in range(3)]
+        cache.put(keys[0], _ok(0), 60)
+        cache.put(keys[1], _ok(1), 60)
+        cache.get(keys[0])
+
+        cache.put(keys[2], _ok(2), 60)
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_byte_limit(self):
+        """Total cached bytes stay under max_bytes; oversized results are skipped."""
+        cache = ResultCache(max_bytes=4096)
+        big = cache.key("srv", "tool", "hash", {"big": True})
+
+        assert cache.put(big, _ok("x" * 10000), 60) is False
+        for i in range(10):
+            cache.put(
+                cache.key("srv", "tool", "hash", {"i": i}),
+                _ok(None, result_json=b"y" * 1000),
+                60,
+            )
+
+        stats = cache.stats()
+        assert stats["bytes"] <= 4096
+        assert stats["size"] == 3
+        assert cache.get(cache.key("srv", "tool", "hash", {"i": 9})) is not None
+
+    def test_invalidate_server(self):
+        """Invalidation only drops the given server's entries."""
+        cache = ResultCache()
+        cache.put(cache.key("a", "tool", "hash", {}), _ok(1), 60)
+        cache.put(cache.key("b", "tool", "hash", {}), _ok(2), 60)
+
+        assert cache.invalidate_server("a") == 1
+        assert cache.get(cache.key("a", "tool", "hash", {})) is None
+        assert cache.get(cache.key("b", "tool", "hash", {})) is not None
+
+
+class TestRegistryCaching:
+    """Tests for memoization in ToolRegistry."""
+
+    @pytest.fixture
+    def registry(self, monkeypatch):
+        monkeypatch.setattr(
+            "app.registry.result_cache", result_cache_module.ResultCache()
+        )
+        registry = ToolRegistry()
+        self._register(registry)
+        return registry
+
+    def _register(self, registry, code=ECHO_CODE, **tool):
+        registry.register_server(
+            server_id="srv",
+            server_name="Srv",
+            tools=[
+                {
+                    "name": "echo",
+                    "description": "",
+                    "parameters": {},
+                    "python_code": code,
+                    "cacheable": True,
+                    **tool,
+                }
+            ],
+        )
+
+    @pytest.fixture
+    def runs(self, registry, monkeypatch):
+        """Count executions that actually ran the tool."""
+        runs = []
+        run_tool = registry._execute_uncached_tool
+
+        async def counting(tool, arguments, *args):
+            runs.append(arguments)
+            return await run_tool(tool, arguments, *args)
+
+        monkeypatch.setattr(registry, "_execute_uncached_tool", counting)
+        return runs
+
+    async def test_repeated_call_served_from_cache(self, registry, runs):
+        """The second identical call doesn't run the tool."""
+        first = await registry.execute_tool("Srv__echo", {"value": 1})
+        second = await registry.execute_tool("Srv__echo", {"value": 1})
+
+        assert first["cache_hit"] is False
+        assert second["cache_hit"] is True
+        assert second["result"] == {"value": 1}
+        assert second["result_json"] == first["result_json"]
+        assert "resource_usage" not in second
+        assert len(runs) == 1
+
+    async def test_different_arguments_run(self, registry, runs):
+        """Each distinct argument set runs once."""
+        await registry.execute_tool("Srv__echo", {"value": 1})
+        result = await registry.execute_tool("Srv__echo", {"value": 2})
+
+        assert result["cache_hit"] is False
+        assert result["result"] == {"value": 2}
+        assert len(runs) == 2
+
+    async def test_reregistration_invalidates(self, registry, runs):
+        """Re-registering the server drops its cached results."""
+        await registry.execute_tool("Srv__echo", {"value": 1})
+        self._register(registry)
+
+        result = await registry.execute_tool("Srv__echo", {"value": 1})
+
+        assert result["cache_hit"] is False
+        assert len(runs) == 2
+
+    async def test_secret_update_invalidates(self, registry, runs):
+        """New secrets drop the server's cached results."""
+        await registry.execute_tool("Srv__echo", {"value": 1})
+        registry.update_secrets("srv", {"TOKEN": "new"})
+
+        await registry.execute_tool("Srv__echo", {"value": 1})
+
+        assert len(runs) == 2
+
+    async def test_debug_and_profile_bypass_cache(self, registry, runs):
+        """Debug and profiled calls always run and don't report cache_hit."""
+        await registry.execute_tool("Srv__echo", {"value": 1})
+
+        debug = await registry.execute_tool("Srv__echo", {"value": 1}, debug_mode=True)
+        profiled = await registry.execute_tool("Srv__echo", {"value": 1}, profile=True)
+
+        assert "cache_hit" not in debug
+        assert "cache_hit" not in profiled
+        assert len(runs) == 3
+
+    async def test_not_cacheable_by_default(self, registry, runs):
+        """Tools that don't opt in are never cached."""
+        self._register(registry, cacheable=False)
+
+        await registry.execute_tool("Srv__echo", {"value": 1})
+        result = await registry.execute_tool("Srv__echo", {"value": 1})
+
+        assert "cache_hit" not in result
+        assert len(runs) == 2
+
+
+class TestCacheResponses:
+    """Tests for cache hits in API responses."""
+
+    def _register(self, client):
+        response = client.post(
+            "/servers/register",
+            json={
+                "server_id": "cache-srv",
+                "server_name": "CacheSrv",
+                "tools": [
+                    {
+                        "name": "echo",
+                        "python_code": ECHO_CODE,
+                        "cacheable": True,
+                        "cache_ttl_seconds": 60,
+                    }
+                ],
+            },
+        )
+        assert response.status_code == 200
+
+    def test_tool_call_reports_cache_hit(self, authenticated_client):
+        """/tools/{name}/call reports whether the result was cached."""
+        self._register(authenticated_client)
+
+        responses = [
+            authenticated_client.post(
+                "/tools/CacheSrv__echo/call", json={"arguments": {"value": 3}}
+            ).json()
+            for _ in range(2)
+        ]
+
+        assert [r["cache_hit"] for r in responses] == [False, True]
+        assert responses[1]["result"] == {"value": 3}
+
+    def test_mcp_meta_reports_cache_hit(self, authenticated_client):
+        """/mcp tools/call carries cache_hit in _meta.execution."""
+        self._register(authenticated_client)
+        body = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "tools/call",
+            "params": {"name": "CacheSrv__echo", "arguments": {"value": 4}},
+        }
+
+        authenticated_client.post("/mcp", json=body)
+        response = authenticated_client.post("/mcp", json=body)
+
+        execution = response.json()["result"]["_meta"]["execution"]
+        assert execution["cache_hit"] is True
+
+    def test_rejects_non_positive_ttl(self, authenticated_client):
+        """cache_ttl_seconds must be positive."""
+        response = authenticated_client.post(
+            "/servers/register",
+            json={
+                "server_id": "cache-srv",
+                "server_name": "CacheSrv",
+                "tools": [{"name": "echo", "cache_ttl_seconds": 0}],
+            },
+        )
+
+        assert response.status_code == 422
+
+    def test_execution_stats(self, authenticated_client):
+        """/execution-stats includes result cache counters."""
+        response = authenticated_client.get("/execution-stats")
+
+        stats = response.json()["result_cache"]
+        assert {"size", "bytes", "hits", "misses"} <= stats.keys()
@@ -0,0 +1,178 @@
+"""Tests for single-pass, size-bounded result encoding."""
+
+import json
+
+import httpx
+import pytest
+
+from app.executor import (
+    ExecutionResult,
+    PythonExecutor,
+    SecretRedactor,
+    encode_result,
+)
+
+SECRET = "sk-live-0123456789abcdef"
+
+
+class TestEncodeResult:
+    """Tests for encode_result()."""
+
+    @pytest.mark.parametrize(
+        "value",
+        [
+            None,
+            0,
+            1.5,
+            True,
+            "text with \"quotes\" and ünïcode",
+            [],
+            {},
+            [1, "two", 3.0, None, False],
+            (1, 2, 3),
+            {"rows": [{"id": i, "name": f"row {i}"} for i in range(50)]},
+            {"nested": {"deep": {"deeper": [[1, 2], {"k": "v"}]}}},
+            {1: "int key", None: "none key"},
+            [{"mixed": [1, {"a": (2, 3)}]}, "tail"],
+        ],
+    )
+    def test_matches_json_dumps(self, value):
+        """Output is byte-identical to json.dumps() for values under the limit."""
+        returned, encoded = encode_result(value)
+
+        assert returned is value
+        assert encoded == json.dumps(value).encode()
+
+    def test_long_string_truncated(self):
+        """Strings over the limit are cut to the limit plus a notice."""
+        value, encoded = encode_result("x" * 5000, max_size=1024)
+
+        assert value.startswith("x" * 1024)
+        assert "RESULT TRUNCATED - exceeded 1KB limit" in value
+        assert json.loads(encoded) == value
+
+    def test_oversized_structure_truncated_like_to_dict(self):
+        """Oversized values become the first max_size chars of their JSON text."""
+        rows = [{"id": i, "payload": "y" * 100} for i in range(200)]
+
+        value, encoded = encode_result({"rows": rows}, max_size=2048)
+
+        assert value.startswith(json.dumps({"rows": rows})[:2048])
+        assert "RESULT TRUNCATED" in value
+        assert json.loads(encoded) == value
+
+    def test_stops_encoding_at_limit(self):
+        """Elements after the limit is crossed are never encoded."""
+        value = ["z" * 100] * 50 + [object()]
+
+        truncated, _ = encode_result(value, max_size=1024)
+
+        assert "RESULT TRUNCATED" in truncated
+
+    def test_unserializable_raises(self):
+        """Values json.dumps() rejects still raise TypeError."""
+        with pytest.raises(TypeError):
+            encode_result({"obj": object()})
+
+    def test_circular_reference_raises(self):
+        """Self-referencing containers raise ValueError instead of recursing."""
+        value: list = []
+        value.append(value)
+
+        with pytest.raises(ValueError):
+            encode_result(value)
+
+    def test_redacts_before_encoding(self):
+        """Secrets are redacted from the value and its encoding."""
+        redactor = SecretRedactor({"KEY": SECRET})
+
+        value, encoded = encode_result({"token": SECRET}, redactor=redactor)
+
+        assert value == {"token": "[REDACTED]"}
+        assert SECRET.encode() not in encoded
+
+    def test_redacts_secret_cut_by_limit(self):
+        """A secret straddling the limit leaves no prefix in the truncated text."""
+        redactor = SecretRedactor({"KEY": SECRET})
+        value = ["a" * 1010, SECRET, "b" * 2000]
+
+        truncated, encoded = encode_result(value, max_size=1024, redactor=redactor)
+
+        assert "RESULT TRUNCATED" in truncated
+        assert SECRET[:6] not in truncated
+        assert SECRET[:6].encode() not in encoded
+
+
+class TestExecutionResultEncoding:
+    """Tests for pre-encoded results on ExecutionResult."""
+
+    async def test_execute_carries_encoded_result(self):
+        """execute() attaches the result's JSON bytes."""
+        code = "async def main():\n    return {'items': [1, 2, 3]}\n"
+
+        async with httpx.AsyncClient() as client:
+            result = await PythonExecutor().execute(
+                python_code=code, arguments={}, http_client=client
+            )
+
+        assert result.success is True
+        assert result.result_json == b'{"items": [1, 2, 3]}'
+        assert result.to_dict(include_json=True)["result_json"] == result.result_json
+        assert "result_json" not in result.to_dict()
+
+    async def test_unserializable_result_encoded_as_string(self):
+        """Non-JSON results are reported and encoded as their str()."""
+        code = "async def main():\n    return {1, 2}\n"
+
+        async with httpx.AsyncClient() as client:
+            result = await PythonExecutor().execute(
+                python_code=code, arguments={}, http_client=client
+            )
+
+        assert result.result == "{1, 2}"
+        assert result.result_json == b'"{1, 2}"'
+
+    def test_to_dict_trusts_encoded_result(self):
+        """to_dict() doesn't re-check results that were already encoded."""
+        value, encoded = encode_result(["x" * 10])
+        result = ExecutionResult(success=True, result=value, result_json=encoded)
+
+        assert result.to_dict()["result"] == ["x" * 10]
+
+
+class TestToolCallResponse:
+    """Tests for pre-encoded results in /tools/{name}/call responses."""
+
+    def test_call_returns_encoded_result(self, authenticated_client):
+        """The tool result arrives intact alongside the other fields."""
+        authenticated_client.post(
+            "/servers/register",
+            json={
+                "server_id": "enc-srv",
+                "server_name": "EncSrv",
+                "tools": [
+                    {
+                        "name": "rows",
+                        "description": "Returns rows",
+                        "parameters": {},
+                        "python_code": (
+                            "async def main():\n"
+                            "    print('done')\n"
+                            "    return {'rows': [{'id': i} for i in range(3)]}\n"
+                        ),
+                    }
+                ],
+            },
+        )
+
+        response = authenticated_client.post(
+            "/tools/EncSrv__rows/call", json={"arguments": {}}
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/json"
+        data = response.json()
+        assert data["success"] is True
+        assert data["result"] == {"rows": [{"id": 0}, {"id": 1}, {"id": 2}]}
+        assert data["stdout"] == "done\n"
+        assert data["error"] is None
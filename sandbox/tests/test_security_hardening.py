@@ -7,13 +7,16 @@ Tests for:
 4. Allowed hosts stored and passed through registry
 """
 
+import json
+import random
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
 import pytest
 
-from app.executor import _redact_secrets
+from app.executor import SecretRedactor, _redact_secrets
 from app.ssrf import SSRFError, SSRFProtectedAsyncHttpClient
+from benchmarks.bench_secret_redaction import legacy_pattern
 
 
 # =============================================================================
@@ -35,7 +38,7 @@ class TestNetworkAllowlist:
             mock_client, allowed_hosts=allowed_hosts, proxy_mode=False
         )
 
-    @patch("app.ssrf.validate_url_with_pinning")
+    @patch("app.ssrf.validate_url_with_pinning_async")
     @pytest.mark.asyncio
     async def test_no_allowlist_allows_any_public_host(self, mock_validate):
         """When allowed_hosts is None, any public host is permitted."""
@@ -591,6 +594,149 @@ class TestSecretRedaction:
         assert '"data": "safe"' in result
 
 
+class TestSecretRedactor:
+    """Tests for SecretRedactor (compiled once per server's secrets)."""
+
+    SECRETS = {"TOKEN": "sk-abcdefghijklmnop", "PASSWORD": "hunter2-hunter2"}
+
+    def test_overlapping_secrets_longest_wins(self):
+        """A secret containing another secret is redacted as a whole."""
+        redactor = SecretRedactor({"SHORT": "abcdefgh", "LONG": "abcdefgh-ijkl"})
+
+        assert redactor.redact_text("x abcdefgh-ijkl y") == "x [REDACTED] y"
+        assert redactor.redact_text("x abcdefgh y") == "x [REDACTED] y"
+
+    def test_long_text(self):
+        """Texts past the substring prefilter length are still redacted."""
+        redactor = SecretRedactor(self.SECRETS)
+        text = "a" * 10000 + "sk-abcdefghijklmnop" + "b" * 10000
+
+        assert redactor.redact_text(text) == "a" * 10000 + "[REDACTED]" + "b" * 10000
+        assert redactor.redact_text("a" * 10000) == "a" * 10000
+
+    def test_structured_result_copied(self):
+        """Nested dicts and lists are redacted into new containers."""
+        redactor = SecretRedactor(self.SECRETS)
+        inner = ["ok", "pw=hunter2-hunter2"]
+        result = {"auth": "Bearer sk-abcdefghijklmnop", "items": inner, "n": 3}
+
+        redacted = redactor.redact_value(result)
+
+        assert redacted == {
+            "auth": "Bearer [REDACTED]",
+            "items": ["ok", "pw=[REDACTED]"],
+            "n": 3,
+        }
+        # The tool's objects are left alone
+        assert result["auth"] == "Bearer sk-abcdefghijklmnop"
+        assert inner == ["ok", "pw=hunter2-hunter2"]
+
+    def test_matches_legacy_alternation(self):
+        """The prefix-tree pattern redacts exactly like the flat alternation."""
+        rng = random.Random(0)
+        for _ in range(500):
+            values = [
+                "".join(rng.choice("abc-") for _ in range(rng.randint(8, 12)))
+                for _ in range(rng.randint(1, 8))
+            ]
+            text = "".join(rng.choice("abc-x") for _ in range(rng.randint(0, 80)))
+            redactor = SecretRedactor(dict(enumerate(values)))
+
+            assert redactor.redact_text(text) == legacy_pattern(values).sub(
+                "[REDACTED]", text
+            ), (values, text)
+
+    def test_falls_back_to_alternation(self, monkeypatch):
+        """Secrets nested too deeply for the tree pattern are still redacted."""
+
+        def too_deep(values):
+            raise RecursionError
+
+        monkeypatch.setattr("app.executor._secret_trie_pattern", too_deep)
+        redactor = SecretRedactor(self.SECRETS)
+
+        assert redactor.redact_text("pw=hunter2-hunter2!") == "pw=[REDACTED]!"
+
+    def test_top_level_list_and_keys(self):
+        """Lists and dict keys are covered, and key order is kept."""
+        redactor = SecretRedactor(self.SECRETS)
+
+        redacted = redactor.redact_value(
+            [{"first": 1, "sk-abcdefghijklmnop": 2, "last": 3}, ("hunter2-hunter2",)]
+        )
+
+        assert redacted == [
+            {"first": 1, "[REDACTED]": 2, "last": 3},
+            ("[REDACTED]",),
+        ]
+        assert list(redacted[0]) == ["first", "[REDACTED]", "last"]
+
+    def test_numeric_secret(self):
+        """A number whose digits are a secret is replaced by the redacted text."""
+        redactor = SecretRedactor({"PIN": "12345678"})
+
+        assert redactor.redact_value({"pin": 12345678, "ok": 42}) == {
+            "pin": "[REDACTED]",
+            "ok": 42,
+        }
+
+    def test_encoded_prefilter(self):
+        """Clean encoded results skip the walk; escaped secrets are still found."""
+        redactor = SecretRedactor({"TOKEN": 'pa"ss\\wörd-123'})
+        clean = {"a": ["nothing here"]}
+        dirty = {"a": ['pa"ss\\wörd-123']}
+
+        assert redactor.redact_value(clean, json.dumps(clean)) is clean
+        assert redactor.redact_value(dirty, json.dumps(dirty)) == {
+            "a": ["[REDACTED]"]
+        }
+
+    def test_no_secrets_is_noop(self):
+        redactor = SecretRedactor({"FLAG": "yes"})
+        value = {"a": ["yes"]}
+
+        assert not redactor
+        assert redactor.redact_value(value) is value
+        assert redactor.redact_text("yes") == "yes"
+
+    def test_registry_builds_redactor(self, tool_registry):
+        """register_server and update_secrets compile the server's redactor."""
+        tool_registry.register_server(
+            server_id="redact-srv",
+            server_name="RedactSrv",
+            tools=[],
+            secrets={"TOKEN": "sk-abcdefghijklmnop"},
+        )
+        server = tool_registry.servers["redact-srv"]
+        assert server.redactor.redact_text("sk-abcdefghijklmnop") == "[REDACTED]"
+
+        tool_registry.update_secrets("redact-srv", {"TOKEN": "sk-zyxwvutsrqponm"})
+
+        assert server.redactor.redact_text("sk-abcdefghijklmnop") == "sk-abcdefghijklmnop"
+        assert server.redactor.redact_text("sk-zyxwvutsrqponm") == "[REDACTED]"
+
+    @pytest.mark.asyncio
+    async def test_tool_list_result_redacted(self, tool_registry):
+        """List results are redacted too (previously only str and dict were)."""
+        tool_registry.register_server(
+            server_id="redact-list-srv",
+            server_name="RedactListSrv",
+            tools=[
+                {
+                    "name": "leak",
+                    "python_code": "async def main():\n"
+                    "    return [secrets['TOKEN'], {'k': secrets['TOKEN']}]\n",
+                }
+            ],
+            secrets={"TOKEN": "sk-abcdefghijklmnop"},
+        )
+
+        result = await tool_registry.execute_tool("RedactListSrv__leak", {})
+
+        assert result["success"] is True
+        assert result["result"] == ["[REDACTED]", {"k": "[REDACTED]"}]
+
+
 # =============================================================================
 # Passthrough SSRF Validation Tests
 # =============================================================================
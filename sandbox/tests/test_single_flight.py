@@ -0,0 +1,233 @@
+"""Tests for single-flight coalescing of identical concurrent tool calls."""
+
+import asyncio
+
+import pytest
+
+from app.registry import ToolRegistry
+from app.result_cache import ResultCache
+from app.single_flight import SingleFlight
+
+ECHO_CODE = "async def main(value: int = 0):\n    return {'value': value}\n"
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight."""
+
+    async def test_concurrent_calls_share_execution(self):
+        """Calls with the same key made while one runs share its result."""
+        group = SingleFlight()
+        runs = 0
+
+        async def execute():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return {"success": True, "result": runs}
+
+        results = await asyncio.gather(*(group.run("k", execute) for _ in range(5)))
+
+        assert runs == 1
+        assert [coalesced for _, coalesced in results] == [False] + [True] * 4
+        assert all(result == {"success": True, "result": 1} for result, _ in results)
+        assert results[0][0] is not results[1][0]
+        assert group.stats() == {
+            "in_flight": 0,
+            "calls": 5,
+            "executions": 1,
+            "coalesced": 4,
+            "abandoned": 0,
+        }
+
+    async def test_sequential_calls_run_again(self):
+        """A call made after the previous one finished runs on its own."""
+        group = SingleFlight()
+        runs = 0
+
+        async def execute():
+            nonlocal runs
+            runs += 1
+            return {"success": True}
+
+        await group.run("k", execute)
+        _, coalesced = await group.run("k", execute)
+
+        assert runs == 2
+        assert coalesced is False
+
+    async def test_different_keys_not_coalesced(self):
+        """Only calls with the same key are coalesced."""
+        group = SingleFlight()
+
+        async def execute():
+            await asyncio.sleep(0.01)
+            return {"success": True}
+
+        results = await asyncio.gather(group.run("a", execute), group.run("b", execute))
+
+        assert [coalesced for _, coalesced in results] == [False, False]
+        assert group.stats()["executions"] == 2
+
+    async def test_exception_reaches_every_caller(self):
+        """A failing execution fails all the calls that joined it."""
+        group = SingleFlight()
+
+        async def execute():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(
+            group.run("k", execute), group.run("k", execute), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert group.in_flight == 0
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """The first caller going away leaves the execution running for the rest."""
+        group = SingleFlight()
+
+        async def execute():
+            await asyncio.sleep(0.05)
+            return {"success": True}
+
+        first = asyncio.ensure_future(group.run("k", execute))
+        second = asyncio.ensure_future(group.run("k", execute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        result, coalesced = await second
+
+        assert result == {"success": True}
+        assert coalesced is True
+        assert group.stats()["abandoned"] == 0
+
+    async def test_execution_cancelled_when_all_callers_leave(self):
+        """Nobody waiting any more cancels the shared execution."""
+        group = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def execute():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return {"success": True}
+
+        caller = asyncio.ensure_future(group.run("k", execute))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        assert group.stats()["abandoned"] == 1
+        assert group.in_flight == 0
+
+
+class TestRegistryCoalescing:
+    """Tests for coalescing in ToolRegistry."""
+
+    @pytest.fixture
+    def registry(self, monkeypatch):
+        monkeypatch.setattr("app.registry.single_flight", SingleFlight())
+        monkeypatch.setattr("app.registry.result_cache", ResultCache())
+        return ToolRegistry()
+
+    def _register(self, registry, **tool):
+        registry.register_server(
+            server_id="srv",
+            server_name="Srv",
+            tools=[
+                {
+                    "name": "echo",
+                    "description": "",
+                    "parameters": {},
+                    "python_code": ECHO_CODE,
+                    **tool,
+                }
+            ],
+        )
+
+    @pytest.fixture
+    def runs(self, registry, monkeypatch):
+        """Count executions that actually ran the tool (slowed down to overlap)."""
+        runs = []
+        run_tool = registry._execute_uncached_tool
+
+        async def counting(tool, arguments, *args):
+            runs.append(arguments)
+            await asyncio.sleep(0.02)
+            return await run_tool(tool, arguments, *args)
+
+        monkeypatch.setattr(registry, "_execute_uncached_tool", counting)
+        return runs
+
+    async def _call_concurrently(self, registry, calls):
+        return await asyncio.gather(
+            *(registry.execute_tool("Srv__echo", *call) for call in calls)
+        )
+
+    async def test_identical_calls_coalesced(self, registry, runs):
+        """Concurrent identical calls to a coalescing tool run once."""
+        self._register(registry, coalesce=True)
+
+        results = await self._call_concurrently(registry, [({"value": 1},)] * 3)
+
+        assert len(runs) == 1
+        assert [r.get("coalesced", False) for r in results] == [False, True, True]
+        assert all(r["result"] == {"value": 1} for r in results)
+
+    async def test_different_arguments_not_coalesced(self, registry, runs):
+        """Calls with different arguments run separately."""
+        self._register(registry, coalesce=True)
+
+        await self._call_concurrently(registry, [({"value": 1},), ({"value": 2},)])
+
+        assert len(runs) == 2
+
+    async def test_not_coalesced_without_opt_in(self, registry, runs):
+        """Tools that didn't opt in run every call."""
+        self._register(registry)
+
+        results = await self._call_concurrently(registry, [({"value": 1},)] * 3)
+
+        assert len(runs) == 3
+        assert not any("coalesced" in r for r in results)
+
+    async def test_cacheable_implies_coalescing(self, registry, runs):
+        """Concurrent misses of a cacheable tool run once and fill the cache."""
+        self._register(registry, cacheable=True)
+
+        results = await self._call_concurrently(registry, [({"value": 1},)] * 2)
+        later = await registry.execute_tool("Srv__echo", {"value": 1})
+
+        assert len(runs) == 1
+        assert [r["cache_hit"] for r in results] == [False, False]
+        assert results[1]["coalesced"] is True
+        assert later["cache_hit"] is True
+
+    async def test_debug_calls_not_coalesced(self, registry, runs):
+        """Debug calls always run on their own."""
+        self._register(registry, coalesce=True)
+
+        await self._call_concurrently(registry, [({"value": 1}, True)] * 2)
+
+        assert len(runs) == 2
+
+
+class TestCoalescingStats:
+    """Tests for coalescing counters in /execution-stats."""
+
+    def test_execution_stats(self, authenticated_client, monkeypatch):
+        """/execution-stats includes the coalescing counters."""
+        group = SingleFlight()
+        monkeypatch.setattr("app.routes.single_flight", group)
+        group.calls = 3
+        group.coalesced = 2
+
+        response = authenticated_client.get("/execution-stats")
+
+        stats = response.json()["coalescing"]
+        assert stats["calls"] == 3
+        assert stats["coalesced"] == 2
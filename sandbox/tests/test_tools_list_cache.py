@@ -0,0 +1,147 @@
+"""Tests for the generation-stamped, pre-serialized tools list."""
+
+import json
+
+import pytest
+
+from app.registry import ToolRegistry, tool_registry
+
+CODE = "async def main():\n    return 1\n"
+
+
+@pytest.fixture
+def registry():
+    registry = ToolRegistry()
+    registry.register_server("s1", "S1", [{"name": "a", "python_code": CODE}])
+    return registry
+
+
+class TestGeneration:
+    """Tests for the registry generation."""
+
+    def test_every_change_bumps_generation(self, registry):
+        """Registration, updates and unregistration each start a generation."""
+        generations = [registry.generation]
+
+        registry.register_server("s2", "S2", [])
+        generations.append(registry.generation)
+        registry.update_server("s2", 1, tools=[{"name": "b", "python_code": CODE}])
+        generations.append(registry.generation)
+        registry.update_secrets("s2", {"KEY": "value"})
+        generations.append(registry.generation)
+        registry.unregister_server("s2")
+        generations.append(registry.generation)
+
+        assert generations == sorted(set(generations))
+
+    def test_lookups_keep_generation(self, registry):
+        generation = registry.generation
+
+        registry.list_tools()
+        registry.get_tool("S1__a")
+        registry.unregister_server("missing")
+
+        assert registry.generation == generation
+
+    def test_tag_differs_between_registries(self):
+        """A restarted sandbox doesn't reuse a previous process's tags."""
+        assert ToolRegistry().generation_tag != ToolRegistry().generation_tag
+
+    async def test_clear_all_bumps_generation(self, registry):
+        generation = registry.generation
+
+        await registry.clear_all()
+
+        assert registry.generation > generation
+
+
+class TestSerializedList:
+    """Tests for the tools list serialized once per generation."""
+
+    def test_matches_list_tools(self, registry):
+        tools_json, total = registry.list_tools_json()
+
+        assert json.loads(tools_json) == registry.list_tools()
+        assert total == 1
+
+    def test_reused_within_generation(self, registry):
+        assert registry.list_tools_json()[0] is registry.list_tools_json()[0]
+
+    def test_rebuilt_after_change(self, registry):
+        before, _ = registry.list_tools_json()
+
+        registry.update_server("s1", 1, remove_tools=["a"])
+
+        assert registry.list_tools_json() == (b"[]", 0)
+        assert before != b"[]"
+
+
+class TestConditionalFetch:
+    """Tests for conditional /tools and /mcp tools/list requests."""
+
+    @pytest.fixture(autouse=True)
+    def registered(self):
+        tool_registry.register_server(
+            "list-server", "listed", [{"name": "a", "python_code": CODE}]
+        )
+        yield
+        tool_registry.unregister_server("list-server")
+
+    def test_tools_etag(self, authenticated_client):
+        """An unchanged list is answered with 304 and no body."""
+        first = authenticated_client.get("/tools")
+        etag = first.headers["etag"]
+
+        second = authenticated_client.get("/tools", headers={"If-None-Match": etag})
+
+        assert first.status_code == 200
+        assert "listed__a" in [t["name"] for t in first.json()["tools"]]
+        assert first.json()["total"] == len(first.json()["tools"])
+        assert second.status_code == 304
+        assert second.content == b""
+
+    def test_tools_etag_after_change(self, authenticated_client):
+        etag = authenticated_client.get("/tools").headers["etag"]
+        tool_registry.update_server(
+            "list-server", 1, tools=[{"name": "b", "python_code": CODE}]
+        )
+
+        response = authenticated_client.get("/tools", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert "listed__b" in [t["name"] for t in response.json()["tools"]]
+
+    def test_filtered_tools_etag(self, authenticated_client):
+        response = authenticated_client.get("/tools?server_id=list-server")
+
+        assert response.json()["tools"][0]["name"] == "listed__a"
+        assert response.headers["etag"] == f'"{tool_registry.generation_tag}"'
+
+    def test_mcp_tools_list_generation(self, authenticated_client):
+        """tools/list results carry the generation; passing it back skips the list."""
+        request = {"jsonrpc": "2.0", "id": 7, "method": "tools/list", "params": {}}
+        first = authenticated_client.post("/mcp", json=request).json()
+
+        generation = first["result"]["generation"]
+        second = authenticated_client.post(
+            "/mcp", json={**request, "params": {"generation": generation}}
+        ).json()
+
+        assert first["id"] == 7
+        assert "listed__a" in [t["name"] for t in first["result"]["tools"]]
+        assert second["result"] == {"generation": generation, "unchanged": True}
+
+    def test_mcp_tools_list_stale_generation(self, authenticated_client):
+        response = authenticated_client.post(
+            "/mcp",
+            json={
+                "jsonrpc": "2.0",
+                "id": "list",
+                "method": "tools/list",
+                "params": {"generation": "old"},
+            },
+        ).json()
+
+        assert response["id"] == "list"
+        assert "tools" in response["result"]
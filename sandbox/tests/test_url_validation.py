@@ -1,15 +1,29 @@
 """Unit tests for URL validation (SSRF prevention)."""
 
+import ipaddress
 from unittest.mock import patch
 
 import pytest
 
 from app.ssrf import (
+    _ALWAYS_BLOCKED_INDEX,
+    _ALWAYS_BLOCKED_NETWORKS,
+    _BLOCKED_INDEX,
+    BLOCKED_IP_RANGES,
     SSRFError,
+    _IPRangeIndex,
     _is_always_blocked_ip,
+    _is_private_ip,
     _validate_hostname_only,
     validate_url_with_pinning,
 )
+from benchmarks.bench_ip_blocklist import (
+    CASES,
+    boundary_addresses,
+    legacy_is_always_blocked_ip,
+    legacy_is_private_ip,
+    random_addresses,
+)
 
 
 # Mock socket.getaddrinfo to avoid actual DNS resolution in tests
@@ -474,3 +488,70 @@ class TestAdminApprovedIntegration:
                 validate_url_with_pinning(
                     "http://evil.example.com/api", admin_approved=True
                 )
+
+
+class TestBlocklistIndexParity:
+    """The interval index gives the same answers as checking each network."""
+
+    ODD_INPUTS = [
+        "fe80::1%eth0",
+        "::ffff:127.0.0.1",
+        "::127.0.0.1",
+        "0:0:0:0:0:ffff:a00:1",
+        "FE80::ABCD",
+        "010.0.0.1",
+        "1.2.3",
+        "256.1.1.1",
+        "",
+        "not-an-ip",
+        "::",
+        "255.255.255.255",
+        "ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff",
+    ]
+
+    def _addresses(self):
+        return (
+            boundary_addresses()
+            + random_addresses(2000)
+            + [ip for ips in CASES.values() for ip in ips]
+            + self.ODD_INPUTS
+        )
+
+    def test_is_private_ip_parity(self):
+        """_is_private_ip matches the per-network reference implementation."""
+        for ip in self._addresses():
+            assert _is_private_ip(ip) == legacy_is_private_ip(ip), ip
+
+    def test_is_always_blocked_ip_parity(self):
+        """_is_always_blocked_ip matches the per-network reference implementation."""
+        for ip in self._addresses():
+            assert _is_always_blocked_ip(ip) == legacy_is_always_blocked_ip(ip), ip
+
+    def test_index_matches_network_membership(self):
+        """``ip in index`` is ``any(ip in network)``, across IP versions too."""
+        cases = [
+            (_BLOCKED_INDEX, BLOCKED_IP_RANGES),
+            (_ALWAYS_BLOCKED_INDEX, _ALWAYS_BLOCKED_NETWORKS),
+        ]
+        for ip_str in boundary_addresses() + random_addresses(500):
+            ip = ipaddress.ip_address(ip_str)
+            for index, networks in cases:
+                assert (ip in index) == any(ip in n for n in networks), ip_str
+
+    def test_overlapping_and_adjacent_networks_merged(self):
+        """Overlapping and adjacent networks behave as their union."""
+        index = _IPRangeIndex(
+            [
+                ipaddress.ip_network("10.0.0.0/24"),
+                ipaddress.ip_network("10.0.0.128/25"),
+                ipaddress.ip_network("10.0.1.0/24"),
+                ipaddress.ip_network("10.0.3.0/24"),
+            ]
+        )
+
+        assert ipaddress.ip_address("10.0.1.255") in index
+        assert ipaddress.ip_address("10.0.2.0") not in index
+        assert ipaddress.ip_address("10.0.3.7") in index
+        assert ipaddress.ip_address("9.255.255.255") not in index
+        assert ipaddress.ip_address("::a00:1") not in index
+
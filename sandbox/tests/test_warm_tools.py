@@ -0,0 +1,251 @@
+"""Tests for warm tool execution (module body runs once per registration)."""
+
+import httpx
+import pytest
+
+from app.executor import PythonExecutor, WarmSlot
+
+
+async def _run(executor, code, slot, arguments=None, secrets=None):
+    async with httpx.AsyncClient() as client:
+        return await executor.execute(
+            python_code=code,
+            arguments=arguments or {},
+            http_client=client,
+            secrets=secrets,
+            warm_slot=slot,
+        )
+
+
+class TestWarmExecution:
+    """Tests for PythonExecutor warm mode."""
+
+    @pytest.mark.asyncio
+    async def test_module_body_runs_once(self):
+        """Module-level code only runs on the first warm call."""
+        code = (
+            "print('module init')\n"
+            "async def main():\n"
+            "    return 'ok'\n"
+        )
+        executor = PythonExecutor()
+        slot = WarmSlot()
+
+        first = await _run(executor, code, slot)
+        second = await _run(executor, code, slot)
+
+        assert first.success and second.success
+        assert "module init" in first.stdout
+        assert "module init" not in second.stdout
+        assert slot.template is not None
+
+    @pytest.mark.asyncio
+    async def test_cold_mode_runs_module_body_every_call(self):
+        """Without a warm slot, module-level code runs on every call."""
+        code = "print('module init')\nasync def main():\n    return 1\n"
+        executor = PythonExecutor()
+
+        first = await _run(executor, code, None)
+        second = await _run(executor, code, None)
+
+        assert "module init" in first.stdout
+        assert "module init" in second.stdout
+
+    @pytest.mark.asyncio
+    async def test_global_rebinding_isolated_per_call(self):
+        """`global` assignments in main() don't leak into later calls."""
+        code = (
+            "counter = 0\n"
+            "async def main():\n"
+            "    global counter\n"
+            "    counter += 1\n"
+            "    return counter\n"
+        )
+        executor = PythonExecutor()
+        slot = WarmSlot()
+
+        results = [(await _run(executor, code, slot)).result for _ in range(3)]
+
+        assert results == [1, 1, 1]
+
+    @pytest.mark.asyncio
+    async def test_secrets_are_per_call(self):
+        """Helpers and main() see the secrets of the current call."""
+        code = (
+            "def read():\n"
+            "    return secrets.get('K')\n"
+            "async def main():\n"
+            "    return read()\n"
+        )
+        executor = PythonExecutor()
+        slot = WarmSlot()
+
+        first = await _run(executor, code, slot, secrets={"K": "v1"})
+        second = await _run(executor, code, slot, secrets={"K": "v2"})
+
+        assert first.result == "v1"
+        assert second.result == "v2"
+
+    @pytest.mark.asyncio
+    async def test_print_is_per_call(self):
+        """print() inside main() goes to the current call's stdout only."""
+        code = "async def main(tag):\n    print('tag=' + tag)\n    return tag\n"
+        executor = PythonExecutor()
+        slot = WarmSlot()
+
+        first = await _run(executor, code, slot, arguments={"tag": "one"})
+        second = await _run(executor, code, slot, arguments={"tag": "two"})
+
+        assert first.stdout.strip() == "tag=one"
+        assert second.stdout.strip() == "tag=two"
+
+    @pytest.mark.asyncio
+    async def test_module_level_imports_preserved(self):
+        """Names bound at module level (e.g. from-imports) survive warm calls."""
+        code = (
+            "from datetime import datetime\n"
+            "LIMIT = 3\n"
+            "async def main():\n"
+            "    return [LIMIT, datetime(2024, 1, 2).day]\n"
+        )
+        executor = PythonExecutor()
+        slot = WarmSlot()
+
+        await _run(executor, code, slot)
+        result = await _run(executor, code, slot)
+
+        assert result.success is True
+        assert result.result == [3, 2]
+
+    @pytest.mark.asyncio
+    async def test_template_rebuilt_when_code_changes(self):
+        """A template built from different code is not reused."""
+        executor = PythonExecutor()
+        slot = WarmSlot()
+
+        await _run(executor, "async def main():\n    return 'a'\n", slot)
+        result = await _run(executor, "async def main():\n    return 'b'\n", slot)
+
+        assert result.result == "b"
+
+
+class TestWarmUnsupportedNamespaces:
+    """Tools whose functions can't all be re-bound per call run cold."""
+
+    async def _assert_cold(self, code):
+        executor = PythonExecutor()
+        slot = WarmSlot()
+
+        first = await _run(executor, code, slot, secrets={"K": "v1"})
+        second = await _run(executor, code, slot, secrets={"K": "v2"})
+
+        assert first.result == "v1"
+        assert second.result == "v2"
+        assert "module init" in second.stdout
+        assert slot.template is None
+        assert slot.unsupported_code_hash is not None
+
+    @pytest.mark.asyncio
+    async def test_partial(self):
+        await self._assert_cold(
+            "import functools\n"
+            "print('module init')\n"
+            "def get(key):\n"
+            "    return secrets.get(key)\n"
+            "token = functools.partial(get, 'K')\n"
+            "async def main():\n"
+            "    return token()\n"
+        )
+
+    @pytest.mark.asyncio
+    async def test_decorated_function(self):
+        """The wrapper is re-bound but the function it closes over is not."""
+        await self._assert_cold(
+            "print('module init')\n"
+            "def logged(func):\n"
+            "    def wrapper():\n"
+            "        return func()\n"
+            "    return wrapper\n"
+            "@logged\n"
+            "def token():\n"
+            "    return secrets.get('K')\n"
+            "async def main():\n"
+            "    return token()\n"
+        )
+
+    @pytest.mark.asyncio
+    async def test_function_in_container(self):
+        await self._assert_cold(
+            "print('module init')\n"
+            "def token():\n"
+            "    return secrets.get('K')\n"
+            "HANDLERS = {'token': token}\n"
+            "async def main():\n"
+            "    return HANDLERS['token']()\n"
+        )
+
+    @pytest.mark.asyncio
+    async def test_lambda_default(self):
+        await self._assert_cold(
+            "print('module init')\n"
+            "def token(get=lambda: secrets.get('K')):\n"
+            "    return get()\n"
+            "async def main():\n"
+            "    return token()\n"
+        )
+
+    @pytest.mark.asyncio
+    async def test_data_and_imports_stay_warm(self):
+        """Constants, containers of data and imported functions are fine."""
+        code = (
+            "import json\n"
+            "TABLE = {'a': [1, 2, (3, 'x')]}\n"
+            "dumps = json.dumps\n"
+            "async def main():\n"
+            "    return dumps(TABLE)\n"
+        )
+        executor = PythonExecutor()
+        slot = WarmSlot()
+
+        await _run(executor, code, slot)
+
+        assert slot.template is not None
+        assert slot.unsupported_code_hash is None
+
+
+class TestWarmRegistry:
+    """Tests for warm mode wiring in the registry."""
+
+    def test_warm_flag_creates_slot(self, tool_registry):
+        tool_registry.register_server(
+            server_id="warm-srv",
+            server_name="WarmSrv",
+            tools=[
+                {"name": "w", "python_code": "async def main(): return 1", "warm": True},
+                {"name": "c", "python_code": "async def main(): return 1"},
+            ],
+        )
+
+        assert tool_registry.get_tool("WarmSrv__w").warm_slot is not None
+        assert tool_registry.get_tool("WarmSrv__c").warm_slot is None
+
+    @pytest.mark.asyncio
+    async def test_update_secrets_resets_template(self, tool_registry):
+        tool_registry.register_server(
+            server_id="warm-sec-srv",
+            server_name="WarmSecSrv",
+            tools=[
+                {
+                    "name": "w",
+                    "python_code": "async def main(): return 1",
+                    "warm": True,
+                }
+            ],
+        )
+        await tool_registry.execute_tool("WarmSecSrv__w", {})
+        slot = tool_registry.get_tool("WarmSecSrv__w").warm_slot
+        assert slot.template is not None
+
+        tool_registry.update_secrets("warm-sec-srv", {"K": "new"})
+
+        assert slot.template is None